@@ -1,7 +1,7 @@
 from django.contrib import admin
 
 from bpp.models.szablondlaopisubibliograficznego import SzablonDlaOpisuBibliograficznego
-from bpp.util import rebuild_instances_of_models
+from bpp.tasks import przebuduj_opisy_bibliograficzne
 
 
 @admin.register(SzablonDlaOpisuBibliograficznego)
@@ -13,10 +13,15 @@ class SzablonDlaOpisuBibliograficznegoAdmin(admin.ModelAdmin):
         super(SzablonDlaOpisuBibliograficznegoAdmin, self).save_model(
             request, obj, form, change
         )
-        rebuild_instances_of_models(obj.get_models_for_this_szablon())
+        przebuduj_opisy_bibliograficzne.delay_on_commit(
+            [model._meta.label for model in obj.get_models_for_this_szablon()]
+        )
 
     def delete_model(self, request, obj: SzablonDlaOpisuBibliograficznego):
         super(SzablonDlaOpisuBibliograficznegoAdmin, self).delete_model(request, obj)
-        rebuild_instances_of_models(
-            SzablonDlaOpisuBibliograficznego.objects.all_templated_models
+        przebuduj_opisy_bibliograficzne.delay_on_commit(
+            [
+                model._meta.label
+                for model in SzablonDlaOpisuBibliograficznego.objects.all_templated_models
+            ]
         )
@@ -15,7 +15,7 @@ from django.template.response import TemplateResponse
 from django.urls import re_path as url
 from django.utils import timezone
 
-from bpp.util import rebuild_instances_of_models
+from bpp.tasks import przebuduj_opisy_bibliograficzne
 
 admin.site.unregister(Template)
 
@@ -87,7 +87,10 @@ class BppTemplateAdmin(TemplateAdmin):
             f"ostatnio zmodyfikowane w ciągu ostatnich {ILE_DNI} dni. Zmiany powinny być zauważalne "
             "po dłuższej chwili. Pozostałe rekordy zostaną przebudowane w godzinach nocnych. ",
         )
-        rebuild_instances_of_models(modele, ostatnio_zmieniony__gte=dni_temu)
+        przebuduj_opisy_bibliograficzne.delay_on_commit(
+            [model._meta.label for model in modele],
+            zmienione_od=dni_temu.isoformat(),
+        )
 
     def save_model(self, request, obj, form, change):
         pk = obj.pk
@@ -36,6 +36,7 @@ class BppConfig(AppConfig):
             )
 
         self._podepnij_inwalidacje_cache_publicznego()
+        self._podepnij_inwalidacje_szablonow_opisu()
 
         # Ensure BppUserAdmin takes precedence over microsoft_auth's UserAdmin
         self._register_bpp_user_admin()
@@ -59,6 +60,10 @@ class BppConfig(AppConfig):
         "Zrodlo",
         "Wydzial",
         "Uczelnia",
+        # Autorstwa — zmieniają stronę pracy, jej rok i listę autorów.
+        "Wydawnictwo_Ciagle_Autor",
+        "Wydawnictwo_Zwarte_Autor",
+        "Patent_Autor",
         # Słowniki — ich nazwy trafiają do opisów bibliograficznych, więc
         # zmiana nazwy zmienia treść publicznych stron. Bez nich obietnica
         # „zapis w adminie unieważnia natychmiast" byłaby dla tych modeli
@@ -89,15 +94,22 @@ class BppConfig(AppConfig):
     def _podepnij_inwalidacje_cache_publicznego(self):
         """Zapis w adminie ma NATYCHMIAST odświeżyć publiczne strony.
 
-        Bez tego jedyną gwarancją świeżości byłby TTL. Inwalidujemy
-        hurtowo (bump generacji), bo mapowanie „ten rekord → te URL-e"
-        jest w BPP nietrywialne, a nadmiarowa inwalidacja jest bezpieczna
+        Bez tego jedyną gwarancją świeżości byłby TTL. Modele z tagami
+        zarejestrowanymi w ``bpp.views.browse`` (``tagi_dla_modelu``)
+        unieważniają tylko strony, które mogą je pokazywać; pozostałe —
+        hurtowo (bump generacji). Nadmiarowa inwalidacja jest bezpieczna
         (najwyżej kosztuje jedno przeliczenie strony).
         """
         from django.apps import apps
-        from django.db.models.signals import post_delete, post_save
+        from django.db.models.signals import post_delete, post_save, pre_save
 
-        from bpp.views.cache_publiczny import uniewaznij_cache_publiczny
+        # Import rejestruje tagi modeli
+        import bpp.views.browse  # noqa: F401
+        from bpp.views.cache_publiczny import (
+            _TAGI_MODELI,
+            uniewaznij_cache_publiczny,
+            zapamietaj_stan_przed_zapisem,
+        )
 
         for nazwa in self.MODELE_INWALIDUJACE_CACHE_PUBLICZNY:
             model = apps.get_model("bpp", nazwa)
@@ -107,6 +119,32 @@ class BppConfig(AppConfig):
                     sender=model,
                     dispatch_uid=f"bpp.cache_publiczny.{nazwa}.{etykieta}",
                 )
+            if model in _TAGI_MODELI:
+                pre_save.connect(
+                    zapamietaj_stan_przed_zapisem,
+                    sender=model,
+                    dispatch_uid=f"bpp.cache_publiczny.{nazwa}.pre_save",
+                )
+
+    def _podepnij_inwalidacje_szablonow_opisu(self):
+        """Zmiana szablonu lub powiązania szablonu z typem rekordu unieważnia
+        szablony zapamiętane przez ``bpp.opis_bibliograficzny``."""
+        from django.apps import apps
+        from django.db.models.signals import post_delete, post_save
+
+        from bpp.opis_bibliograficzny import uniewaznij_szablony_opisu
+
+        modele = [apps.get_model("bpp", "SzablonDlaOpisuBibliograficznego")]
+        if apps.is_installed("dbtemplates"):
+            modele.append(apps.get_model("dbtemplates", "Template"))
+
+        for model in modele:
+            for etykieta, sygnal in (("save", post_save), ("delete", post_delete)):
+                sygnal.connect(
+                    uniewaznij_szablony_opisu,
+                    sender=model,
+                    dispatch_uid=f"bpp.opis_bibliograficzny.{model.__name__}.{etykieta}",
+                )
 
     def _register_bpp_user_admin(self):
         """Re-register BppUserAdmin to override any previous registrations."""
@@ -1,3 +1,7 @@
+from itertools import groupby, islice
+from operator import itemgetter
+
+import billiard
 from django.db.models import F
 
 from bpp.util import knapsack
@@ -38,23 +42,166 @@ def zbieraj_sloty(
         )
     ]  # name, size, value
 
-    id_wpisow_cpaq = [x[0] for x in res]
-    sloty = [x[1] for x in res]
-    punkty = [x[2] for x in res]
+    if zadany_slot is not None:
+        zadany_slot = int(zadany_slot * 10000)
+
+    return _zbieraj_sloty_z_wpisow(zadany_slot, res, akcja)
+
+
+def _zbieraj_sloty_z_wpisow(zadany_slot, wpisy, akcja=None):
+    """Część obliczeniowa ``zbieraj_sloty`` -- bez bazy danych.
+
+    :param zadany_slot: slot przeskalowany przez 10000 (``int``); może być
+        ``None`` dla ``akcja == "wszystko"``
+    :param wpisy: lista krotek ``(pk, slot * 10000, pkdaut * 10000)``
+
+    Funkcja jest modułowa (picklowalna), bo ``zbieraj_sloty_wsadowo`` wysyła
+    ją do puli procesów.
+    """
+    id_wpisow_cpaq = [x[0] for x in wpisy]
+    sloty = [x[1] for x in wpisy]
+    punkty = [x[2] for x in wpisy]
 
     if akcja == "wszystko":
         return sum(punkty) / 10000, id_wpisow_cpaq, sum(sloty) / 10000
 
-    maks, lista = knapsack(int(zadany_slot * 10000), sloty, punkty, id_wpisow_cpaq)
+    maks, lista = knapsack(zadany_slot, sloty, punkty, id_wpisow_cpaq)
 
-    sloty_ret = 0
-    for elem in lista:
-        index = id_wpisow_cpaq.index(elem)
-        sloty_ret += sloty[index]
+    slot_wpisu = dict(zip(id_wpisow_cpaq, sloty, strict=True))
+    sloty_ret = sum(slot_wpisu[elem] for elem in lista)
 
     return maks / 10000, lista, sloty_ret / 10000
 
 
+def _grupuj_wpisy_slotow(wiersze, minimalny_pk):
+    """Grupuje posortowany strumień wierszy po kluczu (autor, dyscyplina,
+    jednostka) i zwraca ``(klucz, wpisy)`` dla ``_zbieraj_sloty_z_wpisow``.
+
+    Wiersze poniżej ``minimalny_pk`` są odrzucane tutaj, a nie w SQL -- tak
+    jak w ``zbieraj_sloty`` kombinacja autor/dyscyplina bez żadnej pracy
+    powyżej progu ma dać wynik zerowy, a nie zniknąć z raportu.
+    """
+    for klucz, grupa in groupby(wiersze, key=itemgetter(0)):
+        yield (
+            klucz,
+            [
+                (pk, int(size), int(value))
+                for _klucz, pk, size, value, punkty_kbn in grupa
+                if minimalny_pk is None
+                or (punkty_kbn is not None and punkty_kbn >= minimalny_pk)
+            ],
+        )
+
+
+def _licz_sloty_porcjami(grupy, zadany_slot, akcja, procesy, rozmiar_porcji):
+    """Plecaki dla ``(klucz, wpisy)`` z ``grupy``, porcjami po
+    ``rozmiar_porcji`` -- w puli ``billiard``, gdy ``procesy > 1``."""
+    pula = None
+
+    try:
+        while porcja := list(islice(grupy, rozmiar_porcji)):
+            klucze = [k for k, _wpisy in porcja]
+            argumenty = [(zadany_slot, w, akcja) for _k, w in porcja]
+
+            # Pulę uruchamiamy dopiero przy pierwszej pełnej porcji -- dla
+            # małych raportów start procesów kosztowałby więcej niż plecaki.
+            if (
+                pula is None
+                and procesy > 1
+                and akcja != "wszystko"
+                and len(porcja) == rozmiar_porcji
+            ):
+                pula = billiard.get_context("spawn").Pool(procesy)
+
+            if pula is not None:
+                wyniki = pula.starmap(
+                    _zbieraj_sloty_z_wpisow,
+                    argumenty,
+                    chunksize=max(1, len(porcja) // (procesy * 4)),
+                )
+            else:
+                wyniki = (_zbieraj_sloty_z_wpisow(*a) for a in argumenty)
+            yield from zip(klucze, wyniki, strict=True)
+    except BaseException:
+        # Także GeneratorExit porzuconego generatora: nie czekamy na pulę.
+        if pula is not None:
+            pula.terminate()
+        raise
+    else:
+        if pula is not None:
+            pula.close()
+    finally:
+        if pula is not None:
+            pula.join()
+
+
+def zbieraj_sloty_wsadowo(
+    zadany_slot,
+    rok_min,
+    rok_max,
+    minimalny_pk=None,
+    uczelnia_id=None,
+    dziel_na_jednostki=True,
+    akcja=None,
+    procesy=1,
+    rozmiar_porcji=500,
+    chunk_size=5000,
+):
+    """Wsadowy odpowiednik ``zbieraj_sloty`` dla wszystkich autorów naraz.
+
+    Zamiast jednego zapytania na każdą kombinację (autor, dyscyplina[,
+    jednostka]) wykonywane jest jedno strumieniowane zapytanie posortowane po
+    autorze, grupowane w Pythonie; plecaki liczone są porcjami po
+    ``rozmiar_porcji`` kombinacji -- w puli procesów, gdy ``procesy > 1``.
+
+    Pula to ``billiard`` (fork ``multiprocessing`` z Celery), która -- w
+    przeciwieństwie do ``ProcessPoolExecutor`` -- startuje także z procesu
+    demonicznego, np. workera Celery w trybie prefork, w którym liczony jest
+    ``RaportSlotowUczelnia``.
+
+    :returns: generator krotek ``((autor_id, dyscyplina_id, jednostka_id),
+        (maks_punkty, lista, sloty))``; ``jednostka_id`` jest ``None``, gdy
+        ``dziel_na_jednostki`` jest ``False``. Wynik jest identyczny z
+        ``zbieraj_sloty`` wołanym dla każdej kombinacji osobno.
+    """
+    from bpp.models.cache import Cache_Punktacja_Autora_Query
+
+    rekordy = Cache_Punktacja_Autora_Query.objects.filter(
+        rekord__rok__gte=rok_min, rekord__rok__lte=rok_max
+    )
+    if uczelnia_id is not None:
+        rekordy = rekordy.filter(jednostka__uczelnia_id=uczelnia_id)
+
+    klucz = ["autor_id", "dyscyplina_id"]
+    if dziel_na_jednostki:
+        klucz.append("jednostka_id")
+
+    n = len(klucz)
+    wiersze = (
+        (w[:n] if dziel_na_jednostki else (*w[:n], None), *w[n:])
+        for w in rekordy.order_by(*klucz, "pk")
+        .values_list(
+            *klucz,
+            "pk",
+            F("slot") * 10000,
+            F("pkdaut") * 10000,
+            "rekord__punkty_kbn",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    if zadany_slot is not None:
+        zadany_slot = int(zadany_slot * 10000)
+
+    yield from _licz_sloty_porcjami(
+        _grupuj_wpisy_slotow(wiersze, minimalny_pk),
+        zadany_slot,
+        akcja,
+        procesy,
+        rozmiar_porcji,
+    )
+
+
 def group_emails(group_name):
     "Zwraca maile osób z danej grupy"
     from bpp.models.profile import BppUser
@@ -30,3 +30,8 @@ def wyczysc_cache_dbtemplate(name):
     for loader in Engine.get_default().template_loaders:
         if isinstance(loader, CachedLoader):
             loader.get_template_cache.pop(loader.cache_key(name), None)
+
+    # Skompilowane szablony opisu bibliograficznego trzymane w procesie.
+    from bpp.opis_bibliograficzny import uniewaznij_szablony_opisu
+
+    uniewaznij_szablony_opisu()
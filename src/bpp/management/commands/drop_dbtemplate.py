@@ -9,7 +9,7 @@ Dlaczego to nie jest zwykłe ``Template.objects.filter(...).delete()``:
    ``ProtectedError``.
 2. ``opis_bibliograficzny_cache`` to pole ``@denormalized``, które NIE zależy
    od dbtemplate. Samo usunięcie wiersza nie odświeży zapisanego stringa —
-   trzeba wymusić ``rebuild_instances_of_models`` (a trigger ``bpp_refresh_cache``
+   trzeba go przeliczyć (``przebuduj_opisy``; trigger ``bpp_refresh_cache``
    dociągnie kopię w ``Rekord``).
 """
 
@@ -21,7 +21,7 @@ from bpp.dbtemplates_sync import wyczysc_cache_dbtemplate
 from bpp.models.szablondlaopisubibliograficznego import (
     SzablonDlaOpisuBibliograficznego,
 )
-from bpp.util import rebuild_instances_of_models
+from bpp.opis_bibliograficzny import przebuduj_opisy
 
 
 class Command(BaseCommand):
@@ -92,12 +92,7 @@ class Command(BaseCommand):
             f"Przebudowa opis_bibliograficzny_cache dla {len(modele_do_przebudowy)} "
             "modeli (z dysku)…"
         )
-        # rebuild_instances_of_models tylko ZNACZY instancje jako dirty
-        # (DirtyInstance); realne przeliczenie robi denorm.flush(). Admin
-        # świadomie odkłada flush na noc, ale komenda deployowa ma odświeżyć
+        # Admin zleca przebudowę w tle, ale komenda deployowa ma odświeżyć
         # cache od ręki.
-        rebuild_instances_of_models(list(modele_do_przebudowy))
-        from denorm import denorms
-
-        denorms.flush()
-        self.stdout.write(self.style.SUCCESS("Gotowe."))
+        ile = przebuduj_opisy(list(modele_do_przebudowy))
+        self.stdout.write(self.style.SUCCESS(f"Gotowe ({ile} zmienionych opisów)."))
@@ -0,0 +1,107 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management import BaseCommand
+from django.db import connections
+
+from bpp.models import Patent, Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
+from bpp.models.sloty.wsadowo import przebuduj_zakres, rekordy_do_przeliczenia
+from bpp.util import no_threads
+
+MODELE = {
+    "ciagle": Wydawnictwo_Ciagle,
+    "zwarte": Wydawnictwo_Zwarte,
+    "patent": Patent,
+}
+
+
+def _zakresy(pks, rozmiar):
+    """Kolejne, domknięte zakresy ``(pk_min, pk_max)`` po ``rozmiar`` rekordów."""
+    for i in range(0, len(pks), rozmiar):
+        yield pks[i], pks[min(i + rozmiar, len(pks)) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Przelicza cache punktacji (Cache_Punktacja_Autora/_Dyscypliny) "
+        "wsadowo, zakresami (typ rekordu, id) w wielu procesach"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=sorted(MODELE),
+            action="append",
+            help="Typ rekordów (można podać kilka razy); domyślnie wszystkie",
+        )
+        parser.add_argument("--rok-min", type=int, default=None)
+        parser.add_argument("--rok-max", type=int, default=None)
+        parser.add_argument(
+            "--procesy",
+            type=int,
+            default=no_threads(),
+            help="Liczba procesów; 1 -- bez puli procesów",
+        )
+        parser.add_argument(
+            "--rozmiar-porcji",
+            type=int,
+            default=500,
+            help="Ile rekordów przeliczać w jednej transakcji",
+        )
+        parser.add_argument(
+            "--porcji-na-zadanie",
+            type=int,
+            default=4,
+            help="Ile porcji przypada na jeden zakres id wysyłany do procesu",
+        )
+
+    def handle(
+        self,
+        model,
+        rok_min,
+        rok_max,
+        procesy,
+        rozmiar_porcji,
+        porcji_na_zadanie,
+        *args,
+        **options,
+    ):
+        zadania = []
+        for nazwa in model or sorted(MODELE):
+            klasa = MODELE[nazwa]
+            pks = list(
+                rekordy_do_przeliczenia(klasa, rok_min, rok_max).values_list(
+                    "pk", flat=True
+                )
+            )
+            zadania.extend(
+                (klasa._meta.label, pk_min, pk_max, rok_min, rok_max, rozmiar_porcji)
+                for pk_min, pk_max in _zakresy(pks, rozmiar_porcji * porcji_na_zadanie)
+            )
+
+        if not zadania:
+            self.stdout.write("Brak rekordów do przeliczenia.")
+            return
+
+        if procesy <= 1:
+            wyniki = (przebuduj_zakres(*zadanie) for zadanie in zadania)
+            self._raportuj(wyniki, len(zadania))
+            return
+
+        # Procesy potomne otwierają własne połączenia z bazą
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=procesy,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            futures = [executor.submit(przebuduj_zakres, *z) for z in zadania]
+            self._raportuj((f.result() for f in as_completed(futures)), len(zadania))
+
+    def _raportuj(self, wyniki, ile_zadan):
+        razem = 0
+        for no, wynik in enumerate(wyniki, 1):
+            razem += wynik
+            self.stdout.write(f"{no}/{ile_zadan} zakresów, {razem} rekordów")
+        self.stdout.write(self.style.SUCCESS(f"Przeliczono {razem} rekordów."))
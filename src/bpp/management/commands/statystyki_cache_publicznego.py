@@ -0,0 +1,31 @@
+"""Liczniki publicznego cache'a stron (trafienia, chybienia, unieważnienia)
+na rodzaj tagu — do monitoringu, np. co minutę z ``--json`` do Zabbiksa.
+
+Liczniki rosną od ostatniego restartu Redisa; hit-rate liczy się z różnic.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from bpp.views.cache_publiczny import ZDARZENIA, statystyki_cache_publicznego
+
+
+class Command(BaseCommand):
+    help = "Liczniki trafień/chybień/unieważnień publicznego cache'a stron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Wynik jako JSON")
+
+    def handle(self, *args, **options):
+        statystyki = statystyki_cache_publicznego()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(statystyki))
+            return
+
+        self.stdout.write(f"{'rodzaj':<12}" + "".join(f"{z:>12}" for z in ZDARZENIA))
+        for rodzaj, liczniki in statystyki.items():
+            self.stdout.write(
+                f"{rodzaj:<12}" + "".join(f"{liczniki[z]:>12}" for z in ZDARZENIA)
+            )
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY nie może działać w bloku transakcji —
+    # patrz 0430_rekord_mat_slug_idx.
+    atomic = False
+
+    dependencies = [
+        ("bpp", "0472_constraint_autor_jednostka_bez_daty"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            # OAI-PMH ListRecords przewija rekordy kursorem keyset
+            # (ostatnio_zmieniony, id) malejąco — ten indeks pozwala
+            # zacząć każdą porcję od kursora zamiast od OFFSET n.
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+            "bpp_rekord_mat_ostatnio_zmieniony_id_idx "
+            "ON bpp_rekord_mat (ostatnio_zmieniony, id)",
+            "DROP INDEX CONCURRENTLY IF EXISTS "
+            "bpp_rekord_mat_ostatnio_zmieniony_id_idx",
+        ),
+    ]
@@ -0,0 +1,28 @@
+import denorm.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bpp", "0473_rekord_mat_oai_keyset_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="autor",
+            name="ile_prac_ciaglych",
+            field=denorm.fields.CountField("wydawnictwo_ciagle_autor_set", default=0),
+        ),
+        migrations.RunSQL(
+            # Stan początkowy; dalej licznik utrzymują triggery denorm.
+            """
+            UPDATE bpp_autor
+               SET ile_prac_ciaglych = t.ile
+              FROM (SELECT autor_id, COUNT(*) AS ile
+                      FROM bpp_wydawnictwo_ciagle_autor
+                     GROUP BY autor_id) t
+             WHERE bpp_autor.id = t.autor_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
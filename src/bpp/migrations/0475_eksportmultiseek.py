@@ -0,0 +1,84 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import long_running.notification_mixins
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("bpp", "0474_autor_ile_prac_ciaglych"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EksportMultiseek",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_on", models.DateTimeField(auto_now_add=True)),
+                ("last_updated_on", models.DateTimeField(auto_now=True)),
+                ("started_on", models.DateTimeField(blank=True, null=True)),
+                ("finished_on", models.DateTimeField(blank=True, null=True)),
+                ("finished_successfully", models.BooleanField(default=False)),
+                ("traceback", models.TextField(blank=True, null=True)),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("xlsx", "XLSX")], max_length=4
+                    ),
+                ),
+                (
+                    "wariant",
+                    models.CharField(
+                        choices=[("dane", "dane"), ("opis", "opis bibliograficzny")],
+                        default="dane",
+                        max_length=4,
+                    ),
+                ),
+                (
+                    "tytul",
+                    models.CharField(max_length=512, verbose_name="Tytuł raportu"),
+                ),
+                ("liczba_rekordow", models.PositiveIntegerField(default=0)),
+                ("zapytanie", models.BinaryField()),
+                ("adres_serwisu", models.URLField(max_length=512)),
+                (
+                    "pbn_api_root",
+                    models.CharField(blank=True, default="", max_length=512),
+                ),
+                (
+                    "plik",
+                    models.FileField(
+                        blank=True, null=True, upload_to="protected/multiseek/"
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "eksport wyników wyszukiwania",
+                "verbose_name_plural": "eksporty wyników wyszukiwania",
+                "ordering": ["-last_updated_on"],
+            },
+            bases=(
+                long_running.notification_mixins.NullNotificationMixin,
+                models.Model,
+            ),
+        ),
+    ]
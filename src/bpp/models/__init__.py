@@ -6,7 +6,7 @@ from .dyscyplina_naukowa import *  # noqa
 from .grant import *  # noqa
 from .kierunek_studiow import Kierunek_Studiow  # noqa
 from .konferencja import *  # noqa
-from .multiseek import BppMultiseekVisibility  # noqa
+from .multiseek import BppMultiseekVisibility, EksportMultiseek  # noqa
 from .openaccess import *  # noqa
 from .patent import *  # noqa
 from .praca_doktorska import *  # noqa
@@ -19,6 +19,7 @@ from .seria_wydawnicza import *  # noqa
 from .struktura import *  # noqa
 from .sumy_views import *  # noqa
 from .system import *  # noqa
+from .szablondlaopisubibliograficznego import SzablonDlaOpisuBibliograficznego  # noqa
 from .wydawnictwo_ciagle import *  # noqa
 from .wydawnictwo_zwarte import *  # noqa
 from .zrodlo import *  # noqa
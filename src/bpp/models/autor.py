@@ -8,11 +8,12 @@ import logging
 from datetime import date, timedelta
 
 from autoslug import AutoSlugField
+from denorm import CountField
 from django.contrib.postgres.search import SearchVectorField as VectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.db import IntegrityError, models, transaction
-from django.db.models import CASCADE, SET_NULL, Count, Q, Sum
+from django.db.models import CASCADE, SET_NULL, Count, F, Q, Sum
 from django.urls.base import reverse
 from django.utils import timezone
 from tinymce.models import HTMLField
@@ -22,6 +23,7 @@ from bpp.core import zbieraj_sloty
 from bpp.models import LinkDoPBNMixin, ModelZAdnotacjami, ModelZNazwa, NazwaISkrot
 from bpp.models.abstract import ModelZPBN_ID
 from bpp.util import FulltextSearchMixin, zaloguj_polkniety_wyjatek
+from bpp.util.orm import build_fulltext_search_query
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +143,23 @@ class AutorManager(FulltextSearchMixin, models.Manager.from_queryset(AutorQueryS
     def fulltext_annotate(self, search_query, normalization):
         return {self.fts_field + "__rank": Count("wydawnictwo_ciagle")}
 
+    def fulltext_podpowiedzi(self, qstr):
+        """Jak ``fulltext_filter``, ale do podpowiedzi (autocomplete): ranking
+        to zdenormalizowane ``ile_prac_ciaglych`` zamiast ``Count`` po
+        autorstwach, więc zapytanie nie robi JOIN/GROUP BY i wystarcza mu
+        indeks GIN na ``search``."""
+        search_query = build_fulltext_search_query(
+            qstr, self.fts_enable_websearch_on_minus_or_quote
+        )
+        if search_query is None:
+            return self.fulltext_empty()
+
+        return (
+            self.filter(**{self.fts_field: search_query})
+            .annotate(**{self.fts_field + "__rank": F("ile_prac_ciaglych")})
+            .order_by(f"-{self.fts_field}__rank", "sort")
+        )
+
 
 class Autor(LinkDoPBNMixin, ModelZAdnotacjami, ModelZPBN_ID):
     url_do_pbn = const.LINK_PBN_DO_AUTORA
@@ -268,6 +287,11 @@ class Autor(LinkDoPBNMixin, ModelZAdnotacjami, ModelZPBN_ID):
 
     search = VectorField()
 
+    # ile_prac_ciaglych to liczba autorstw w wydawnictwach ciągłych, utrzymywana
+    # triggerem; po niej sortują się podpowiedzi w wyszukiwaniu autorów
+
+    ile_prac_ciaglych = CountField("wydawnictwo_ciagle_autor_set")
+
     objects = AutorManager()
 
     slug = AutoSlugField(populate_from="get_full_name", unique=True, max_length=1024)
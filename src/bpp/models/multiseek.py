@@ -1,4 +1,13 @@
+import functools
+import pickle
+import tempfile
+from urllib.parse import urljoin
+
+from django.core.files import File
 from django.db import models
+from django.urls import reverse
+
+from long_running.models import Operation
 
 
 class BppMultiseekVisibility(models.Model):
@@ -26,3 +35,66 @@ class BppMultiseekVisibility(models.Model):
 
     def __str__(self):
         return f'Widoczność opcji wyszukiwania dla "{self.label}"'
+
+
+class EksportMultiseek(Operation):
+    """Eksport danych Multiseek (CSV / XLSX) wykonywany w tle.
+
+    Widok eksportu zleca go zamiast odpowiedzi wprost, gdy wynik przekracza
+    MULTISEEK_EXPORT_MAX_ROWS. Zapytanie zapamiętujemy jako zpicklowany
+    ``Query`` (udokumentowany w Django sposób odtworzenia querysetu), a dane
+    zależne od żądania HTTP (adres serwisu, korzeń PBN) — jako tekst.
+    """
+
+    FORMATY = [("csv", "CSV"), ("xlsx", "XLSX")]
+    WARIANTY = [("dane", "dane"), ("opis", "opis bibliograficzny")]
+
+    format = models.CharField(max_length=4, choices=FORMATY)
+    wariant = models.CharField(max_length=4, choices=WARIANTY, default="dane")
+    tytul = models.CharField("Tytuł raportu", max_length=512)
+    liczba_rekordow = models.PositiveIntegerField(default=0)
+
+    zapytanie = models.BinaryField(editable=False)
+    adres_serwisu = models.URLField(max_length=512)
+    pbn_api_root = models.CharField(max_length=512, blank=True, default="")
+
+    plik = models.FileField(upload_to="protected/multiseek/", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "eksport wyników wyszukiwania"
+        verbose_name_plural = "eksporty wyników wyszukiwania"
+        ordering = ["-last_updated_on"]
+
+    def __str__(self):
+        return f"Eksport {self.format} ({self.liczba_rekordow} rekordów)"
+
+    def get_absolute_url(self):
+        return reverse("multiseek-export-status", args=(self.pk,))
+
+    def nazwa_pliku(self):
+        from bpp.views.multiseek_export import _export_filename
+
+        return _export_filename(self.format, self.tytul)
+
+    def get_queryset(self):
+        query = pickle.loads(self.zapytanie)
+        queryset = query.model._default_manager.all()
+        queryset.query = query
+        return queryset
+
+    def perform(self):
+        from bpp.views.multiseek_export import export_rows, write_csv, write_xlsx
+
+        rows = export_rows(
+            self.get_queryset(),
+            self.wariant,
+            functools.partial(urljoin, self.adres_serwisu),
+            self.pbn_api_root,
+        )
+        with tempfile.TemporaryFile() as output:
+            if self.format == "csv":
+                write_csv(output, rows)
+            else:
+                write_xlsx(output, rows, self.tytul, self.wariant)
+            output.seek(0)
+            self.plik.save(self.nazwa_pliku(), File(output), save=False)
@@ -44,7 +44,16 @@ def _rozstrzygnij_uczelnie(original):
     )
 
 
-def ISlot(original, uczelnia=None):  # noqa
+def ISlot(  # noqa
+    original, uczelnia=None, ukryte_statusy=None, wiersze=None, poziom_wydawcy=None
+):
+    """Kalkulator slotów dla rekordu.
+
+    ``ukryte_statusy`` -- gotowy wynik ``uczelnia.ukryte_statusy("sloty")``,
+    dla przeliczeń wsadowych, które dobierają kalkulatory wielu rekordom tej
+    samej uczelni. ``wiersze`` i ``poziom_wydawcy`` -- patrz
+    ``_dopasuj_kalkulator``.
+    """
     if isinstance(original, Patent):
         raise CannotAdapt("Sloty dla patentów nie są liczone")
 
@@ -57,20 +66,36 @@ def ISlot(original, uczelnia=None):  # noqa
     if uczelnia is None:
         uczelnia = _rozstrzygnij_uczelnie(original)
 
-    if hasattr(
-        original, "status_korekty_id"
-    ) and original.status_korekty_id in uczelnia.ukryte_statusy("sloty"):
+    if ukryte_statusy is None:
+        ukryte_statusy = uczelnia.ukryte_statusy("sloty")
+
+    if (
+        hasattr(original, "status_korekty_id")
+        and original.status_korekty_id in ukryte_statusy
+    ):
         raise CannotAdapt(
             "Sloty nie będą liczone, zgodnie z ustawieniami obiektu Uczelnia dla ukrywanych "
             "statusów korekt. "
         )
 
-    kalkulator = _dopasuj_kalkulator(original, uczelnia)
+    kalkulator = _dopasuj_kalkulator(
+        original, uczelnia, wiersze=wiersze, poziom_wydawcy=poziom_wydawcy
+    )
     kalkulator.uczelnia = uczelnia
     return kalkulator
 
 
-def _dopasuj_kalkulator(original, uczelnia=None):  # noqa: C901
+def _dopasuj_kalkulator(  # noqa: C901
+    original, uczelnia=None, wiersze=None, poziom_wydawcy=None
+):
+    """Kalkulator slotów pasujący do rodzaju, roku i punktacji rekordu.
+
+    Przeliczenia wsadowe (``bpp.models.sloty.wsadowo``) podają migawkę:
+    ``wiersze`` -- ``AutorRekordu`` wszystkich autorów rekordu, a
+    ``poziom_wydawcy`` -- wynik ``Wydawca.get_tier(rok)``; wtedy dobór
+    kalkulatora wydawnictwa zwartego nie pyta bazy o autorów, dyscypliny
+    ani poziom wydawcy.
+    """
     if isinstance(original, Wydawnictwo_Ciagle):
         if original.rok in [2017, 2018]:
             if original.punkty_kbn >= 30:
@@ -99,14 +124,15 @@ def _dopasuj_kalkulator(original, uczelnia=None):  # noqa: C901
                 f"Rok poza zakresem procedur liczacych ({original.rok}). "
             )
 
-        poziom_wydawcy = -1
+        if poziom_wydawcy is None:
+            poziom_wydawcy = -1
 
-        if original.wydawca_id is not None:
-            try:
-                wydawca = original.wydawca
-                poziom_wydawcy = wydawca.get_tier(original.rok)
-            except Wydawca.DoesNotExist:
-                pass
+            if original.wydawca_id is not None:
+                try:
+                    wydawca = original.wydawca
+                    poziom_wydawcy = wydawca.get_tier(original.rok)
+                except Wydawca.DoesNotExist:
+                    pass
 
         # Referaty zjazdowe
 
@@ -150,8 +176,13 @@ def _dopasuj_kalkulator(original, uczelnia=None):  # noqa: C901
             raise NotImplementedError("To sie nie powinno wydarzyc)")
 
         if ksiazka and original.pk:
-            autorstwo = original.warunek_autorstwo()
-            redakcja = original.warunek_redakcja()
+            if wiersze is None:
+                autorstwo = original.warunek_autorstwo()
+                redakcja = original.warunek_redakcja()
+            else:
+                typy = {w.typ_ogolny for w in wiersze}
+                autorstwo = const.TO_AUTOR in typy
+                redakcja = const.TO_REDAKTOR in typy
 
             if autorstwo and redakcja:
                 raise CannotAdapt("Rekord ma jednocześnie autorów i redaktorów.")
@@ -170,10 +201,20 @@ def _dopasuj_kalkulator(original, uczelnia=None):  # noqa: C901
         elif rozdzial and autorstwo:
             tryb_kalkulacji = const.TRYB_KALKULACJI.ROZDZIAL_W_MONOGRAFI
 
-        rodzaje_hst = {
-            Dyscyplina_Naukowa.objects.get(pk=x[0]).dyscyplina_hst
-            for x in original.wszystkie_dyscypliny_rekordu(uczelnia)
-        }
+        if wiersze is None:
+            rodzaje_hst = {
+                Dyscyplina_Naukowa.objects.get(pk=x[0]).dyscyplina_hst
+                for x in original.wszystkie_dyscypliny_rekordu(uczelnia)
+            }
+        else:
+            # Odpowiednik wszystkie_dyscypliny_rekordu(uczelnia)
+            rodzaje_hst = {
+                w.dyscyplina.dyscyplina_hst
+                for w in wiersze
+                if w.dyscyplina is not None
+                and w.przypieta
+                and (uczelnia is None or w.uczelnia_id == uczelnia.pk)
+            }
 
         match len(rodzaje_hst):
             case 0:
@@ -0,0 +1,409 @@
+"""Wsadowe przeliczanie ``Cache_Punktacja_Autora`` i ``Cache_Punktacja_Dyscypliny``.
+
+``IPunktacjaCacher`` przelicza jeden rekord: kalkulator pyta bazę o autorów
+przy każdej dyscyplinie, a każdy wiersz cache to osobny ``INSERT``.
+``przebuduj_punktacje`` robi to samo dla porcji rekordów jednego modelu:
+
+* autorów wszystkich rekordów porcji pobiera jednym zapytaniem, a rodzaje
+  autorów liczone w slotach (``Autor_Dyscyplina``) -- drugim,
+* kalkulatory dobiera ``ISlot`` -- raz na rekord i uczelnię, z migawki
+  autorów i poziomów wydawców, bez zapytań -- ale liczy nimi na migawce
+  autorów (``AutorzyWPamieci``); wzory zostają w klasach ``SlotKalkulator_*``,
+* stare wiersze usuwa jednym ``DELETE``, nowe zapisuje ``bulk_create``,
+  a zdenormalizowane ``cached_punkty_dyscyplin`` -- ``bulk_update``
+  tylko tam, gdzie się zmieniły.
+
+Wynik jest taki sam, jak ``przelicz_punkty_dyscyplin`` wywołane dla
+każdego rekordu z osobna.
+"""
+
+import json
+from dataclasses import dataclass
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from bpp.models.cache import Cache_Punktacja_Autora, Cache_Punktacja_Dyscypliny
+
+from .core import ISlot, _dopasuj_kalkulator
+from .exceptions import CannotAdapt
+
+
+@dataclass(frozen=True)
+class AutorRekordu:
+    """Migawka wiersza ``*_Autor`` z polami, których używają kalkulatory."""
+
+    pk: int
+    autor_id: int
+    jednostka_id: int
+    uczelnia_id: int
+    skupia_pracownikow: bool
+    afiliuje: bool
+    przypieta: bool
+    dyscyplina: object  # Dyscyplina_Naukowa albo None
+    typ_ogolny: int
+    licz_sloty: bool
+    zapisany_jako: str = ""
+
+    @classmethod
+    def z_wiersza(cls, wa, licz_sloty):
+        """Migawka ``wa`` pobranego z ``select_related`` jednostki,
+        dyscypliny i typu odpowiedzialności."""
+        return cls(
+            pk=wa.pk,
+            autor_id=wa.autor_id,
+            jednostka_id=wa.jednostka_id,
+            uczelnia_id=wa.jednostka.uczelnia_id,
+            skupia_pracownikow=wa.jednostka.skupia_pracownikow,
+            afiliuje=wa.afiliuje,
+            przypieta=wa.przypieta,
+            dyscyplina=wa.dyscyplina_naukowa,
+            typ_ogolny=(
+                wa.typ_odpowiedzialnosci.typ_ogolny
+                if wa.typ_odpowiedzialnosci_id
+                else None
+            ),
+            licz_sloty=licz_sloty,
+            zapisany_jako=wa.zapisany_jako,
+        )
+
+    def okresl_dyscypline(self):
+        return self.dyscyplina
+
+    def uwzgledniany(self):
+        """Warunki, pod którymi ``IPunktacjaCacher`` zapisuje wiersz autora."""
+        return (
+            self.afiliuje
+            and self.skupia_pracownikow
+            and self.przypieta
+            and self.licz_sloty
+            and self.dyscyplina is not None
+        )
+
+
+class AutorzyWPamieci:
+    """Podmienia zapytania ``SlotMixin`` o autorów rekordu na migawkę.
+
+    Wzory punktów i slotów zostają w klasach ``SlotKalkulator_*``; tutaj są
+    tylko odpowiedniki ``wszyscy``, ``autorzy_z_dyscypliny`` i ``dyscypliny``
+    liczone na liście ``AutorRekordu`` (już zawężonej do uczelni).
+    """
+
+    def wszyscy(self):
+        return len(self.wiersze)
+
+    def autorzy_z_dyscypliny(self, dyscyplina_naukowa, typ_ogolny=None):
+        return [
+            w
+            for w in self.wiersze
+            if w.afiliuje
+            and w.przypieta
+            and w.dyscyplina == dyscyplina_naukowa
+            and (typ_ogolny is None or w.typ_ogolny == typ_ogolny)
+            and w.licz_sloty
+        ]
+
+    @property
+    def dyscypliny(self):
+        return {w.dyscyplina for w in self.wiersze if w.dyscyplina is not None}
+
+
+_klasy_w_pamieci = {}
+
+# Atrybuty liczone przez kalkulator z bazy -- nie mogą przejść do kopii.
+_PAMIEC_KALKULATORA = ("dyscypliny", "_liczba_k_cache")
+
+
+def kalkulator_w_pamieci(kalkulator, wiersze):
+    """Kopia kalkulatora z ``ISlot`` licząca na liście ``AutorRekordu``."""
+    klasa = type(kalkulator)
+    podklasa = _klasy_w_pamieci.get(klasa)
+    if podklasa is None:
+        podklasa = type(f"{klasa.__name__}_WPamieci", (AutorzyWPamieci, klasa), {})
+        _klasy_w_pamieci[klasa] = podklasa
+
+    ret = object.__new__(podklasa)
+    ret.__dict__.update(
+        (k, v) for k, v in kalkulator.__dict__.items() if k not in _PAMIEC_KALKULATORA
+    )
+    ret.wiersze = wiersze
+    return ret
+
+
+def wpisy_autorow(kalkulator):
+    """Krotki ``(wiersz, pkdaut, slot)`` dla autorów, którym
+    ``IPunktacjaCacher._zapisz`` tworzy ``Cache_Punktacja_Autora``."""
+    for w in kalkulator.wiersze:
+        if not w.uwzgledniany():
+            continue
+        pkdaut = kalkulator.pkd_dla_autora(w)
+        if pkdaut is None:
+            continue
+        yield w, pkdaut, kalkulator.slot_dla_autora_z_dyscypliny(w.dyscyplina)
+
+
+def _wiersze_cache(kalkulator, rekord_id, uczelnia):
+    dyscypliny, autorzy = [], []
+
+    for dyscyplina in kalkulator.dyscypliny:
+        azd = kalkulator.autorzy_z_dyscypliny(dyscyplina)
+        if not azd:
+            continue
+        dyscypliny.append(
+            Cache_Punktacja_Dyscypliny(
+                rekord_id=rekord_id,
+                dyscyplina=dyscyplina,
+                uczelnia=uczelnia,
+                pkd=kalkulator.punkty_pkd(dyscyplina),
+                slot=kalkulator.slot_dla_dyscypliny(dyscyplina),
+                autorzy_z_dyscypliny=[a.pk for a in azd],
+                zapisani_autorzy_z_dyscypliny=[a.zapisany_jako for a in azd],
+            )
+        )
+
+    for w, pkdaut, slot in wpisy_autorow(kalkulator):
+        autorzy.append(
+            Cache_Punktacja_Autora(
+                rekord_id=rekord_id,
+                autor_id=w.autor_id,
+                jednostka_id=w.jednostka_id,
+                dyscyplina_id=w.dyscyplina.pk,
+                pkdaut=pkdaut,
+                slot=slot,
+            )
+        )
+
+    return dyscypliny, autorzy
+
+
+class _Uczelnie:
+    """Uczelnie i ich ukryte statusy, pobierane raz na całe przeliczenie."""
+
+    def __init__(self):
+        from bpp.models.uczelnia import Uczelnia
+
+        self.wszystkie = {u.pk: u for u in Uczelnia.objects.all()}
+        self._ukryte = {}
+
+    def dla_rekordu(self, wiersze):
+        # Odpowiednik IPunktacjaCacher._uczelnie_do_przeliczenia
+        if len(self.wszystkie) == 1:
+            return list(self.wszystkie.values())
+        ids = {w.uczelnia_id for w in wiersze if w.afiliuje and w.przypieta}
+        return [u for pk, u in sorted(self.wszystkie.items()) if pk in ids]
+
+    def ukryte_statusy(self, uczelnia):
+        ret = self._ukryte.get(uczelnia.pk)
+        if ret is None:
+            ret = self._ukryte[uczelnia.pk] = set(uczelnia.ukryte_statusy("sloty"))
+        return ret
+
+
+def _migawki_autorow(model, prace):
+    from bpp.models import Autor_Dyscyplina
+
+    klasa_autora = model.autorzy_set.rel.related_model
+    wiersze = list(
+        klasa_autora.objects.filter(rekord__in=prace)
+        .select_related("jednostka", "dyscyplina_naukowa", "typ_odpowiedzialnosci")
+        .order_by("rekord_id", "kolejnosc", "typ_odpowiedzialnosci__skrot")
+    )
+
+    lata = {p.rok for p in prace if p.rok is not None}
+    licz_sloty = set(
+        Autor_Dyscyplina.objects.filter(
+            autor_id__in={wa.autor_id for wa in wiersze},
+            rok__in=lata,
+            rodzaj_autora__licz_sloty=True,
+        ).values_list("autor_id", "rok")
+    )
+
+    rok = {p.pk: p.rok for p in prace}
+    ret = {p.pk: [] for p in prace}
+    for wa in wiersze:
+        ret[wa.rekord_id].append(
+            AutorRekordu.z_wiersza(wa, (wa.autor_id, rok[wa.rekord_id]) in licz_sloty)
+        )
+    return ret
+
+
+def _poziomy_wydawcow(prace):
+    """``Wydawca.get_tier(rok)`` dla każdego rekordu porcji: jedno zapytanie."""
+    from bpp.models.wydawca import Poziom_Wydawcy
+
+    wydawcy = {
+        p.pk: p.wydawca.get_toplevel().pk
+        for p in prace
+        if getattr(p, "wydawca_id", None) is not None
+    }
+    if not wydawcy:
+        return {}
+
+    poziomy = {
+        (wydawca_id, rok): poziom
+        for wydawca_id, rok, poziom in Poziom_Wydawcy.objects.filter(
+            wydawca_id__in=set(wydawcy.values()),
+            rok__in={p.rok for p in prace},
+        ).values_list("wydawca_id", "rok", "poziom")
+    }
+    # Brak poziomu (-1) i poziom nieokreślony (None) kalkulatory traktują
+    # jednakowo; None oznaczałoby dla ISlot "pobierz z bazy".
+    rok = {p.pk: p.rok for p in prace}
+    return {
+        pk: poziomy.get((wydawca_id, rok[pk])) or -1
+        for pk, wydawca_id in wydawcy.items()
+    }
+
+
+def _zserializuj(klucze):
+    """``IPunktacjaCacher.serialize`` dla wielu rekordów: dwa zapytania."""
+    ret = {tuple(k): ([], []) for k in klucze}
+    for elem in Cache_Punktacja_Autora.objects.filter(rekord_id__in=klucze).order_by(
+        "rekord_id",
+        "jednostka__uczelnia_id",
+        "autor__nazwisko",
+        "dyscyplina__nazwa",
+        "pk",
+    ):
+        ret[tuple(elem.rekord_id)][0].append(elem.serialize())
+    for elem in Cache_Punktacja_Dyscypliny.objects.filter(
+        rekord_id__in=klucze
+    ).order_by("rekord_id", "uczelnia_id", "dyscyplina__nazwa", "pk"):
+        ret[tuple(elem.rekord_id)][1].append(elem.serialize())
+    return ret
+
+
+def _jak_json(wartosc):
+    # Tak odczyta wartość JSONField (krotki stają się listami)
+    return json.loads(json.dumps(wartosc))
+
+
+def _przebuduj_model(model, prace, uczelnie):
+    ctype = ContentType.objects.get_for_model(model).pk
+    migawki = _migawki_autorow(model, prace)
+    poziomy = _poziomy_wydawcow(prace)
+
+    nowe_dyscypliny, nowi_autorzy = [], []
+    for praca in prace:
+        rekord_id = [ctype, praca.pk]
+        wiersze = migawki[praca.pk]
+        poziom_wydawcy = poziomy.get(praca.pk, -1)
+
+        # Odpowiednik IPunktacjaCacher.canAdapt. Przy jednej uczelni jego
+        # wynik pokrywa się z doborem w ISlot poniżej, więc liczymy tylko tam.
+        if len(uczelnie.wszystkie) > 1:
+            try:
+                _dopasuj_kalkulator(
+                    praca, wiersze=wiersze, poziom_wydawcy=poziom_wydawcy
+                )
+            except CannotAdapt:
+                continue
+
+        for uczelnia in uczelnie.dla_rekordu(wiersze):
+            try:
+                kalk = ISlot(
+                    praca,
+                    uczelnia=uczelnia,
+                    ukryte_statusy=uczelnie.ukryte_statusy(uczelnia),
+                    wiersze=wiersze,
+                    poziom_wydawcy=poziom_wydawcy,
+                )
+            except CannotAdapt:
+                continue
+
+            dyscypliny, autorzy = _wiersze_cache(
+                kalkulator_w_pamieci(
+                    kalk, [w for w in wiersze if w.uczelnia_id == uczelnia.pk]
+                ),
+                rekord_id,
+                uczelnia,
+            )
+            nowe_dyscypliny.extend(dyscypliny)
+            nowi_autorzy.extend(autorzy)
+
+    klucze = [[ctype, praca.pk] for praca in prace]
+    with transaction.atomic():
+        Cache_Punktacja_Dyscypliny.objects.filter(rekord_id__in=klucze).delete()
+        Cache_Punktacja_Autora.objects.filter(rekord_id__in=klucze).delete()
+        Cache_Punktacja_Dyscypliny.objects.bulk_create(nowe_dyscypliny)
+        Cache_Punktacja_Autora.objects.bulk_create(nowi_autorzy)
+
+        if not hasattr(model, "cached_punkty_dyscyplin"):
+            return len(prace)
+
+        zserializowane = _zserializuj(klucze)
+        zmienione = []
+        for praca in prace:
+            wartosc = _jak_json(zserializowane[(ctype, praca.pk)])
+            if praca.cached_punkty_dyscyplin != wartosc:
+                praca.cached_punkty_dyscyplin = wartosc
+                zmienione.append(praca)
+        model.objects.bulk_update(zmienione, ["cached_punkty_dyscyplin"])
+
+    return len(prace)
+
+
+def przebuduj_punktacje(rekordy):
+    """Przelicz cache punktacji dla rekordów (dowolnych modeli z
+    ``cached_punkty_dyscyplin``); zwraca liczbę przeliczonych rekordów.
+
+    Rekordy powinny mieć dociągnięte (``select_related``) pola, po które
+    sięga ``ISlot``: ``typ_kbn``, ``charakter_formalny``, ``wydawca`` --
+    inaczej każdy rekord to kilka zapytań więcej. Jedna porcja to jedna
+    transakcja; wygodny rozmiar to kilkaset rekordów.
+    """
+    grupy = {}
+    for rekord in rekordy:
+        grupy.setdefault(type(rekord), []).append(rekord)
+
+    if not grupy:
+        return 0
+
+    uczelnie = _Uczelnie()
+    return sum(
+        _przebuduj_model(model, prace, uczelnie) for model, prace in grupy.items()
+    )
+
+
+#: Klucze obce, po które sięga ``ISlot`` przy doborze kalkulatora.
+POLA_POWIAZANE = ("typ_kbn", "charakter_formalny", "wydawca")
+
+
+def rekordy_do_przeliczenia(model, rok_min=None, rok_max=None):
+    """Rekordy ``model`` z dociągniętymi ``POLA_POWIAZANE``, posortowane po pk."""
+    from django.core.exceptions import FieldDoesNotExist
+
+    pola = []
+    for nazwa in POLA_POWIAZANE:
+        try:
+            model._meta.get_field(nazwa)
+        except FieldDoesNotExist:
+            continue
+        pola.append(nazwa)
+
+    qs = model.objects.select_related(*pola).order_by("pk")
+    if rok_min is not None:
+        qs = qs.filter(rok__gte=rok_min)
+    if rok_max is not None:
+        qs = qs.filter(rok__lte=rok_max)
+    return qs
+
+
+def przebuduj_zakres(
+    model_label, pk_min, pk_max, rok_min=None, rok_max=None, rozmiar_porcji=500
+):
+    """Przelicz rekordy ``model_label`` o pk z ``[pk_min, pk_max]``
+    porcjami po ``rozmiar_porcji``; zadanie dla jednego procesu puli."""
+    from django.apps import apps
+
+    rekordy = (
+        rekordy_do_przeliczenia(apps.get_model(model_label), rok_min, rok_max)
+        .filter(pk__gte=pk_min, pk__lte=pk_max)
+        .iterator(chunk_size=rozmiar_porcji)
+    )
+
+    ret = 0
+    while porcja := list(islice(rekordy, rozmiar_porcji)):
+        ret += przebuduj_punktacje(porcja)
+    return ret
@@ -2,8 +2,6 @@
 
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 
-from bpp.models.szablondlaopisubibliograficznego import SzablonDlaOpisuBibliograficznego
-
 try:
     from django.core.urlresolvers import reverse
 except ImportError:
@@ -11,7 +9,6 @@ except ImportError:
 
 from django.db import models
 from django.db.models import Max
-from django.template.loader import get_template
 from django.utils import safestring
 
 # Skrócony widok listy autorów na stronie rekordu (patrz
@@ -95,39 +92,12 @@ class ModelZOpisemBibliograficznym(models.Model):
 
         :param links: "normal" lub "admin" jeżeli chcemy, aby autorzy prowadzili gdzieś (do stron browse/
         lub do admina).
-        """
-
-        template_name = SzablonDlaOpisuBibliograficznego.objects.get_for_model(self)
-        if template_name is None:
-            template_name = "opis_bibliograficzny.html"
-
-        template = get_template(template_name)
 
-        ret = (
-            template.render(dict(praca=self, links=links))
-            .replace("\r\n", "")
-            .replace("\n", "")
-        )
-        while ret.find("  ") != -1:
-            ret = ret.replace("  ", " ")
-
-        ret = (
-            ret.replace(" , ", ", ")
-            .replace(" . ", ". ")
-            .replace(". . ", ". ")
-            .replace(". , ", ". ")
-            .replace(" .", ".")
-            .replace(".</b>[", ".</b> [")
-        )
-
-        # Opis powstaje m.in. z (niezaufanego) tytułu i jest renderowany |safe
-        # oraz cache'owany w opis_bibliograficzny_cache. Sanityzujemy złożenie,
-        # żeby żaden <script> z tytułu nie przeżył (obrona w głębi obok
-        # sanityzacji tytułu u źródła), zachowując kursywę, sub/sup i linki
-        # autorów.
-        from bpp.util import safe_opis_bibliograficzny_html
+        Szablon i poprawki tekstu: ``bpp.opis_bibliograficzny``.
+        """
+        from bpp.opis_bibliograficzny import renderuj_opis
 
-        return safe_opis_bibliograficzny_html(ret)
+        return renderuj_opis(self, links=links)
 
     #: Atrybut, pod którym ``prefetch_autorzy_dla_opisu`` podstawia gotową
     #: listę autorów. Ustawiany JAWNIE przez widok na czas renderowania jednej
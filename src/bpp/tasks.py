@@ -276,3 +276,56 @@ def zaktualizuj_liczbe_cytowan():
     odpytałyby WoS API zdublowanie. Lock w Redisie zapewnia że tylko jeden
     worker wykonuje task naraz (cluster-wide)."""
     _zaktualizuj_liczbe_cytowan()
+
+
+# Eksport całej bibliografii to setki tysięcy wierszy — limit z zapasem, ale
+# zawieszony eksport nie może trzymać workera do `visibility_timeout` brokera.
+EKSPORT_MULTISEEK_TIME_LIMIT = 60 * 60
+
+# Pliki eksportów w tle trzymamy tyle dni — to link do pobrania, nie archiwum.
+EKSPORT_MULTISEEK_RETENCJA_DNI = 2
+
+
+@app.task(
+    ignore_result=True,
+    time_limit=EKSPORT_MULTISEEK_TIME_LIMIT,
+    soft_time_limit=int(0.95 * EKSPORT_MULTISEEK_TIME_LIMIT),
+)
+def eksportuj_multiseek(eksport_pk):
+    """Wykonuje EksportMultiseek zlecony przez widok eksportu Multiseek."""
+    from bpp.models import EksportMultiseek
+
+    EksportMultiseek.objects.get(pk=eksport_pk).task_perform()
+
+
+@app.task(ignore_result=True)
+def usun_stare_eksporty_multiseek(days=EKSPORT_MULTISEEK_RETENCJA_DNI):
+    """Usuwa eksporty Multiseek w tle (rekordy i pliki) starsze niż `days` dni."""
+    from bpp.models import EksportMultiseek
+    from bpp.util import remove_old_objects
+
+    return remove_old_objects(
+        EksportMultiseek, file_field="plik", field_name="created_on", days=days
+    )
+
+
+@app.task(ignore_result=True)
+def przebuduj_opisy_bibliograficzne(modele, zmienione_od=None):
+    """Przelicza ``opis_bibliograficzny_cache`` po zmianie szablonu opisu.
+
+    ``modele`` to etykiety ``app_label.ModelName``, ``zmienione_od`` (ISO
+    8601) ogranicza przebudowę do rekordów zmienionych od tej chwili.
+    """
+    from datetime import datetime
+
+    from django.apps import apps
+
+    from bpp.opis_bibliograficzny import przebuduj_opisy
+
+    kw = {}
+    if zmienione_od is not None:
+        kw["ostatnio_zmieniony__gte"] = datetime.fromisoformat(zmienione_od)
+
+    ret = przebuduj_opisy([apps.get_model(model) for model in modele], **kw)
+    logger.info("Przebudowano opis_bibliograficzny_cache dla %d rekordów", ret)
+    return ret
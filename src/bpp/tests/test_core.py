@@ -1,7 +1,10 @@
-import pytest
+import multiprocessing
 
+import billiard
+import pytest
 from django.contrib.auth.models import Group
 
+from bpp import core
 from bpp.const import GR_WPROWADZANIE_DANYCH, GR_ZGLOSZENIA_PUBLIKACJI
 from bpp.core import editors_emails, zgloszenia_publikacji_emails
 from bpp.models import BppUser
@@ -40,3 +43,33 @@ def test_zgloszenia_publikacji_emails(admin_user: BppUser, normal_django_user: B
     normal_django_user.groups.add(g)
     assert ADMIN_EMAIL not in zgloszenia_publikacji_emails()
     assert USER_EMAIL in zgloszenia_publikacji_emails()
+
+
+def test_licz_sloty_porcjami_pula_w_procesie_demonie(monkeypatch):
+    """Raport slotów liczy się w workerze Celery prefork (proces demoniczny)
+    -- pula ``billiard`` musi tam ruszyć i dać te same wyniki, co liczenie
+    w bieżącym procesie."""
+    grupy = [
+        (
+            (autor, 1, None),
+            [(autor * 10 + i, 5000 + i * 1000, 10000 * (i + 1)) for i in range(4)],
+        )
+        for autor in range(7)
+    ]
+    oczekiwane = list(core._licz_sloty_porcjami(iter(grupy), 20000, None, 1, 3))
+
+    konteksty = []
+    get_context = billiard.get_context
+
+    def sledz_get_context(*args):
+        konteksty.append(args)
+        return get_context(*args)
+
+    monkeypatch.setattr(core.billiard, "get_context", sledz_get_context)
+    monkeypatch.setitem(multiprocessing.current_process()._config, "daemon", True)
+    monkeypatch.setitem(billiard.current_process()._config, "daemon", True)
+
+    wyniki = list(core._licz_sloty_porcjami(iter(grupy), 20000, None, 2, 3))
+
+    assert konteksty == [("spawn",)]
+    assert wyniki == oczekiwane
@@ -0,0 +1,70 @@
+"""Benchmark silnika plecaka NumPy vs pierwotna tabela list-of-lists.
+
+``bpp.core.zbieraj_sloty`` woła ``knapsack`` raz na (autor, dyscyplina,
+jednostka) przy każdym raporcie slotów; pojemność to slot przeskalowany przez
+``DEC2INT`` (4 sloty -> 40000 kolumn). Profile poniżej odpowiadają typowym
+autorom: kilkadziesiąt prac o slotach będących ułamkami 1 (udziały 1/2, 1/3,
+1/4, ...) i punktach z wykazu MEiN.
+
+Twierdzenia:
+
+1. WYNIK (twardy gejt): ``(maks, lista)`` identyczne z implementacją
+   referencyjną, łącznie z kolejnością listy.
+
+2. WYDAJNOSC (tylko informacyjnie): czasy ida do stdout, bez asercji --
+   pomiar zegarowy na obciazonym CI bylby niestabilny.
+"""
+
+import random
+import time
+
+import pytest
+
+from bpp.util.algorithms import DEC2INT, _knapsack_numpy, _knapsack_python
+
+PUNKTY = [20, 40, 70, 100, 140, 200]
+UDZIALY = [1, 1 / 2, 1 / 3, 1 / 4, 2 / 3, 3 / 4, 1 / 5]
+
+PROFILE = [
+    # (liczba prac, zbierany slot)
+    (20, 1),
+    (40, 2),
+    (80, 4),
+]
+
+
+def _profil_autora(r, liczba_prac):
+    wt, val = [], []
+    for _ in range(liczba_prac):
+        udzial = r.choice(UDZIALY)
+        wt.append(int(udzial * DEC2INT))
+        val.append(int(r.choice(PUNKTY) * udzial * DEC2INT))
+    return wt, val
+
+
+def _czas(fun, *args):
+    t0 = time.perf_counter()
+    ret = fun(*args)
+    return time.perf_counter() - t0, ret
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("liczba_prac,slot", PROFILE)
+def test_knapsack_benchmark(liczba_prac, slot):
+    r = random.Random(liczba_prac)
+    wt, val = _profil_autora(r, liczba_prac)
+    ids = list(range(liczba_prac))
+    W = slot * DEC2INT
+
+    # Rozgrzewka: pierwszy import numpy nie powinien obciążać pomiaru.
+    _knapsack_numpy(W, wt, val, ids)
+
+    t_tabela, wynik_tabela = _czas(_knapsack_python, W, wt, val, ids)
+    t_numpy, wynik_numpy = _czas(_knapsack_numpy, W, wt, val, ids)
+
+    assert wynik_numpy == wynik_tabela
+
+    print(
+        f"\nknapsack n={liczba_prac} W={W}: tabela {t_tabela * 1000:.1f} ms, "
+        f"numpy {t_numpy * 1000:.1f} ms ({t_tabela / max(t_numpy, 1e-9):.0f}x)"
+    )
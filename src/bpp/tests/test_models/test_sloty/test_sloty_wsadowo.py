@@ -0,0 +1,74 @@
+"""Wsadowe przeliczanie cache punktacji daje to samo, co IPunktacjaCacher."""
+
+import pytest
+from django.core.management import call_command
+
+from bpp.models import Cache_Punktacja_Autora, Cache_Punktacja_Dyscypliny
+from bpp.models.sloty.core import IPunktacjaCacher
+from bpp.models.sloty.wsadowo import przebuduj_punktacje, rekordy_do_przeliczenia
+
+
+def _stan(rekordy):
+    ret = []
+    for rekord in rekordy:
+        rekord.refresh_from_db()
+        ret.append(
+            (
+                IPunktacjaCacher(rekord).serialize(),
+                getattr(rekord, "cached_punkty_dyscyplin", None),
+            )
+        )
+    return ret
+
+
+@pytest.fixture
+def rekordy(ciagle_z_dyscyplinami, zwarte_z_dyscyplinami, patent, denorms):
+    ciagle_z_dyscyplinami.punkty_kbn = 70
+    ciagle_z_dyscyplinami.save()
+    # Jedna dyscyplina odpięta, druga wciąż przypięta
+    wza = zwarte_z_dyscyplinami.autorzy_set.first()
+    wza.przypieta = False
+    wza.save()
+    denorms.flush()
+    return [ciagle_z_dyscyplinami, zwarte_z_dyscyplinami, patent]
+
+
+@pytest.mark.django_db
+def test_przebuduj_punktacje_zgodne_z_ipunktacjacacher(rekordy):
+    # denorms.flush() przeliczył rekordy po staremu, przez IPunktacjaCacher
+    oczekiwane = _stan(rekordy)
+    assert Cache_Punktacja_Autora.objects.exists()
+
+    Cache_Punktacja_Autora.objects.all().delete()
+    Cache_Punktacja_Dyscypliny.objects.all().delete()
+    for rekord in rekordy:
+        type(rekord).objects.filter(pk=rekord.pk).update(cached_punkty_dyscyplin=None)
+
+    assert przebuduj_punktacje(
+        [rekordy_do_przeliczenia(type(r)).get(pk=r.pk) for r in reversed(rekordy)]
+    ) == len(rekordy)
+    assert _stan(rekordy) == oczekiwane
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("fixture", ["wydawnictwo_ciagle", "wydawnictwo_zwarte"])
+def test_przebuduj_punktacje_ograniczona_liczba_zapytan(
+    rekordy, fixture, request, django_assert_max_num_queries
+):
+    prace = list(rekordy_do_przeliczenia(type(request.getfixturevalue(fixture))))
+    assert len(prace) > 1
+    # Dobór ukrytych statusów, ContentType, autorzy, rodzaje autorów, poziomy
+    # wydawców, DELETE x2, INSERT x2, serializacja x2, transakcja
+    with django_assert_max_num_queries(16):
+        przebuduj_punktacje(prace)
+
+
+@pytest.mark.django_db
+def test_komenda_przebuduj_punktacje(rekordy):
+    oczekiwane = _stan(rekordy)
+    Cache_Punktacja_Autora.objects.all().delete()
+    Cache_Punktacja_Dyscypliny.objects.all().delete()
+
+    call_command("przebuduj_punktacje", procesy=1, rozmiar_porcji=1)
+
+    assert _stan(rekordy) == oczekiwane
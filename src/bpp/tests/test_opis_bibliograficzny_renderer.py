@@ -0,0 +1,129 @@
+import random
+from unittest import mock
+
+import pytest
+from dbtemplates.models import Template
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from bpp import opis_bibliograficzny
+from bpp.models import Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
+from bpp.models.szablondlaopisubibliograficznego import (
+    SzablonDlaOpisuBibliograficznego,
+)
+from bpp.opis_bibliograficzny import (
+    normalizuj_opis,
+    przebuduj_opisy,
+    renderuj_opisy,
+)
+
+
+def _normalizuj_po_staremu(ret):
+    ret = ret.replace("\r\n", "").replace("\n", "")
+    while ret.find("  ") != -1:
+        ret = ret.replace("  ", " ")
+    return (
+        ret.replace(" , ", ", ")
+        .replace(" . ", ". ")
+        .replace(". . ", ". ")
+        .replace(". , ", ". ")
+        .replace(" .", ".")
+        .replace(".</b>[", ".</b> [")
+    )
+
+
+def test_normalizuj_opis_zgodny_z_lancuchem_replace():
+    rnd = random.Random(0)
+    alfabet = [" ", " ", ".", ",", "\n", "\r\n", "\r", "a", "</b>[", "</b>", "["]
+    for _ in range(20000):
+        tekst = "".join(rnd.choice(alfabet) for _ in range(rnd.randint(0, 16)))
+        assert normalizuj_opis(tekst) == _normalizuj_po_staremu(tekst), repr(tekst)
+
+
+@pytest.fixture
+def cache_locmem(settings):
+    # Domyślny DummyCache w testach nie pamięta generacji, więc szablon byłby
+    # rozwiązywany za każdym razem.
+    settings.CACHES = {
+        **settings.CACHES,
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    opis_bibliograficzny.uniewaznij_szablony_opisu()
+
+
+def _zapytania_o_szablon(kontekst):
+    return [
+        q
+        for q in kontekst.captured_queries
+        if "bpp_szablondlaopisubibliograficznego" in q["sql"]
+    ]
+
+
+@pytest.mark.django_db
+def test_szablon_zapamietany_i_uniewazniany(cache_locmem, wydawnictwo_ciagle):
+    SzablonDlaOpisuBibliograficznego.objects.all().delete()
+    pierwszy = Template.objects.create(name="opis-1", content="pierwszy")
+    SzablonDlaOpisuBibliograficznego.objects.create(template=pierwszy)
+
+    assert wydawnictwo_ciagle.opis_bibliograficzny() == "pierwszy"
+
+    with CaptureQueriesContext(connection) as kontekst:
+        assert wydawnictwo_ciagle.opis_bibliograficzny() == "pierwszy"
+    assert _zapytania_o_szablon(kontekst) == []
+
+    # Nowe powiązanie dla konkretnego modelu -- post_save unieważnia pamięć
+    drugi = Template.objects.create(name="opis-2", content="drugi")
+    SzablonDlaOpisuBibliograficznego.objects.create(
+        model=ContentType.objects.get_for_model(Wydawnictwo_Ciagle), template=drugi
+    )
+    assert wydawnictwo_ciagle.opis_bibliograficzny() == "drugi"
+
+    # Zmiana treści szablonu w dbtemplates również
+    drugi.content = "drugi, poprawiony"
+    drugi.save()
+    assert wydawnictwo_ciagle.opis_bibliograficzny() == "drugi, poprawiony"
+
+
+@pytest.mark.django_db
+def test_renderuj_opisy_zgodne_z_pojedynczym(
+    wydawnictwo_ciagle, wydawnictwo_zwarte, autor_jan_kowalski, jednostka
+):
+    wydawnictwo_ciagle.dodaj_autora(autor_jan_kowalski, jednostka)
+    wydawnictwo_zwarte.dodaj_autora(autor_jan_kowalski, jednostka)
+    prace = [wydawnictwo_zwarte, wydawnictwo_ciagle]
+
+    oczekiwane = [praca.opis_bibliograficzny() for praca in prace]
+
+    assert renderuj_opisy(prace) == oczekiwane
+    assert "KOWALSKI" in oczekiwane[1]
+    # Podstawiona lista autorów nie przeżywa renderowania
+    for praca in prace:
+        assert not hasattr(praca, praca.PREFETCH_AUTORZY_ATTR)
+
+
+@pytest.mark.django_db
+def test_renderuj_opisy_czyta_generacje_raz(wydawnictwo_ciagle, wydawnictwo_zwarte):
+    with mock.patch.object(
+        opis_bibliograficzny, "_generacja", wraps=opis_bibliograficzny._generacja
+    ) as generacja:
+        renderuj_opisy([wydawnictwo_zwarte, wydawnictwo_ciagle, wydawnictwo_zwarte])
+    assert generacja.call_count == 1
+
+
+@pytest.mark.django_db
+def test_przebuduj_opisy(wydawnictwo_ciagle, wydawnictwo_zwarte, monkeypatch):
+    monkeypatch.setattr(opis_bibliograficzny, "ROZMIAR_PORCJI", 1)
+    modele = [Wydawnictwo_Ciagle, Wydawnictwo_Zwarte]
+    przebuduj_opisy(modele)
+    Wydawnictwo_Ciagle.objects.update(opis_bibliograficzny_cache="nieaktualny")
+
+    assert przebuduj_opisy(modele) == 1
+
+    wydawnictwo_ciagle.refresh_from_db()
+    assert (
+        wydawnictwo_ciagle.opis_bibliograficzny_cache
+        == wydawnictwo_ciagle.opis_bibliograficzny()
+    )
+    # Aktualne opisy nie są zapisywane ponownie
+    assert przebuduj_opisy(modele) == 0
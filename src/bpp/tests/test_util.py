@@ -1,3 +1,5 @@
+import random
+
 import pytest
 
 from bpp.util import (
@@ -9,6 +11,7 @@ from bpp.util import (
     strip_nonalphanumeric,
     wytnij_isbn_z_uwag,
 )
+from bpp.util.algorithms import _knapsack_numpy, _knapsack_python
 
 
 @pytest.mark.parametrize(
@@ -73,6 +76,28 @@ def test_knapsack_nie_zwracaj_listy():
     ) == (10, [])
 
 
+@pytest.mark.parametrize("seed", range(5))
+def test_knapsack_numpy_zgodny_z_tabela(seed):
+    r = random.Random(seed)
+    for _ in range(200):
+        n = r.randint(1, 12)
+        # Masy zerowe i o wspólnym dzielniku sprawdzają skracanie przez NWD
+        wt = [r.choice([0, r.randint(1, 30), r.choice([5, 10, 15])]) for _ in range(n)]
+        val = [r.randint(0, 50) for _ in range(n)]
+        ids = list(range(n))
+        W = r.randint(0, 60)
+        for zwracaj in (True, False):
+            assert _knapsack_numpy(W, wt, val, ids, zwracaj) == _knapsack_python(
+                W, wt, val, ids, zwracaj
+            )
+
+
+def test_knapsack_zwraca_int():
+    maks, lista = knapsack(10, [6, 6], [3, 4], ["a", "b"])
+    assert (maks, lista) == (4, ["b"])
+    assert type(maks) is int
+
+
 @pytest.mark.django_db
 def test_ModelZOpisemBibliograficznym(wydawnictwo_ciagle):
     assert wydawnictwo_ciagle.opis_bibliograficzny() != ""
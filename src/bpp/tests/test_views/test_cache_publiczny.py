@@ -10,10 +10,14 @@ from django.urls import reverse
 from model_bakery import baker
 
 from bpp.views.cache_publiczny import (
+    TAG_KAZDA_ZMIANA,
     _klucz,
     _mozna_cachowac_odpowiedz,
     cache_publiczny,
+    statystyki_cache_publicznego,
+    tag,
     uniewaznij_cache_publiczny,
+    uniewaznij_tagi,
 )
 
 from fixtures.conftest_multisite import make_request_for_site
@@ -773,3 +777,181 @@ def test_baker_rekord_widoczny_po_inwalidacji(
 
     po = client.get(url, HTTP_HOST=site1.domain)
     assert po["X-BPP-Cache"] == "MISS"
+
+
+# ---------------------------------------------------------------------------
+# TAGI — zapis obiektu unieważnia tylko strony, które mogą go pokazywać
+# ---------------------------------------------------------------------------
+
+
+def _stan(client, site, url):
+    return client.get(url, HTTP_HOST=site.domain)["X-BPP-Cache"]
+
+
+def _rozgrzej(client, site, *urle):
+    for url in urle:
+        client.get(url, HTTP_HOST=site.domain)
+        assert _stan(client, site, url) == "HIT", url
+
+
+@pytest.mark.django_db
+def test_zapis_publikacji_uniewaznia_tylko_jej_strony(
+    client,
+    cache_locmem,
+    site1,
+    uczelnia1,
+    jednostka_uczelnia1,
+    wydawnictwo_ciagle,
+    django_capture_on_commit_callbacks,
+    czysta_kolejka_on_commit,
+):
+    rok = wydawnictwo_ciagle.rok
+    jednostki = reverse("bpp:browse_jednostki")
+    ten_rok = reverse("bpp:browse_rok", args=(str(rok),))
+    inny_rok = reverse("bpp:browse_rok", args=(str(rok - 5),))
+    _rozgrzej(client, site1, jednostki, ten_rok, inny_rok)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        wydawnictwo_ciagle.tytul_oryginalny = "Tytuł po zmianie"
+        wydawnictwo_ciagle.save()
+
+    assert _stan(client, site1, ten_rok) == "MISS"
+    assert _stan(client, site1, jednostki) == "HIT"
+    assert _stan(client, site1, inny_rok) == "HIT"
+
+
+@pytest.mark.django_db
+def test_zapis_rozdzialu_uniewaznia_strone_ksiazki(
+    client,
+    cache_locmem,
+    site1,
+    uczelnia1,
+    django_capture_on_commit_callbacks,
+    czysta_kolejka_on_commit,
+):
+    """Strona rozdziału pokazuje książkę, a strona książki — jej rozdziały."""
+    from django.db import transaction
+
+    stara, nowa, inna = baker.make("bpp.Wydawnictwo_Zwarte", rok=2020, _quantity=3)
+    rozdzial = baker.make(
+        "bpp.Wydawnictwo_Zwarte", rok=2020, wydawnictwo_nadrzedne=stara
+    )
+    transaction.get_connection().run_on_commit.clear()
+
+    def strona(rekord):
+        rekord.refresh_from_db()
+        return reverse("bpp:browse_praca_by_slug", args=(rekord.slug,))
+
+    urle = {rekord: strona(rekord) for rekord in (stara, nowa, inna, rozdzial)}
+    _rozgrzej(client, site1, *urle.values())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        rozdzial.wydawnictwo_nadrzedne = nowa
+        rozdzial.save()
+
+    assert _stan(client, site1, urle[stara]) == "MISS"
+    assert _stan(client, site1, urle[nowa]) == "MISS"
+    assert _stan(client, site1, urle[inna]) == "HIT"
+
+    _rozgrzej(client, site1, urle[rozdzial])
+    with django_capture_on_commit_callbacks(execute=True):
+        nowa.tytul_oryginalny = "Nowy tytuł książki"
+        nowa.save()
+
+    assert _stan(client, site1, urle[rozdzial]) == "MISS"
+
+
+@pytest.mark.django_db
+def test_zmiana_roku_uniewaznia_poprzedni_rok_i_lata(
+    client,
+    cache_locmem,
+    site1,
+    uczelnia1,
+    wydawnictwo_ciagle,
+    django_capture_on_commit_callbacks,
+    czysta_kolejka_on_commit,
+):
+    """Stary rok znamy tylko z ``pre_save`` — po zapisie obiekt ma już nowy."""
+    stary_rok = reverse("bpp:browse_rok", args=(str(wydawnictwo_ciagle.rok),))
+    lata = reverse("bpp:browse_lata")
+    _rozgrzej(client, site1, stary_rok, lata)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        wydawnictwo_ciagle.rok -= 3
+        wydawnictwo_ciagle.save()
+
+    assert _stan(client, site1, stary_rok) == "MISS"
+    assert _stan(client, site1, lata) == "MISS"
+
+
+@pytest.mark.django_db
+def test_zmiana_nazwiska_uniewaznia_stara_i_nowa_literke(
+    client,
+    cache_locmem,
+    site1,
+    uczelnia1,
+    jednostka_uczelnia1,
+    django_capture_on_commit_callbacks,
+):
+    from django.db import transaction
+
+    autor = baker.make("bpp.Autor", nazwisko="Kowalski", imiona="Jan")
+    transaction.get_connection().run_on_commit.clear()
+
+    urle = {
+        litera: reverse("bpp:browse_autorzy_literka", args=(litera,))
+        for litera in "KNM"
+    }
+    _rozgrzej(client, site1, *urle.values())
+
+    with django_capture_on_commit_callbacks(execute=True):
+        autor.nazwisko = "Nowak"
+        autor.save()
+
+    assert _stan(client, site1, urle["K"]) == "MISS"
+    assert _stan(client, site1, urle["N"]) == "MISS"
+    assert _stan(client, site1, urle["M"]) == "HIT"
+
+
+@pytest.mark.django_db
+def test_tagi_jednej_transakcji_to_jedno_uniewaznienie(
+    cache_locmem, django_capture_on_commit_callbacks, czysta_kolejka_on_commit
+):
+    with django_capture_on_commit_callbacks() as callbacki:
+        uniewaznij_tagi([tag("rok", "rok:2020")])
+        uniewaznij_tagi([tag("lata")])
+
+    assert len(callbacki) == 1
+    assert callbacki[0].tagi == {tag("rok", "rok:2020"), tag("lata"), TAG_KAZDA_ZMIANA}
+
+
+@pytest.mark.django_db
+def test_liczniki_trafien_i_uniewaznien(
+    client,
+    cache_locmem,
+    site1,
+    uczelnia1,
+    jednostka_uczelnia1,
+    django_capture_on_commit_callbacks,
+    czysta_kolejka_on_commit,
+):
+    from django.core.management import call_command
+
+    _rozgrzej(client, site1, reverse("bpp:browse_jednostki"))
+    with django_capture_on_commit_callbacks(execute=True):
+        jednostka_uczelnia1.save()
+
+    statystyki = statystyki_cache_publicznego()
+    assert statystyki["jednostki"] == {"hit": 1, "miss": 1, "bump": 1}
+    # Nazwa się nie zmieniła — strony prac zostają
+    assert statystyki["rekord"]["bump"] == 0
+
+    call_command("statystyki_cache_publicznego")
+
+
+@pytest.mark.django_db
+def test_liczniki_mozna_wylaczyc(client, cache_locmem, settings, site1, uczelnia1):
+    settings.BPP_CACHE_PUBLICZNY_LICZNIKI = False
+    _rozgrzej(client, site1, reverse("bpp:browse_lata"))
+
+    assert statystyki_cache_publicznego()["lata"] == {"hit": 0, "miss": 0, "bump": 0}
@@ -16,7 +16,7 @@ from model_bakery import baker
 from multiseek.logic import STARTS_WITH
 from multiseek.views import MULTISEEK_SESSION_KEY, MULTISEEK_SESSION_KEY_REMOVED
 
-from bpp.models import Wydawnictwo_Ciagle
+from bpp.models import EksportMultiseek, Wydawnictwo_Ciagle
 from bpp.models.cache import Rekord
 from bpp.tests.util import any_ciagle, any_zwarte
 from bpp.views.multiseek_export import (
@@ -164,7 +164,7 @@ def test_multiseek_export_csv(logged_in_client, multiseek_export_rekord):
         in response["Content-Disposition"]
     )
 
-    rows = list(csv.reader(io.StringIO(response.content.decode("utf-8"))))
+    rows = list(csv.reader(io.StringIO(response.getvalue().decode("utf-8"))))
     assert rows[0] == list(MULTISEEK_EXPORT_HEADERS)
     assert rows[1] == [
         multiseek_export_rekord.tytul_oryginalny,
@@ -218,7 +218,7 @@ def test_multiseek_export_csv_sanitizes_formula_like_values(
     )
 
     assert response.status_code == 200
-    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8"))))
+    rows = list(csv.DictReader(io.StringIO(response.getvalue().decode("utf-8"))))
     assert rows[0]["tytul_oryginalny"] == "'" + title
 
 
@@ -255,7 +255,7 @@ def test_multiseek_export_xlsx(logged_in_client, multiseek_export_rekord):
 
     from openpyxl import load_workbook
 
-    workbook = load_workbook(io.BytesIO(response.content))
+    workbook = load_workbook(io.BytesIO(response.getvalue()))
     worksheet = workbook.active
     assert worksheet.title == MULTISEEK_DEFAULT_REPORT_TITLE
     rows = list(worksheet.iter_rows(values_only=True))
@@ -288,6 +288,9 @@ def test_multiseek_export_xlsx(logged_in_client, multiseek_export_rekord):
     # kolumny linków (L, M, N) zawierają =HYPERLINK
     for col in ("L", "M", "N"):
         assert worksheet[f"{col}2"].value.startswith("=HYPERLINK(")
+    # arkusz write-only: tabela i szerokości kolumn ustawiane z góry
+    assert worksheet.tables["MultiseekExport"].ref == "A1:N2"
+    assert worksheet.column_dimensions["A"].width > 0
 
 
 @pytest.mark.django_db
@@ -309,7 +312,7 @@ def test_multiseek_export_xlsx_sheet_title_uses_limited_report_title(
 
     from openpyxl import load_workbook
 
-    workbook = load_workbook(io.BytesIO(response.content))
+    workbook = load_workbook(io.BytesIO(response.getvalue()))
     worksheet_title = workbook.active.title
     assert worksheet_title.startswith("Raport A B C")
     assert len(worksheet_title) == XLSX_WORKSHEET_TITLE_MAX_LENGTH
@@ -337,10 +340,10 @@ def test_multiseek_export_removed_records(
     )
 
     normal_rows = list(
-        csv.DictReader(io.StringIO(normal_response.content.decode("utf-8")))
+        csv.DictReader(io.StringIO(normal_response.getvalue().decode("utf-8")))
     )
     removed_rows = list(
-        csv.DictReader(io.StringIO(removed_response.content.decode("utf-8")))
+        csv.DictReader(io.StringIO(removed_response.getvalue().decode("utf-8")))
     )
     assert [row["bpp_id"] for row in normal_rows] == [str(tuple(visible.pk))]
     assert [row["bpp_id"] for row in removed_rows] == [str(tuple(removed.pk))]
@@ -356,7 +359,7 @@ def test_multiseek_export_enforces_row_limit(
     monkeypatch.setattr("bpp.views.mymultiseek.MULTISEEK_EXPORT_MAX_ROWS", 1)
 
     response = logged_in_client.get(
-        reverse("multiseek-export", kwargs={"export_format": "csv"})
+        reverse("multiseek-export", kwargs={"export_format": "html"})
     )
 
     assert response.status_code == 400
@@ -364,7 +367,89 @@ def test_multiseek_export_enforces_row_limit(
 
 
 @pytest.mark.django_db
-def test_multiseek_export_links_hidden_over_limit(
+def test_multiseek_export_ponad_limit_idzie_w_tle(
+    logged_in_client,
+    multiseek_export_pair,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    """Eksport danych ponad limit: zamiast 400 — EksportMultiseek w tle,
+    strona statusu z linkiem i plik do pobrania (tylko dla zlecającego)."""
+    _set_multiseek_title_filter(logged_in_client)
+    monkeypatch.setattr("bpp.views.mymultiseek.MULTISEEK_EXPORT_MAX_ROWS", 1)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = logged_in_client.get(
+            reverse("multiseek-export", kwargs={"export_format": "csv"})
+        )
+
+    eksport = EksportMultiseek.objects.get()
+    assert response.status_code == 302
+    assert response["Location"] == eksport.get_absolute_url()
+    assert eksport.liczba_rekordow == 2
+
+    eksport.refresh_from_db()
+    assert eksport.finished_successfully, eksport.traceback
+
+    status = logged_in_client.get(eksport.get_absolute_url())
+    pobierz = reverse("multiseek-export-pobierz", args=(eksport.pk,))
+    assert pobierz in status.content.decode("utf-8")
+
+    response = logged_in_client.get(pobierz)
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.getvalue().decode("utf-8"))))
+    assert sorted(row["bpp_id"] for row in rows) == sorted(
+        str(tuple(rekord.pk)) for rekord in multiseek_export_pair
+    )
+    assert rows[0]["link_do_bpp_url"].startswith("http://testserver/")
+
+
+@pytest.mark.django_db
+def test_multiseek_export_w_tle_bez_duplikatow_i_z_limitem(
+    logged_in_client,
+    multiseek_export_pair,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    """Powtórzony GET nie kolejkuje drugiego eksportu tego samego zapytania,
+    a liczba trwających eksportów użytkownika jest ograniczona."""
+    _set_multiseek_title_filter(logged_in_client)
+    monkeypatch.setattr("bpp.views.mymultiseek.MULTISEEK_EXPORT_MAX_ROWS", 1)
+    monkeypatch.setattr(
+        "bpp.views.mymultiseek.MULTISEEK_EKSPORTY_W_TLE_NA_UZYTKOWNIKA", 1
+    )
+    csv_url = reverse("multiseek-export", kwargs={"export_format": "csv"})
+
+    # Bez wykonania zadań: eksporty zostają trwające
+    with django_capture_on_commit_callbacks(execute=False):
+        pierwsza = logged_in_client.get(csv_url)
+        druga = logged_in_client.get(csv_url)
+        xlsx = logged_in_client.get(
+            reverse("multiseek-export", kwargs={"export_format": "xlsx"})
+        )
+
+    eksport = EksportMultiseek.objects.get()
+    assert pierwsza["Location"] == druga["Location"] == eksport.get_absolute_url()
+    assert xlsx.status_code == 429
+
+    # Zakończony eksport nie blokuje nowego
+    eksport.mark_finished_okay()
+    with django_capture_on_commit_callbacks(execute=False):
+        assert logged_in_client.get(csv_url).status_code == 302
+    assert EksportMultiseek.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_multiseek_export_w_tle_tylko_dla_wlasciciela(admin_client, django_user_model):
+    eksport = baker.make(EksportMultiseek, owner=baker.make(django_user_model))
+
+    response = admin_client.get(eksport.get_absolute_url())
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_multiseek_export_links_over_limit(
     logged_in_client,
     multiseek_export_pair,
     monkeypatch,
@@ -375,12 +460,17 @@ def test_multiseek_export_links_hidden_over_limit(
     response = logged_in_client.get(reverse("live-results"))
 
     assert response.status_code == 200
+    # dane (CSV/XLSX) dostępne zawsze — ponad limit idą w tle
     assert (
         reverse("multiseek-export", kwargs={"export_format": "csv"}).encode()
-        not in response.content
+        in response.content
     )
     assert (
         reverse("multiseek-export", kwargs={"export_format": "xlsx"}).encode()
+        in response.content
+    )
+    assert (
+        reverse("multiseek-export", kwargs={"export_format": "html"}).encode()
         not in response.content
     )
 
@@ -409,7 +499,7 @@ def test_multiseek_export_does_not_match_unfiltered_records(
         reverse("multiseek-export", kwargs={"export_format": "csv"})
     )
 
-    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8"))))
+    rows = list(csv.DictReader(io.StringIO(response.getvalue().decode("utf-8"))))
     assert [row["bpp_id"] for row in rows] == [str(tuple(multiseek_export_rekord.pk))]
 
 
@@ -424,7 +514,7 @@ def test_export_dane_csv_ma_zrodlo_i_typ_mnisw(
     )
 
     assert response.status_code == 200
-    text = response.content.decode("utf-8")
+    text = response.getvalue().decode("utf-8")
     header = text.splitlines()[0]
     cols = header.split(",")
     assert cols[2] == "zrodlo"
@@ -454,7 +544,7 @@ def test_export_dane_csv_ksiazka_bez_zrodla_ma_puste_pole(
     )
 
     assert response.status_code == 200
-    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8"))))
+    rows = list(csv.DictReader(io.StringIO(response.getvalue().decode("utf-8"))))
     assert len(rows) == 1
     assert rows[0]["zrodlo"] == ""
 
@@ -472,7 +562,7 @@ def test_export_dane_xlsx_ma_zrodlo_i_typ_mnisw(
     )
 
     assert response.status_code == 200
-    wb = load_workbook(io.BytesIO(response.content))
+    wb = load_workbook(io.BytesIO(response.getvalue()))
     ws = wb.active
     headers = [c.value for c in ws[1]]
     assert headers[2] == "Źródło"
@@ -527,13 +617,13 @@ def test_export_dane_xlsx_nie_ma_n_plus_1(logged_in_client, standard_data, denor
     _set_multiseek_title_filter(logged_in_client, title_prefix=prefix)
 
     response, n1_queries = _query_count_for_export(logged_in_client, url)
-    load_workbook(io.BytesIO(response.content))
+    load_workbook(io.BytesIO(response.getvalue()))
 
     _make_n_plus_1_rows(prefix, 4)  # razem 6 rekordów
     denorms.flush()
 
     response, n2_queries = _query_count_for_export(logged_in_client, url)
-    load_workbook(io.BytesIO(response.content))
+    load_workbook(io.BytesIO(response.getvalue()))
 
     assert n2_queries == n1_queries, (
         "Liczba zapytań SQL rośnie wraz z liczbą wierszy "
@@ -585,7 +675,7 @@ def test_multiseek_export_opis_xlsx_uklad(logged_in_client, multiseek_export_rek
     )
 
     assert response.status_code == 200
-    wb = load_workbook(io.BytesIO(response.content))
+    wb = load_workbook(io.BytesIO(response.getvalue()))
     ws = wb.active
     headers = [c.value for c in ws[1]]
     assert headers == list(MULTISEEK_EXPORT_OPIS_XLSX_HEADERS)
@@ -604,7 +694,7 @@ def test_multiseek_export_opis_xlsx_wiersz(logged_in_client, multiseek_export_re
     )
 
     assert response.status_code == 200
-    ws = load_workbook(io.BytesIO(response.content)).active
+    ws = load_workbook(io.BytesIO(response.getvalue())).active
     rows = list(ws.iter_rows(values_only=True))
     assert rows[1] == (
         1,
@@ -627,7 +717,7 @@ def test_multiseek_export_opis_csv_degraduje_do_dane(
     )
 
     assert response.status_code == 200
-    header = response.content.decode("utf-8").splitlines()[0]
+    header = response.getvalue().decode("utf-8").splitlines()[0]
     assert header.split(",")[0] == "tytul_oryginalny"  # układ dane, nie opis
 
 
@@ -645,7 +735,7 @@ def test_multiseek_export_nieznany_wariant_to_dane(
     )
 
     assert response.status_code == 200
-    ws = load_workbook(io.BytesIO(response.content)).active
+    ws = load_workbook(io.BytesIO(response.getvalue())).active
     assert ws[1][0].value == "Tytuł oryginalny"  # układ dane
 
 
@@ -685,13 +775,13 @@ def test_multiseek_export_opis_xlsx_nie_ma_n_plus_1(
     _set_multiseek_title_filter(logged_in_client, title_prefix=prefix)
 
     response, n1_queries = _query_count_for_export(logged_in_client, url)
-    load_workbook(io.BytesIO(response.content))
+    load_workbook(io.BytesIO(response.getvalue()))
 
     _make_n_plus_1_rows(prefix, 4)  # razem 6 rekordów
     denorms.flush()
 
     response, n2_queries = _query_count_for_export(logged_in_client, url)
-    load_workbook(io.BytesIO(response.content))
+    load_workbook(io.BytesIO(response.getvalue()))
 
     assert n2_queries == n1_queries, (
         "Liczba zapytań SQL rośnie wraz z liczbą wierszy "
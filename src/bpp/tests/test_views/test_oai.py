@@ -69,3 +69,46 @@ def test_listRecords_no_queries_ciagle(artykul, client, django_assert_max_num_qu
     with django_assert_max_num_queries(10):
         res = client.get(listRecords)
     assert "Tytul Wydawnictwo" in toXML(res)[2][0][1][0][1].text
+
+
+NS_OAI = "{http://www.openarchives.org/OAI/2.0/}"
+
+
+def _identyfikatory_i_token(response):
+    xml = toXML(response)
+    identyfikatory = [e.text for e in xml.iter(f"{NS_OAI}identifier")]
+    token = xml.find(f".//{NS_OAI}resumptionToken")
+    return identyfikatory, token.text if token is not None else None
+
+
+@pytest.mark.django_db
+def test_listRecords_wznowienie_kursorem_keyset(ksiazka, artykul, client, settings):
+    settings.BPP_OAI_BATCH_SIZE = 1
+    url = reverse("bpp:oai")
+
+    pierwsze, token = _identyfikatory_i_token(
+        client.get(url + "?verb=ListRecords&metadataPrefix=oai_dc")
+    )
+    assert len(pierwsze) == 1
+    assert "po%3D" in token
+
+    drugie, token = _identyfikatory_i_token(
+        client.get(url, {"verb": "ListRecords", "resumptionToken": token})
+    )
+    assert len(drugie) == 1
+    assert token is None
+    assert set(pierwsze + drugie) == {
+        f"oai:bpp.umlub.pl:wydawnictwo_zwarte/{ksiazka.pk}",
+        f"oai:bpp.umlub.pl:wydawnictwo_ciagle/{artykul.pk}",
+    }
+
+
+@pytest.mark.django_db
+def test_listRecords_slowa_kluczowe_z_agregatu(artykul, client):
+    artykul.slowa_kluczowe.add("alfa", "beta")
+
+    res = client.get(reverse("bpp:oai") + "?verb=ListRecords&metadataPrefix=oai_dc")
+    tematy = [
+        e.text for e in toXML(res).iter("{http://purl.org/dc/elements/1.1/}subject")
+    ]
+    assert tematy == ["alfa", "beta"]
@@ -0,0 +1,114 @@
+"""Podpowiedzi autorów (globalne wyszukiwanie, autocomplete).
+
+Ranking podpowiedzi to zdenormalizowany licznik ``Autor.ile_prac_ciaglych``
+(CountField, utrzymywany triggerem) zamiast ``Count("wydawnictwo_ciagle")``
+liczonego przy każdym naciśnięciu klawisza — zapytanie ma się obyć bez
+JOIN/GROUP BY i trafiać w indeks GIN na ``bpp_autor.search``.
+"""
+
+import statistics
+import time
+
+import pytest
+from django.db import connection
+
+from bpp.models import Autor
+from bpp.tests.util import any_autor, any_ciagle
+from bpp.views.autocomplete.search_services import globalne_wyszukiwanie_autora
+
+LICZBA_AUTOROW_BENCHMARK = 68_000
+
+
+@pytest.mark.django_db
+def test_ile_prac_ciaglych_utrzymywane_triggerem(denorms, jednostka):
+    autor = any_autor()
+    assert autor.ile_prac_ciaglych == 0
+
+    wc = any_ciagle()
+    wc.dodaj_autora(autor, jednostka)
+    any_ciagle().dodaj_autora(autor, jednostka)
+    denorms.flush()
+    autor.refresh_from_db()
+    assert autor.ile_prac_ciaglych == 2
+
+    wc.delete()
+    denorms.flush()
+    autor.refresh_from_db()
+    assert autor.ile_prac_ciaglych == 1
+
+
+@pytest.mark.django_db
+def test_podpowiedzi_bez_joinu_i_sortowane_po_popularnosci(denorms, jednostka):
+    malo = any_autor(nazwisko="Kowalczyk")
+    duzo = any_autor(nazwisko="Kowalski", imiona="Adam")
+    for _ in range(3):
+        any_ciagle().dodaj_autora(duzo, jednostka)
+    any_ciagle().dodaj_autora(malo, jednostka)
+    denorms.flush()
+
+    querysets = []
+    globalne_wyszukiwanie_autora(querysets, "kowal")
+    qs = querysets[-1]
+
+    sql = str(qs.query).upper()
+    assert " JOIN BPP_WYDAWNICTWO_CIAGLE" not in sql
+    assert "GROUP BY" not in sql
+    assert list(qs) == [duzo, malo]
+
+
+@pytest.mark.django_db
+def test_podpowiedzi_puste_zapytanie():
+    any_autor()
+    assert list(Autor.objects.fulltext_podpowiedzi("")) == []
+
+
+def _powiel_autora(wzor, ile):
+    """Kopiuje ``wzor`` ``ile`` razy jednym INSERT ... SELECT (trigger
+    fulltekstowy wypełnia ``search``), z unikalnym nazwiskiem i slugiem."""
+    kolumny = [
+        f.column
+        for f in Autor._meta.concrete_fields
+        if f.column not in ("id", "nazwisko", "slug", "sort", "search", "orcid")
+        and not f.unique
+    ]
+    lista = ", ".join(kolumny)
+    with connection.cursor() as c:
+        c.execute(
+            f"INSERT INTO bpp_autor (nazwisko, slug, {lista}) "
+            f"SELECT 'Nazwisko' || n, 'autor-benchmark-' || n, {lista} "
+            "FROM bpp_autor, generate_series(1, %s) n WHERE id = %s",
+            [ile, wzor.pk],
+        )
+        c.execute("ANALYZE bpp_autor")
+
+
+def _czasy_ms(qs, powtorzen=20):
+    czasy = []
+    for _ in range(powtorzen):
+        start = time.perf_counter()
+        list(qs[:10])
+        czasy.append((time.perf_counter() - start) * 1000)
+    return czasy
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_benchmark_podpowiedzi_autorow():
+    """Benchmark (informacyjnie + sanity): czasy idą na stdout, asercja
+    sprawdza tylko, że plan to skan indeksu bez agregacji."""
+    _powiel_autora(any_autor(nazwisko="Wzorcowy"), LICZBA_AUTOROW_BENCHMARK)
+
+    for fraza in ("naz", "nazwisko1", "nazwisko12345"):
+        qs = Autor.objects.fulltext_podpowiedzi(fraza)
+        czasy = _czasy_ms(qs)
+        print(
+            f"{fraza!r}: mediana {statistics.median(czasy):.2f} ms, "
+            f"max {max(czasy):.2f} ms"
+        )
+
+        with connection.cursor() as c:
+            sql, params = qs[:10].query.sql_with_params()
+            c.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in c.fetchall())
+        assert "Aggregate" not in plan, plan
+        assert "Seq Scan on bpp_autor" not in plan, plan
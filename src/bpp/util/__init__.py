@@ -89,6 +89,8 @@ _XLSX_LAZY_NAMES = frozenset(
         "worksheet_columns_autosize",
         "worksheet_create_table",
         "worksheet_create_urls",
+        "write_only_columns_autosize",
+        "write_only_worksheet_create_table",
     }
 )
 
@@ -170,4 +172,6 @@ __all__ = [
     "worksheet_columns_autosize",
     "worksheet_create_table",
     "worksheet_create_urls",
+    "write_only_columns_autosize",
+    "write_only_worksheet_create_table",
 ]
@@ -1,3 +1,6 @@
+import math
+
+
 def _build_knapsack_table(n, W, wt, val):
     """Build the dynamic programming table for knapsack problem."""
     K = [[0 for x in range(W + 1)] for x in range(n + 1)]
@@ -32,6 +35,108 @@ def _reconstruct_knapsack_items(K, n, W, wt, val, ids):
     return lista
 
 
+def _knapsack_python(W, wt, val, ids, zwracaj_liste_przedmiotow=True):
+    """Pierwotna implementacja plecaka na pełnej tabeli ``(n+1) x (W+1)``.
+
+    Zostaje jako wzorzec (referencja) dla testów równoważności i benchmarku
+    silnika NumPy -- ``knapsack`` z niej nie korzysta.
+    """
+    n = len(wt)
+    K = _build_knapsack_table(n, W, wt, val)
+
+    maks_punkty = K[n][W]
+    lista = []
+
+    if zwracaj_liste_przedmiotow:
+        lista = _reconstruct_knapsack_items(K, n, W, wt, val, ids)
+
+    return maks_punkty, lista
+
+
+def _nwd_mas(wt):
+    """NWD wszystkich mas przedmiotów; 1 gdy którakolwiek masa jest <= 0.
+
+    Sloty skalowane przez ``DEC2INT`` mają zwykle wspólny dzielnik (np. slot
+    0.25 -> 2500), więc podzielenie mas i pojemności plecaka przez NWD
+    zmniejsza szerokość tablicy DP bez wpływu na wynik. Masy zerowe wyłączają
+    to skracanie: oryginalna tablica ma kolumnę ``w == 0`` zawsze zerową,
+    a po skróceniu obejmowałaby ona też pojemności ``1..NWD-1``, w których
+    przedmiot o zerowej masie mógłby się zmieścić.
+    """
+    ret = 0
+    for x in wt:
+        if x <= 0:
+            return 1
+        ret = math.gcd(ret, x)
+        if ret == 1:
+            return 1
+    return ret or 1
+
+
+def _knapsack_numpy(W, wt, val, ids, zwracaj_liste_przedmiotow=True):
+    """Plecak 0/1 jako jednowymiarowe DP na tablicach NumPy.
+
+    Zamiast tablicy ``(n+1) x (W+1)`` trzymany jest jeden wiersz ``dp``
+    nadpisywany kolejno dla każdego przedmiotu. Do odtworzenia listy
+    przedmiotów zapamiętywany jest dla każdego wiersza jedynie spakowany bit
+    „przedmiot poprawił wynik w tej kolumnie" (``np.packbits``), czyli
+    ``n * (W+1) / 8`` bajtów zamiast ``n * (W+1)`` obiektów ``int``. Gdy lista
+    nie jest potrzebna, pamięć jest rzędu ``O(W)``.
+
+    Bit odpowiada dokładnie warunkowi ``K[i][w] != K[i-1][w]`` z
+    ``_reconstruct_knapsack_items``, więc zwracana lista (łącznie z kolejnością
+    i rozstrzyganiem remisów) jest identyczna jak w ``_knapsack_python``.
+    """
+    import numpy as np
+
+    n = len(wt)
+
+    nwd = _nwd_mas(wt)
+    W = W // nwd
+    wt = [x // nwd for x in wt]
+
+    # Punkty są normalnie liczbami całkowitymi (przeskalowanymi przez DEC2INT),
+    # ale zachowujemy zgodność z wywołaniami przekazującymi float.
+    typ = np.int64 if all(isinstance(x, int) for x in val) else np.float64
+    dp = np.zeros(W + 1, dtype=typ)
+    if zwracaj_liste_przedmiotow:
+        bity = np.zeros((n, (W + 8) // 8), dtype=np.uint8)
+
+    for i in range(n):
+        m = wt[i]
+        if m > W:
+            continue
+        # Kolumna w == 0 zawsze zostaje zerowa (jak w _build_knapsack_table).
+        start = max(m, 1)
+        if start > W:
+            continue
+        kandydat = dp[start - m : W + 1 - m] + val[i]
+        poprawa = kandydat > dp[start:]
+        dp[start:] = np.where(poprawa, kandydat, dp[start:])
+
+        if zwracaj_liste_przedmiotow:
+            wiersz = np.zeros(W + 1, dtype=bool)
+            wiersz[start:] = poprawa
+            bity[i] = np.packbits(wiersz)
+
+    maks_punkty = dp[W].item()
+    lista = []
+
+    if zwracaj_liste_przedmiotow:
+        res = maks_punkty
+        w = W
+        for i in range(n - 1, -1, -1):
+            if res <= 0:
+                break
+
+            if bity[i, w >> 3] & (0x80 >> (w & 7)):
+                lista.append(ids[i])
+                res -= val[i]
+                w -= wt[i]
+
+    return maks_punkty, lista
+
+
 def knapsack(W, wt, val, ids, zwracaj_liste_przedmiotow=True):
     """
     :param W: wielkosc plecaka -- maksymalna masa przedmiotów w plecaku (zbierany slot)
@@ -43,6 +148,10 @@ def knapsack(W, wt, val, ids, zwracaj_liste_przedmiotow=True):
 
     :returns: tuple(mp, lista), gdzie mp to maksymalna możliwa wartość włożonych przedmiotów, a lista to lista
     lub pusta lista gdy parametr `zwracaj_liste_przemiotów` był pusty
+
+    Obliczenia wykonuje ``_knapsack_numpy``; numpy importowany jest dopiero
+    przy pierwszym wywołaniu (patrz komentarz o leniwych importach w
+    ``bpp.util``).
     """
 
     assert len(wt) == len(val) == len(ids), "Listy są różnej długości"
@@ -54,16 +163,7 @@ def knapsack(W, wt, val, ids, zwracaj_liste_przedmiotow=True):
             return sum(val), ids
         return sum(val), []
 
-    n = len(wt)
-    K = _build_knapsack_table(n, W, wt, val)
-
-    maks_punkty = K[n][W]
-    lista = []
-
-    if zwracaj_liste_przedmiotow:
-        lista = _reconstruct_knapsack_items(K, n, W, wt, val, ids)
-
-    return maks_punkty, lista
+    return _knapsack_numpy(W, wt, val, ids, zwracaj_liste_przedmiotow)
 
 
 DEC2INT = 10000
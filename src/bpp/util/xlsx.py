@@ -1,3 +1,5 @@
+import warnings
+
 import openpyxl.worksheet.worksheet
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.filters import AutoFilter
@@ -18,13 +20,20 @@ def _extract_hyperlink_text(text):
 
 def _calculate_column_width(col, right_margin, multiplier, max_width):
     """Calculate optimal width for a column based on its content."""
+    return _calculate_width(
+        (cell.value for cell in col), right_margin, multiplier, max_width
+    )
+
+
+def _calculate_width(values, right_margin, multiplier, max_width):
+    """Calculate optimal width for a column based on its values."""
     max_length = 0
 
-    for cell in col:
-        if cell.value is None or not str(cell.value):
+    for value in values:
+        if value is None or not str(value):
             continue
 
-        text = str(cell.value)
+        text = str(value)
         text = _extract_hyperlink_text(text)
 
         max_line_len = max(len(line) for line in text.split("\n"))
@@ -68,6 +77,25 @@ def worksheet_columns_autosize(
         ws.column_dimensions[column].width = adjusted_width
 
 
+def write_only_columns_autosize(
+    ws,
+    rows,
+    max_width: int = 55,
+    right_margin=2,
+    multiplier=1.1,
+):
+    """Odpowiednik `worksheet_columns_autosize` dla arkusza write-only.
+
+    Arkusz write-only nie trzyma komórek, a szerokości kolumn trafiają do
+    pliku przed pierwszym wierszem — liczymy je więc z podanych wierszy
+    (wartości, np. nagłówek i próbka danych) i ustawiamy PRZED `ws.append`.
+    """
+    for ncol, values in enumerate(zip(*rows, strict=False), start=1):
+        ws.column_dimensions[get_column_letter(ncol)].width = _calculate_width(
+            values, right_margin, multiplier, max_width
+        )
+
+
 # Znaki, którymi zaczynający się tekst Excel/LibreOffice interpretuje
 # jako formułę (=, +, -, @) lub jako wstrzyknięcie do innej komórki/komendy
 # poprzez separator (Tab, CR, LF). Pełna lista zaleceń OWASP CSV/Formula
@@ -134,9 +162,34 @@ def worksheet_create_table(
     :param table_columns: określa rodzaj kolumn w tabeli, jeżeli None to tytuły nagłówków zostaną pobrane
     z pierwszego wiersza w arkuszu.
     """
-    max_column = ws.max_column
+    if table_columns is None:
+        table_columns = tuple(
+            TableColumn(id=h, name=header.value)
+            for h, header in enumerate(next(iter(ws.rows), None), start=1)
+        )
+
+    ws.add_table(
+        _table(title, ws.max_column, ws.max_row, first_table_row, totals, table_columns)
+    )
+
+
+def write_only_worksheet_create_table(ws, headers, max_row, title="Tabela"):
+    """`worksheet_create_table` dla arkusza write-only.
+
+    openpyxl nie zna tam zawartości arkusza, więc nagłówki i numer ostatniego
+    wiersza (licząc nagłówek) podajemy jawnie. Wołać przed `workbook.save`.
+    """
+    table_columns = tuple(
+        TableColumn(id=h, name=header) for h, header in enumerate(headers, start=1)
+    )
+    with warnings.catch_warnings():
+        # "In write-only mode you must add table columns manually" — podajemy je
+        warnings.simplefilter("ignore", UserWarning)
+        ws.add_table(_table(title, len(headers), max_row, 1, False, table_columns))
+
+
+def _table(title, max_column, max_row, first_table_row, totals, table_columns):
     max_column_letter = get_column_letter(max_column)
-    max_row = ws.max_row
 
     style = TableStyleInfo(
         name="TableStyleMedium9",
@@ -146,13 +199,7 @@ def worksheet_create_table(
         showColumnStripes=True,
     )
 
-    if table_columns is None:
-        table_columns = tuple(
-            TableColumn(id=h, name=header.value)
-            for h, header in enumerate(next(iter(ws.rows), None), start=1)
-        )
-
-    tab = Table(
+    return Table(
         displayName=title,
         ref=f"A{first_table_row}:{max_column_letter}{max_row}",
         autoFilter=AutoFilter(
@@ -164,8 +211,6 @@ def worksheet_create_table(
         tableColumns=table_columns,
     )
 
-    ws.add_table(tab)
-
 
 def worksheet_create_urls(
     ws: openpyxl.worksheet.worksheet.Worksheet, default_link_name: str = "[link]"
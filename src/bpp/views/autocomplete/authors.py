@@ -50,7 +50,7 @@ class AutorAutocompleteBase(
         )
 
         if self.q:
-            qs = Autor.objects.fulltext_filter(self.q)
+            qs = Autor.objects.fulltext_podpowiedzi(self.q)
         else:
             qs = Autor.objects.all()
 
@@ -244,7 +244,7 @@ class AutorAktualnieZatrudnionyNaUczelni(AutorAutocomplete):
 
     def get_queryset(self):
         if self.q:
-            qs = Autor.objects.fulltext_filter(self.q)
+            qs = Autor.objects.fulltext_podpowiedzi(self.q)
         else:
             qs = Autor.objects.all()
 
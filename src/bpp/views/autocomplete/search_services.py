@@ -1,7 +1,5 @@
 """Global search functions for autocomplete views."""
 
-from django.db.models.aggregates import Count
-
 from bpp import const
 from bpp.models import Jednostka
 from bpp.models.autor import Autor
@@ -74,11 +72,9 @@ def globalne_wyszukiwanie_autora(querysets, q, uczelnia=None):
 
     querysets.append(
         _scope(
-            Autor.objects.fulltext_filter(q)
-            .annotate(Count("wydawnictwo_ciagle"))
+            Autor.objects.fulltext_podpowiedzi(q)
             .only(*AUTOR_ONLY)
             .select_related(*AUTOR_SELECT_RELATED)
-            .order_by("-search__rank", "-wydawnictwo_ciagle__count")
         )
     )
 
@@ -33,9 +33,17 @@ from siteblog.models import Article
 from bpp.models import (
     Autor,
     Jednostka,
+    Patent,
+    Patent_Autor,
+    Praca_Doktorska,
+    Praca_Habilitacyjna,
     Rekord,
     Uczelnia,
+    Wydawnictwo_Ciagle,
+    Wydawnictwo_Ciagle_Autor,
     Wydawnictwo_Ciagle_Streszczenie,
+    Wydawnictwo_Zwarte,
+    Wydawnictwo_Zwarte_Autor,
     Wydzial,
     Zrodlo,
 )
@@ -57,7 +65,15 @@ from bpp.util.uczelnia_scope import (
     scope_rekord_do_uczelni,
     tylko_jedna_uczelnia,
 )
-from bpp.views.cache_publiczny import DOMYSLNY_TTL, _generacja, cache_publiczny
+from bpp.views.cache_publiczny import (
+    DOMYSLNY_TTL,
+    TAG_KAZDA_ZMIANA,
+    WSZYSTKIE,
+    _generacje,
+    cache_publiczny,
+    tag,
+    tagi_dla_modelu,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -321,12 +337,244 @@ def get_available_letters(queryset, field_name):
     return {_CHAR_TO_LITERKA[ch] for ch in first_chars if ch and ch in _CHAR_TO_LITERKA}
 
 
+# ---------------------------------------------------------------------------
+# Tagi stron przeglądania (patrz „TAGI" w ``bpp.views.cache_publiczny``).
+#
+# Listy (autorzy, źródła, jednostki) zależą od całego rodzaju, od kubełka
+# swojej literki i od rządka literek; strona roku — od swojego roku;
+# strona pracy — od swojego rekordu. Funkcje ``tagi_*`` niżej, wołane
+# z ``post_save``/``post_delete``, wyznaczają, które z tych tagów zapis
+# danego obiektu unieważnia.
+# ---------------------------------------------------------------------------
+
+
+def _kubelek_literki(tekst):
+    """Kubełek literki dla początku ``tekst`` (``None`` — strona bez literki).
+
+    Znaki spoza ``LITERKI`` nie mają własnej podstrony, więc trafiają do
+    kubełka strony bez literki.
+    """
+    literka = _CHAR_TO_LITERKA.get(tekst[:1]) if tekst else None
+    return f"litera:{literka or WSZYSTKIE}"
+
+
+def _tagi_listy(rodzaj, literka=None, uczelnia=WSZYSTKIE):
+    """Tagi strony listy: cały rodzaj, kubełek literki, rządek literek."""
+    return [
+        tag(rodzaj, uczelnia=uczelnia),
+        tag(rodzaj, _kubelek_literki(literka), uczelnia),
+        tag(rodzaj, "literki", uczelnia),
+    ]
+
+
+def tagi_listy(rodzaj, per_uczelnia=False):
+    """Funkcja tagów dla ``cache_publiczny(tagi=...)`` i ``Browser.tagi_cache``."""
+
+    def _tagi(request, *args, literka=None, **kwargs):
+        uczelnia = WSZYSTKIE
+        if per_uczelnia:
+            obj = Uczelnia.objects.get_for_request(request)
+            if obj is not None:
+                uczelnia = obj.pk
+        return _tagi_listy(rodzaj, literka, uczelnia)
+
+    return _tagi
+
+
+TAGI_AUTOROW = tagi_listy("autorzy")
+TAGI_ZRODEL = tagi_listy("zrodla")
+TAGI_JEDNOSTEK = tagi_listy("jednostki", per_uczelnia=True)
+
+
+def tagi_lat(request, *args, **kwargs):
+    return [tag("lata")]
+
+
+def tagi_roku(request, rok=None, *args, **kwargs):
+    return [tag("rok"), tag("rok", f"rok:{rok}")]
+
+
+def tagi_pracy(request, *args, model=None, pk=None, **kwargs):
+    try:
+        int(model)
+    except ValueError:
+        try:
+            # Cache ContentType — bez zapytania po pierwszym razie
+            model = ContentType.objects.get_by_natural_key("bpp", model).pk
+        except ContentType.DoesNotExist:
+            pass
+    return [tag("rekord"), tag("rekord", f"{model}:{pk}")]
+
+
+def tagi_pracy_po_slugu(request, *args, slug=None, **kwargs):
+    ret = [tag("rekord"), tag("rekord", f"slug:{slug}")]
+    res = re.search(END_NUMBER_REGEX, slug or "")
+    if res is not None:
+        ret.append(tag("rekord", "{}:{}".format(*res.groups())))
+    return ret
+
+
+def _tagi_literek(rodzaj, zmiana, pole, pola_widocznosci=(), uczelnie=(WSZYSTKIE,)):
+    """Kubełki, w których obiekt jest (i był), oraz — gdy mógł pojawić się
+    lub zniknąć kubełek — rządek literek."""
+    kubelki = {_kubelek_literki(w) for w in zmiana.wartosci(pole)}
+    kubelki.add(_kubelek_literki(None))
+    ret = [tag(rodzaj, k, u) for k in kubelki for u in uczelnie]
+    if len(kubelki) > 2 or zmiana.zmienione(*pola_widocznosci):
+        ret += [tag(rodzaj, "literki", u) for u in uczelnie]
+    return ret
+
+
+def _kubelki(rodzaj, tekst):
+    """Kubełek obiektu i strona bez literki (na której też jest)."""
+    return [tag(rodzaj, _kubelek_literki(tekst)), tag(rodzaj, _kubelek_literki(None))]
+
+
+def _tagi_powiazanego(rodzaj, zmiana, pole, nazwa):
+    """Tagi listy ``rodzaj`` dla obiektu wskazanego przez ``pole`` pracy.
+
+    Listy mogą ukrywać obiekty bez prac. Dodanie lub usunięcie pracy
+    unieważnia kubełek obiektu (``nazwa()`` to jego tekst do literki),
+    przepięcie pracy na inny obiekt — cały rodzaj, żeby nie dociągać z
+    bazy poprzedniego.
+    """
+    if zmiana.przed is not None:
+        return [tag(rodzaj)] if zmiana.zmienione(pole) else []
+    if getattr(zmiana.instance, pole) is None:
+        return []
+    return _kubelki(rodzaj, nazwa())
+
+
+def _tagi_wydawnictw_powiazanych(zmiana, content_type_id):
+    """Strona rozdziału pokazuje wydawnictwo nadrzędne, a strona książki
+    listę jej rozdziałów: zapis rozdziału unieważnia stronę poprzedniego i
+    obecnego wydawnictwa nadrzędnego, a zapis książki — strony rozdziałów."""
+    rekord = zmiana.instance
+    nadrzedne = {
+        pk for pk in zmiana.wartosci("wydawnictwo_nadrzedne_id") if pk is not None
+    }
+    ret = []
+    for pk, slug in Wydawnictwo_Zwarte._base_manager.filter(
+        Q(pk__in=nadrzedne) | Q(wydawnictwo_nadrzedne_id=rekord.pk)
+    ).values_list("pk", "slug"):
+        ret.append(tag("rekord", f"{content_type_id}:{pk}"))
+        if slug:
+            ret.append(tag("rekord", f"slug:{slug}"))
+    return ret
+
+
+@tagi_dla_modelu(Wydawnictwo_Ciagle, pola=("rok", "slug", "zrodlo_id"))
+@tagi_dla_modelu(Wydawnictwo_Zwarte, pola=("rok", "slug", "wydawnictwo_nadrzedne_id"))
+@tagi_dla_modelu(Patent, pola=("rok", "slug"))
+@tagi_dla_modelu(Praca_Doktorska, Praca_Habilitacyjna, pola=("rok", "slug", "autor_id"))
+def tagi_rekordu(zmiana):
+    rekord = zmiana.instance
+    content_type_id = ContentType.objects.get_for_model(rekord).pk
+    ret = [tag("rekord", f"{content_type_id}:{rekord.pk}")]
+    ret += [tag("rekord", f"slug:{s}") for s in zmiana.wartosci("slug") if s]
+
+    lata = {r for r in zmiana.wartosci("rok") if r is not None}
+    ret += [tag("rok", f"rok:{r}") for r in lata]
+    if zmiana.zmienione("rok"):
+        # Liczby prac na ``/bpp/lata/`` i linki „poprzedni/następny rok"
+        ret.append(tag("lata"))
+        ret += [tag("rok", f"rok:{r + d}") for r in lata for d in (-1, 1)]
+
+    if hasattr(rekord, "zrodlo_id"):
+        ret += _tagi_powiazanego(
+            "zrodla", zmiana, "zrodlo_id", lambda: rekord.zrodlo.nazwa
+        )
+    if isinstance(rekord, Wydawnictwo_Zwarte):
+        ret += _tagi_wydawnictw_powiazanych(zmiana, content_type_id)
+    if hasattr(rekord, "autor_id"):
+        ret += _tagi_powiazanego(
+            "autorzy", zmiana, "autor_id", lambda: rekord.autor.nazwisko
+        )
+    return ret
+
+
+@tagi_dla_modelu(
+    Wydawnictwo_Ciagle_Autor,
+    Wydawnictwo_Zwarte_Autor,
+    Patent_Autor,
+    pola=("autor_id", "jednostka_id"),
+)
+def tagi_autorstwa(zmiana):
+    """Autorstwo zmienia stronę rekordu, jego rok i listę autorów.
+
+    Rządka literek autorów NIE unieważniamy: nowa literka pojawia się tu
+    tylko wtedy, gdy pierwsza praca autora zaczyna ją na liście ukrywającej
+    autorów bez prac — to odświeży TTL.
+    """
+    wa = zmiana.instance
+    model = type(wa)
+    if model.rekord.is_cached(wa):
+        rok, slug = wa.rekord.rok, wa.rekord.slug
+    else:
+        stan = (
+            model.rekord.field.related_model._base_manager.filter(pk=wa.rekord_id)
+            .values("rok", "slug")
+            .first()
+        ) or {"rok": None, "slug": None}
+        rok, slug = stan["rok"], stan["slug"]
+
+    content_type_id = ContentType.objects.get_for_model(
+        model.rekord.field.related_model
+    ).pk
+    ret = [
+        tag("rekord", f"{content_type_id}:{wa.rekord_id}"),
+        tag("rekord", f"slug:{slug}"),
+        tag("rok", f"rok:{rok}"),
+        # Zakres uczelni (multi-host) idzie po jednostkach autorstw
+        tag("lata"),
+    ]
+    ret += _tagi_powiazanego("autorzy", zmiana, "autor_id", lambda: wa.autor.nazwisko)
+    if zmiana.przed is not None and zmiana.zmienione("jednostka_id"):
+        # Widoczność autora na liście zależy od uczelni jednostki
+        ret += _kubelki("autorzy", wa.autor.nazwisko)
+    return ret
+
+
+@tagi_dla_modelu(Autor, pola=("nazwisko", "imiona", "pokazuj", "aktualna_jednostka_id"))
+def tagi_autora(zmiana):
+    ret = _tagi_literek(
+        "autorzy", zmiana, "nazwisko", ("pokazuj", "aktualna_jednostka_id")
+    )
+    if zmiana.zmienione("nazwisko", "imiona"):
+        # Nazwisko widać na stronach prac
+        ret += [tag("rekord"), tag("rok")]
+    return ret
+
+
+@tagi_dla_modelu(Zrodlo, pola=("nazwa",))
+def tagi_zrodla(zmiana):
+    ret = _tagi_literek("zrodla", zmiana, "nazwa")
+    if zmiana.zmienione("nazwa"):
+        ret += [tag("rekord"), tag("rok")]
+    return ret
+
+
+@tagi_dla_modelu(
+    Jednostka, pola=("nazwa", "uczelnia_id", "widoczna", "wydzial_id", "parent_id")
+)
+@tagi_dla_modelu(Wydzial, pola=("nazwa", "uczelnia_id"))
+def tagi_jednostki(zmiana):
+    """Jednostki uczelni (i host bez uczelni); nazwa — także listę autorów."""
+    uczelnie = {*zmiana.wartosci("uczelnia_id"), WSZYSTKIE}
+    ret = [tag("jednostki", uczelnia=u) for u in uczelnie]
+    if zmiana.zmienione("nazwa"):
+        ret.append(tag("autorzy"))
+        if isinstance(zmiana.instance, Jednostka):
+            ret.append(tag("rekord"))
+    return ret
+
+
 #: Prefiks kluczy zliczeń — celowo inny niż ``cache_publiczny.PREFIKS``,
-#: żeby dało się je rozróżnić w Redisie, ale generacja jest ta SAMA.
+#: żeby dało się je rozróżnić w Redisie, ale generacje są te SAME.
 PREFIKS_ZLICZEN = "bpp-zliczenia:v1"
 
 
-def _klucz_zliczenia(request, etykieta):
+def _klucz_zliczenia(request, etykieta, tagi=None):
     """Klucz cache'a dla zliczenia strony przeglądania.
 
     ``request.get_host()`` jest składnikiem KRYTYCZNYM — to on izoluje
@@ -334,16 +582,19 @@ def _klucz_zliczenia(request, etykieta):
     ``cache_publiczny._klucz``). Bez niego licznik autorów jednej uczelni
     pokazałby się na stronie drugiej.
 
-    Znacznik generacji sprawia, że zapis ``Autor``/``Jednostka``/``Zrodlo``
+    Znaczniki generacji sprawiają, że zapis ``Autor``/``Jednostka``/``Zrodlo``
     unieważnia zliczenia NATYCHMIAST — te modele są w
-    ``BppConfig.MODELE_INWALIDUJACE_CACHE_PUBLICZNY``, więc bumpują tę samą
-    generację, której używa cache całych stron.
+    ``BppConfig.MODELE_INWALIDUJACE_CACHE_PUBLICZNY``, więc bumpują te same
+    tagi (``tagi``, domyślnie ``TAG_KAZDA_ZMIANA``), których używa cache
+    całych stron.
     """
-    surowy = "|".join([str(_generacja()), request.get_host().lower(), etykieta])
+    if tagi is None:
+        tagi = [TAG_KAZDA_ZMIANA]
+    surowy = "|".join([*_generacje(tagi), request.get_host().lower(), etykieta])
     return f"{PREFIKS_ZLICZEN}:{hashlib.sha256(surowy.encode('utf-8')).hexdigest()}"
 
 
-def zliczenie_z_cache(request, etykieta, oblicz):
+def zliczenie_z_cache(request, etykieta, oblicz, tagi=None):
     """Policz raz i zapamiętaj — dla zliczeń niebędących treścią strony.
 
     Dotyczy ``paginator.count`` i rządka literek: obie wartości są
@@ -365,7 +616,7 @@ def zliczenie_z_cache(request, etykieta, oblicz):
     if not hasattr(request, "get_host"):
         return oblicz()
 
-    klucz = _klucz_zliczenia(request, etykieta)
+    klucz = _klucz_zliczenia(request, etykieta, tagi)
     wartosc = cache.get(klucz)
     if wartosc is None:
         wartosc = oblicz()
@@ -397,6 +648,8 @@ class Browser(ListView):
     param = None
     literka_field = None
     paginate_by = 40
+    #: ``tagi_listy(...)`` — te same tagi, co w ``cache_publiczny`` widoku
+    tagi_cache = None
 
     def setup(self, request, *args, **kwargs):
         """Zapamiętaj wybraną literkę ZANIM ktokolwiek ruszy ``self.kwargs``.
@@ -488,12 +741,16 @@ class Browser(ListView):
             return super().get_paginator(queryset, per_page, *args, **kwargs)
 
         etykieta = f"{type(self).__name__}:count:{self.get_literka() or ''}"
+        tagi = self._tagi_cache()
         return PaginatorZeZliczeniemZCache(
             queryset,
             per_page,
             *args,
             licz_count=lambda: zliczenie_z_cache(
-                self.request, etykieta, lambda: queryset.count()
+                self.request,
+                etykieta,
+                lambda: queryset.count(),
+                tagi[:2] if tagi else None,
             ),
             **kwargs,
         )
@@ -505,12 +762,20 @@ class Browser(ListView):
         rządek pokazuje ten sam zestaw na każdej podstronie, więc jeden
         wpis na host obsługuje je wszystkie.
         """
+        tagi = self._tagi_cache()
         return zliczenie_z_cache(
             self.request,
             f"{type(self).__name__}:literki",
             lambda: get_available_letters(base_qry, self.literka_field),
+            [tagi[0], tagi[2]] if tagi else None,
         )
 
+    def _tagi_cache(self):
+        """Cały rodzaj, kubełek literki i rządek — z ``tagi_cache``."""
+        if self.tagi_cache is None:
+            return None
+        return self.tagi_cache(self.request, literka=self.get_literka())
+
     def get_context_data(self, **kw):
         return super().get_context_data(
             flt=self.request.GET.get(self.param),
@@ -571,8 +836,9 @@ class Browser(ListView):
                 raise
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=TAGI_AUTOROW), name="dispatch")
 class AutorzyView(Browser):
+    tagi_cache = staticmethod(TAGI_AUTOROW)
     template_name = "browse/autorzy_modern_bordered.html"
     model = Autor
     param = "search"
@@ -665,8 +931,9 @@ class AutorzyView(Browser):
         return context
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=TAGI_ZRODEL), name="dispatch")
 class ZrodlaView(Browser):
+    tagi_cache = staticmethod(TAGI_ZRODEL)
     template_name = "browse/zrodla.html"
     model = Zrodlo
     param = "search"
@@ -715,8 +982,9 @@ class ZrodlaView(Browser):
         return context
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=TAGI_JEDNOSTEK), name="dispatch")
 class JednostkiView(Browser):
+    tagi_cache = staticmethod(TAGI_JEDNOSTEK)
     template_name = "browse/jednostki.html"
     model = Jednostka
     param = "search"
@@ -781,7 +1049,7 @@ class ZrodloView(DetailView):
         return context
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=tagi_lat), name="dispatch")
 class LataView(ListView):
     template_name = "browse/lata.html"
     context_object_name = "years"
@@ -828,7 +1096,7 @@ class LataView(ListView):
         return context
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=tagi_roku), name="dispatch")
 class RokView(ListView):
     template_name = "browse/rok.html"
     model = Rekord
@@ -1033,7 +1301,7 @@ class PracaViewMixin:
 END_NUMBER_REGEX = re.compile(r"(?P<content_type_id>\d+)-(?P<object_id>\d+)$")
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=tagi_pracy_po_slugu), name="dispatch")
 class PracaViewBySlug(PracaViewMixin, DetailView):
     template_name = "browse/praca.html"
     model = Rekord
@@ -1064,7 +1332,7 @@ class PracaViewBySlug(PracaViewMixin, DetailView):
         raise Http404
 
 
-@method_decorator(cache_publiczny(), name="dispatch")
+@method_decorator(cache_publiczny(tagi=tagi_pracy), name="dispatch")
 class PracaView(PracaViewMixin, DetailView):
     template_name = "browse/praca.html"
     model = Rekord
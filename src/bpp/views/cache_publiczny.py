@@ -54,6 +54,33 @@ Klucz zawiera numer generacji (``_generacja``) trzymany w cache'u.
 ``post_save``/``post_delete`` modeli redagowanych w adminie, więc zapis
 publikacji unieważnia cache NATYCHMIAST (bez enumerowania kluczy).
 
+TAGI
+====
+
+Jedna generacja na wszystko sprawiała, że każdy zapis w adminie zerował
+cały cache — w godzinach pracy redakcji hit-rate ``/bpp/autorzy/`` i
+spółki spadał do zera. Dlatego klucz strony składa się także z generacji
+jej TAGÓW (``tag(rodzaj, kubełek, uczelnia)``), np. „autorzy na literę
+K", „rok 2023", „rekord 14:1234". Widok deklaruje tagi w
+``cache_publiczny(tagi=...)``, a model — funkcją zarejestrowaną przez
+``tagi_dla_modelu`` — które tagi unieważnia jego zapis. Zapis publikacji
+unieważnia więc tylko strony, na których może się ona pojawić.
+
+Modele bez zarejestrowanych tagów (słowniki, ``Uczelnia``) nadal
+podbijają generację globalną — zmiana nazwy charakteru formalnego może
+zmienić dowolną stronę. Strona bez zadeklarowanych tagów zależy od
+``TAG_KAZDA_ZMIANA``, podbijanego przy każdym unieważnieniu.
+
+Żeby zmiana roku czy nazwiska unieważniła też stronę, na której obiekt
+był DOTĄD, ``zapamietaj_stan_przed_zapisem`` (``pre_save``) odczytuje
+z bazy poprzednie wartości pól wskazanych przy rejestracji.
+
+Liczniki trafień, chybień i unieważnień na rodzaj tagu (kubełki i
+pojedyncze rekordy są sumowane, żeby liczników nie było setki tysięcy)
+zwraca ``statystyki_cache_publicznego``; pokazuje je komenda
+``statystyki_cache_publicznego``. Wyłącza je
+``settings.BPP_CACHE_PUBLICZNY_LICZNIKI = False``.
+
 ``DOMYSLNY_TTL`` jest tylko siatką bezpieczeństwa na zmiany, których
 sygnały nie łapią: ``QuerySet.update()``, ``bulk_create``, importery
 masowe i triggery SQL. Stąd 10 minut, a nie doba z
@@ -62,11 +89,14 @@ masowe i triggery SQL. Stąd 10 minut, a nie doba z
 
 import hashlib
 import logging
+from dataclasses import dataclass
 from functools import wraps
 from uuid import uuid4
 
+from django.conf import settings
 from django.core.cache import cache
 from django.db import transaction
+from django.db.models.signals import post_delete
 from django.http import HttpResponse, HttpResponseNotModified
 from django.utils.cache import patch_cache_control
 from django.utils.translation import get_language
@@ -115,6 +145,7 @@ def _generacja():
 def _wykonaj_bump():
     """Ustaw nową, nigdy wcześniej nieużytą generację."""
     cache.set(_KLUCZ_GENERACJI, uuid4().hex, None)
+    _zlicz("bump", [WSZYSTKIE])
 
 
 def _bump_juz_zaplanowany(polaczenie):
@@ -127,10 +158,13 @@ def _bump_juz_zaplanowany(polaczenie):
     return any(_wykonaj_bump in wpis for wpis in polaczenie.run_on_commit)
 
 
-def uniewaznij_cache_publiczny(sender=None, **kwargs):
+def uniewaznij_cache_publiczny(sender=None, instance=None, **kwargs):
     """Unieważnij CAŁY publiczny cache HTTP (nowa generacja).
 
-    Receiver ``post_save``/``post_delete``. Stare wpisy zostają w
+    Receiver ``post_save``/``post_delete``. Dla modeli z
+    ``tagi_dla_modelu`` unieważnia tylko tagi wyznaczone przez
+    zarejestrowaną funkcję (patrz „TAGI" w docstringu modułu), dla
+    pozostałych — wszystko. Stare wpisy zostają w
     backendzie, ale ich klucz zawiera poprzednią generację, więc nikt ich
     już nie trafi; wygasną same po TTL.
 
@@ -143,6 +177,14 @@ def uniewaznij_cache_publiczny(sender=None, **kwargs):
     * koszt — importer zapisujący 100 tys. wierszy w jednym bloku
       ``atomic`` robi jedno unieważnienie, a nie 100 tys. round-tripów.
     """
+    wpis = _TAGI_MODELI.get(sender)
+    if wpis is not None and instance is not None:
+        przed = instance.__dict__.pop(_STAN_PRZED, None)
+        if kwargs.get("created") or kwargs.get("signal") is post_delete:
+            przed = None
+        uniewaznij_tagi(wpis[0](Zmiana(instance, przed)))
+        return
+
     polaczenie = transaction.get_connection()
     if _bump_juz_zaplanowany(polaczenie):
         return
@@ -150,6 +192,183 @@ def uniewaznij_cache_publiczny(sender=None, **kwargs):
     transaction.on_commit(_wykonaj_bump)
 
 
+# ---------------------------------------------------------------------------
+# TAGI
+# ---------------------------------------------------------------------------
+
+#: Kubełek/uczelnia „wszystkie".
+WSZYSTKIE = "*"
+
+#: Rodzaje tagów, dla których prowadzimy liczniki (``WSZYSTKIE`` to strony
+#: bez zadeklarowanych tagów i unieważnienia globalne).
+RODZAJE = (WSZYSTKIE, "autorzy", "zrodla", "jednostki", "lata", "rok", "rekord")
+
+ZDARZENIA = ("hit", "miss", "bump")
+
+
+def tag(rodzaj, kubelek=WSZYSTKIE, uczelnia=WSZYSTKIE):
+    """Tag zależności strony.
+
+    ``tag(rodzaj)`` to wszystkie strony danego rodzaju — strona listy
+    zależy zarówno od niego, jak i od swojego kubełka, więc unieważnienie
+    całego rodzaju nie wymaga wyliczania kubełków.
+    """
+    return f"{uczelnia}|{rodzaj}|{kubelek}"
+
+
+#: Zależność stron, które nie zadeklarowały tagów.
+TAG_KAZDA_ZMIANA = tag(WSZYSTKIE)
+
+
+def _rodzaj(tag_):
+    return tag_.split("|", 2)[1]
+
+
+def _klucz_tagu(tag_):
+    return f"{PREFIKS}:tag:{tag_}"
+
+
+def _generacje(tagi):
+    """Generacja globalna i generacje ``tagi`` — jednym ``get_many``.
+
+    Brakującym tagom (pierwsze użycie, eksmisja) nadajemy nowy, losowy
+    znacznik — z tych samych powodów co w ``_generacja``.
+    """
+    klucze = [_KLUCZ_GENERACJI, *(_klucz_tagu(t) for t in tagi)]
+    znane = cache.get_many(klucze)
+    brakujace = {k: uuid4().hex for k in klucze if k not in znane}
+    if brakujace:
+        cache.set_many(brakujace, None)
+        znane.update(brakujace)
+    return [znane[k] for k in klucze]
+
+
+class _BumpTagow:
+    """Callback ``on_commit`` zbierający tagi unieważnione w transakcji.
+
+    Jak w ``uniewaznij_cache_publiczny``: jeden callback na transakcję,
+    odnajdywany w ``run_on_commit`` (które Django czyści przy rollbacku).
+    Tagi dopisane do callbacku zarejestrowanego w savepoincie, który
+    potem zatwierdzono, a następny wycofano, zostają — to najwyżej
+    nadmiarowe unieważnienie.
+    """
+
+    def __init__(self):
+        self.tagi = set()
+
+    def __call__(self):
+        cache.set_many({_klucz_tagu(t): uuid4().hex for t in self.tagi}, None)
+        _zlicz("bump", {_rodzaj(t) for t in self.tagi})
+
+
+def uniewaznij_tagi(tagi):
+    """Unieważnij strony zależne od ``tagi`` po zatwierdzeniu transakcji."""
+    tagi = {*tagi, TAG_KAZDA_ZMIANA}
+    for wpis in transaction.get_connection().run_on_commit:
+        for element in wpis:
+            if isinstance(element, _BumpTagow):
+                element.tagi.update(tagi)
+                return
+    bump = _BumpTagow()
+    bump.tagi.update(tagi)
+    # Poza blokiem ``atomic`` ``on_commit`` wykonuje się natychmiast.
+    transaction.on_commit(bump)
+
+
+def _zlicz(zdarzenie, rodzaje):
+    if not getattr(settings, "BPP_CACHE_PUBLICZNY_LICZNIKI", True):
+        return
+    for rodzaj in rodzaje:
+        klucz = f"{PREFIKS}:licznik:{rodzaj}:{zdarzenie}"
+        try:
+            cache.incr(klucz)
+        except ValueError:
+            # Pierwsze zdarzenie (albo eksmisja licznika).
+            cache.add(klucz, 1, None)
+
+
+def statystyki_cache_publicznego():
+    """``{rodzaj: {"hit": n, "miss": n, "bump": n}}`` dla ``RODZAJE``."""
+    klucze = {
+        (rodzaj, zdarzenie): f"{PREFIKS}:licznik:{rodzaj}:{zdarzenie}"
+        for rodzaj in RODZAJE
+        for zdarzenie in ZDARZENIA
+    }
+    wartosci = cache.get_many(klucze.values())
+    return {
+        rodzaj: {
+            zdarzenie: wartosci.get(klucze[(rodzaj, zdarzenie)], 0)
+            for zdarzenie in ZDARZENIA
+        }
+        for rodzaj in RODZAJE
+    }
+
+
+@dataclass
+class Zmiana:
+    """Zapis lub usunięcie obiektu, z wartościami pól sprzed zapisu.
+
+    ``przed`` jest ``None`` dla nowego i usuniętego obiektu — wtedy każde
+    pole uznajemy za zmienione.
+    """
+
+    instance: object
+    przed: dict | None = None
+
+    def wartosci(self, pole):
+        """Wartość bieżąca i (gdy inna) poprzednia."""
+        ret = {getattr(self.instance, pole)}
+        if self.przed is not None:
+            ret.add(self.przed[pole])
+        return ret
+
+    def zmienione(self, *pola):
+        if self.przed is None:
+            return True
+        return any(self.przed[p] != getattr(self.instance, p) for p in pola)
+
+
+#: model -> (funkcja(Zmiana) -> tagi, pola zapamiętywane przed zapisem)
+_TAGI_MODELI = {}
+
+
+def tagi_dla_modelu(*modele, pola=()):
+    """Dekorator: funkcja wyznacza tagi unieważniane zapisem ``modele``.
+
+    ``pola`` (nazwy atrybutów, np. ``"zrodlo_id"``) odczytujemy z bazy
+    przed zapisem, żeby funkcja mogła unieważnić też strony, na których
+    obiekt był dotąd.
+    """
+
+    def dekorator(funkcja):
+        for model in modele:
+            _TAGI_MODELI[model] = (funkcja, tuple(pola))
+        return funkcja
+
+    return dekorator
+
+
+_STAN_PRZED = "_cache_publiczny_stan_przed"
+
+
+def zapamietaj_stan_przed_zapisem(sender, instance, raw=False, **kwargs):
+    """Receiver ``pre_save``: poprzednie wartości pól z ``tagi_dla_modelu``."""
+    wpis = _TAGI_MODELI.get(sender)
+    if wpis is None or not wpis[1] or raw or instance.pk is None:
+        return
+
+    _funkcja, pola = wpis
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {
+        sender._meta.get_field(p).name for p in pola
+    } & set(update_fields):
+        # Zapis nie dotyka tych pól — bez zapytania.
+        stan = {p: getattr(instance, p) for p in pola}
+    else:
+        stan = sender._base_manager.filter(pk=instance.pk).values(*pola).first()
+    instance.__dict__[_STAN_PRZED] = stan
+
+
 #: Nazwa ciasteczka zgody na ciasteczka (pakiet ``cookielaw``).
 _CIASTECZKO_ZGODY = "cookielaw_accepted"
 
@@ -195,8 +414,10 @@ def _stan_zgody(request):
     return "odmowa"
 
 
-def _klucz(request):
-    """Klucz cache'a: generacja + HOST + zgoda + język + metoda + ścieżka.
+def _klucz(request, tagi=None):
+    """Klucz cache'a: generacje + HOST + zgoda + język + metoda + ścieżka.
+
+    ``tagi`` to zależności strony (domyślnie ``TAG_KAZDA_ZMIANA``).
 
     ``request.get_host()`` jest tu składnikiem KRYTYCZNYM — to on
     izoluje uczelnie od siebie (patrz docstring modułu). Nie usuwaj go
@@ -205,9 +426,11 @@ def _klucz(request):
     ``_stan_zgody`` jest krytyczny z innego powodu — patrz
     ``test_cache_nie_przenosi_zgody_miedzy_odwiedzajacymi``.
     """
+    if tagi is None:
+        tagi = [TAG_KAZDA_ZMIANA]
     surowy = "|".join(
         [
-            str(_generacja()),
+            *_generacje(tagi),
             # Nazwy hostów są case-insensitive — bez ``lower()``
             # ``Uczelnia1.localhost`` i ``uczelnia1.localhost`` robiłyby
             # dwa wpisy na tę samą stronę (marnotrawstwo, nie wyciek).
@@ -292,9 +515,14 @@ def _odtworz(request, zapamietane):
     return odpowiedz
 
 
-def cache_publiczny(ttl=DOMYSLNY_TTL):
+def cache_publiczny(ttl=DOMYSLNY_TTL, tagi=None):
     """Zapamiętaj odpowiedź publicznego widoku przeglądania dla anonima.
 
+    ``tagi(request, *args, **kwargs)`` zwraca tagi, od których zależy
+    strona (pierwszy wyznacza rodzaj w licznikach trafień); bez nich
+    strona zależy od ``TAG_KAZDA_ZMIANA``. Tagi muszą dać się wyznaczyć
+    bez zapytań do bazy — liczymy je przy każdym trafieniu.
+
     Używaj TYLKO na widokach, których wyrenderowana dla anonima treść
     zależy wyłącznie od (host, ścieżka, query string, język) — czyli na
     deterministycznych stronach przeglądania. Zalogowani przechodzą obok
@@ -313,15 +541,21 @@ def cache_publiczny(ttl=DOMYSLNY_TTL):
             if not _mozna_cachowac_zadanie(request):
                 return view_func(request, *args, **kwargs)
 
-            klucz = _klucz(request)
+            tagi_strony = (
+                list(tagi(request, *args, **kwargs)) if tagi else [TAG_KAZDA_ZMIANA]
+            )
+            rodzaj = _rodzaj(tagi_strony[0])
+            klucz = _klucz(request, tagi_strony)
             zapamietane = cache.get(klucz)
             if zapamietane is not None:
+                _zlicz("hit", [rodzaj])
                 odpowiedz = _odtworz(request, zapamietane)
                 patch_cache_control(
                     odpowiedz, private=True, max_age=0, must_revalidate=True
                 )
                 return odpowiedz
 
+            _zlicz("miss", [rodzaj])
             odpowiedz = view_func(request, *args, **kwargs)
             odpowiedz["X-BPP-Cache"] = "MISS"
 
@@ -2,14 +2,21 @@
 
 Wydzielone z bpp/views/mymultiseek.py — widok trzyma routing i stan sesji,
 ten moduł zamienia queryset Rekordów na gotową odpowiedź HTTP z plikiem.
+
+Eksport danych (CSV / XLSX) ma stałe zużycie pamięci niezależnie od liczby
+wierszy: CSV idzie porcjami przez StreamingHttpResponse, XLSX pisze openpyxl
+w trybie write-only do pliku tymczasowego. Te same funkcje zapisu (write_csv,
+write_xlsx) obsługują eksport w tle (bpp.models.multiseek.EksportMultiseek).
 """
 
 import csv
 import html
 import io
+import itertools
 import re
+import tempfile
 
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.utils.html import strip_tags
 from django.utils.http import content_disposition_header
@@ -94,6 +101,17 @@ XLSX_WORKSHEET_TITLE_INVALID_CHARS_RE = re.compile(
 )
 SPREADSHEET_FORMULA_INJECTION_LEAD = ("=", "+", "-", "@", "\t", "\r", "\n")
 
+CSV_CONTENT_TYPE = "text/csv; charset=utf-8"
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# CSV wysyłamy porcjami ~64 KiB tekstu — nie wiersz po wierszu (tysiące
+# drobnych zapisów do gniazda) i nie w całości (pamięć rośnie z eksportem).
+CSV_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Szerokości kolumn arkusza write-only muszą być znane przed pierwszym
+# wierszem — liczymy je z nagłówka i tylu początkowych wierszy danych.
+XLSX_AUTOSIZE_SAMPLE_ROWS = 500
+
 
 def _export_value(value):
     if value is None:
@@ -161,19 +179,31 @@ def _pbn_publication_url(pbn_uid_id, pbn_api_root):
     )
 
 
-def _admin_change_url(rekord, request):
+def _admin_change_url(rekord, absolute_uri):
     content_type = rekord.content_type
     url = reverse(
         f"admin:{content_type.app_label}_{content_type.model}_change",
         args=(rekord.object_id,),
     )
-    return request.build_absolute_uri(url)
+    return absolute_uri(url)
 
 
-def _iter_export_rows(queryset, request):
+def export_links(request):
+    """(absolute_uri, pbn_api_root) — to, czego wiersze eksportu 'dane'
+    potrzebują z żądania HTTP. Eksport w tle zapamiętuje te wartości
+    w chwili zlecenia, bo worker Celery żądania nie ma."""
     uczelnia = Uczelnia.objects.get_for_request(request)
     pbn_api_root = uczelnia.pbn_api_root if uczelnia is not None else ""
+    return request.build_absolute_uri, pbn_api_root
+
 
+def export_rows(queryset, wariant, absolute_uri, pbn_api_root):
+    if wariant == "opis":
+        return _iter_export_rows_opis(queryset)
+    return _iter_export_rows(queryset, absolute_uri, pbn_api_root)
+
+
+def _iter_export_rows(queryset, absolute_uri, pbn_api_root):
     for rekord in queryset.iterator(chunk_size=1000):
         zrodlo = rekord.zrodlo
         typ_kbn = rekord.typ_kbn
@@ -189,13 +219,13 @@ def _iter_export_rows(queryset, request):
             typ_kbn.nazwa if typ_kbn is not None else "",
             rekord.object_id,
             _export_value(rekord.pbn_uid_id),
-            request.build_absolute_uri(rekord.get_absolute_url()),
-            _admin_change_url(rekord, request),
+            absolute_uri(rekord.get_absolute_url()),
+            _admin_change_url(rekord, absolute_uri),
             _pbn_publication_url(rekord.pbn_uid_id, pbn_api_root),
         )
 
 
-def _iter_export_rows_opis(queryset, request):
+def _iter_export_rows_opis(queryset):
     for lp, rekord in enumerate(queryset.iterator(chunk_size=1000), start=1):
         charakter = rekord.charakter_formalny
         typ_kbn = rekord.typ_kbn
@@ -214,18 +244,12 @@ def _xlsx_columns_where(headers, predicate):
     return [i for i, h in enumerate(headers, start=1) if predicate(h)]
 
 
-def _apply_xlsx_number_format(worksheet, columns, number_format):
-    for col in columns:
-        for row in worksheet.iter_rows(min_row=2, min_col=col, max_col=col):
-            row[0].number_format = number_format
-
-
-def _apply_xlsx_hyperlinks(worksheet, url_cols):
-    for row_idx in range(2, worksheet.max_row + 1):
-        for col_idx in url_cols:
-            cell = worksheet.cell(row=row_idx, column=col_idx)
-            if cell.value:
-                cell.value = f'=HYPERLINK("{cell.value}", "[link]")'
+def _xlsx_hyperlinks(row, url_cols):
+    """Wartości kolumn z adresami -> formuły =HYPERLINK (0-based indeksy)."""
+    for idx in url_cols:
+        if row[idx]:
+            row[idx] = f'=HYPERLINK("{row[idx]}", "[link]")'
+    return row
 
 
 # Allowlist dla nh3.clean treści dokumentu eksportu (D8). Unia (nie podzbiór)
@@ -323,15 +347,31 @@ def bibtex_export_response(queryset, report_title):
     return response
 
 
-def csv_export_response(queryset, request, report_title):
-    output = io.StringIO()
-    writer = csv.writer(output)
+def iter_csv(rows):
+    """Nagłówek i wiersze eksportu 'dane' jako porcje tekstu CSV."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
     writer.writerow(MULTISEEK_EXPORT_HEADERS)
-    writer.writerows(
-        _sanitize_spreadsheet_row(row) for row in _iter_export_rows(queryset, request)
-    )
+    for row in rows:
+        writer.writerow(_sanitize_spreadsheet_row(row))
+        if buffer.tell() >= CSV_STREAM_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_csv(fileobj, rows):
+    """Zapis CSV do pliku binarnego (eksport w tle)."""
+    for chunk in iter_csv(rows):
+        fileobj.write(chunk.encode("utf-8"))
 
-    response = HttpResponse(output.getvalue(), content_type="text/csv; charset=utf-8")
+
+def csv_export_response(queryset, request, report_title):
+    # Wiersze czytane leniwie podczas wysyłania odpowiedzi — w pamięci jest
+    # najwyżej jedna porcja CSV i jedna porcja kursora (iterator()).
+    rows = _iter_export_rows(queryset, *export_links(request))
+    response = StreamingHttpResponse(iter_csv(rows), content_type=CSV_CONTENT_TYPE)
     response["Content-Disposition"] = content_disposition_header(
         as_attachment=True,
         filename=_export_filename("csv", report_title),
@@ -339,66 +379,100 @@ def csv_export_response(queryset, request, report_title):
     return response
 
 
-def xlsx_export_response(queryset, request, report_title, wariant="dane"):
+def write_xlsx(fileobj, rows, report_title, wariant="dane"):
+    """Zapis arkusza eksportu do ``fileobj`` w trybie write-only openpyxl.
+
+    Wiersze nie lądują w drzewie komórek w pamięci, tylko od razu w pliku
+    tymczasowym openpyxl, więc to, co zwykły Workbook poprawiał po fakcie
+    (style, formaty liczb, hiperłącza, szerokości kolumn, tabela), ustawiamy
+    tu przy dopisywaniu wiersza albo z góry.
+    """
     from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Alignment, Font, PatternFill
 
     from bpp.util import (
         sanitize_xlsx_row,
-        worksheet_columns_autosize,
-        worksheet_create_table,
+        write_only_columns_autosize,
+        write_only_worksheet_create_table,
     )
 
     if wariant == "opis":
         headers = MULTISEEK_EXPORT_OPIS_XLSX_HEADERS
-        rows = _iter_export_rows_opis(queryset, request)
         freeze = "A2"
     else:
         headers = MULTISEEK_EXPORT_XLSX_HEADERS
-        rows = _iter_export_rows(queryset, request)
         freeze = "B1"
 
-    workbook = Workbook()
-    worksheet = workbook.active
-    worksheet.title = _xlsx_worksheet_title(report_title)
-    worksheet.append(headers)
-    for row in rows:
-        worksheet.append(sanitize_xlsx_row(row))
+    # indeksy 0-based (pozycja w wierszu), w przeciwieństwie do kolumn arkusza
+    url_cols = [
+        c - 1 for c in _xlsx_columns_where(headers, lambda h: h.startswith("Link"))
+    ]
+    number_formats = {
+        c - 1: "0.000"
+        for c in _xlsx_columns_where(headers, lambda h: h in ("Impact Factor", "IF"))
+    }
+    number_formats.update(
+        {c - 1: "0.00" for c in _xlsx_columns_where(headers, lambda h: h == "PK")}
+    )
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(_xlsx_worksheet_title(report_title))
+    worksheet.freeze_panes = freeze
+
+    rows = (_xlsx_hyperlinks(sanitize_xlsx_row(row), url_cols) for row in rows)
+    sample = list(itertools.islice(rows, XLSX_AUTOSIZE_SAMPLE_ROWS))
+    write_only_columns_autosize(worksheet, [headers, *sample])
 
     header_fill = PatternFill("solid", fgColor="1F4E78")
     header_font = Font(color="FFFFFF", bold=True)
-    for cell in worksheet[1]:
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    header_row = []
+    for value in headers:
+        cell = WriteOnlyCell(worksheet, value)
         cell.fill = header_fill
         cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    url_cols = _xlsx_columns_where(headers, lambda h: h.startswith("Link"))
-    if_cols = _xlsx_columns_where(headers, lambda h: h in ("Impact Factor", "IF"))
-    pk_cols = _xlsx_columns_where(headers, lambda h: h == "PK")
-
-    for row in worksheet.iter_rows(min_row=2):
-        for cell in row:
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
+        cell.alignment = header_alignment
+        header_row.append(cell)
+    worksheet.append(header_row)
+
+    alignment = Alignment(vertical="top", wrap_text=True)
+    max_row = 1
+    for row in itertools.chain(sample, rows):
+        cells = []
+        for idx, value in enumerate(row):
+            cell = WriteOnlyCell(worksheet, value)
+            cell.alignment = alignment
+            if idx in number_formats:
+                cell.number_format = number_formats[idx]
+            cells.append(cell)
+        worksheet.append(cells)
+        max_row += 1
+
+    if max_row > 1:
+        write_only_worksheet_create_table(
+            worksheet, headers, max_row, title="MultiseekExport"
+        )
 
-    _apply_xlsx_number_format(worksheet, if_cols, "0.000")
-    _apply_xlsx_number_format(worksheet, pk_cols, "0.00")
-    _apply_xlsx_hyperlinks(worksheet, url_cols)
+    workbook.save(fileobj)
 
-    worksheet.freeze_panes = freeze
-    worksheet_columns_autosize(worksheet)
-    if worksheet.max_row > 1:
-        worksheet_create_table(worksheet, title="MultiseekExport")
 
-    output = io.BytesIO()
-    workbook.save(output)
-    response = HttpResponse(
-        output.getvalue(),
-        content_type=(
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        ),
-    )
-    response["Content-Disposition"] = content_disposition_header(
+def xlsx_export_response(queryset, request, report_title, wariant="dane"):
+    rows = export_rows(queryset, wariant, *export_links(request))
+
+    # Plik tymczasowy (na dysku), nie BytesIO: gotowy arkusz nie musi mieścić
+    # się w pamięci workera; FileResponse wysyła go blokami i zamyka.
+    output = tempfile.TemporaryFile()
+    try:
+        write_xlsx(output, rows, report_title, wariant)
+        output.seek(0)
+    except BaseException:
+        output.close()
+        raise
+
+    return FileResponse(
+        output,
         as_attachment=True,
         filename=_export_filename("xlsx", report_title),
+        content_type=XLSX_CONTENT_TYPE,
     )
-    return response
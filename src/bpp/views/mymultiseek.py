@@ -1,14 +1,20 @@
 import hashlib
 import json
 import logging
+import pickle
+from datetime import timedelta
 
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Count, Sum
-from django.http import HttpResponseBadRequest, JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import redirect
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.views.decorators.cache import never_cache
-from django.views.generic import View
+from django.views.generic import DetailView, View
+from django_sendfile import sendfile
 from multiseek.logic import get_registry
 from multiseek.views import (
     MULTISEEK_SESSION_KEY_REMOVED,
@@ -16,7 +22,7 @@ from multiseek.views import (
     manually_add_or_remove,
 )
 
-from bpp.models import Uczelnia
+from bpp.models import EksportMultiseek, Uczelnia
 from bpp.multiseek_registry import registry as multiseek_registry
 from bpp.multiseek_registry.djangoql_export import multiseek_form_to_djangoql
 from bpp.views.multiseek_export import (
@@ -29,6 +35,7 @@ from bpp.views.multiseek_export import (
     bibtex_export_response,
     csv_export_response,
     docx_export_response,
+    export_links,
     html_export_response,
     plain_multiseek_report_title,
     sanitize_export_html,
@@ -41,7 +48,13 @@ logger = logging.getLogger(__name__)
 PKT_WEWN = "pkt_wewn"
 PKT_WEWN_BEZ = "pkt_wewn_bez"
 TABLE = "table"
+# Powyżej tylu rekordów eksport DANYCH (CSV/XLSX) idzie w tle
+# (EksportMultiseek + link do pobrania), a eksport DOKUMENTU jest niedostępny.
 MULTISEEK_EXPORT_MAX_ROWS = 5000
+# Ile eksportów w tle może naraz trwać dla jednego użytkownika. Adres
+# eksportu to zwykły GET — bez limitu każde odświeżenie kolejkowałoby
+# kolejne, nawet godzinne zadanie.
+MULTISEEK_EKSPORTY_W_TLE_NA_UZYTKOWNIKA = 3
 
 # TTL cache agregatów wyników (count + sumy) — patrz get_context_data.
 MULTISEEK_AGGREGATE_CACHE_TIMEOUT = 30 * 60
@@ -250,18 +263,25 @@ class MyMultiseekExport(LoginRequiredMixin, MyMultiseekResults):
 
         queryset = self.get_queryset_for_current_mode()
         count = queryset.count()
+        report_title = _multiseek_report_title(request)
+
+        if export_format in self.DATA_FORMATS:
+            if count > MULTISEEK_EXPORT_MAX_ROWS:
+                return self._export_data_w_tle(
+                    request, export_format, queryset, report_title, count
+                )
+            return self._export_data(request, export_format, queryset, report_title)
+
         if count > MULTISEEK_EXPORT_MAX_ROWS:
             return HttpResponseBadRequest(
                 "Eksport Multiseek jest dostępny dla maksymalnie "
                 f"{MULTISEEK_EXPORT_MAX_ROWS} rekordów."
             )
-
-        report_title = _multiseek_report_title(request)
-        if export_format in self.DATA_FORMATS:
-            return self._export_data(request, export_format, queryset, report_title)
         return self._export_document(request, export_format, queryset, report_title)
 
-    def _export_data(self, request, export_format, queryset, report_title):
+    @staticmethod
+    def _data_queryset(request, export_format, queryset):
+        """(queryset z projekcją kolumn eksportu, wariant) dla CSV/XLSX."""
         wariant = request.GET.get("wariant", "dane")
         if wariant not in {"dane", "opis"}:
             wariant = "dane"
@@ -275,16 +295,66 @@ class MyMultiseekExport(LoginRequiredMixin, MyMultiseekResults):
                 .select_related("charakter_formalny", "typ_kbn")
                 .only(*MULTISEEK_EXPORT_OPIS_FIELDS)
             )
-            return xlsx_export_response(queryset, request, report_title, "opis")
+        else:
+            queryset = (
+                queryset.select_related(None)
+                .select_related("zrodlo", "typ_kbn")
+                .only(*MULTISEEK_EXPORT_DANE_FIELDS)
+            )
+        return queryset, wariant
 
-        queryset = (
-            queryset.select_related(None)
-            .select_related("zrodlo", "typ_kbn")
-            .only(*MULTISEEK_EXPORT_DANE_FIELDS)
-        )
+    def _export_data(self, request, export_format, queryset, report_title):
+        queryset, wariant = self._data_queryset(request, export_format, queryset)
         if export_format == "csv":
             return csv_export_response(queryset, request, report_title)
-        return xlsx_export_response(queryset, request, report_title, "dane")
+        return xlsx_export_response(queryset, request, report_title, wariant)
+
+    def _export_data_w_tle(self, request, export_format, queryset, report_title, count):
+        """Zbyt duży wynik na odpowiedź wprost: zlecamy EksportMultiseek
+        i odsyłamy na stronę statusu z linkiem do pobrania.
+
+        Trwający eksport tego samego zapytania i formatu wykorzystujemy
+        ponownie; ponad ``MULTISEEK_EKSPORTY_W_TLE_NA_UZYTKOWNIKA``
+        trwających eksportów użytkownik dostaje 429. Eksport starszy niż
+        limit czasu zadania nie jest już trwający — zadanie zostało ubite.
+        """
+        from bpp.tasks import EKSPORT_MULTISEEK_TIME_LIMIT, eksportuj_multiseek
+
+        queryset, wariant = self._data_queryset(request, export_format, queryset)
+        zapytanie = pickle.dumps(queryset.query)
+
+        trwajace = EksportMultiseek.objects.filter(
+            owner=request.user,
+            finished_on=None,
+            created_on__gte=timezone.now()
+            - timedelta(seconds=EKSPORT_MULTISEEK_TIME_LIMIT),
+        )
+        ten_sam = trwajace.filter(
+            format=export_format, wariant=wariant, zapytanie=zapytanie
+        ).first()
+        if ten_sam is not None:
+            return redirect(ten_sam)
+        if trwajace.count() >= MULTISEEK_EKSPORTY_W_TLE_NA_UZYTKOWNIKA:
+            return HttpResponse(
+                "Trwa już maksymalna liczba eksportów w tle "
+                f"({MULTISEEK_EKSPORTY_W_TLE_NA_UZYTKOWNIKA}); "
+                "spróbuj ponownie po ich zakończeniu.",
+                status=429,
+            )
+
+        _absolute_uri, pbn_api_root = export_links(request)
+        eksport = EksportMultiseek.objects.create(
+            owner=request.user,
+            format=export_format,
+            wariant=wariant,
+            tytul=report_title,
+            liczba_rekordow=count,
+            zapytanie=zapytanie,
+            adres_serwisu=request.build_absolute_uri("/"),
+            pbn_api_root=pbn_api_root,
+        )
+        transaction.on_commit(lambda: eksportuj_multiseek.delay(str(eksport.pk)))
+        return redirect(eksport)
 
     def _export_document(self, request, export_format, queryset, report_title):
         registry = get_registry(self.registry)
@@ -339,6 +409,29 @@ class MyMultiseekExport(LoginRequiredMixin, MyMultiseekResults):
         return html_export_response(document_html, report_title)
 
 
+class EksportMultiseekStatus(LoginRequiredMixin, DetailView):
+    """Postęp eksportu Multiseek w tle; po zakończeniu — link do pobrania."""
+
+    template_name = "multiseek/eksport-w-tle.html"
+    context_object_name = "eksport"
+
+    def get_queryset(self):
+        return EksportMultiseek.objects.filter(owner=self.request.user)
+
+
+class EksportMultiseekPobierz(EksportMultiseekStatus):
+    def get(self, request, *args, **kwargs):
+        eksport = self.get_object()
+        if not eksport.finished_successfully or not eksport.plik:
+            raise Http404("Plik eksportu nie jest gotowy.")
+        return sendfile(
+            request,
+            eksport.plik.path,
+            attachment=True,
+            attachment_filename=eksport.nazwa_pliku(),
+        )
+
+
 def _normalize_session_removed(request):
     # JSONSerializer zamienia tuple → list przy zapisie sesji. Upstream
     # manually_add_or_remove() robi `set(data)` na odczycie, co pada na
@@ -1,70 +1,122 @@
 import datetime
+import hashlib
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
 
 try:
     from django.core.urlresolvers import reverse
 except ImportError:
     from django.urls import reverse
 
+from django.db.models import OuterRef, Q, Subquery
 from django.db.models.aggregates import Min
 from django.http.response import HttpResponse, HttpResponseServerError
 from django.utils import timezone
 from django.utils.timezone import make_naive
 from django.views.generic.base import View
-from moai.oai import OAIServerFactory
+from moai.oai import OAIServer, get_writer
 from moai.server import FeedConfig
+from oaipmh.error import BadResumptionTokenError
+from oaipmh.metadata import MetadataRegistry
+from oaipmh.server import (
+    BatchingResumption,
+    ServerBase,
+    decodeResumptionToken,
+    encodeResumptionToken,
+)
 
 from bpp.models import Rekord, Uczelnia
+from bpp.models.cache.views import SlowaKluczoweView
 from bpp.util.uczelnia_scope import scope_rekord_do_uczelni
+from bpp.views.cache_publiczny import DOMYSLNY_TTL, TAG_KAZDA_ZMIANA, _generacje
+
+#: Prefiks kluczy zapamiętanych porcji ListRecords/ListIdentifiers.
+PREFIKS = "bpp-oai:v1"
+
+#: Pola rekordu potrzebne do nagłówka i metadanych Dublin Core. Porcję
+#: czytamy jednym ``values()`` — bez instancji modelu i bez prefetchy
+#: ``zrodlo``/``slowa_kluczowe`` (słowa kluczowe agreguje SQL).
+POLA_METADANYCH = (
+    "id",
+    "ostatnio_zmieniony",
+    "tytul_oryginalny",
+    "tytul",
+    "jezyk__nazwa",
+    "rok",
+    "wydawnictwo",
+    "zrodlo__nazwa",
+    "informacje",
+    "szczegoly",
+    "opis_bibliograficzny_autorzy_cache",
+    "charakter_formalny__nazwa_w_primo",
+    "www",
+    "slowa_kluczowe_lista",
+)
+
+
+def _z_metadanymi(query):
+    slowa_kluczowe = (
+        SlowaKluczoweView.objects.filter(rekord_id=OuterRef("pk"))
+        .order_by()
+        .values("rekord_id")
+        .annotate(lista=ArrayAgg("tag__name", order_by="tag_id"))
+        .values("lista")
+    )
+    return query.annotate(slowa_kluczowe_lista=Subquery(slowa_kluczowe)).values(
+        *POLA_METADANYCH
+    )
 
 
 class CacheMetadata:
+    """Metadane Dublin Core z wiersza ``_z_metadanymi`` (słownik)."""
+
     def __init__(self, orig):
         self.orig = orig
 
     def _get_title(self, default):
-        if self.orig.tytul:
-            return [self.orig.tytul_oryginalny, self.orig.tytul]
-        return [self.orig.tytul_oryginalny]
+        if self.orig["tytul"]:
+            return [self.orig["tytul_oryginalny"], self.orig["tytul"]]
+        return [self.orig["tytul_oryginalny"]]
 
     def _get_language(self, default):
-        if hasattr(self.orig, "jezyk") and self.orig.jezyk:
-            return [self.orig.jezyk.nazwa]
+        if self.orig["jezyk__nazwa"]:
+            return [self.orig["jezyk__nazwa"]]
         return default
 
     def _get_creator(self, default):
-        return self.orig.opis_bibliograficzny_autorzy_cache or []
+        return self.orig["opis_bibliograficzny_autorzy_cache"] or []
 
     def _get_date(self, default):
-        return [str(self.orig.rok)]
+        return [str(self.orig["rok"])]
 
     def _get_publisher(self, default):
-        if hasattr(self.orig, "wydawnictwo") and self.orig.wydawnictwo:
-            return [self.orig.wydawnictwo]
+        if self.orig["wydawnictwo"]:
+            return [self.orig["wydawnictwo"]]
         return default
 
     def _get_subject(self, default):
-        if hasattr(self.orig, "slowa_kluczowe"):
-            return ", ".join(o.name for o in self.orig.slowa_kluczowe.all())
-        return default
+        # Writer ``oai_dc`` iteruje po wartości — napis ", ".join(...)
+        # dawał jeden ``dc:subject`` na ZNAK; jeden element na słowo.
+        return self.orig["slowa_kluczowe_lista"] or default
 
     def _get_source(self, default):
         src = []
-        if getattr(self.orig, "zrodlo_id", None) is not None:
-            src.append(
-                f"{self.orig.zrodlo.nazwa} {self.orig.informacje} {self.orig.szczegoly}"
-            )
-        elif self.orig.informacje or self.orig.szczegoly:
-            src.append(f"{self.orig.informacje} {self.orig.szczegoly}")
+        informacje, szczegoly = self.orig["informacje"], self.orig["szczegoly"]
+        if self.orig["zrodlo__nazwa"] is not None:
+            src.append(f"{self.orig['zrodlo__nazwa']} {informacje} {szczegoly}")
+        elif informacje or szczegoly:
+            src.append(f"{informacje} {szczegoly}")
 
-        if self.orig.www:
-            src.append(self.orig.www)
+        if self.orig["www"]:
+            src.append(self.orig["www"])
 
         return src
 
     def _get_type(self, default):
-        return [self.orig.charakter_formalny.nazwa_w_primo]
+        return [self.orig["charakter_formalny__nazwa_w_primo"]]
 
     def get(self, item, default):
         handlers = {
@@ -87,10 +139,81 @@ def get_dc_ident(model, obj_pk):
     return f"oai:bpp.umlub.pl:{model}/{obj_pk}"
 
 
+def _zakoduj_kursor(kursor):
+    ostatnio_zmieniony, (content_type_id, object_id) = kursor
+    return f"{ostatnio_zmieniony.isoformat()}|{content_type_id}|{object_id}"
+
+
+def _odkoduj_kursor(tekst):
+    try:
+        ostatnio_zmieniony, content_type_id, object_id = tekst.split("|")
+        return (
+            datetime.datetime.fromisoformat(ostatnio_zmieniony),
+            (int(content_type_id), int(object_id)),
+        )
+    except ValueError as e:
+        raise BadResumptionTokenError(f"Nieprawidłowy kursor: {tekst}") from e
+
+
+def _strefa(data):
+    # moai przekazuje daty ``from``/``until`` jako naiwne UTC
+    if data is not None and timezone.is_naive(data):
+        return timezone.make_aware(data, datetime.UTC)
+    return data
+
+
+class KeysetBatchingResumption(BatchingResumption):
+    """Token wznowienia niesie, oprócz offsetu, kursor keyset ``po``.
+
+    ``BatchingResumption`` koduje w tokenie tylko offset, a
+    ``OFFSET n`` po ``bpp_rekord_mat`` kosztuje tym więcej, im dalej
+    jest harvester. Kursor ``(ostatnio_zmieniony, id)`` ostatniego
+    rekordu porcji pozwala zacząć kolejną porcję od indeksu. Offset
+    zostaje w tokenie — tokeny bez ``po`` (wydane przed wdrożeniem)
+    nadal działają.
+    """
+
+    def __init__(self, server, db, batch_size=10):
+        super().__init__(server, batch_size)
+        self._db = db
+
+    def handleVerb(self, verb, kw):
+        if verb not in ("ListIdentifiers", "ListRecords"):
+            return super().handleVerb(verb, kw)
+
+        if "resumptionToken" in kw:
+            kw, cursor = decodeResumptionToken(kw["resumptionToken"])
+            po = kw.pop("po", None)
+            self._db.kursor = _odkoduj_kursor(po) if po else None
+            kw["cursor"] = cursor
+
+        result, token = super().handleVerb(verb, kw)
+        if token is not None:
+            kw_tokenu, cursor = decodeResumptionToken(token)
+            kw_tokenu["po"] = _zakoduj_kursor(self._db.kursory[self._batch_size - 1])
+            token = encodeResumptionToken(kw_tokenu, cursor)
+        return result, token
+
+
+def serwer_oai(db, config):
+    """Odpowiednik ``moai.oai.OAIServerFactory`` z ``KeysetBatchingResumption``."""
+    metadata_registry = MetadataRegistry()
+    for prefix in config.metadata_prefixes:
+        metadata_registry.registerWriter(prefix, get_writer(prefix, config, db))
+    return ServerBase(
+        KeysetBatchingResumption(OAIServer(db, config), db, config.batch_size),
+        metadata_registry,
+    )
+
+
 class BPPOAIDatabase:
     def __init__(self, original, request=None):
         self.original = original
         self.request = request
+        #: Kursor keyset z tokenu wznowienia (ustawia ``KeysetBatchingResumption``)
+        self.kursor = None
+        #: Kursory wierszy zwróconych przez ostatnie ``oai_query``
+        self.kursory = []
 
     def get_set(self, oai_id):
         if oai_id == 1:
@@ -161,12 +284,42 @@ class BPPOAIDatabase:
         allowed_sets = allowed_sets or []
         if batch_size < 0:
             batch_size = 0
+        self.kursory = []
+
+        from_date = _strefa(from_date)
+        until_date = _strefa(until_date)
+        kursor = self.kursor if offset else None
+        uczelnia = Uczelnia.objects.get_for_request(self.request)
+
+        klucz = None
+        if identifier is None:
+            klucz = self._klucz_porcji(
+                uczelnia, from_date, until_date, kursor or offset, batch_size
+            )
+            wiersze = cache.get(klucz)
+            if wiersze is not None:
+                yield from self._rekordy(wiersze)
+                return
+
+        wiersze = self._wiersze(
+            uczelnia, from_date, until_date, identifier, offset, batch_size, kursor
+        )
+        if klucz is not None:
+            cache.set(
+                klucz, wiersze, getattr(settings, "BPP_OAI_CACHE_TTL", DOMYSLNY_TTL)
+            )
+        yield from self._rekordy(wiersze)
 
+    def _wiersze(
+        self, uczelnia, from_date, until_date, identifier, offset, batch_size, kursor
+    ):
         # make sure until date is set, and not in future
         if until_date is None or until_date > datetime.datetime.now(datetime.UTC):
             until_date = timezone.now()
 
-        query = self.original.order_by("-ostatnio_zmieniony")
+        # ``id`` rozstrzyga remisy — bez niego kolejność rekordów o tym
+        # samym ``ostatnio_zmieniony`` nie byłaby stała między porcjami.
+        query = self.original.order_by("-ostatnio_zmieniony", "-id")
 
         # filter dates
         query = query.filter(ostatnio_zmieniony__lte=until_date)
@@ -185,40 +338,60 @@ class BPPOAIDatabase:
         if from_date is not None:
             query = query.filter(ostatnio_zmieniony__gte=from_date)
 
-        uczelnia = Uczelnia.objects.get_for_request(self.request)
         if uczelnia:
             ukryte_statusy = uczelnia.ukryte_statusy("api")
             if ukryte_statusy:
                 query = query.exclude(status_korekty_id__in=ukryte_statusy)
 
-        for row in (
-            query.only(
-                "ostatnio_zmieniony",
-                "tytul_oryginalny",
-                "tytul",
-                "jezyk__nazwa",
-                "rok",
-                "wydawnictwo",
-                "zrodlo",
-                "informacje",
-                "szczegoly",
-                "opis_bibliograficzny_autorzy_cache",
-                "charakter_formalny__nazwa_w_primo",
-                "www",
+        query = _z_metadanymi(query)
+        if kursor is not None:
+            ostatnio_zmieniony, id_ = kursor
+            # Nadmiarowe ``lte`` staje się warunkiem indeksu — skan zaczyna
+            # się od kursora, a nie od najnowszego rekordu.
+            query = query.filter(
+                Q(ostatnio_zmieniony__lt=ostatnio_zmieniony)
+                | Q(ostatnio_zmieniony=ostatnio_zmieniony, id__lt=list(id_)),
+                ostatnio_zmieniony__lte=ostatnio_zmieniony,
             )
-            .select_related("charakter_formalny", "jezyk")
-            .prefetch_related("zrodlo", "slowa_kluczowe")[offset : offset + batch_size]
-        ):
+            return list(query[:batch_size])
+        return list(query[offset : offset + batch_size])
+
+    def _rekordy(self, wiersze):
+        for wiersz in wiersze:
+            content_type_id, object_id = wiersz["id"]
+            self.kursory.append((wiersz["ostatnio_zmieniony"], wiersz["id"]))
             yield {
-                "id": get_dc_ident(row.content_type.model, row.object_id),
+                "id": get_dc_ident(
+                    ContentType.objects.get_for_id(content_type_id).model, object_id
+                ),
                 "deleted": False,
                 "modified": make_naive(
-                    row.ostatnio_zmieniony, row.ostatnio_zmieniony.tzinfo
+                    wiersz["ostatnio_zmieniony"], wiersz["ostatnio_zmieniony"].tzinfo
                 ),
-                "metadata": CacheMetadata(row),
+                "metadata": CacheMetadata(wiersz),
                 "sets": ["1"],
             }
 
+    def _klucz_porcji(self, uczelnia, from_date, until_date, pozycja, batch_size):
+        """Klucz porcji: (uczelnia, from, until, kursor lub offset).
+
+        Generacja cache'a publicznego (``TAG_KAZDA_ZMIANA``) unieważnia
+        porcje przy każdym zapisie w adminie. Zmiany omijające sygnały
+        (importy, ``update()``) odświeża ``BPP_OAI_CACHE_TTL``.
+        """
+        surowy = "|".join(
+            str(x)
+            for x in (
+                *_generacje([TAG_KAZDA_ZMIANA]),
+                uczelnia.pk if uczelnia else "",
+                from_date,
+                until_date,
+                pozycja,
+                batch_size,
+            )
+        )
+        return f"{PREFIKS}:{hashlib.sha256(surowy.encode('utf-8')).hexdigest()}"
+
 
 class OAIView(View):
     def get(self, request, *args, **kwargs):
@@ -247,7 +420,14 @@ class OAIView(View):
             uczelnia,
         )
         db = BPPOAIDatabase(base_qs, request=request)
-        oai_server = OAIServerFactory(db, FeedConfig("bpp", base_url))
+        oai_server = serwer_oai(
+            db,
+            FeedConfig(
+                "bpp",
+                base_url,
+                batch_size=getattr(settings, "BPP_OAI_BATCH_SIZE", 100),
+            ),
+        )
         return HttpResponse(
             content=oai_server.handleRequest(request.GET),
             content_type="application/xml",
@@ -0,0 +1,378 @@
+"""
+Blocking index for the publication duplicate scan.
+
+Instead of running ``matchuj_publikacje`` (a cascade of DOI/source/ISBN/URI
+and ``TrigramSimilarity`` queries) for every publication, all publications of
+the scanned years are loaded in one projected query and put into buckets:
+
+- normalized DOI, ISBN / e-ISBN and WWW address (exact keys),
+- source + year + the beginning of the normalized title,
+- year + "prefix" title trigrams.
+
+Title trigrams are generated the way ``pg_trgm`` does it. Every title is
+indexed only by its ``n - ceil(t * n) + 1`` rarest trigrams (prefix
+filtering): two titles whose trigram Jaccard similarity -- i.e. the
+``pg_trgm`` ``similarity()`` -- reaches ``t`` always share at least one of
+them, so the index finds every pair above the threshold while most buckets
+stay tiny. Only pairs sharing a bucket are compared, in pure Python, with the
+same rules and thresholds ``matchuj_publikacje`` uses.
+
+Apart from :func:`load_entries` nothing here touches Django; the comparison
+can therefore run in a ``spawn`` process pool.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+import billiard
+
+from import_common.normalization import (
+    extract_part_number,
+    normalize_doi,
+    normalize_isbn,
+    normalize_public_uri,
+    normalize_tytul_publikacji,
+)
+
+# Limits and thresholds of ``import_common.core.publikacja``. Not imported
+# from there: that module loads ``bpp.models``, and this one is imported by
+# pool workers, which run without ``django.setup()``.
+TITLE_LIMIT_SINGLE_WORD = 15
+TITLE_LIMIT_MANY_WORDS = 25
+MATCH_SIMILARITY_THRESHOLD = 0.95
+MATCH_SIMILARITY_THRESHOLD_LOW = 0.90
+MATCH_SIMILARITY_THRESHOLD_VERY_LOW = 0.80
+
+# Minimum similarity score to store as a candidate
+MIN_SIMILARITY_TO_STORE = MATCH_SIMILARITY_THRESHOLD_VERY_LOW
+
+# Scores of the match reasons, as in the original per-publication scan
+REASON_SCORES = {"DOI": 1.0, "ISBN": 0.95, "WWW": 0.90, "źródło": 0.85}
+
+# Number of leading characters of the normalized title used in the
+# source bucket -- shortest title that may be matched by source
+ZRODLO_PREFIX_LENGTH = TITLE_LIMIT_SINGLE_WORD
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+class Entry(NamedTuple):
+    """A publication projected to the fields needed for matching."""
+
+    content_type_id: int
+    pk: int
+    title: str
+    rok: int
+    normalized_title: str
+    trigrams: frozenset
+    part_number: int | None
+    doi: str | None
+    isbns: frozenset
+    wwws: frozenset
+    zrodlo_id: int | None
+    has_parent: bool
+
+
+class ScanOptions(NamedTuple):
+    ignore_doi: bool = False
+    ignore_www: bool = False
+    ignore_isbn: bool = False
+    ignore_zrodlo: bool = False
+
+
+class Match(NamedTuple):
+    original: int
+    duplicate: int
+    similarity: float
+    reasons: list
+
+
+def trigrams(s):
+    """Set of trigrams of ``s``, generated like ``pg_trgm``'s ``show_trgm``."""
+    ret = set()
+    for word in WORD_RE.findall(s.lower()):
+        padded = f"  {word} "
+        ret.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(ret)
+
+
+def similarity(a, b):
+    """Trigram similarity, equal to ``pg_trgm``'s ``similarity()``."""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def _title_long_enough(title):
+    if " " in title:
+        return len(title) >= TITLE_LIMIT_MANY_WORDS
+    return len(title) >= TITLE_LIMIT_SINGLE_WORD
+
+
+def make_entry(
+    content_type_id,
+    pk,
+    title,
+    rok,
+    doi,
+    www,
+    public_www,
+    isbn=None,
+    e_isbn=None,
+    zrodlo_id=None,
+    parent_id=None,
+):
+    """Build an :class:`Entry` from raw column values."""
+    title = title or ""
+    normalized = normalize_tytul_publikacji(title).lower().replace(" [online]", "")
+    normalized = " ".join(normalized.split())
+    return Entry(
+        content_type_id=content_type_id,
+        pk=pk,
+        title=title,
+        rok=rok,
+        normalized_title=normalized,
+        trigrams=trigrams(normalized),
+        part_number=extract_part_number(title)[1],
+        doi=normalize_doi(doi),
+        isbns=frozenset(filter(None, map(normalize_isbn, (isbn, e_isbn)))),
+        wwws=frozenset(filter(None, map(normalize_public_uri, (www, public_www)))),
+        zrodlo_id=zrodlo_id,
+        has_parent=parent_id is not None,
+    )
+
+
+COMMON_FIELDS = ("pk", "tytul_oryginalny", "rok", "doi", "www", "public_www")
+
+
+def load_entries(year_from, year_to):
+    """Load publications of the year range, continuous first, both by pk.
+
+    One ``values_list`` query per model instead of model instances: only the
+    columns used for matching are read.
+    """
+    from django.contrib.contenttypes.models import ContentType
+
+    from bpp.models import Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
+
+    entries = []
+
+    ct_ciagle = ContentType.objects.get_for_model(Wydawnictwo_Ciagle).pk
+    rows = (
+        Wydawnictwo_Ciagle.objects.filter(rok__gte=year_from, rok__lte=year_to)
+        .order_by("pk")
+        .values_list(*COMMON_FIELDS, "zrodlo_id")
+    )
+    for *common, zrodlo_id in rows.iterator():
+        entries.append(make_entry(ct_ciagle, *common, zrodlo_id=zrodlo_id))
+
+    ct_zwarte = ContentType.objects.get_for_model(Wydawnictwo_Zwarte).pk
+    rows = (
+        Wydawnictwo_Zwarte.objects.filter(rok__gte=year_from, rok__lte=year_to)
+        .order_by("pk")
+        .values_list(*COMMON_FIELDS, "isbn", "e_isbn", "wydawnictwo_nadrzedne_id")
+    )
+    for *common, isbn, e_isbn, parent_id in rows.iterator():
+        entries.append(make_entry(ct_zwarte, *common, isbn, e_isbn, None, parent_id))
+
+    return entries
+
+
+def build_index(entries, options, threshold=MATCH_SIMILARITY_THRESHOLD_LOW):
+    """Put entries into buckets.
+
+    Returns ``(keys, buckets)``: ``keys[i]`` lists bucket keys of
+    ``entries[i]``; ``buckets`` maps a key to entry indices. Buckets holding
+    a single entry are dropped.
+    """
+    frequency = Counter()
+    for entry in entries:
+        frequency.update(entry.trigrams)
+
+    keys = []
+    for entry in entries:
+        own = []
+        if entry.doi and not options.ignore_doi:
+            own.append(("doi", entry.doi))
+        if not options.ignore_isbn:
+            own.extend(("isbn", isbn) for isbn in entry.isbns)
+        if not options.ignore_www:
+            own.extend(("www", www) for www in entry.wwws)
+        if (
+            entry.zrodlo_id is not None
+            and not options.ignore_zrodlo
+            and len(entry.normalized_title) >= ZRODLO_PREFIX_LENGTH
+        ):
+            own.append(
+                (
+                    "zrodlo",
+                    entry.zrodlo_id,
+                    entry.rok,
+                    entry.normalized_title[:ZRODLO_PREFIX_LENGTH],
+                )
+            )
+        if entry.trigrams:
+            ordered = sorted(entry.trigrams, key=lambda t: (frequency[t], t))
+            size = len(ordered)
+            # round(): 0.9 * 10 is 9.000000000000002 in floating point
+            prefix = size - math.ceil(round(threshold * size, 9)) + 1
+            own.extend(("tytul", entry.rok, t) for t in ordered[:prefix])
+        keys.append(own)
+
+    buckets = defaultdict(list)
+    for n, own in enumerate(keys):
+        for key in own:
+            buckets[key].append(n)
+
+    buckets = {key: members for key, members in buckets.items() if len(members) > 1}
+    keys = [[key for key in own if key in buckets] for own in keys]
+    return keys, buckets
+
+
+def _matches(a, b, sim, options):
+    """Would ``matchuj_publikacje`` called for ``a`` return ``b``?"""
+    parts_ok = a.part_number == b.part_number
+
+    if (
+        a.doi
+        and not options.ignore_doi
+        and a.doi == b.doi
+        and a.rok == b.rok
+        and not b.has_parent
+        and sim >= MATCH_SIMILARITY_THRESHOLD_VERY_LOW
+        and parts_ok
+    ):
+        return True
+
+    long_enough = _title_long_enough(a.normalized_title)
+
+    if (
+        long_enough
+        and not options.ignore_zrodlo
+        and a.zrodlo_id is not None
+        and a.zrodlo_id == b.zrodlo_id
+        and a.rok == b.rok
+        and b.normalized_title.startswith(a.normalized_title)
+    ):
+        return True
+
+    isbn = a.isbns if not options.ignore_isbn else frozenset()
+    if (
+        isbn & b.isbns
+        and not b.has_parent
+        and sim >= MATCH_SIMILARITY_THRESHOLD_VERY_LOW
+        and parts_ok
+    ):
+        return True
+
+    if (
+        not options.ignore_www
+        and a.wwws & b.wwws
+        and sim >= MATCH_SIMILARITY_THRESHOLD
+        and parts_ok
+    ):
+        return True
+
+    return (
+        long_enough
+        and a.rok == b.rok
+        and sim >= MATCH_SIMILARITY_THRESHOLD_LOW
+        and parts_ok
+        and (not isbn or not b.isbns or bool(isbn & b.isbns))
+    )
+
+
+def _score(a, b, sim, options):
+    """Similarity score and match reasons of an accepted pair."""
+    reasons = []
+    if not options.ignore_doi and a.doi and a.doi == b.doi:
+        reasons.append("DOI")
+    if not options.ignore_isbn and a.isbns & b.isbns:
+        reasons.append("ISBN")
+    if not options.ignore_www and a.wwws & b.wwws:
+        reasons.append("WWW")
+    if not options.ignore_zrodlo and a.zrodlo_id and a.zrodlo_id == b.zrodlo_id:
+        reasons.append("źródło")
+
+    if not reasons:
+        return sim, ["tytuł"]
+    return max(REASON_SCORES[reason] for reason in reasons), reasons
+
+
+def compare(entries, keys, buckets, start, stop, options):
+    """Compare entries ``start:stop`` with the later entries of their buckets.
+
+    Each pair is compared once, from its earlier entry, which becomes the
+    "original" of the returned :class:`Match`.
+    """
+    ret = []
+    for n in range(start, stop):
+        a = entries[n]
+        others = set()
+        for key in keys[n]:
+            others.update(m for m in buckets[key] if m > n)
+        for m in sorted(others):
+            b = entries[m]
+            sim = similarity(a.trigrams, b.trigrams)
+            if not (_matches(a, b, sim, options) or _matches(b, a, sim, options)):
+                continue
+            score, reasons = _score(a, b, sim, options)
+            if score >= MIN_SIMILARITY_TO_STORE:
+                ret.append(Match(n, m, score, reasons))
+    return ret
+
+
+_worker_state = None
+
+
+def _init_worker(entries, keys, buckets, options):
+    global _worker_state
+    _worker_state = (entries, keys, buckets, options)
+
+
+def _compare_in_worker(bounds):
+    entries, keys, buckets, options = _worker_state
+    start, stop = bounds
+    return compare(entries, keys, buckets, start, stop, options)
+
+
+def scan(entries, options, chunk_size=1000, processes=1):
+    """Yield ``(entries_done, matches)`` for consecutive chunks of entries.
+
+    With ``processes > 1`` chunks are compared in a ``spawn`` process pool.
+    It is a ``billiard`` pool (Celery's fork of ``multiprocessing``), which,
+    unlike ``ProcessPoolExecutor``, can be started from a daemonic process
+    such as a prefork Celery worker running ``scan_for_duplicates``.
+    """
+    keys, buckets = build_index(entries, options)
+    ranges = [
+        (start, min(start + chunk_size, len(entries)))
+        for start in range(0, len(entries), chunk_size)
+    ]
+
+    if processes <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield stop, compare(entries, keys, buckets, start, stop, options)
+        return
+
+    pool = billiard.get_context("spawn").Pool(
+        processes,
+        initializer=_init_worker,
+        initargs=(entries, keys, buckets, options),
+    )
+    try:
+        results = pool.imap(_compare_in_worker, ranges)
+        for (_start, stop), matches in zip(ranges, results, strict=True):
+            yield stop, matches
+    except BaseException:
+        # Also GeneratorExit of an abandoned scan: do not wait for the
+        # remaining chunks.
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
@@ -2,112 +2,33 @@
 Celery tasks for publication duplicate scanning.
 """
 
+import os
+
 from celery import shared_task
 from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 from django.utils import timezone
 
-logger = get_task_logger(__name__)
-
-# How often to update progress (every N publications)
-PROGRESS_UPDATE_INTERVAL = 100
-
-# Minimum similarity score to store as a candidate
-MIN_SIMILARITY_TO_STORE = 0.80
-
-
-def _check_doi_match(publication_doi, match, match_reasons):
-    """Check if DOIs match and update match_reasons."""
-    if not publication_doi:
-        return 0.0
-    if not hasattr(match, "doi") or not match.doi:
-        return 0.0
-
-    from import_common.normalization import normalize_doi
-
-    if normalize_doi(publication_doi) == normalize_doi(match.doi):
-        match_reasons.append("DOI")
-        return 1.0
-    return 0.0
-
-
-def _check_isbn_match(publication_isbn, match, match_reasons):
-    """Check if ISBNs match and update match_reasons."""
-    if not publication_isbn:
-        return 0.0
-    if not hasattr(match, "isbn") or not match.isbn:
-        return 0.0
-
-    from import_common.normalization import normalize_isbn
-
-    if normalize_isbn(publication_isbn) == normalize_isbn(match.isbn):
-        match_reasons.append("ISBN")
-        return 0.95
-    return 0.0
-
-
-def _check_www_match(publication_www, match, match_reasons):
-    """Check if WWW URLs match and update match_reasons."""
-    if not publication_www:
-        return 0.0
-    if not hasattr(match, "www") or not match.www:
-        return 0.0
-
-    from import_common.normalization import normalize_public_uri
-
-    if normalize_public_uri(publication_www) == normalize_public_uri(match.www):
-        match_reasons.append("WWW")
-        return 0.90
-    return 0.0
+from .blocking import ScanOptions, load_entries, scan
 
+logger = get_task_logger(__name__)
 
-def _check_zrodlo_match(publication_zrodlo, match, match_reasons):
-    """Check if sources match and update match_reasons."""
-    if not publication_zrodlo:
-        return 0.0
-    if not hasattr(match, "zrodlo") or not match.zrodlo:
-        return 0.0
+# Number of publications compared per chunk; progress is saved and
+# cancellation checked after every chunk
+SCAN_CHUNK_SIZE = 1000
 
-    if publication_zrodlo.pk == match.zrodlo.pk:
-        match_reasons.append("źródło")
-        return 0.85
-    return 0.0
+# Candidates are saved in batches of this size
+BULK_CREATE_BATCH_SIZE = 500
 
 
-def _calculate_match_similarity(publication, match, scan_run):
-    """
-    Calculate similarity score and determine match reasons.
-
-    Returns:
-        Tuple of (similarity_score, match_reasons) or (None, None) if no valid match.
-    """
-    doi = getattr(publication, "doi", None) if not scan_run.ignore_doi else None
-    www = getattr(publication, "www", None) if not scan_run.ignore_www else None
-    isbn = getattr(publication, "isbn", None) if not scan_run.ignore_isbn else None
-    zrodlo = (
-        getattr(publication, "zrodlo", None) if not scan_run.ignore_zrodlo else None
+def scan_processes():
+    """Number of processes comparing publications; 1 compares in-process."""
+    return getattr(
+        settings, "DEDUPLIKATOR_PUBLIKACJI_PROCESY", min(4, os.cpu_count() or 2)
     )
 
-    match_reasons = []
-    similarity = 0.0
-
-    similarity = max(similarity, _check_doi_match(doi, match, match_reasons))
-    similarity = max(similarity, _check_isbn_match(isbn, match, match_reasons))
-    similarity = max(similarity, _check_www_match(www, match, match_reasons))
-    similarity = max(similarity, _check_zrodlo_match(zrodlo, match, match_reasons))
-
-    # Handle title-only matches
-    if not match_reasons:
-        match_reasons.append("tytuł")
-        similarity = getattr(match, "podobienstwo", 0.80)
-        if isinstance(similarity, float) and similarity < MIN_SIMILARITY_TO_STORE:
-            return None, None
-    elif similarity < MIN_SIMILARITY_TO_STORE:
-        similarity = getattr(match, "podobienstwo", similarity)
-
-    return similarity, match_reasons
-
 
 def _get_user_by_id(user_id):
     """Get user by ID, returning None if not found."""
@@ -123,154 +44,38 @@ def _get_user_by_id(user_id):
         return None
 
 
-def _get_publications_to_scan(year_from, year_to):
-    """
-    Get all publications in the specified year range.
-
-    Returns a list of (content_type, publication) tuples.
-    """
-    from bpp.models import Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
-
-    publications = []
-
-    ct_ciagle = ContentType.objects.get_for_model(Wydawnictwo_Ciagle)
-    ct_zwarte = ContentType.objects.get_for_model(Wydawnictwo_Zwarte)
-
-    # Get Wydawnictwo_Ciagle publications
-    ciagle_qs = Wydawnictwo_Ciagle.objects.filter(
-        rok__gte=year_from, rok__lte=year_to
-    ).order_by("pk")
-    for pub in ciagle_qs.iterator():
-        publications.append((ct_ciagle, pub))
-
-    # Get Wydawnictwo_Zwarte publications
-    zwarte_qs = Wydawnictwo_Zwarte.objects.filter(
-        rok__gte=year_from, rok__lte=year_to
-    ).order_by("pk")
-    for pub in zwarte_qs.iterator():
-        publications.append((ct_zwarte, pub))
-
-    return publications
-
-
-def _find_duplicates_for_publication(
-    publication,
-    content_type,
-    scan_run,
-    processed_pairs,
-):
-    """
-    Find duplicate candidates for a single publication.
-
-    Args:
-        publication: The publication to check
-        content_type: ContentType of the publication
-        scan_run: The scan run instance
-        processed_pairs: Set of already processed pairs to avoid duplicates
-
-    Returns:
-        List of PublicationDuplicateCandidate instances to create
-    """
-    from bpp.models import Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
-
-    candidates = []
-    title = publication.tytul_oryginalny
-    year = publication.rok
-
-    doi = getattr(publication, "doi", None) if not scan_run.ignore_doi else None
-    www = getattr(publication, "www", None) if not scan_run.ignore_www else None
-    isbn = getattr(publication, "isbn", None) if not scan_run.ignore_isbn else None
-    zrodlo = (
-        getattr(publication, "zrodlo", None) if not scan_run.ignore_zrodlo else None
-    )
-
-    for klass in [Wydawnictwo_Ciagle, Wydawnictwo_Zwarte]:
-        match = _try_match_publication(
-            klass, publication, title, year, doi, www, isbn, zrodlo
-        )
-        if match is None:
-            continue
-
-        match_ct = ContentType.objects.get_for_model(klass)
-        if _is_same_publication(content_type, publication.pk, match_ct, match.pk):
-            continue
-
-        if _is_pair_already_processed(
-            content_type, publication.pk, match_ct, match.pk, processed_pairs
-        ):
-            continue
-
-        candidate = _create_candidate_if_valid(
-            publication, content_type, match, match_ct, scan_run, title, year
-        )
-        if candidate:
-            candidates.append(candidate)
-
-    return candidates
-
-
-def _try_match_publication(klass, publication, title, year, doi, www, isbn, zrodlo):
-    """Try to find a matching publication using matchuj_publikacje."""
-    from import_common.core import matchuj_publikacje
+def _save_candidates(candidates):
+    from .models import PublicationDuplicateCandidate
 
-    try:
-        return matchuj_publikacje(
-            klass=klass,
-            title=title,
-            year=year,
-            doi=doi,
-            public_uri=www,
-            isbn=isbn,
-            zrodlo=zrodlo,
-            DEBUG_MATCHOWANIE=False,
+    with transaction.atomic():
+        PublicationDuplicateCandidate.objects.bulk_create(
+            candidates, ignore_conflicts=True
         )
-    except Exception as e:
-        logger.debug(f"Error matching publication {publication.pk}: {e}")
-        return None
-
-
-def _is_same_publication(content_type, pub_pk, match_ct, match_pk):
-    """Check if the match is the same publication as the original."""
-    return content_type == match_ct and pub_pk == match_pk
 
 
-def _is_pair_already_processed(
-    content_type, pub_pk, match_ct, match_pk, processed_pairs
-):
-    """Check if this pair has already been processed and add it if not."""
-    pair_key = tuple(sorted([(content_type.pk, pub_pk), (match_ct.pk, match_pk)]))
-    if pair_key in processed_pairs:
-        return True
-    processed_pairs.add(pair_key)
-    return False
-
-
-def _create_candidate_if_valid(
-    publication, content_type, match, match_ct, scan_run, title, year
-):
-    """Create a PublicationDuplicateCandidate if the match is valid."""
+def _make_candidate(scan_run, entries, match):
+    """Build a PublicationDuplicateCandidate from a blocking Match."""
     from .models import PublicationDuplicateCandidate
 
-    similarity, match_reasons = _calculate_match_similarity(
-        publication, match, scan_run
-    )
-    if similarity is None:
-        return None
+    original = entries[match.original]
+    duplicate = entries[match.duplicate]
+    original_ct = ContentType.objects.get_for_id(original.content_type_id)
+    duplicate_ct = ContentType.objects.get_for_id(duplicate.content_type_id)
 
     return PublicationDuplicateCandidate(
         scan_run=scan_run,
-        original_content_type=content_type,
-        original_object_id=publication.pk,
-        duplicate_content_type=match_ct,
-        duplicate_object_id=match.pk,
-        similarity_score=similarity,
-        match_reasons=match_reasons,
-        original_title=title[:2048] if title else "",
-        duplicate_title=(match.tytul_oryginalny or "")[:2048],
-        original_year=year,
-        duplicate_year=match.rok,
-        original_type=content_type.model,
-        duplicate_type=match_ct.model,
+        original_content_type=original_ct,
+        original_object_id=original.pk,
+        duplicate_content_type=duplicate_ct,
+        duplicate_object_id=duplicate.pk,
+        similarity_score=match.similarity,
+        match_reasons=match.reasons,
+        original_title=original.title[:2048],
+        duplicate_title=duplicate.title[:2048],
+        original_year=original.rok,
+        duplicate_year=duplicate.rok,
+        original_type=original_ct.model,
+        duplicate_type=duplicate_ct.model,
     )
 
 
@@ -334,25 +139,45 @@ def scan_for_duplicates(
         )
         logger.info(f"Deleted {deleted_count} existing candidates")
 
-        # Get publications to scan
-        publications = _get_publications_to_scan(year_from, year_to)
-        total_count = len(publications)
+        # Load publications to scan
+        entries = load_entries(year_from, year_to)
+        total_count = len(entries)
 
         scan_run.total_publications_to_scan = total_count
         scan_run.save(update_fields=["total_publications_to_scan"])
 
         logger.info(f"Scanning {total_count} publications for duplicates...")
 
+        options = ScanOptions(
+            ignore_doi=ignore_doi,
+            ignore_www=ignore_www,
+            ignore_isbn=ignore_isbn,
+            ignore_zrodlo=ignore_zrodlo,
+        )
+
         publications_scanned = 0
         duplicates_found = 0
         candidates_to_create = []
-        processed_pairs = set()
 
-        for content_type, publication in publications:
+        chunks = scan(
+            entries, options, chunk_size=SCAN_CHUNK_SIZE, processes=scan_processes()
+        )
+        for publications_scanned, matches in chunks:
+            candidates_to_create.extend(
+                _make_candidate(scan_run, entries, match) for match in matches
+            )
+            duplicates_found += len(matches)
+
+            # Bulk create candidates periodically
+            if len(candidates_to_create) >= BULK_CREATE_BATCH_SIZE:
+                _save_candidates(candidates_to_create)
+                candidates_to_create = []
+
             # Check for cancellation
-            scan_run.refresh_from_db()
+            scan_run.refresh_from_db(fields=["status"])
             if scan_run.status == PublicationDuplicateScanRun.Status.CANCELLED:
                 logger.info("Scan cancelled by user")
+                chunks.close()
                 return {
                     "status": "cancelled",
                     "scan_run_id": scan_run.pk,
@@ -360,43 +185,18 @@ def scan_for_duplicates(
                     "duplicates_found": duplicates_found,
                 }
 
-            publications_scanned += 1
-
-            new_candidates = _find_duplicates_for_publication(
-                publication,
-                content_type,
-                scan_run,
-                processed_pairs,
+            # Update progress
+            scan_run.publications_scanned = publications_scanned
+            scan_run.duplicates_found = duplicates_found
+            scan_run.save(update_fields=["publications_scanned", "duplicates_found"])
+            logger.info(
+                f"Progress: {publications_scanned}/{total_count} publications, "
+                f"{duplicates_found} duplicates found"
             )
-            candidates_to_create.extend(new_candidates)
-            duplicates_found += len(new_candidates)
-
-            # Bulk create candidates periodically
-            if len(candidates_to_create) >= 500:
-                with transaction.atomic():
-                    PublicationDuplicateCandidate.objects.bulk_create(
-                        candidates_to_create, ignore_conflicts=True
-                    )
-                candidates_to_create = []
-
-            # Update progress periodically
-            if publications_scanned % PROGRESS_UPDATE_INTERVAL == 0:
-                scan_run.publications_scanned = publications_scanned
-                scan_run.duplicates_found = duplicates_found
-                scan_run.save(
-                    update_fields=["publications_scanned", "duplicates_found"]
-                )
-                logger.info(
-                    f"Progress: {publications_scanned}/{total_count} publications, "
-                    f"{duplicates_found} duplicates found"
-                )
 
         # Save remaining candidates
         if candidates_to_create:
-            with transaction.atomic():
-                PublicationDuplicateCandidate.objects.bulk_create(
-                    candidates_to_create, ignore_conflicts=True
-                )
+            _save_candidates(candidates_to_create)
 
         # Mark scan as completed
         scan_run.status = PublicationDuplicateScanRun.Status.COMPLETED
@@ -123,3 +123,83 @@ def test_scan_status_view_not_found(admin_client):
     )
     response = admin_client.get(url)
     assert response.status_code == 404
+
+
+def test_blocking_trigrams_like_pg_trgm():
+    """Test trigram generation and similarity against pg_trgm's results."""
+    from deduplikator_publikacji.blocking import similarity, trigrams
+
+    assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+    assert similarity(trigrams("word"), trigrams("two words")) == pytest.approx(4 / 11)
+
+
+def test_blocking_thresholds_match_import_common():
+    """Test that the mirrored thresholds agree with matchuj_publikacje's."""
+    from deduplikator_publikacji import blocking
+    from import_common.core import publikacja
+
+    for name in (
+        "TITLE_LIMIT_SINGLE_WORD",
+        "TITLE_LIMIT_MANY_WORDS",
+        "MATCH_SIMILARITY_THRESHOLD",
+        "MATCH_SIMILARITY_THRESHOLD_LOW",
+        "MATCH_SIMILARITY_THRESHOLD_VERY_LOW",
+    ):
+        assert getattr(blocking, name) == getattr(publikacja, name)
+
+
+def test_blocking_scan_finds_pairs_within_buckets():
+    """Test the blocking scan on in-memory entries."""
+    from deduplikator_publikacji.blocking import ScanOptions, make_entry, scan
+
+    title = "Wpływ czynników środowiskowych na zdrowie populacji"
+    entries = [
+        make_entry(1, 1, title, 2023, None, None, None),
+        make_entry(1, 2, "Zupełnie inna praca o czymś innym", 2023, None, None, None),
+        make_entry(2, 1, title + " [online]", 2023, None, None, None),
+        # Same title, different year: not a duplicate
+        make_entry(2, 2, title, 2024, None, None, None),
+        # Different part numbers: not a duplicate
+        make_entry(1, 3, title + " cz. I", 2023, None, None, None),
+        make_entry(1, 4, title + " cz. II", 2023, None, None, None),
+        # Same DOI, short title
+        make_entry(1, 5, "Wstęp", 2023, "10.1000/ABC", None, None),
+        make_entry(2, 3, "Wstęp.", 2023, "https://doi.org/10.1000/abc", None, None),
+    ]
+
+    def pairs(options, **kw):
+        return {
+            (entries[m.original].pk, entries[m.duplicate].pk, tuple(m.reasons))
+            for _done, matches in scan(entries, options, **kw)
+            for m in matches
+        }
+
+    assert pairs(ScanOptions(), chunk_size=3) == {(1, 1, ("tytuł",)), (5, 3, ("DOI",))}
+    assert pairs(ScanOptions(), chunk_size=3, processes=2) == pairs(ScanOptions())
+    assert pairs(ScanOptions(ignore_doi=True)) == {(1, 1, ("tytuł",))}
+
+
+@pytest.mark.django_db
+def test_scan_for_duplicates_task(wydawnictwo_ciagle, wydawnictwo_zwarte):
+    """Test the duplicate scan task end to end."""
+    from deduplikator_publikacji.tasks import scan_for_duplicates
+
+    title = "Wpływ czynników środowiskowych na zdrowie populacji"
+    for pub in wydawnictwo_ciagle, wydawnictwo_zwarte:
+        pub.tytul_oryginalny = title
+        pub.rok = 2023
+        pub.save()
+
+    result = scan_for_duplicates.delay(year_from=2023, year_to=2023).get()
+
+    assert result["status"] == "success"
+    assert result["publications_scanned"] == 2
+    assert result["duplicates_found"] == 1
+
+    candidate = PublicationDuplicateCandidate.objects.get(
+        scan_run_id=result["scan_run_id"]
+    )
+    assert candidate.original_object_id == wydawnictwo_ciagle.pk
+    assert candidate.duplicate_object_id == wydawnictwo_zwarte.pk
+    assert candidate.original_type == "wydawnictwo_ciagle"
+    assert candidate.match_reasons == ["tytuł"]
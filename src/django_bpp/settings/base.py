@@ -780,6 +780,10 @@ CELERYBEAT_SCHEDULE = {
         "task": "oswiadczenia.tasks.remove_old_oswiadczenia_export_files",
         "schedule": timedelta(days=1),
     },
+    "cleanup-multiseek-export-files": {
+        "task": "bpp.tasks.usun_stare_eksporty_multiseek",
+        "schedule": timedelta(hours=6),
+    },
     # Retencja porzuconych plików tmp kreatora zgłoszeń publikacji (anonimowy
     # formularz — porzucone uploady zostałyby na wolumenie media bez ograniczeń;
     # anty-DoS na dysk, bpp #551). Kasuje sieroty >24h z osobnego katalogu tmp,
@@ -801,6 +805,13 @@ CELERYBEAT_SCHEDULE = {
         "task": "importer_autorow_pbn.tasks.auto_rebuild_match_cache_task",
         "schedule": crontab(hour=4, minute=30),  # Daily at 4:30 AM
     },
+    # Wsadowa wysyłka kolejki PBN (pbn_export_queue.dispatcher); przebieg
+    # trzyma blokadę w cache, więc nakładające się uruchomienia kończą się
+    # od razu.
+    "pbn-export-queue-dispatcher": {
+        "task": "pbn_export_queue.tasks.wyslij_kolejke_porcjami",
+        "schedule": timedelta(minutes=1),
+    },
     "pbn-export-queue-watchdog": {
         "task": "pbn_export_queue.tasks.queue_watchdog",
         "schedule": timedelta(minutes=10),
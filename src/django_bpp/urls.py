@@ -25,6 +25,8 @@ from bpp.views.admin import (
 )
 from bpp.views.global_nav import global_nav_redir
 from bpp.views.mymultiseek import (
+    EksportMultiseekPobierz,
+    EksportMultiseekStatus,
     MultiseekToDjangoQLView,
     MyMultiseekExport,
     MyMultiseekResults,
@@ -316,6 +318,16 @@ urlpatterns = (
             MultiseekToDjangoQLView.as_view(),
             name="multiseek-do-djangoql",
         ),
+        url(
+            r"^multiseek/export/w-tle/(?P<pk>[0-9a-f-]+)/$",
+            EksportMultiseekStatus.as_view(),
+            name="multiseek-export-status",
+        ),
+        url(
+            r"^multiseek/export/w-tle/(?P<pk>[0-9a-f-]+)/pobierz/$",
+            EksportMultiseekPobierz.as_view(),
+            name="multiseek-export-pobierz",
+        ),
         url(
             r"^multiseek/export/(?P<export_format>[\w-]+)/$",
             csrf_exempt(
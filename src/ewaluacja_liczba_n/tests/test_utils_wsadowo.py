@@ -0,0 +1,247 @@
+"""Regresja: zbiorowe przeliczanie liczby N daje te same wyniki co
+dawna implementacja wiersz-po-wierszu (odtworzona poniżej jako wzorzec)."""
+
+from collections import defaultdict
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from bpp.models import Autor, Autor_Dyscyplina
+from ewaluacja_liczba_n.models import (
+    IloscUdzialowDlaAutoraZaCalosc,
+    IloscUdzialowDlaAutoraZaRok,
+    LiczbaNDlaUczelni,
+)
+from ewaluacja_liczba_n.utils import (
+    _komentarz_i_limity,
+    oblicz_dyscypliny_nieraportowane,
+    oblicz_liczbe_n_na_koniec_2025,
+    oblicz_liczby_n_dla_ewaluacji_2022_2025,
+)
+
+
+def _ad_lub_none(autor_id, rok):
+    try:
+        return Autor_Dyscyplina.objects.get(autor_id=autor_id, rok=rok)
+    except Autor_Dyscyplina.DoesNotExist:
+        return None
+
+
+def _referencyjne_za_rok(uczelnia, rok_min, rok_max):
+    IloscUdzialowDlaAutoraZaRok.objects.filter(uczelnia=uczelnia).delete()
+    for ad in Autor_Dyscyplina.objects.filter(
+        autor__aktualna_jednostka__uczelnia=uczelnia,
+        autor__aktualna_jednostka__skupia_pracownikow=True,
+        rok__gte=rok_min,
+        rok__lte=rok_max,
+    ):
+        zero = ad.rodzaj_autora and not ad.rodzaj_autora.licz_sloty
+        for dyscyplina, ilosc in ad.policz_udzialy():
+            IloscUdzialowDlaAutoraZaRok.objects.create(
+                rok=ad.rok,
+                autor=ad.autor,
+                dyscyplina_naukowa=dyscyplina,
+                uczelnia=uczelnia,
+                ilosc_udzialow=Decimal("0.0") if zero else ilosc,
+                ilosc_udzialow_monografie=Decimal("0.0") if zero else ilosc / 2,
+                autor_dyscyplina=ad,
+            )
+
+
+def _referencyjne_za_calosc(uczelnia, udzialy):
+    IloscUdzialowDlaAutoraZaCalosc.objects.filter(uczelnia=uczelnia).delete()
+    grupy = defaultdict(lambda: [Decimal("0"), Decimal("0"), set()])
+    for u in udzialy:
+        ad = _ad_lub_none(u.autor_id, u.rok)
+        if ad is None or ad.rodzaj_autora is None:
+            continue
+        g = grupy[(u.autor_id, u.dyscyplina_naukowa_id, ad.rodzaj_autora_id)]
+        g[0] += u.ilosc_udzialow
+        g[1] += u.ilosc_udzialow_monografie
+        g[2].add(u.rok)
+    for (autor_id, dyscyplina_id, rodzaj_id), (s, sm, lata) in grupy.items():
+        s, sm, komentarz = _komentarz_i_limity(s, sm, lata)
+        IloscUdzialowDlaAutoraZaCalosc.objects.create(
+            autor_id=autor_id,
+            dyscyplina_naukowa_id=dyscyplina_id,
+            rodzaj_autora_id=rodzaj_id,
+            uczelnia=uczelnia,
+            ilosc_udzialow=s,
+            ilosc_udzialow_monografie=sm,
+            komentarz=komentarz,
+        )
+
+
+def _referencyjna_srednia(uczelnia, udzialy, liczba_lat):
+    sumy = defaultdict(lambda: Decimal("0"))
+    for u in udzialy:
+        ad = _ad_lub_none(u.autor_id, u.rok)
+        if ad and ad.rodzaj_autora and ad.rodzaj_autora.jest_w_n:
+            sumy[u.dyscyplina_naukowa_id] += u.ilosc_udzialow
+    sankcje = {
+        o.dyscyplina_naukowa_id: o.sankcje
+        for o in LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia)
+    }
+    LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia).delete()
+    for dyscyplina_id, suma in sumy.items():
+        if suma > 0:
+            LiczbaNDlaUczelni.objects.create(
+                uczelnia=uczelnia,
+                dyscyplina_naukowa_id=dyscyplina_id,
+                liczba_n=suma / liczba_lat,
+                sankcje=sankcje.get(dyscyplina_id, Decimal("0")),
+            )
+
+
+def _referencyjny_bonus(uczelnia, rok_min, rok_max):
+    nieraportowane = oblicz_dyscypliny_nieraportowane(uczelnia, rok_max)
+    for rekord in IloscUdzialowDlaAutoraZaCalosc.objects.filter(uczelnia=uczelnia):
+        ad = Autor_Dyscyplina.objects.filter(
+            autor_id=rekord.autor_id, rok__gte=rok_min, rok__lte=rok_max
+        ).first()
+        if ad is None or not ad.dwie_dyscypliny():
+            continue
+        if rekord.dyscyplina_naukowa_id == ad.dyscyplina_naukowa_id:
+            inna = ad.subdyscyplina_naukowa
+        else:
+            inna = ad.dyscyplina_naukowa
+        if (
+            rekord.dyscyplina_naukowa_id not in nieraportowane
+            and inna.pk in nieraportowane
+        ):
+            nowa = rekord.ilosc_udzialow + 1
+            rekord.ilosc_udzialow_monografie += Decimal("0.5")
+            rekord.komentarz += (
+                f"<br>+1 slot (+0.5 monografie): {inna.nazwa} nie-raportowana"
+            )
+            if nowa > 4:
+                rekord.komentarz += f"<br>Ilość udziałów zredukowana: {nowa:.4f} → 4.00"
+                nowa = Decimal("4")
+                rekord.ilosc_udzialow_monografie = Decimal("2")
+            rekord.ilosc_udzialow = nowa
+            rekord.save()
+
+
+def _pipeline_referencyjny(uczelnia, rok_min=2022, rok_max=2025):
+    _referencyjne_za_rok(uczelnia, rok_min, rok_max)
+    udzialy = list(IloscUdzialowDlaAutoraZaRok.objects.filter(uczelnia=uczelnia))
+    _referencyjne_za_calosc(uczelnia, udzialy)
+    _referencyjna_srednia(uczelnia, udzialy, rok_max - rok_min + 1)
+    _referencyjny_bonus(uczelnia, rok_min, rok_max)
+
+
+def _stan(uczelnia):
+    return {
+        "za_rok": set(
+            IloscUdzialowDlaAutoraZaRok.objects.filter(uczelnia=uczelnia).values_list(
+                "autor_id",
+                "dyscyplina_naukowa_id",
+                "rok",
+                "ilosc_udzialow",
+                "ilosc_udzialow_monografie",
+                "autor_dyscyplina_id",
+            )
+        ),
+        "za_calosc": set(
+            IloscUdzialowDlaAutoraZaCalosc.objects.filter(
+                uczelnia=uczelnia
+            ).values_list(
+                "autor_id",
+                "dyscyplina_naukowa_id",
+                "rodzaj_autora_id",
+                "ilosc_udzialow",
+                "ilosc_udzialow_monografie",
+                "komentarz",
+            )
+        ),
+        "liczba_n": set(
+            LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia).values_list(
+                "dyscyplina_naukowa_id", "liczba_n", "sankcje"
+            )
+        ),
+        "koniec_2025": oblicz_liczbe_n_na_koniec_2025(uczelnia),
+    }
+
+
+@pytest.fixture
+def dane(
+    uczelnia,
+    jednostka,
+    dyscyplina1,
+    dyscyplina2,
+    rodzaj_autora_n,
+    rodzaj_autora_d,
+    rodzaj_autora_z,
+):
+    jednostka.skupia_pracownikow = True
+    jednostka.save()
+
+    def ad(rok, rodzaj=rodzaj_autora_n, etat="1.00", **kw):
+        autor = kw.pop("autor", None) or baker.make(Autor, aktualna_jednostka=jednostka)
+        kw.setdefault("dyscyplina_naukowa", dyscyplina1)
+        kw.setdefault("procent_dyscypliny", Decimal("100"))
+        Autor_Dyscyplina.objects.create(
+            autor=autor,
+            rok=rok,
+            rodzaj_autora=rodzaj,
+            wymiar_etatu=Decimal(etat) if etat else None,
+            **kw,
+        )
+        return autor
+
+    # Dyscyplina 1 raportowana w 2025 (>= 12 udziałów)
+    for _ in range(13):
+        ad(2025)
+
+    # Pełny etat przez 4 lata -> limit 4 i bonus za nieraportowaną dyscyplinę 2
+    autor = ad(
+        2022,
+        procent_dyscypliny=Decimal("80"),
+        subdyscyplina_naukowa=dyscyplina2,
+        procent_subdyscypliny=Decimal("20"),
+    )
+    for rok in (2023, 2024, 2025):
+        ad(rok, autor=autor, procent_dyscypliny=Decimal("100"))
+
+    # Mały etat (zaokrąglenie do 1), doktorant, typ Z, brak rodzaju, brak etatu
+    ad(2023, etat="0.33")
+    ad(2024, rodzaj=rodzaj_autora_d, etat="0.50")
+    ad(2025, rodzaj=rodzaj_autora_z)
+    ad(2024, rodzaj=None)
+    ad(2022, etat=None)
+
+    # Autor spoza jednostki skupiającej pracowników -- pomijany
+    baker.make(Autor_Dyscyplina, rok=2024, dyscyplina_naukowa=dyscyplina1)
+
+    LiczbaNDlaUczelni.objects.create(
+        uczelnia=uczelnia,
+        dyscyplina_naukowa=dyscyplina1,
+        liczba_n=Decimal("1"),
+        sankcje=Decimal("2.5"),
+    )
+    return uczelnia
+
+
+@pytest.mark.django_db
+def test_pipeline_zgodny_z_implementacja_referencyjna(dane):
+    _pipeline_referencyjny(dane)
+    oczekiwane = _stan(dane)
+
+    oblicz_liczby_n_dla_ewaluacji_2022_2025(dane)
+    wynik = _stan(dane)
+
+    assert wynik == oczekiwane
+    # Fixture pokrywa wszystkie gałęzie: bonus, zaokrąglenie, sankcje
+    assert any("nie-raportowana" in w[-1] for w in wynik["za_calosc"])
+    assert any("zaokrąglona" in w[-1] for w in wynik["za_calosc"])
+    assert Decimal("2.5") in {sankcje for _, _, sankcje in wynik["liczba_n"]}
+
+
+@pytest.mark.django_db
+def test_pipeline_liczba_zapytan_nie_zalezy_od_liczby_autorow(
+    dane, django_assert_max_num_queries
+):
+    oblicz_liczby_n_dla_ewaluacji_2022_2025(dane)
+    with django_assert_max_num_queries(30):
+        oblicz_liczby_n_dla_ewaluacji_2022_2025(dane)
@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.db import transaction
+from django.db.models import Exists, OuterRef, Subquery, Sum
 
 from .models import (
     IloscUdzialowDlaAutoraZaCalosc,
@@ -8,63 +9,60 @@ from .models import (
     LiczbaNDlaUczelni,
 )
 
+# Wszystkie funkcje poniżej działają na zbiorach: liczba zapytań nie zależy
+# od liczby autorów. Autor_Dyscyplina łączymy z udziałami po (autor, rok) --
+# unique_together gwarantuje co najwyżej jeden rekord, tak jak dawniej
+# Autor_Dyscyplina.objects.get(autor=..., rok=...) w pętli.
 
-@transaction.atomic
-def oblicz_srednia_liczbe_n_dla_dyscyplin(uczelnia, rok_min=2022, rok_max=2025):
-    """
-    Oblicza średnią liczbę N dla każdej dyscypliny w przeliczeniu na pełny wymiar czasu pracy.
 
-    Procedura:
-    1. Pobiera wszystkie udziały dla autorów z tabeli IloscUdzialowDlaAutoraZaRok
-    2. Łączy z danymi o wymiarze etatu z tabeli Autor_Dyscyplina
-    3. Oblicza średnią arytmetyczną w przeliczeniu na pełny etat (FTE)
-    4. Zapisuje wyniki do tabeli LiczbaNDlaUczelni
-    """
-    from collections import defaultdict
+def _autor_dyscyplina_za_rok():
+    from bpp.models.dyscyplina_naukowa import Autor_Dyscyplina
+
+    return Autor_Dyscyplina.objects.filter(
+        autor_id=OuterRef("autor_id"), rok=OuterRef("rok")
+    )
 
-    rok_kw = dict(rok__gte=rok_min, rok__lte=rok_max)
 
-    # Słownik do przechowywania sum udziałów i wymiarów etatu dla każdej dyscypliny
-    dyscyplina_stats = defaultdict(
-        lambda: {
-            "suma_udzialow": Decimal("0"),
-        }
+def _udzialy_w_liczbie_n(uczelnia, **filtr):
+    """Udziały autorów, których rodzaj (w danym roku) wlicza się do liczby N."""
+    return IloscUdzialowDlaAutoraZaRok.objects.filter(
+        Exists(_autor_dyscyplina_za_rok().filter(rodzaj_autora__jest_w_n=True)),
+        uczelnia=uczelnia,
+        **filtr,
     )
 
-    # Pobierz wszystkie udziały dla autorów w okresie ewaluacji dla tej uczelni
-    udzialy = IloscUdzialowDlaAutoraZaRok.objects.filter(
-        uczelnia=uczelnia, **rok_kw
-    ).select_related("autor", "dyscyplina_naukowa")
 
-    # Dla każdego udziału znajdź odpowiedni rodzaj autora
-    from bpp.models.dyscyplina_naukowa import Autor_Dyscyplina
+def _sumy_dla_dyscyplin(udzialy):
+    return dict(
+        udzialy.order_by()
+        .values("dyscyplina_naukowa_id")
+        .annotate(suma=Sum("ilosc_udzialow"))
+        .values_list("dyscyplina_naukowa_id", "suma")
+    )
 
-    for udzial in udzialy:
-        try:
-            # Pobierz rodzaj autora dla autora w danym roku
-            autor_dyscyplina = Autor_Dyscyplina.objects.get(
-                autor=udzial.autor, rok=udzial.rok
-            )
 
-            # Tylko dla pracowników zaliczanych do liczby N
-            if (
-                autor_dyscyplina.rodzaj_autora
-                and autor_dyscyplina.rodzaj_autora.jest_w_n
-            ):
-                # Sumuj tylko ilosc_udzialow bez ważenia
-                dyscyplina_stats[udzial.dyscyplina_naukowa]["suma_udzialow"] += (
-                    udzial.ilosc_udzialow
-                )
+@transaction.atomic
+def oblicz_srednia_liczbe_n_dla_dyscyplin(uczelnia, rok_min=2022, rok_max=2025):
+    """
+    Oblicza średnią liczbę N dla każdej dyscypliny w przeliczeniu na pełny wymiar czasu pracy.
 
-        except Autor_Dyscyplina.DoesNotExist:
-            # Jeśli nie ma przypisania dla autora, pomijamy
-            continue
+    Procedura:
+    1. Sumuje (jednym zapytaniem grupującym) udziały z tabeli
+       IloscUdzialowDlaAutoraZaRok dla autorów, których rodzaj w danym roku
+       (Autor_Dyscyplina) jest wliczany do liczby N
+    2. Oblicza średnią arytmetyczną w przeliczeniu na pełny etat (FTE)
+    3. Zapisuje wyniki do tabeli LiczbaNDlaUczelni (bulk_create)
+    """
+    sumy = _sumy_dla_dyscyplin(
+        _udzialy_w_liczbie_n(uczelnia, rok__gte=rok_min, rok__lte=rok_max)
+    )
 
     # Zapisz istniejące sankcje przed usunięciem rekordów
-    istniejace_sankcje = {
-        obj.dyscyplina_naukowa_id: obj.sankcje
-        for obj in LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia)
-    }
+    istniejace_sankcje = dict(
+        LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia).values_list(
+            "dyscyplina_naukowa_id", "sankcje"
+        )
+    )
 
     # Usuń istniejące rekordy dla uczelni
     LiczbaNDlaUczelni.objects.filter(uczelnia=uczelnia).delete()
@@ -72,20 +70,20 @@ def oblicz_srednia_liczbe_n_dla_dyscyplin(uczelnia, rok_min=2022, rok_max=2025):
     # Oblicz średnią i zapisz wyniki
     liczba_lat = rok_max - rok_min + 1
 
-    for dyscyplina, stats in dyscyplina_stats.items():
-        if stats["suma_udzialow"] > 0:
-            # Średnia arytmetyczna w przeliczeniu na pełny wymiar czasu pracy
-            srednia_calkowita = stats["suma_udzialow"] / liczba_lat
-
-            # Przywróć poprzednie sankcje jeśli istniały
-            sankcje = istniejace_sankcje.get(dyscyplina.pk, Decimal("0"))
-
-            LiczbaNDlaUczelni.objects.create(
+    LiczbaNDlaUczelni.objects.bulk_create(
+        [
+            LiczbaNDlaUczelni(
                 uczelnia=uczelnia,
-                dyscyplina_naukowa=dyscyplina,
-                liczba_n=srednia_calkowita,
-                sankcje=sankcje,
+                dyscyplina_naukowa_id=dyscyplina_id,
+                # Średnia arytmetyczna w przeliczeniu na pełny wymiar czasu pracy
+                liczba_n=suma / liczba_lat,
+                # Przywróć poprzednie sankcje jeśli istniały
+                sankcje=istniejace_sankcje.get(dyscyplina_id, Decimal("0")),
             )
+            for dyscyplina_id, suma in sumy.items()
+            if suma is not None and suma > 0
+        ]
+    )
 
 
 def oblicz_dyscypliny_nieraportowane(uczelnia, rok=2025):
@@ -100,18 +98,14 @@ def oblicz_dyscypliny_nieraportowane(uczelnia, rok=2025):
     Returns:
         set: Zbiór ID dyscyplin nieraportowanych
     """
-    from django.db.models import Sum
-
-    sumy = (
+    sumy = _sumy_dla_dyscyplin(
         IloscUdzialowDlaAutoraZaRok.objects.filter(uczelnia=uczelnia, rok=rok)
-        .values("dyscyplina_naukowa_id")
-        .annotate(suma=Sum("ilosc_udzialow"))
     )
 
     return {
-        item["dyscyplina_naukowa_id"]
-        for item in sumy
-        if item["suma"] is not None and item["suma"] < 12
+        dyscyplina_id
+        for dyscyplina_id, suma in sumy.items()
+        if suma is not None and suma < 12
     }
 
 
@@ -141,30 +135,47 @@ def dolicz_bonus_za_nieraportowana(
         return  # Brak nieraportowanych dyscyplin - nic do zrobienia
 
     # Pobierz nazwy dyscyplin do komentarzy
-    dyscypliny_nazwy = {
-        d.pk: d.nazwa
-        for d in Dyscyplina_Naukowa.objects.filter(pk__in=nieraportowane_ids)
-    }
+    dyscypliny_nazwy = dict(
+        Dyscyplina_Naukowa.objects.filter(pk__in=nieraportowane_ids).values_list(
+            "pk", "nazwa"
+        )
+    )
 
-    # Dla każdego rekordu IloscUdzialowDlaAutoraZaCalosc sprawdź warunki
-    for rekord in IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-        uczelnia=uczelnia
-    ).select_related("autor", "dyscyplina_naukowa", "rodzaj_autora"):
-        # Pobierz Autor_Dyscyplina dla tego autora (dowolny rok z zakresu)
-        autor_dyscyplina = Autor_Dyscyplina.objects.filter(
-            autor_id=rekord.autor_id,
+    rekordy = list(IloscUdzialowDlaAutoraZaCalosc.objects.filter(uczelnia=uczelnia))
+
+    # Autor_Dyscyplina dla każdego autora: pierwszy rok z zakresu (tak jak
+    # dawniej .filter(...).first() przy Meta.ordering = ("rok",))
+    dyscypliny_autora = {
+        autor_id: (dyscyplina_id, subdyscyplina_id)
+        for autor_id, dyscyplina_id, subdyscyplina_id in Autor_Dyscyplina.objects.filter(
+            autor_id__in={rekord.autor_id for rekord in rekordy},
             rok__gte=rok_min,
             rok__lte=rok_max,
-        ).first()
+        )
+        .order_by("autor_id", "rok")
+        .distinct("autor_id")
+        .values_list("autor_id", "dyscyplina_naukowa_id", "subdyscyplina_naukowa_id")
+    }
 
-        if autor_dyscyplina is None or not autor_dyscyplina.dwie_dyscypliny():
+    do_zapisu = []
+    for rekord in rekordy:
+        dyscyplina_id, subdyscyplina_id = dyscypliny_autora.get(
+            rekord.autor_id, (None, None)
+        )
+
+        # Odpowiednik Autor_Dyscyplina.dwie_dyscypliny()
+        if (
+            dyscyplina_id is None
+            or subdyscyplina_id is None
+            or dyscyplina_id == subdyscyplina_id
+        ):
             continue
 
         # Ustal która dyscyplina jest "inna"
-        if rekord.dyscyplina_naukowa_id == autor_dyscyplina.dyscyplina_naukowa_id:
-            inna_dyscyplina_id = autor_dyscyplina.subdyscyplina_naukowa_id
+        if rekord.dyscyplina_naukowa_id == dyscyplina_id:
+            inna_dyscyplina_id = subdyscyplina_id
         else:
-            inna_dyscyplina_id = autor_dyscyplina.dyscyplina_naukowa_id
+            inna_dyscyplina_id = dyscyplina_id
 
         # Sprawdź warunki dla +1
         aktualna_raportowana = rekord.dyscyplina_naukowa_id not in nieraportowane_ids
@@ -190,13 +201,40 @@ def dolicz_bonus_za_nieraportowana(
             rekord.ilosc_udzialow = nowa_suma
             rekord.ilosc_udzialow_monografie = nowa_suma_monografie
             rekord.komentarz = komentarz
-            rekord.save(
-                update_fields=[
-                    "ilosc_udzialow",
-                    "ilosc_udzialow_monografie",
-                    "komentarz",
-                ]
-            )
+            do_zapisu.append(rekord)
+
+    IloscUdzialowDlaAutoraZaCalosc.objects.bulk_update(
+        do_zapisu,
+        ["ilosc_udzialow", "ilosc_udzialow_monografie", "komentarz"],
+        batch_size=1000,
+    )
+
+
+def _komentarz_i_limity(suma_udzialow, suma_monografie, lata):
+    """Komentarz z latami oraz sumy po zastosowaniu minimum 1 i limitu 4."""
+    komentarz = f"Lata z danymi: {', '.join(map(str, sorted(lata)))}"
+
+    # Zastosuj minimalną wartość 1 jeśli suma jest mniejsza niż 1
+    if suma_udzialow > 0 and suma_udzialow < 1:
+        komentarz += f"<br>Ilość udziałów zaokrąglona: {suma_udzialow:.4f} → 1.00"
+        suma_udzialow = Decimal("1")
+
+    if suma_monografie > 0 and suma_monografie < 1:
+        komentarz += f"<br>Ilość udziałów za monografie zaokrąglona: {suma_monografie:.4f} → 1.00"
+        suma_monografie = Decimal("1")
+
+    if suma_udzialow > 4:
+        komentarz += f"<br>Ilość udziałów zredukowana: {suma_udzialow:.4f} → 4.00"
+        suma_udzialow = Decimal("4")
+
+        suma_monografie_new = suma_udzialow / Decimal("2")
+        komentarz += (
+            f"<br>Ilość udziałów za monografie zredukowana: {suma_monografie:.4f} → "
+            f"{suma_monografie_new:.2f}"
+        )
+        suma_monografie = suma_monografie_new
+
+    return suma_udzialow, suma_monografie, komentarz
 
 
 @transaction.atomic
@@ -208,106 +246,59 @@ def oblicz_sumy_udzialow_za_calosc(uczelnia, rok_min=2022, rok_max=2025):
     Tworzy osobny wpis dla każdego rodzaju autora (N, D, B, Z).
     Pomija rekordy gdzie rodzaj autora jest None.
 
+    Sumy liczone są jednym zapytaniem grupującym po (autor, dyscyplina,
+    rodzaj autora z Autor_Dyscyplina za dany rok); wyniki zapisywane są
+    przez bulk_create.
+
     Args:
         uczelnia: Uczelnia dla której wykonujemy obliczenia
         rok_min: Pierwszy rok okresu ewaluacji
         rok_max: Ostatni rok okresu ewaluacji
     """
-    from collections import defaultdict
-
-    from bpp.models.dyscyplina_naukowa import Autor_Dyscyplina
+    from django.contrib.postgres.aggregates import ArrayAgg
 
     # Wyczyść istniejące dane dla tej uczelni
     IloscUdzialowDlaAutoraZaCalosc.objects.filter(uczelnia=uczelnia).delete()
 
-    # Słownik do grupowania: klucz = (autor_id, dyscyplina_id, rodzaj_autora_id)
-    # wartość = {'suma_udzialow': ..., 'suma_monografie': ..., 'lata': set()}
-    grupy = defaultdict(
-        lambda: {
-            "suma_udzialow": Decimal("0"),
-            "suma_monografie": Decimal("0"),
-            "lata": set(),
-        }
-    )
-
-    # Pobierz wszystkie udziały za okres ewaluacji dla tej uczelni
-    udzialy = IloscUdzialowDlaAutoraZaRok.objects.filter(
-        uczelnia=uczelnia, rok__gte=rok_min, rok__lte=rok_max
-    ).select_related("autor", "dyscyplina_naukowa")
-
-    # Dla każdego udziału znajdź rodzaj autora i zgrupuj
-    for udzial in udzialy:
-        try:
-            autor_dyscyplina = Autor_Dyscyplina.objects.get(
-                autor=udzial.autor, rok=udzial.rok
-            )
-
-            # POMIŃ rekordy gdzie rodzaj_autora jest None
-            if autor_dyscyplina.rodzaj_autora is None:
-                continue
-
-            # Klucz grupowania
-            klucz = (
-                udzial.autor_id,
-                udzial.dyscyplina_naukowa_id,
-                autor_dyscyplina.rodzaj_autora_id,
-            )
-
-            # Dodaj do grupy
-            grupy[klucz]["suma_udzialow"] += udzial.ilosc_udzialow
-            grupy[klucz]["suma_monografie"] += udzial.ilosc_udzialow_monografie
-            grupy[klucz]["lata"].add(udzial.rok)
-
-        except Autor_Dyscyplina.DoesNotExist:
-            # Brak danych Autor_Dyscyplina - pomijamy
-            continue
-
-    # Zapisz zagregowane dane
-    for klucz, dane in grupy.items():
-        autor_id, dyscyplina_id, rodzaj_autora_id = klucz
-
-        # Zbuduj komentarz z latami
-        lata_posortowane = sorted(dane["lata"])
-        komentarz = f"Lata z danymi: {', '.join(map(str, lata_posortowane))}"
-
-        # Zastosuj minimalną wartość 1 jeśli suma jest mniejsza niż 1
-        suma_udzialow_final = dane["suma_udzialow"]
-        suma_monografie_final = dane["suma_monografie"]
-
-        if suma_udzialow_final > 0 and suma_udzialow_final < 1:
-            komentarz += (
-                f"<br>Ilość udziałów zaokrąglona: {suma_udzialow_final:.4f} → 1.00"
-            )
-            suma_udzialow_final = Decimal("1")
-
-        if suma_monografie_final > 0 and suma_monografie_final < 1:
-            komentarz += f"<br>Ilość udziałów za monografie zaokrąglona: {suma_monografie_final:.4f} → 1.00"
-            suma_monografie_final = Decimal("1")
-
-        if suma_udzialow_final > 4:
-            komentarz += (
-                f"<br>Ilość udziałów zredukowana: {suma_udzialow_final:.4f} → 4.00"
+    grupy = (
+        IloscUdzialowDlaAutoraZaRok.objects.filter(
+            uczelnia=uczelnia, rok__gte=rok_min, rok__lte=rok_max
+        )
+        .annotate(
+            ad_rodzaj_autora_id=Subquery(
+                _autor_dyscyplina_za_rok().values("rodzaj_autora_id")[:1]
             )
-            suma_udzialow_final = Decimal("4")
+        )
+        # POMIŃ rekordy bez Autor_Dyscyplina oraz gdzie rodzaj_autora jest None
+        .filter(ad_rodzaj_autora_id__isnull=False)
+        .order_by()
+        .values("autor_id", "dyscyplina_naukowa_id", "ad_rodzaj_autora_id")
+        .annotate(
+            suma_udzialow=Sum("ilosc_udzialow"),
+            suma_monografie=Sum("ilosc_udzialow_monografie"),
+            lata=ArrayAgg("rok", distinct=True),
+        )
+    )
 
-            suma_monografie_final_new = suma_udzialow_final / Decimal("2")
-            komentarz += (
-                f"<br>Ilość udziałów za monografie zredukowana: {suma_monografie_final:.4f} → "
-                f"{suma_monografie_final_new:.2f}"
+    obiekty = []
+    for grupa in grupy:
+        suma_udzialow, suma_monografie, komentarz = _komentarz_i_limity(
+            grupa["suma_udzialow"], grupa["suma_monografie"], grupa["lata"]
+        )
+        obiekty.append(
+            IloscUdzialowDlaAutoraZaCalosc(
+                autor_id=grupa["autor_id"],
+                dyscyplina_naukowa_id=grupa["dyscyplina_naukowa_id"],
+                rodzaj_autora_id=grupa["ad_rodzaj_autora_id"],
+                uczelnia=uczelnia,
+                ilosc_udzialow=suma_udzialow,
+                ilosc_udzialow_monografie=suma_monografie,
+                komentarz=komentarz,
             )
-            suma_monografie_final = suma_monografie_final_new
-
-        # Utwórz wpis
-        IloscUdzialowDlaAutoraZaCalosc.objects.create(
-            autor_id=autor_id,
-            dyscyplina_naukowa_id=dyscyplina_id,
-            rodzaj_autora_id=rodzaj_autora_id,
-            uczelnia=uczelnia,
-            ilosc_udzialow=suma_udzialow_final,
-            ilosc_udzialow_monografie=suma_monografie_final,
-            komentarz=komentarz,
         )
 
+    IloscUdzialowDlaAutoraZaCalosc.objects.bulk_create(obiekty, batch_size=1000)
+
 
 def oblicz_liczbe_n_na_koniec_2025(uczelnia):
     """
@@ -319,41 +310,7 @@ def oblicz_liczbe_n_na_koniec_2025(uczelnia):
     UWAGA: Liczy NIEWAŻONĄ sumę udziałów (bez wymiar_etatu × procent_dyscypliny),
     tylko prosta suma ilosc_udzialow z tabeli IloscUdzialowDlaAutoraZaRok.
     """
-    from collections import defaultdict
-
-    from bpp.models.dyscyplina_naukowa import Autor_Dyscyplina
-
-    # Słownik do przechowywania sum udziałów dla każdej dyscypliny w roku 2025
-    dyscyplina_stats_2025 = defaultdict(lambda: Decimal("0"))
-
-    # Pobierz wszystkie udziały dla autorów w roku 2025 dla tej uczelni
-    udzialy_2025 = IloscUdzialowDlaAutoraZaRok.objects.filter(
-        uczelnia=uczelnia, rok=2025
-    ).select_related("autor", "dyscyplina_naukowa")
-
-    # Dla każdego udziału sumuj nieważone udziały
-    for udzial in udzialy_2025:
-        try:
-            # Pobierz rodzaj autora dla autora w roku 2025
-            autor_dyscyplina = Autor_Dyscyplina.objects.get(
-                autor=udzial.autor, rok=2025
-            )
-
-            # Tylko dla pracowników zaliczanych do liczby N
-            if (
-                autor_dyscyplina.rodzaj_autora
-                and autor_dyscyplina.rodzaj_autora.jest_w_n
-            ):
-                # Sumuj tylko ilosc_udzialow bez ważenia
-                dyscyplina_stats_2025[udzial.dyscyplina_naukowa_id] += (
-                    udzial.ilosc_udzialow
-                )
-
-        except Autor_Dyscyplina.DoesNotExist:
-            # Jeśli nie ma przypisania dla autora w 2025, pomijamy
-            continue
-
-    return dict(dyscyplina_stats_2025)
+    return _sumy_dla_dyscyplin(_udzialy_w_liczbie_n(uczelnia, rok=2025))
 
 
 @transaction.atomic
@@ -367,7 +324,7 @@ def oblicz_liczby_n_dla_ewaluacji_2022_2025(uczelnia, rok_min=2022, rok_max=2025
         uczelnia=uczelnia, **warunek_lat
     ).delete()
 
-    wymiary_etatu = []
+    udzialy = []
 
     # Iteruj tylko autorów należących do tej uczelni z aktywną jednostką
     # skupiającą pracowników; aktualna_jednostka=None → wykluczone przez
@@ -376,38 +333,29 @@ def oblicz_liczby_n_dla_ewaluacji_2022_2025(uczelnia, rok_min=2022, rok_max=2025
         autor__aktualna_jednostka__uczelnia=uczelnia,
         autor__aktualna_jednostka__skupia_pracownikow=True,
         **warunek_lat,
-    ):
-        if ad.wymiar_etatu is not None:
-            wymiary_etatu.append(ad.wymiar_etatu)
-
-        # Sprawdź czy autorowi należy liczyć sloty
-        if ad.rodzaj_autora and not ad.rodzaj_autora.licz_sloty:
-            # Autor typu Z (licz_sloty=False) - utwórz wpis z udziałami = 0.0
-            # Dzięki temu autor będzie widoczny w tabelach, ale nie będzie
-            # wliczany do liczby N
-            for dyscyplina, _ in ad.policz_udzialy():
-                IloscUdzialowDlaAutoraZaRok.objects.create(
-                    rok=ad.rok,
-                    autor=ad.autor,
-                    dyscyplina_naukowa=dyscyplina,
-                    uczelnia=uczelnia,
-                    ilosc_udzialow=Decimal("0.0"),
-                    ilosc_udzialow_monografie=Decimal("0.0"),
-                    autor_dyscyplina=ad,
-                )
-        else:
-            # Normalny autor (licz_sloty=True lub rodzaj_autora=None) —
-            # oblicz rzeczywiste udziały
-            for dyscyplina, ilosc_udzialow in ad.policz_udzialy():
-                IloscUdzialowDlaAutoraZaRok.objects.create(
+    ).select_related("rodzaj_autora", "dyscyplina_naukowa", "subdyscyplina_naukowa"):
+        # Autor typu Z (licz_sloty=False) - wpis z udziałami = 0.0. Dzięki
+        # temu autor będzie widoczny w tabelach, ale nie będzie wliczany do
+        # liczby N. Normalny autor (licz_sloty=True lub rodzaj_autora=None) —
+        # rzeczywiste udziały.
+        licz_sloty = not ad.rodzaj_autora or ad.rodzaj_autora.licz_sloty
+
+        for dyscyplina, ilosc_udzialow in ad.policz_udzialy():
+            if not licz_sloty:
+                ilosc_udzialow = Decimal("0.0")
+            udzialy.append(
+                IloscUdzialowDlaAutoraZaRok(
                     rok=ad.rok,
-                    autor=ad.autor,
+                    autor_id=ad.autor_id,
                     dyscyplina_naukowa=dyscyplina,
                     uczelnia=uczelnia,
                     ilosc_udzialow=ilosc_udzialow,
                     ilosc_udzialow_monografie=ilosc_udzialow / Decimal("2.0"),
                     autor_dyscyplina=ad,
                 )
+            )
+
+    IloscUdzialowDlaAutoraZaRok.objects.bulk_create(udzialy, batch_size=1000)
 
     # Krok 1: Oblicz sumy udziałów za całość (BEZ bonusu +1)
     oblicz_sumy_udzialow_za_calosc(uczelnia, rok_min, rok_max)
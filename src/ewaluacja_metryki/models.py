@@ -142,7 +142,27 @@ class MetrykaAutora(models.Model):
         return f"{self.autor} - {self.dyscyplina_naukowa.nazwa}"
 
     def save(self, *args, **kwargs):
-        # Wylicz średnie przed zapisem
+        self.przelicz_pola_wyliczane()
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        """Zwraca URL do widoku szczegółów metryki używając stabilnych identyfikatorów"""
+        from django.urls import reverse
+
+        return reverse(
+            "ewaluacja_metryki:szczegoly",
+            kwargs={
+                "autor_slug": self.autor.slug,
+                "dyscyplina_kod": self.dyscyplina_naukowa.kod,
+            },
+        )
+
+    def przelicz_pola_wyliczane(self):
+        """Wylicz średnie i procent wykorzystania slotów.
+
+        Wołane przez ``save()``; ``bulk_create`` omija ``save()``, więc
+        ścieżki wsadowe wołają tę metodę same.
+        """
         if self.slot_nazbierany and self.slot_nazbierany > 0:
             self.srednia_za_slot_nazbierana = (
                 self.punkty_nazbierane / self.slot_nazbierany
@@ -163,20 +183,6 @@ class MetrykaAutora(models.Model):
         else:
             self.procent_wykorzystania_slotow = 0
 
-        super().save(*args, **kwargs)
-
-    def get_absolute_url(self):
-        """Zwraca URL do widoku szczegółów metryki używając stabilnych identyfikatorów"""
-        from django.urls import reverse
-
-        return reverse(
-            "ewaluacja_metryki:szczegoly",
-            kwargs={
-                "autor_slug": self.autor.slug,
-                "dyscyplina_kod": self.dyscyplina_naukowa.kod,
-            },
-        )
-
     @property
     def slot_niewykorzystany(self):
         """Zwraca ilość niewykorzystanych slotów"""
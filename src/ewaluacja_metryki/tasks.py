@@ -3,6 +3,7 @@ import sys
 
 import rollbar
 from celery import chord, group, shared_task
+from django.conf import settings
 from django.utils import timezone
 
 from bpp.models import Uczelnia
@@ -13,6 +14,10 @@ from .utils import generuj_metryki
 
 logger = logging.getLogger(__name__)
 
+# Ile par autor-dyscyplina liczy jeden task w trybie porcjowym; 1 = tryb
+# "jeden task na autora".
+ROZMIAR_PORCJI_METRYK = getattr(settings, "EWALUACJA_METRYKI_ROZMIAR_PORCJI", 250)
+
 
 def _resolve_uczelnia(uczelnia_id):
     """Single-or-fail: jawne uczelnia_id albo jedyna uczelnia w bazie.
@@ -128,6 +133,68 @@ def oblicz_metryki_dla_autora_task(
         }
 
 
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 2},
+)
+def oblicz_metryki_dla_porcji_task(
+    self,
+    ilosc_udzialow_ids,
+    rok_min=2022,
+    rok_max=2025,
+    minimalny_pk=0.01,
+    rodzaje_autora=None,
+    uczelnia_id=None,
+):
+    """
+    Celery task do obliczania metryk dla porcji autorów-dyscyplin.
+
+    Args:
+        ilosc_udzialow_ids: Lista ID obiektów IloscUdzialowDlaAutoraZaCalosc
+        pozostałe: jak w ``oblicz_metryki_dla_autora_task``
+
+    Returns:
+        Dict z kluczami: status ("porcja"), processed, skipped, errors, total
+    """
+    from decimal import Decimal
+
+    from django.db.models import F
+
+    from .utils import get_default_rodzaje_autora, oblicz_metryki_wsadowo
+
+    if rodzaje_autora is None:
+        rodzaje_autora = get_default_rodzaje_autora()
+
+    try:
+        wynik = oblicz_metryki_wsadowo(
+            ilosc_udzialow_ids,
+            rodzaje_autora=rodzaje_autora,
+            rok_min=rok_min,
+            rok_max=rok_max,
+            minimalny_pk=Decimal(str(minimalny_pk)),
+        )
+    except Exception as e:
+        error_msg = f"Błąd przy przetwarzaniu porcji {len(ilosc_udzialow_ids)} ID: {e}"
+        logger.error(error_msg)
+        rollbar.report_exc_info(sys.exc_info())
+        wynik = {
+            "processed": 0,
+            "skipped": 0,
+            "errors": len(ilosc_udzialow_ids),
+            "total": len(ilosc_udzialow_ids),
+            "message": error_msg,
+        }
+
+    # Atomowo zwiększ licznik przetworzonych o całą porcję (per uczelnia)
+    StatusGenerowania.objects.filter(uczelnia_id=uczelnia_id).update(
+        liczba_przetworzonych=F("liczba_przetworzonych") + len(ilosc_udzialow_ids)
+    )
+
+    return dict(wynik, status="porcja")
+
+
 @shared_task
 def finalizuj_generowanie_metryk(results, uczelnia_id=None):
     """
@@ -151,8 +218,18 @@ def finalizuj_generowanie_metryk(results, uczelnia_id=None):
     processed = 0
     skipped = 0
     errors = 0
+    total = 0
 
     for result in results:
+        if result and isinstance(result, dict) and result.get("status") == "porcja":
+            # Wynik oblicz_metryki_dla_porcji_task -- liczniki całej porcji
+            processed += result.get("processed", 0)
+            skipped += result.get("skipped", 0)
+            errors += result.get("errors", 0)
+            total += result.get("total", 0)
+            continue
+
+        total += 1
         if result and isinstance(result, dict):
             result_status = result.get("status", "error")
             if result_status == "processed":
@@ -165,8 +242,6 @@ def finalizuj_generowanie_metryk(results, uczelnia_id=None):
             # Jeśli wynik nie jest dictem, traktuj jako błąd
             errors += 1
 
-    total = len(results)
-
     # Zakończ generowanie - używa liczba_przetworzonych już zaktualizowanej atomowo w bazie
     status.zakoncz_generowanie(liczba_bledow=errors)
 
@@ -199,12 +274,15 @@ def generuj_metryki_task_parallel(
     przelicz_liczbe_n=True,
     rodzaje_autora=None,
     uczelnia_id=None,
+    rozmiar_porcji=None,
 ):
     """
     Celery task do równoległego generowania metryk ewaluacyjnych.
 
-    Uruchamia wiele tasków równolegle (po jednym dla każdego autora-dyscypliny),
-    co pozwala wykorzystać wiele workerów Celery jednocześnie.
+    Uruchamia wiele tasków równolegle, co pozwala wykorzystać wiele workerów
+    Celery jednocześnie. Każdy task liczy porcję ``rozmiar_porcji``
+    autorów-dyscyplin (domyślnie ``EWALUACJA_METRYKI_ROZMIAR_PORCJI``);
+    ``rozmiar_porcji=1`` to tryb "jeden task na autora".
 
     Args:
         rok_min: Początkowy rok okresu ewaluacji
@@ -213,12 +291,16 @@ def generuj_metryki_task_parallel(
         nadpisz: Czy nadpisywać istniejące metryki
         przelicz_liczbe_n: Czy przeliczać liczbę N przed generowaniem metryk (domyślnie True)
         rodzaje_autora: Lista rodzajów autorów do przetworzenia (domyślnie pobierana z Rodzaj_Autora.filter(licz_sloty=True))
+        rozmiar_porcji: Liczba autorów-dyscyplin na jeden task
     """
     if rodzaje_autora is None:
         from .utils import get_default_rodzaje_autora
 
         rodzaje_autora = get_default_rodzaje_autora()
 
+    if rozmiar_porcji is None:
+        rozmiar_porcji = ROZMIAR_PORCJI_METRYK
+
     try:
         uczelnia = _resolve_uczelnia(uczelnia_id)
     except (Uczelnia.DoesNotExist, Uczelnia.MultipleObjectsReturned) as e:
@@ -270,20 +352,35 @@ def generuj_metryki_task_parallel(
             task_id=self.request.id, liczba_do_przetworzenia=total_count
         )
 
-        # Krok 5: Utwórz group pojedynczych tasków
-        task_group = group(
-            [
-                oblicz_metryki_dla_autora_task.s(
-                    ilosc_udzialow_id=autor_id,
-                    rok_min=rok_min,
-                    rok_max=rok_max,
-                    minimalny_pk=minimalny_pk,
-                    rodzaje_autora=rodzaje_autora,
-                    uczelnia_id=uczelnia.pk,
-                )
-                for autor_id in ids_list
-            ]
-        )
+        # Krok 5: Utwórz group tasków -- porcjami albo po jednym na autora
+        if rozmiar_porcji > 1:
+            task_group = group(
+                [
+                    oblicz_metryki_dla_porcji_task.s(
+                        ilosc_udzialow_ids=ids_list[start : start + rozmiar_porcji],
+                        rok_min=rok_min,
+                        rok_max=rok_max,
+                        minimalny_pk=minimalny_pk,
+                        rodzaje_autora=rodzaje_autora,
+                        uczelnia_id=uczelnia.pk,
+                    )
+                    for start in range(0, total_count, rozmiar_porcji)
+                ]
+            )
+        else:
+            task_group = group(
+                [
+                    oblicz_metryki_dla_autora_task.s(
+                        ilosc_udzialow_id=autor_id,
+                        rok_min=rok_min,
+                        rok_max=rok_max,
+                        minimalny_pk=minimalny_pk,
+                        rodzaje_autora=rodzaje_autora,
+                        uczelnia_id=uczelnia.pk,
+                    )
+                    for autor_id in ids_list
+                ]
+            )
 
         # Krok 6: Uruchom chord (group + callback) i zapisz group_id
         job = chord(task_group)(finalizuj_generowanie_metryk.s(uczelnia_id=uczelnia.pk))
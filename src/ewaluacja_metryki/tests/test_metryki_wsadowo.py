@@ -0,0 +1,153 @@
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from bpp.models import (
+    Autor,
+    Autor_Dyscyplina,
+    Dyscyplina_Naukowa,
+    Jednostka,
+    Typ_Odpowiedzialnosci,
+    Wydawnictwo_Ciagle,
+    Wydawnictwo_Ciagle_Autor,
+)
+from bpp.models.sloty.core import IPunktacjaCacher
+from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
+from ewaluacja_metryki.models import MetrykaAutora, StatusGenerowania
+from ewaluacja_metryki.utils import _process_single_author, oblicz_metryki_wsadowo
+
+POLA = [
+    "slot_maksymalny",
+    "slot_nazbierany",
+    "punkty_nazbierane",
+    "prace_nazbierane",
+    "srednia_za_slot_nazbierana",
+    "slot_wszystkie",
+    "punkty_wszystkie",
+    "prace_wszystkie",
+    "liczba_prac_wszystkie",
+    "srednia_za_slot_wszystkie",
+    "procent_wykorzystania_slotow",
+    "jednostka_id",
+    "rodzaj_autora",
+]
+
+
+@pytest.fixture
+def dane(denorms, rodzaj_autora_n):
+    uczelnia = baker.make("bpp.Uczelnia")
+    jednostka = baker.make(Jednostka, skupia_pracownikow=True, uczelnia=uczelnia)
+    dyscyplina = baker.make(Dyscyplina_Naukowa, nazwa="Informatyka")
+    typ_odp, _ = Typ_Odpowiedzialnosci.objects.get_or_create(
+        nazwa="autor", defaults={"skrot": "aut."}
+    )
+
+    autorzy = baker.make(Autor, _quantity=3)
+    # Ostatni autor nie ma rodzaju "N" w okresie -- zostanie pominięty
+    for autor, rodzaj in zip(
+        autorzy, [rodzaj_autora_n, rodzaj_autora_n, None], strict=True
+    ):
+        baker.make(
+            Autor_Dyscyplina,
+            autor=autor,
+            dyscyplina_naukowa=dyscyplina,
+            rok=2023,
+            rodzaj_autora=rodzaj,
+        )
+        baker.make(
+            IloscUdzialowDlaAutoraZaCalosc,
+            autor=autor,
+            dyscyplina_naukowa=dyscyplina,
+            uczelnia=uczelnia,
+            ilosc_udzialow=Decimal("1.5"),
+            ilosc_udzialow_monografie=Decimal("1"),
+        )
+
+    for punkty in (100, 70, 40):
+        pub = baker.make(Wydawnictwo_Ciagle, rok=2023, punkty_kbn=punkty)
+        for kolejnosc, autor in enumerate(autorzy[:2]):
+            baker.make(
+                Wydawnictwo_Ciagle_Autor,
+                rekord=pub,
+                autor=autor,
+                jednostka=jednostka,
+                dyscyplina_naukowa=dyscyplina,
+                przypieta=True,
+                afiliuje=True,
+                typ_odpowiedzialnosci=typ_odp,
+                kolejnosc=kolejnosc,
+            )
+        denorms.flush()
+        pub.refresh_from_db()
+        cacher = IPunktacjaCacher(pub)
+        cacher.removeEntries()
+        cacher.rebuildEntries()
+
+    return uczelnia
+
+
+def _stan_metryk():
+    # Kolejność ID prac w listach nie jest semantyczna (tryb pojedynczy
+    # zwraca je w kolejności z bazy) -- porównujemy posortowane.
+    return {
+        (m.autor_id, m.dyscyplina_naukowa_id): {
+            p: sorted(getattr(m, p)) if p.startswith("prace_") else getattr(m, p)
+            for p in POLA
+        }
+        for m in MetrykaAutora.objects.all()
+    }
+
+
+@pytest.mark.django_db
+def test_oblicz_metryki_wsadowo_zgodne_z_trybem_pojedynczym(dane):
+    wpisy = list(
+        IloscUdzialowDlaAutoraZaCalosc.objects.select_related(
+            "autor", "dyscyplina_naukowa", "uczelnia"
+        )
+    )
+
+    for iu in wpisy:
+        _process_single_author(
+            iu, 1, 1, 0, ["N"], 2022, 2025, Decimal("0.01"), None, None
+        )
+    oczekiwane = _stan_metryk()
+    assert len(oczekiwane) == 2
+
+    MetrykaAutora.objects.all().delete()
+    wynik = oblicz_metryki_wsadowo([iu.pk for iu in wpisy], ["N"])
+
+    assert wynik == {"processed": 2, "skipped": 1, "errors": 0, "total": 3}
+    assert _stan_metryk() == oczekiwane
+
+    # Ponowne przeliczenie aktualizuje istniejące wiersze (update_conflicts)
+    oblicz_metryki_wsadowo([iu.pk for iu in wpisy], ["N"])
+    assert _stan_metryk() == oczekiwane
+
+
+@pytest.mark.django_db
+def test_oblicz_metryki_dla_porcji_task(dane):
+    from ewaluacja_metryki.tasks import (
+        finalizuj_generowanie_metryk,
+        oblicz_metryki_dla_porcji_task,
+    )
+
+    ids = list(IloscUdzialowDlaAutoraZaCalosc.objects.values_list("pk", flat=True))
+    status = StatusGenerowania.get_or_create(uczelnia=dane)
+    status.rozpocznij_generowanie(task_id="t", liczba_do_przetworzenia=len(ids))
+
+    wyniki = [
+        oblicz_metryki_dla_porcji_task(
+            ilosc_udzialow_ids=porcja, rodzaje_autora=["N"], uczelnia_id=dane.pk
+        )
+        for porcja in (ids[:2], ids[2:])
+    ]
+
+    status.refresh_from_db()
+    assert status.liczba_przetworzonych == 3
+
+    podsumowanie = finalizuj_generowanie_metryk(wyniki, uczelnia_id=dane.pk)
+    assert podsumowanie["total"] == 3
+    assert podsumowanie["skipped"] == 1
+    assert podsumowanie["errors"] == 0
+    assert MetrykaAutora.objects.count() == 2
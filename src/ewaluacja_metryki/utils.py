@@ -2,7 +2,7 @@ import logging
 from decimal import Decimal
 
 from django.db import transaction
-from django.db.models import Q, Sum
+from django.db.models import F, Q, Sum
 
 from bpp.models import Autor_Dyscyplina
 from bpp.util import zaloguj_polkniety_wyjatek
@@ -546,6 +546,197 @@ def _process_single_author(
         return "error", msg
 
 
+def _autor_dyscypliny_w_okresie(autor_ids, rok_min, rok_max):
+    """Wpisy Autor_Dyscyplina z okresu dla wielu autorów -- jedno zapytanie.
+
+    Returns:
+        Dict autor_id -> lista Autor_Dyscyplina posortowana malejąco po roku
+    """
+    ret = {}
+    for ad in (
+        Autor_Dyscyplina.objects.filter(
+            autor_id__in=autor_ids, rok__gte=rok_min, rok__lte=rok_max
+        )
+        .select_related("rodzaj_autora")
+        .order_by("autor_id", "-rok")
+    ):
+        ret.setdefault(ad.autor_id, []).append(ad)
+    return ret
+
+
+def _wpisy_slotow_dla_par(pary, uczelnia_id, rok_min, rok_max, minimalny_pk):
+    """Wpisy Cache_Punktacja_Autora_Query dla wielu par (autor, dyscyplina).
+
+    Jedno zapytanie zamiast dwóch ``zbieraj_sloty`` + dwóch konwersji na
+    ``rekord_id`` per para; filtry jak w ``bpp.core.zbieraj_sloty``.
+
+    Returns:
+        Tuple (wpisy, rekord_id): ``wpisy`` to dict (autor_id, dyscyplina_id)
+        -> lista ``(pk, slot * 10000, pkdaut * 10000)``, ``rekord_id`` mapuje
+        pk wpisu cache na stabilny ``rekord_id``.
+    """
+    from bpp.core import _grupuj_wpisy_slotow
+    from bpp.models.cache import Cache_Punktacja_Autora_Query
+
+    rekordy = Cache_Punktacja_Autora_Query.objects.filter(
+        rekord__rok__gte=rok_min,
+        rekord__rok__lte=rok_max,
+        autor_id__in={autor_id for autor_id, _d in pary},
+        dyscyplina_id__in={dyscyplina_id for _a, dyscyplina_id in pary},
+    )
+    if uczelnia_id is not None:
+        rekordy = rekordy.filter(jednostka__uczelnia_id=uczelnia_id)
+
+    rekord_id = {}
+
+    def wiersze():
+        for autor_id, dyscyplina_id, pk, size, value, punkty_kbn, rid in (
+            rekordy.order_by("autor_id", "dyscyplina_id", "pk")
+            .values_list(
+                "autor_id",
+                "dyscyplina_id",
+                "pk",
+                F("slot") * 10000,
+                F("pkdaut") * 10000,
+                "rekord__punkty_kbn",
+                "rekord_id",
+            )
+            .iterator()
+        ):
+            rekord_id[pk] = rid
+            yield (autor_id, dyscyplina_id), pk, size, value, punkty_kbn
+
+    wpisy = dict(_grupuj_wpisy_slotow(wiersze(), minimalny_pk))
+    return wpisy, rekord_id
+
+
+def oblicz_metryki_wsadowo(
+    ilosc_udzialow_ids,
+    rodzaje_autora,
+    rok_min=2022,
+    rok_max=2025,
+    minimalny_pk=Decimal("0.01"),
+):
+    """
+    Oblicza metryki dla porcji wpisów IloscUdzialowDlaAutoraZaCalosc.
+
+    Wsadowy odpowiednik ``_process_single_author``: dane wejściowe dla całej
+    porcji pobierane są stałą liczbą zapytań, plecaki liczone w pamięci,
+    a wynik zapisywany jednym ``bulk_create(update_conflicts=True)``.
+
+    Args:
+        ilosc_udzialow_ids: ID obiektów IloscUdzialowDlaAutoraZaCalosc
+        rodzaje_autora: Lista akceptowalnych skrótów rodzajów autorów
+        rok_min: Początkowy rok okresu ewaluacji
+        rok_max: Końcowy rok okresu ewaluacji
+        minimalny_pk: Minimalny próg punktów
+
+    Returns:
+        Dict z kluczami: processed, skipped, errors, total
+    """
+    from bpp.core import _zbieraj_sloty_z_wpisow
+    from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
+
+    wpisy_iu = list(
+        IloscUdzialowDlaAutoraZaCalosc.objects.filter(pk__in=ilosc_udzialow_ids)
+        .select_related("autor", "dyscyplina_naukowa")
+        .order_by("pk")
+    )
+    wynik = {"processed": 0, "skipped": 0, "errors": 0, "total": len(wpisy_iu)}
+
+    autor_dyscypliny = _autor_dyscypliny_w_okresie(
+        {iu.autor_id for iu in wpisy_iu}, rok_min, rok_max
+    )
+
+    wpisy_per_uczelnia = {}
+    for iu in wpisy_iu:
+        wpisy_per_uczelnia.setdefault(iu.uczelnia_id, []).append(iu)
+
+    # Klucz unikalności MetrykaAutora; przy powtórzeniu wygrywa ostatni wpis
+    # -- tak jak przy kolejnych update_or_create w trybie pojedynczym.
+    metryki = {}
+
+    for uczelnia_id, wpisy_uczelni in wpisy_per_uczelnia.items():
+        sloty, rekord_id = _wpisy_slotow_dla_par(
+            {(iu.autor_id, iu.dyscyplina_naukowa_id) for iu in wpisy_uczelni},
+            uczelnia_id,
+            rok_min,
+            rok_max,
+            minimalny_pk,
+        )
+
+        for iu in wpisy_uczelni:
+            dyscyplina_id = iu.dyscyplina_naukowa_id
+            w_okresie = [
+                ad
+                for ad in autor_dyscypliny.get(iu.autor_id, [])
+                if dyscyplina_id
+                in (ad.dyscyplina_naukowa_id, ad.subdyscyplina_naukowa_id)
+            ]
+            if not any(
+                ad.rodzaj_autora and ad.rodzaj_autora.skrot in rodzaje_autora
+                for ad in w_okresie
+            ):
+                wynik["skipped"] += 1
+                continue
+
+            try:
+                wpisy = sloty.get((iu.autor_id, dyscyplina_id), [])
+                slot_maksymalny = iu.ilosc_udzialow
+                punkty_nazbierane, lista, slot_nazbierany = _zbieraj_sloty_z_wpisow(
+                    int(slot_maksymalny * 10000), wpisy
+                )
+                punkty_wszystkie, wszystkie, slot_wszystkie = _zbieraj_sloty_z_wpisow(
+                    None, wpisy, "wszystko"
+                )
+
+                najnowszy = w_okresie[0]
+                metryka = MetrykaAutora(
+                    autor_id=iu.autor_id,
+                    dyscyplina_naukowa_id=dyscyplina_id,
+                    uczelnia_id=uczelnia_id,
+                    jednostka_id=iu.autor.aktualna_jednostka_id,
+                    slot_maksymalny=slot_maksymalny,
+                    slot_nazbierany=Decimal(str(slot_nazbierany)),
+                    punkty_nazbierane=Decimal(str(punkty_nazbierane)),
+                    prace_nazbierane=[rekord_id[pk] for pk in lista],
+                    slot_wszystkie=Decimal(str(slot_wszystkie)),
+                    punkty_wszystkie=Decimal(str(punkty_wszystkie)),
+                    prace_wszystkie=[rekord_id[pk] for pk in wszystkie],
+                    liczba_prac_wszystkie=len(wszystkie),
+                    rok_min=rok_min,
+                    rok_max=rok_max,
+                    rodzaj_autora=(
+                        najnowszy.rodzaj_autora.skrot
+                        if najnowszy.rodzaj_autora
+                        else " "
+                    ),
+                )
+                metryka.przelicz_pola_wyliczane()
+            except Exception as e:
+                logger.error(
+                    f"Błąd przy przetwarzaniu {iu.autor} - "
+                    f"{iu.dyscyplina_naukowa.nazwa}: {str(e)}"
+                )
+                wynik["errors"] += 1
+                continue
+
+            metryki[(iu.autor_id, dyscyplina_id, uczelnia_id)] = metryka
+            wynik["processed"] += 1
+
+    MetrykaAutora.objects.bulk_create(
+        metryki.values(),
+        update_conflicts=True,
+        unique_fields=["autor", "dyscyplina_naukowa", "uczelnia"],
+        update_fields=[
+            f.name
+            for f in MetrykaAutora._meta.concrete_fields
+            if f.name not in ("id", "autor", "dyscyplina_naukowa", "uczelnia")
+        ],
+    )
+    return wynik
+
+
 def generuj_metryki(
     rok_min=2022,
     rok_max=2025,
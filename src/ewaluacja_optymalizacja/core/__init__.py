@@ -6,15 +6,23 @@ using constraint programming (CP-SAT solver from OR-Tools).
 """
 
 import logging
+import multiprocessing
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from bpp.models import Dyscyplina_Naukowa
 from ewaluacja_liczba_n.models import LiczbaNDlaUczelni
+from ewaluacja_optymalizacja import pool_worker
 
-from .data_loader import generate_pub_data, load_author_slot_limits
+from .data_loader import (
+    generate_pub_data,
+    load_author_slot_limits,
+    load_discipline_data,
+)
 from .data_structures import (
     SCALE,
+    DisciplineData,
     OptimizationResults,
     Pub,
     is_low_mono,
@@ -29,7 +37,17 @@ from .optimization_phases import (
     run_single_phase_optimization,
     validate_author_limits,
 )
-from .solver import SolutionCallback, solve_author_knapsack
+from .solver import (
+    SolutionCallback,
+    default_num_workers,
+    solve_author_knapsack,
+)
+from .warm_start import (
+    input_fingerprint,
+    load_previous_run,
+    results_from_run,
+    selected_pub_ids,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +74,7 @@ def _run_two_phase_optimization(
     liczba_n: float | None,
     verbose: bool,
     log,
+    hint_ids: set | None = None,
 ) -> tuple[list[Pub], float, bool, float | None, float | None]:
     """Run two-phase optimization: per-author, then institution constraints."""
     # PHASE 1: Solve per-author knapsack problems
@@ -84,6 +103,7 @@ def _run_two_phase_optimization(
         author_slot_limits,
         liczba_n,
         log,
+        hint_ids=hint_ids,
     )
 
     # Overall optimality: both phases must be optimal
@@ -96,15 +116,21 @@ __all__ = [
     # Data structures
     "SCALE",
     "Pub",
+    "DisciplineData",
     "OptimizationResults",
     "slot_units",
     "is_low_mono",
     # Data loading
     "generate_pub_data",
     "load_author_slot_limits",
+    "load_discipline_data",
     # Solver
     "solve_author_knapsack",
     "SolutionCallback",
+    # Incremental re-optimization
+    "input_fingerprint",
+    "load_previous_run",
+    "results_from_run",
     # Optimization phases
     "run_phase1_per_author_optimization",
     "apply_institution_constraints",
@@ -127,6 +153,8 @@ def solve_discipline(
     log_callback=None,
     liczba_n: float | None = None,
     algorithm_mode: str = "two-phase",
+    data: DisciplineData | None = None,
+    hint_ids: set | None = None,
 ) -> OptimizationResults:
     """
     Solve optimization for a single discipline.
@@ -139,6 +167,11 @@ def solve_discipline(
         algorithm_mode: "two-phase" (default) or "single-phase"
             - "two-phase": Phase 1 per-author optimization, Phase 2 institution constraints
             - "single-phase": Global CP-SAT with all constraints from start
+        data: Preloaded input (see load_discipline_data). When given, no
+            database queries are made, so the call can run in a worker
+            process.
+        hint_ids: Publication IDs selected by the previous run, passed to
+            CP-SAT as solution hints (see warm_start)
 
     Returns:
         OptimizationResults object with complete results
@@ -161,7 +194,7 @@ def solve_discipline(
     log(f"Algorithm mode: {algorithm_mode}")
 
     # Log solver configuration
-    cpu_count = os.cpu_count() or 8
+    cpu_count = default_num_workers()
     if algorithm_mode == "single-phase":
         log(
             f"Solver config: {cpu_count} workers, timeout 30 min (1800s), THOROUGH mode"
@@ -174,12 +207,16 @@ def solve_discipline(
 
     log(f"Loading publications for discipline: {dyscyplina_nazwa}")
 
-    # Generate publication data from database
-    try:
-        pubs = generate_pub_data(dyscyplina_nazwa, verbose=verbose)
-    except ValueError as e:
-        log(str(e), "ERROR")
-        raise
+    # Generate publication data and author limits from database
+    if data is None:
+        try:
+            data = load_discipline_data(dyscyplina_nazwa, log_func=log, verbose=verbose)
+        except ValueError as e:
+            log(str(e), "ERROR")
+            raise
+
+    pubs = data.pubs
+    fingerprint = input_fingerprint(data, liczba_n, algorithm_mode)
 
     if not pubs:
         log(
@@ -187,19 +224,18 @@ def solve_discipline(
             "in years 2022-2025",
             "WARNING",
         )
-        return _empty_results(dyscyplina_nazwa)
+        results = _empty_results(dyscyplina_nazwa)
+        results.input_fingerprint = fingerprint
+        return results
 
     log(f"Found {len(pubs)} publications")
 
     # Get unique authors
-    authors = sorted({p.author for p in pubs})
+    authors = data.authors
     log(f"Found {len(authors)} unique authors")
 
-    # Get discipline object for loading slot limits
-    dyscyplina_obj = Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina_nazwa)
-
-    # Load per-author slot limits
-    author_slot_limits = load_author_slot_limits(authors, dyscyplina_obj, log)
+    # Per-author slot limits
+    author_slot_limits = data.author_slot_limits
 
     # Run optimization based on selected algorithm mode
     gap_percent = None
@@ -214,7 +250,7 @@ def solve_discipline(
             gap_percent,
             best_bound,
         ) = run_single_phase_optimization(
-            pubs, authors, author_slot_limits, liczba_n, verbose, log
+            pubs, authors, author_slot_limits, liczba_n, verbose, log, hint_ids
         )
     else:
         # Two-phase: Per-author optimization, then institution constraints
@@ -225,7 +261,7 @@ def solve_discipline(
             gap_percent,
             best_bound,
         ) = _run_two_phase_optimization(
-            pubs, authors, author_slot_limits, liczba_n, verbose, log
+            pubs, authors, author_slot_limits, liczba_n, verbose, log, hint_ids
         )
 
     # Validation: Check that no author exceeds their limits
@@ -237,7 +273,7 @@ def solve_discipline(
     log(f"\nTotal points: {int(total_points)} ({opt_status})", "SUCCESS")
 
     # Build and return results
-    return build_optimization_results(
+    results = build_optimization_results(
         dyscyplina_nazwa,
         all_selected,
         pubs,
@@ -249,6 +285,8 @@ def solve_discipline(
         optimality_gap_percent=gap_percent,
         best_bound=best_bound,
     )
+    results.input_fingerprint = fingerprint
+    return results
 
 
 def apply_pinning_candidates(
@@ -369,17 +407,143 @@ def apply_pinning_candidates(
     }
 
 
-def solve_uczelnia(uczelnia_id: int | None = None, min_liczba_n: int = 12):
+def _log_discipline_error(dyscyplina_nazwa: str, e: Exception) -> None:
+    # Log full traceback for debugging
+    tb = traceback.format_exc()
+    logger.error(
+        f"ERROR processing {dyscyplina_nazwa}: {type(e).__name__}: {e}\n"
+        f"Full traceback:\n{tb}"
+    )
+
+
+def _prepare_discipline(liczba_n_obj, reuse_previous: bool):
+    """
+    Load input of one discipline and compare it with its previous run.
+
+    Returns:
+        (data, liczba_n, reused, hints): ``reused`` is OptimizationResults
+        rebuilt from the previous run when the input fingerprint did not
+        change (None otherwise); ``hints`` are publication IDs of the
+        previous run's selection for warm-starting (None without a run).
+    """
+    dyscyplina = liczba_n_obj.dyscyplina_naukowa
+    liczba_n = float(liczba_n_obj.liczba_n)
+
+    logger.info(f"Loading data: {dyscyplina.nazwa}")
+    data = load_discipline_data(
+        dyscyplina.nazwa, log_func=lambda msg, style=None: logger.info(msg)
+    )
+
+    if not reuse_previous:
+        return data, liczba_n, None, None
+
+    run, selection = load_previous_run(data.dyscyplina_id)
+    if run is None:
+        return data, liczba_n, None, None
+
+    fingerprint = input_fingerprint(data, liczba_n)
+    if run.input_fingerprint == fingerprint:
+        logger.info(f"Input unchanged, reusing run #{run.pk}: {dyscyplina.nazwa}")
+        return data, liczba_n, results_from_run(data, run, selection, fingerprint), None
+
+    return data, liczba_n, None, selected_pub_ids(selection)
+
+
+def _solve_disciplines_parallel(jobs, max_parallel: int):
+    """
+    Solve disciplines concurrently on a bounded process pool.
+
+    ``jobs`` are (DisciplineData, liczba_n, hints) tuples loaded up front in
+    this process (the solves themselves do not touch the database). CP-SAT
+    search workers are split between the concurrent solves so the total
+    stays within the machine's cores. Results are yielded as they finish.
+    """
+    max_parallel = min(max_parallel, len(jobs))
+    workers_per_solve = max(1, (os.cpu_count() or 8) // max_parallel)
+
+    logger.info(
+        f"Parallel mode: {max_parallel} concurrent solves, "
+        f"{workers_per_solve} CP-SAT workers each"
+    )
+
+    with ProcessPoolExecutor(
+        max_workers=max_parallel,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=pool_worker.init_solve_worker,
+        initargs=(workers_per_solve,),
+    ) as executor:
+        futures = {
+            executor.submit(
+                pool_worker.solve_discipline_worker, data, liczba_n, hints
+            ): data.dyscyplina_nazwa
+            for data, liczba_n, hints in jobs
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    dyscyplina_nazwa, results, records = future.result()
+                except Exception as e:
+                    _log_discipline_error(futures[future], e)
+                    # Re-raise to let caller decide how to handle
+                    raise
+                # Progress lines of the worker, as the sequential path logs them
+                pool_worker.replay_logs(records)
+                yield dyscyplina_nazwa, results
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _solve_prepared(data: DisciplineData, liczba_n: float, hints: set | None):
+    """Solve one preloaded discipline in this process."""
+    logger.info(f"\n{'=' * 80}")
+    logger.info(f"Processing: {data.dyscyplina_nazwa} (liczba_n={liczba_n})")
+    logger.info(f"{'=' * 80}")
+
+    try:
+        results = solve_discipline(
+            data.dyscyplina_nazwa,
+            verbose=False,
+            liczba_n=liczba_n,
+            data=data,
+            hint_ids=hints,
+        )
+    except Exception as e:
+        _log_discipline_error(data.dyscyplina_nazwa, e)
+        # Re-raise to let caller decide how to handle
+        raise
+    return data.dyscyplina_nazwa, results
+
+
+def solve_uczelnia(
+    uczelnia_id: int | None = None,
+    min_liczba_n: int = 12,
+    max_parallel: int = 1,
+    reuse_previous: bool = True,
+):
     """
     Solve optimization for all disciplines in university with liczba_n >= min_liczba_n.
 
+    Disciplines whose input (publications, author limits, liczba N) did not
+    change since their last completed OptimizationRun reuse that run's
+    selection -- such results have ``reused_run_id`` set and need not be
+    saved again. Changed disciplines are solved with the previous selection
+    as CP-SAT hints.
+
     Args:
         uczelnia_id: University ID (if None, uses the sole university;
             raises if zero or multiple exist — multi-hosted fail-loud)
         min_liczba_n: Minimum liczba N threshold (default: 12)
+        max_parallel: Number of disciplines solved concurrently in a process
+            pool (default: 1 — sequential, in this process). A daemonic
+            process (e.g. a prefork Celery worker) cannot start a pool, so
+            it always solves sequentially.
+        reuse_previous: Reuse/warm-start from previous runs (default: True);
+            False solves every discipline from scratch
 
     Yields:
-        (dyscyplina_nazwa, OptimizationResults) tuples
+        (dyscyplina_nazwa, OptimizationResults) tuples; in parallel mode
+        reused disciplines first, the rest in order of completion
     """
     from bpp.models import Uczelnia
 
@@ -412,28 +576,27 @@ def solve_uczelnia(uczelnia_id: int | None = None, min_liczba_n: int = 12):
     logger.info(f"Disciplines with liczba_n >= {min_liczba_n}")
     logger.info("=" * 80)
 
-    # Process each discipline
-    for liczba_n_obj in disciplines:
-        dyscyplina = liczba_n_obj.dyscyplina_naukowa
-        logger.info(f"\n{'=' * 80}")
-        logger.info(
-            f"Processing: {dyscyplina.nazwa} (liczba_n={liczba_n_obj.liczba_n})"
-        )
-        logger.info(f"{'=' * 80}")
+    parallel = max_parallel > 1 and not multiprocessing.current_process().daemon
 
+    jobs = []
+    for liczba_n_obj in disciplines:
         try:
-            results = solve_discipline(
-                dyscyplina.nazwa,
-                verbose=False,
-                liczba_n=float(liczba_n_obj.liczba_n),
+            data, liczba_n, reused, hints = _prepare_discipline(
+                liczba_n_obj, reuse_previous
             )
-            yield (dyscyplina.nazwa, results)
         except Exception as e:
-            # Log full traceback for debugging
-            tb = traceback.format_exc()
-            logger.error(
-                f"ERROR processing {dyscyplina.nazwa}: {type(e).__name__}: {e}\n"
-                f"Full traceback:\n{tb}"
-            )
-            # Re-raise to let caller decide how to handle
+            _log_discipline_error(liczba_n_obj.dyscyplina_naukowa.nazwa, e)
             raise
+
+        if reused is not None:
+            yield (data.dyscyplina_nazwa, reused)
+        elif parallel:
+            jobs.append((data, liczba_n, hints))
+        else:
+            yield _solve_prepared(data, liczba_n, hints)
+
+    if len(jobs) > 1:
+        yield from _solve_disciplines_parallel(jobs, max_parallel)
+    elif jobs:
+        # A single changed discipline is not worth starting a pool
+        yield _solve_prepared(*jobs[0])
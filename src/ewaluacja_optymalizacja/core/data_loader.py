@@ -3,106 +3,173 @@ Data loading functions for evaluation optimization.
 
 This module contains functions for loading publication and author data
 from the database.
+
+All loaders are set-based: the number of queries is fixed and does not
+depend on the number of authors or publications in the discipline.
 """
 
+import time
+from contextlib import contextmanager
 from decimal import Decimal
 
-from django.db.models import Sum
+from django.db.models import Count, F, Sum, Window
+from django.db.models.functions import Coalesce, FirstValue
 from tqdm import tqdm
 
 from bpp import const
-from bpp.models import Cache_Punktacja_Autora_Query, Dyscyplina_Naukowa
+from bpp.models import Autorzy, Cache_Punktacja_Autora_Query, Dyscyplina_Naukowa
 from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
 
-from .data_structures import Pub
+from .data_structures import DisciplineData, Pub
 
 
-def generate_pub_data(dyscyplina_nazwa: str, verbose: bool = False) -> list[Pub]:
+@contextmanager
+def timed_stage(name: str, timings: dict | None = None, log_func=None):
     """
-    Generate publication data from cache_punktacja_autora table.
+    Measure wall-clock time of a loading stage.
 
     Args:
-        dyscyplina_nazwa: Name of the scientific discipline to filter by
-        verbose: Show progress bar if True
-
-    Returns:
-        List of Pub objects with data from database
+        name: Stage name (key in ``timings``)
+        timings: Optional dictionary collecting ``name -> seconds``
+        log_func: Optional function to call for logging the stage duration
     """
-    # Get discipline object
+    start = time.perf_counter()
     try:
-        dyscyplina = Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina_nazwa)
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+        if log_func:
+            log_func(f"  [{name}] {elapsed:.2f}s")
+
+
+def _get_discipline(dyscyplina_nazwa: str) -> Dyscyplina_Naukowa:
+    try:
+        return Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina_nazwa)
     except Dyscyplina_Naukowa.DoesNotExist as e:
         raise ValueError(
             f"Discipline '{dyscyplina_nazwa}' not found in database"
         ) from e
 
+
+def _cache_entries(dyscyplina):
     # Query cache data for years 2022-2025 and given discipline
-    cache_entries = (
+    return (
         Cache_Punktacja_Autora_Query.objects.filter(
             dyscyplina=dyscyplina,
             rekord__rok__gte=2022,
             rekord__rok__lte=2025,
         )
-        .select_related(
-            "autor",
-            "rekord",
-        )
         .exclude(pkdaut=0)  # Exclude publications with 0 points
         .exclude(slot__lt=Decimal("0.1"))  # Exclude publications with 0 slots
     )
 
-    # Build a dictionary mapping autor_id to jest_w_n status
-    # Query all authors' rodzaj_autora for this discipline
-    autor_jest_w_n = {}
-    autor_ids = cache_entries.values_list("autor_id", flat=True).distinct()
 
-    for autor_id in autor_ids:
-        record = (
-            IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-                autor_id=autor_id,
-                dyscyplina_naukowa=dyscyplina,
+def load_authors_jest_w_n(cache_entries, dyscyplina) -> dict[int, bool]:
+    """
+    Map autor_id -> rodzaj_autora.jest_w_n in a single query.
+
+    For every author the IloscUdzialowDlaAutoraZaCalosc row with the highest
+    ``ilosc_udzialow`` decides (window function partitioned by author).
+    Authors without any row (or without rodzaj_autora) default to False.
+    """
+    rows = (
+        IloscUdzialowDlaAutoraZaCalosc.objects.filter(
+            autor_id__in=cache_entries.values("autor_id"),
+            dyscyplina_naukowa=dyscyplina,
+        )
+        .order_by()
+        .annotate(
+            first_jest_w_n=Window(
+                expression=FirstValue(Coalesce(F("rodzaj_autora__jest_w_n"), False)),
+                partition_by=[F("autor_id")],
+                order_by=[F("ilosc_udzialow").desc(), F("pk").asc()],
             )
-            .select_related("rodzaj_autora")
-            .order_by("-ilosc_udzialow")
-            .first()
         )
+        .values_list("autor_id", "first_jest_w_n")
+        .distinct()
+    )
+    return dict(rows)
 
-        # Default to False if no record or no rodzaj_autora
-        if record and record.rodzaj_autora:
-            autor_jest_w_n[autor_id] = record.rodzaj_autora.jest_w_n
-        else:
-            autor_jest_w_n[autor_id] = False
-
-    pubs = []
-    iterator = tqdm(cache_entries) if verbose else cache_entries
-    for entry in iterator:
-        rekord = entry.rekord
-
-        # Determine publication kind based on charakter_ogolny
-        charakter_ogolny = rekord.charakter_formalny.charakter_ogolny
-        if charakter_ogolny == const.CHARAKTER_OGOLNY_ARTYKUL:
-            kind = "article"
-        elif charakter_ogolny == const.CHARAKTER_OGOLNY_KSIAZKA:
-            kind = "monography"
-        else:
-            # Skip other types (chapters, etc.)
-            continue
 
-        # Count authors with pinned disciplines
-        author_count = rekord.original.autorzy_set.filter(
-            dyscyplina_naukowa__isnull=False, przypieta=True
-        ).count()
-
-        pub = Pub(
-            id=entry.rekord_id,  # This is already a tuple
-            author=entry.autor_id,
-            kind=kind,
-            points=float(entry.pkdaut),
-            base_slots=round(float(entry.slot), 2),  # Round to 2 decimal places
-            author_count=author_count,
-            jest_w_n=autor_jest_w_n.get(entry.autor_id, False),
+def load_pinned_author_counts(cache_entries) -> dict[tuple, int]:
+    """
+    Map rekord_id -> number of authors with a pinned discipline.
+
+    One grouped query over ``bpp_autorzy_mat`` instead of one
+    ``autorzy_set.count()`` per cache entry.
+    """
+    rows = (
+        Autorzy.objects.filter(
+            rekord__in=cache_entries.values("rekord"),
+            dyscyplina_naukowa__isnull=False,
+            przypieta=True,
+        )
+        .order_by()
+        .values("rekord_id")
+        .annotate(author_count=Count("*"))
+        .values_list("rekord_id", "author_count")
+    )
+    return {tuple(rekord_id): author_count for rekord_id, author_count in rows}
+
+
+def generate_pub_data(
+    dyscyplina_nazwa: str, verbose: bool = False, timings: dict | None = None
+) -> list[Pub]:
+    """
+    Generate publication data from cache_punktacja_autora table.
+
+    Args:
+        dyscyplina_nazwa: Name of the scientific discipline to filter by
+        verbose: Show progress bar if True
+        timings: Optional dictionary collecting per-stage durations (seconds)
+
+    Returns:
+        List of Pub objects with data from database
+    """
+    dyscyplina = _get_discipline(dyscyplina_nazwa)
+    cache_entries = _cache_entries(dyscyplina)
+
+    with timed_stage("jest_w_n", timings):
+        autor_jest_w_n = load_authors_jest_w_n(cache_entries, dyscyplina)
+
+    with timed_stage("author_counts", timings):
+        author_counts = load_pinned_author_counts(cache_entries)
+
+    with timed_stage("publications", timings):
+        rows = cache_entries.values_list(
+            "rekord_id",
+            "autor_id",
+            "pkdaut",
+            "slot",
+            "rekord__charakter_formalny__charakter_ogolny",
         )
-        pubs.append(pub)
+
+        pubs = []
+        iterator = tqdm(rows) if verbose else rows
+        for rekord_id, autor_id, pkdaut, slot, charakter_ogolny in iterator:
+            # Determine publication kind based on charakter_ogolny
+            if charakter_ogolny == const.CHARAKTER_OGOLNY_ARTYKUL:
+                kind = "article"
+            elif charakter_ogolny == const.CHARAKTER_OGOLNY_KSIAZKA:
+                kind = "monography"
+            else:
+                # Skip other types (chapters, etc.)
+                continue
+
+            rekord_id = tuple(rekord_id)
+            pubs.append(
+                Pub(
+                    id=rekord_id,
+                    author=autor_id,
+                    kind=kind,
+                    points=float(pkdaut),
+                    base_slots=round(float(slot), 2),  # Round to 2 decimal places
+                    author_count=author_counts.get(rekord_id, 0),
+                    jest_w_n=autor_jest_w_n.get(autor_id, False),
+                )
+            )
 
     return pubs
 
@@ -120,29 +187,85 @@ def load_author_slot_limits(authors: list[int], dyscyplina_obj, log_func) -> dic
         Dictionary mapping author_id to {"total": float, "mono": float}
     """
     log_func("Loading author slot limits from database...")
-    author_slot_limits = {}
-    custom_limit_count = 0
 
-    for author_id in authors:
-        # Aggregate slot limits across all rodzaj_autora types for this author
-        aggregated = IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-            autor_id=author_id,
+    # Aggregate slot limits across all rodzaj_autora types, grouped by author
+    aggregated = (
+        IloscUdzialowDlaAutoraZaCalosc.objects.filter(
+            autor_id__in=authors,
             dyscyplina_naukowa=dyscyplina_obj,
-        ).aggregate(
+        )
+        .order_by()
+        .values("autor_id")
+        .annotate(
             total_slots=Sum("ilosc_udzialow"),
             total_mono_slots=Sum("ilosc_udzialow_monografie"),
         )
+        .values_list("autor_id", "total_slots", "total_mono_slots")
+    )
 
-        if aggregated["total_slots"] is not None:
-            # Apply regulatory caps: max 4.0 total, max 2.0 monographs
-            total = min(round(float(aggregated["total_slots"]), 2), 4.0)
-            mono = min(round(float(aggregated["total_mono_slots"]), 2), 2.0)
+    custom_limits = {}
+    for author_id, total_slots, total_mono_slots in aggregated:
+        if total_slots is None:
+            continue
+        # Apply regulatory caps: max 4.0 total, max 2.0 monographs
+        custom_limits[author_id] = {
+            "total": min(round(float(total_slots), 2), 4.0),
+            "mono": min(round(float(total_mono_slots), 2), 2.0),
+        }
 
-            author_slot_limits[author_id] = {"total": total, "mono": mono}
-            custom_limit_count += 1
-        else:
-            # Use default limits if not specified
-            author_slot_limits[author_id] = {"total": 4.0, "mono": 2.0}
+    author_slot_limits = {}
+    for author_id in authors:
+        # Use default limits if not specified
+        author_slot_limits[author_id] = custom_limits.get(
+            author_id, {"total": 4.0, "mono": 2.0}
+        )
 
-    log_func(f"Found custom slot limits for {custom_limit_count} authors")
+    log_func(f"Found custom slot limits for {len(custom_limits)} authors")
     return author_slot_limits
+
+
+def load_discipline_data(
+    dyscyplina_nazwa: str, log_func=None, verbose: bool = False
+) -> DisciplineData:
+    """
+    Load everything the solver needs for one discipline.
+
+    Runs a fixed number of queries regardless of the discipline size and
+    records the duration of each stage in ``DisciplineData.timings``.
+
+    Raises:
+        ValueError: if the discipline does not exist
+    """
+
+    def log(msg: str, style: str | None = None):
+        if log_func:
+            log_func(msg, style)
+
+    timings = {}
+
+    with timed_stage("discipline", timings):
+        dyscyplina_obj = _get_discipline(dyscyplina_nazwa)
+
+    pubs = generate_pub_data(dyscyplina_nazwa, verbose=verbose, timings=timings)
+    authors = sorted({p.author for p in pubs})
+
+    author_slot_limits = {}
+    if pubs:
+        with timed_stage("author_limits", timings):
+            author_slot_limits = load_author_slot_limits(authors, dyscyplina_obj, log)
+
+    log(
+        "Data loaded in {:.2f}s ({})".format(
+            sum(timings.values()),
+            ", ".join(f"{name}: {seconds:.2f}s" for name, seconds in timings.items()),
+        )
+    )
+
+    return DisciplineData(
+        dyscyplina_nazwa=dyscyplina_nazwa,
+        dyscyplina_id=dyscyplina_obj.pk,
+        pubs=pubs,
+        authors=authors,
+        author_slot_limits=author_slot_limits,
+        timings=timings,
+    )
@@ -5,7 +5,7 @@ This module contains dataclasses and helper functions for representing
 publication and optimization result data.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 # We'll scale slot numbers by 1000 for better precision (integers for CP-SAT)
 SCALE = 1000
@@ -29,6 +29,18 @@ class Pub:
         return self.points / self.base_slots if self.base_slots > 0 else 0
 
 
+@dataclass
+class DisciplineData:
+    """Solver input for one discipline, as loaded by data_loader"""
+
+    dyscyplina_nazwa: str
+    dyscyplina_id: int
+    pubs: list[Pub]
+    authors: list[int]  # sorted unique author IDs
+    author_slot_limits: dict  # author_id -> {"total": float, "mono": float}
+    timings: dict = field(default_factory=dict)  # stage name -> seconds
+
+
 @dataclass
 class OptimizationResults:
     """Container for optimization results"""
@@ -48,6 +60,10 @@ class OptimizationResults:
         None  # (best_bound - value) / best_bound * 100
     )
     best_bound: float | None = None  # Theoretical upper bound from solver
+    # Hash of the solver input (see warm_start.input_fingerprint)
+    input_fingerprint: str = ""
+    # Set when the result was taken from a stored run with the same input
+    reused_run_id: int | None = None
 
 
 def slot_units(p: Pub) -> int:
@@ -146,6 +146,7 @@ def apply_institution_constraints(  # noqa: C901
     author_slot_limits: dict,
     liczba_n: float | None,
     log_func,
+    hint_ids: set | None = None,
 ) -> tuple[list[Pub], float, bool, float | None, float | None]:
     """
     Apply Phase 2: Institution-level constraints using ALL publications.
@@ -162,6 +163,8 @@ def apply_institution_constraints(  # noqa: C901
         author_slot_limits: Dictionary of slot limits per author
         liczba_n: Institution-level slot limit (3N - sankcje, used directly)
         log_func: Function to call for logging
+        hint_ids: Publication IDs selected by the previous run of this
+            discipline; when given, used for hints instead of phase 1
 
     Returns:
         Tuple of (selected publications, total_points, is_optimal, gap_percent, best_bound)
@@ -252,14 +255,19 @@ def apply_institution_constraints(  # noqa: C901
     y = {p.id: m.NewBoolVar(f"y_{p.id[0]}_{p.id[1]}") for p in all_pubs}
 
     # CRITICAL: Add hints from phase 1 for warm-starting
-    # This helps the solver converge faster by starting from a good solution
+    # This helps the solver converge faster by starting from a good solution.
+    # A previous run's selection already satisfies institution constraints
+    # (unless the input changed a lot), so it is the better starting point.
+    if hint_ids is None:
+        hint_ids = phase1_selected_ids
+    else:
+        log_func("Using previous run selection as solver hints")
     # NOTE: Must iterate over unique pub IDs (y.keys()), not all_pubs,
     # because all_pubs may contain duplicates (same pub for multiple authors).
     # CP-SAT returns MODEL_INVALID if AddHint is called multiple times
     # for the same variable, even with the same value.
     for pub_id in y.keys():
-        was_selected_in_phase1 = pub_id in phase1_selected_ids
-        m.AddHint(y[pub_id], was_selected_in_phase1)
+        m.AddHint(y[pub_id], pub_id in hint_ids)
 
     # Objective: maximize points from ALL publications
     m.Maximize(sum(p.points * y[p.id] for p in all_pubs))
@@ -640,6 +648,7 @@ def run_single_phase_optimization(  # noqa: C901
     liczba_n: float | None,
     verbose: bool,
     log_func,
+    hint_ids: set | None = None,
 ) -> tuple[list[Pub], float, bool, float | None, float | None]:
     """
     Run single-phase optimization using global CP-SAT with all constraints.
@@ -651,6 +660,8 @@ def run_single_phase_optimization(  # noqa: C901
         liczba_n: Institution-level slot limit (3N - sankcje, used directly)
         verbose: Show detailed progress
         log_func: Function to call for logging
+        hint_ids: Publication IDs selected by the previous run of this
+            discipline, passed to the solver as hints (optional)
 
     Returns:
         Tuple of (selected publications, total_points, is_optimal, gap_percent, best_bound)
@@ -670,6 +681,12 @@ def run_single_phase_optimization(  # noqa: C901
     # Decision variables for ALL publications
     x = {p.id: m.NewBoolVar(f"x_{p.id[0]}_{p.id[1]}") for p in pubs}
 
+    # Warm start from the previous run (one hint per variable, see phase 2)
+    if hint_ids is not None:
+        log_func("Using previous run selection as solver hints")
+        for pub_id, var in x.items():
+            m.AddHint(var, pub_id in hint_ids)
+
     # Objective: maximize total points
     m.Maximize(sum(p.points * x[p.id] for p in pubs))
 
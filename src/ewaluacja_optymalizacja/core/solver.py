@@ -48,6 +48,7 @@ multi-author works to redistribute points/slots).
 """
 
 import logging
+import math
 import os
 import sys
 
@@ -57,11 +58,32 @@ from .data_structures import SCALE, Pub
 
 logger = logging.getLogger(__name__)
 
+# Largest table (publications x scaled slot capacity) solved by the exact
+# dynamic-programming knapsack; larger per-author cases go to CP-SAT.
+DP_MAX_CELLS = 20_000_000
+
+# Number of CP-SAT search workers per solve; None means all CPUs.
+# Overridden in process-pool workers (see set_default_num_workers), so that
+# several concurrent solves share the machine's cores.
+_default_num_workers: int | None = None
+
+
+def set_default_num_workers(num_workers: int | None) -> None:
+    """Set the CP-SAT search worker count used by configure_solver."""
+    global _default_num_workers
+    _default_num_workers = num_workers
+
+
+def default_num_workers() -> int:
+    """CP-SAT search worker count used when configure_solver gets none."""
+    return _default_num_workers or os.cpu_count() or 8
+
 
 def configure_solver(
     timeout_seconds: float | None = 1800.0,
     log_progress: bool = True,
     quality_mode: str = "balanced",
+    num_workers: int | None = None,
 ) -> cp_model.CpSolver:
     """
     Configure CP-SAT solver with optimal settings.
@@ -74,14 +96,17 @@ def configure_solver(
             - "fast": Quick solutions, may not be optimal
             - "balanced": Good balance of speed and quality (default)
             - "thorough": Maximum effort to find best solution
+        num_workers: Number of parallel search workers. None means
+            default_num_workers() (all CPUs unless overridden).
 
     Returns:
         Configured CpSolver instance
     """
     solver = cp_model.CpSolver()
 
-    # Use all available CPUs for better performance
-    num_workers = os.cpu_count() or 8
+    # Use all available CPUs (or this process' share of them)
+    if num_workers is None:
+        num_workers = default_num_workers()
     solver.parameters.num_search_workers = num_workers
     logger.info(f"Solver configured with {num_workers} workers")
 
@@ -121,8 +146,125 @@ def configure_solver(
     return solver
 
 
+def _knapsack_dp(weights, values, capacity):
+    """0/1 knapsack over integer weights, vectorized with numpy.
+
+    Returns ``(best, take)``: ``best[c]`` is the maximum value with total
+    weight <= ``c`` and ``take[i, c]`` tells whether item ``i`` is used in
+    that optimum (for backtracking with :func:`_knapsack_backtrack`).
+    """
+    import numpy as np
+
+    best = np.zeros(capacity + 1)
+    take = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for i, (w, v) in enumerate(zip(weights, values, strict=True)):
+        if w > capacity:
+            continue
+        candidate = best[: capacity + 1 - w] + v
+        improves = candidate > best[w:]
+        take[i, w:] = improves
+        best[w:] = np.where(improves, candidate, best[w:])
+    return best, take
+
+
+def _knapsack_backtrack(weights, take, capacity):
+    """Indexes of items of the optimum computed by :func:`_knapsack_dp`."""
+    chosen = []
+    for i in range(len(weights) - 1, -1, -1):
+        if take[i, capacity]:
+            chosen.append(i)
+            capacity -= weights[i]
+    return chosen
+
+
+def solve_author_knapsack_dp(
+    author_pubs: list[Pub], max_slots: float, max_mono_slots: float
+) -> tuple[list[Pub], bool] | None:
+    """
+    Exact dynamic-programming solver for the per-author knapsack.
+
+    Solves the same model as the CP-SAT version of solve_author_knapsack
+    (same integer slot units, same constraints). Monographs use both the
+    total and the monography slot limit, articles only the total one, so
+    the two-constraint problem splits into two one-dimensional knapsacks --
+    monographs up to min(mono, total), articles up to total -- combined by
+    trying every split of the total limit.
+
+    Returns:
+        Same as solve_author_knapsack (a DP result is always optimal), or
+        None when the table would exceed DP_MAX_CELLS.
+    """
+    sorted_pubs = sorted(author_pubs, key=lambda p: (-p.efficiency, p.author_count))
+    mono = [p for p in sorted_pubs if p.kind == "monography"]
+    articles = [p for p in sorted_pubs if p.kind != "monography"]
+
+    capacity = int(max_slots * SCALE)
+    mono_capacity = int(max_mono_slots * SCALE) if mono else capacity
+    if capacity < 0 or mono_capacity < 0:
+        return [], False  # Infeasible, like CP-SAT
+    mono_capacity = min(mono_capacity, capacity)
+
+    mono_weights = [int(p.base_slots * SCALE) for p in mono]
+    article_weights = [int(p.base_slots * SCALE) for p in articles]
+
+    # Slot values are often multiples of a common unit; dividing it out
+    # shrinks the table without changing which subsets fit
+    unit = math.gcd(capacity, mono_capacity, *mono_weights, *article_weights) or 1
+    capacity //= unit
+    mono_capacity //= unit
+    mono_weights = [w // unit for w in mono_weights]
+    article_weights = [w // unit for w in article_weights]
+
+    if len(sorted_pubs) * (capacity + 1) > DP_MAX_CELLS:
+        return None
+
+    mono_best, mono_take = _knapsack_dp(
+        mono_weights, [p.points for p in mono], mono_capacity
+    )
+    article_best, article_take = _knapsack_dp(
+        article_weights, [p.points for p in articles], capacity
+    )
+
+    # Best split of the total limit between monographs and articles
+    totals = mono_best + article_best[capacity - mono_capacity :][::-1]
+    mono_used = int(totals.argmax())
+
+    chosen = {
+        mono[i].id for i in _knapsack_backtrack(mono_weights, mono_take, mono_used)
+    } | {
+        articles[i].id
+        for i in _knapsack_backtrack(
+            article_weights, article_take, capacity - mono_used
+        )
+    }
+    return [p for p in sorted_pubs if p.id in chosen], True
+
+
 def solve_author_knapsack(
     author_pubs: list[Pub], max_slots: float, max_mono_slots: float
+) -> tuple[list[Pub], bool]:
+    """
+    Solve knapsack problem for a single author.
+
+    Uses the exact dynamic-programming solver (solve_author_knapsack_dp) and
+    falls back to CP-SAT only when the case exceeds the DP size bound.
+
+    Returns:
+        Tuple of (selected publications list, is_optimal flag)
+        is_optimal is True if solver found OPTIMAL solution, False if FEASIBLE (possibly timed out)
+    """
+    if not author_pubs:
+        return [], True  # Empty is trivially optimal
+
+    result = solve_author_knapsack_dp(author_pubs, max_slots, max_mono_slots)
+    if result is not None:
+        return result
+
+    return solve_author_knapsack_cp_sat(author_pubs, max_slots, max_mono_slots)
+
+
+def solve_author_knapsack_cp_sat(
+    author_pubs: list[Pub], max_slots: float, max_mono_slots: float
 ) -> tuple[list[Pub], bool]:
     """
     Solve knapsack problem for a single author using CP-SAT.
@@ -0,0 +1,100 @@
+"""
+Incremental re-optimization: input fingerprints and previous runs.
+
+A discipline whose input did not change since its last stored
+OptimizationRun reuses that run's selection instead of being solved again.
+A changed discipline is solved, but the previous selection is passed to
+CP-SAT as solution hints, so the search starts from a near-optimal point.
+"""
+
+import hashlib
+from dataclasses import astuple
+
+from .data_structures import DisciplineData, OptimizationResults
+from .optimization_phases import build_optimization_results
+
+# Bump when the solver model changes so that stored runs are not reused
+FINGERPRINT_VERSION = 1
+
+
+def input_fingerprint(
+    data: DisciplineData, liczba_n: float | None, algorithm_mode: str = "two-phase"
+) -> str:
+    """
+    Content hash of everything the solver result depends on.
+
+    Covers the Pub tuples (in a stable order), per-author slot limits, the
+    institution slot limit and the algorithm mode.
+    """
+    h = hashlib.sha256()
+    h.update(repr((FINGERPRINT_VERSION, liczba_n, algorithm_mode)).encode())
+    for p in sorted(data.pubs, key=lambda p: (p.id, p.author)):
+        h.update(repr(astuple(p)).encode())
+    for author_id in sorted(data.author_slot_limits):
+        limits = data.author_slot_limits[author_id]
+        h.update(repr((author_id, limits["total"], limits["mono"])).encode())
+    return h.hexdigest()
+
+
+def load_previous_run(dyscyplina_id: int):
+    """
+    Latest completed OptimizationRun of the discipline and its selection.
+
+    Returns:
+        (run, selection) where selection is a set of
+        ((content_type_id, object_id), autor_id) tuples; (None, set()) if
+        there is no completed run
+    """
+    from ewaluacja_optymalizacja.models import OptimizationPublication, OptimizationRun
+
+    run = (
+        OptimizationRun.objects.filter(
+            dyscyplina_naukowa_id=dyscyplina_id, status="completed"
+        )
+        .order_by("-started_at")
+        .first()
+    )
+    if run is None:
+        return None, set()
+
+    selection = {
+        (tuple(rekord_id), autor_id)
+        for rekord_id, autor_id in OptimizationPublication.objects.filter(
+            author_result__optimization_run=run
+        ).values_list("rekord_id", "author_result__autor_id")
+    }
+    return run, selection
+
+
+def selected_pub_ids(selection: set) -> set:
+    """Publication IDs of a previous selection, as used for CP-SAT hints."""
+    return {pub_id for pub_id, _author in selection}
+
+
+def results_from_run(
+    data: DisciplineData, run, selection: set, fingerprint: str
+) -> OptimizationResults:
+    """
+    Rebuild OptimizationResults of an unchanged discipline from a stored run.
+
+    The input is identical (same fingerprint), so the stored selection is
+    still valid and optimal to the same degree as when it was saved.
+    """
+    all_selected = [p for p in data.pubs if (p.id, p.author) in selection]
+    results = build_optimization_results(
+        data.dyscyplina_nazwa,
+        all_selected,
+        data.pubs,
+        data.authors,
+        data.author_slot_limits,
+        sum(p.points for p in all_selected),
+        run.validation_passed,
+        is_optimal=run.is_optimal,
+        optimality_gap_percent=(
+            float(run.optimality_gap) if run.optimality_gap is not None else None
+        ),
+        best_bound=float(run.best_bound) if run.best_bound is not None else None,
+    )
+    results.input_fingerprint = fingerprint
+    results.reused_run_id = run.pk
+    return results
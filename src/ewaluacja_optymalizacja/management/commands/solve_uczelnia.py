@@ -3,22 +3,14 @@ Management command to solve optimization for all disciplines in a university.
 """
 
 import logging
-from decimal import Decimal
 
 from django.core.management import BaseCommand
 from django.core.management.base import CommandError
-from django.db import transaction
-from django.utils import timezone
 
 from bpp.models import Dyscyplina_Naukowa, Uczelnia
 from bpp.util import zaloguj_polkniety_wyjatek
-from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
-from ewaluacja_optymalizacja.core import is_low_mono, solve_uczelnia
-from ewaluacja_optymalizacja.models import (
-    OptimizationAuthorResult,
-    OptimizationPublication,
-    OptimizationRun,
-)
+from ewaluacja_optymalizacja.core import solve_uczelnia
+from ewaluacja_optymalizacja.solve_helpers.persistence import write_optimization_run
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +19,8 @@ class Command(BaseCommand):
     help = """Solve evaluation optimization for all disciplines in a university.
 
     Processes all disciplines with liczba_n >= min_liczba_n (default: 12)
-    and saves results to the database.
+    and saves results to the database. Disciplines whose input did not change
+    since the previous run keep that run (use --full to solve everything).
     """
 
     def add_arguments(self, parser):
@@ -43,6 +36,20 @@ class Command(BaseCommand):
             default=12,
             help="Minimum liczba N threshold (default: 12)",
         )
+        parser.add_argument(
+            "--parallel",
+            type=int,
+            default=1,
+            help="Number of disciplines solved concurrently in a process pool; "
+            "CP-SAT workers are split between them (default: 1, sequential)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            default=False,
+            help="Solve every discipline from scratch, without reusing or "
+            "warm-starting from previous runs",
+        )
         parser.add_argument(
             "--save-to-db",
             action="store_true",
@@ -74,7 +81,16 @@ class Command(BaseCommand):
             "żeby ograniczyć optymalizację do jednej uczelni."
         )
 
-    def handle(self, uczelnia, min_liczba_n, save_to_db, *args, **options):
+    def handle(
+        self,
+        uczelnia,
+        min_liczba_n,
+        save_to_db,
+        parallel=1,
+        full=False,
+        *args,
+        **options,
+    ):
         self.stdout.write("=" * 80)
         self.stdout.write("SOLVING OPTIMIZATION FOR UNIVERSITY")
         self.stdout.write("=" * 80)
@@ -84,6 +100,7 @@ class Command(BaseCommand):
         self.stdout.write(f"University: {uczelnia_obj}")
         self.stdout.write(f"Minimum liczba N: {min_liczba_n}")
         self.stdout.write(f"Save to database: {save_to_db}")
+        self.stdout.write(f"Parallel solves: {parallel}")
         self.stdout.write("")
 
         # Process disciplines
@@ -91,8 +108,19 @@ class Command(BaseCommand):
         errors_count = 0
 
         for dyscyplina_nazwa, results in solve_uczelnia(
-            uczelnia_id=uczelnia_obj.pk, min_liczba_n=min_liczba_n
+            uczelnia_id=uczelnia_obj.pk,
+            min_liczba_n=min_liczba_n,
+            max_parallel=parallel,
+            reuse_previous=not full,
         ):
+            if results.reused_run_id is not None:
+                self.stdout.write(
+                    f"= {dyscyplina_nazwa}: input unchanged, "
+                    f"keeping run #{results.reused_run_id}"
+                )
+                results_count += 1
+                continue
+
             try:
                 if save_to_db:
                     self._save_results(
@@ -121,71 +149,10 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING(f"Errors: {errors_count}"))
         self.stdout.write(self.style.SUCCESS("Optimization complete!"))
 
-    @transaction.atomic
     def _save_results(self, results, dyscyplina_nazwa, uczelnia_obj):
         """Save optimization results to database"""
         dyscyplina_obj = Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina_nazwa)
-
-        # Usuń stare optymalizacje dla tej dyscypliny
-        OptimizationRun.objects.filter(dyscyplina_naukowa=dyscyplina_obj).delete()
-
-        # Create OptimizationRun
-        opt_run = OptimizationRun.objects.create(
-            dyscyplina_naukowa=dyscyplina_obj,
-            uczelnia=uczelnia_obj,
-            status="completed",
-            total_points=Decimal(str(results.total_points)),
-            total_slots=Decimal(str(results.total_slots)),
-            total_publications=results.total_publications,
-            low_mono_count=results.low_mono_count,
-            low_mono_percentage=Decimal(str(results.low_mono_percentage)),
-            validation_passed=results.validation_passed,
-            finished_at=timezone.now(),
-        )
-
-        # Save author results
-        for author_id, author_data in results.authors.items():
-            selected_pubs = author_data["selected_pubs"]
-            limits = author_data["limits"]
-
-            # Get rodzaj_autora for this author (może być wiele rekordów - bierzemy pierwszy)
-            record = (
-                IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-                    autor_id=author_id, dyscyplina_naukowa=dyscyplina_obj
-                )
-                .order_by("-ilosc_udzialow")
-                .first()
-            )
-            rodzaj_autora = record.rodzaj_autora if record else None
-
-            total_points = sum(p.points for p in selected_pubs)
-            total_slots = sum(p.base_slots for p in selected_pubs)
-            mono_slots = sum(
-                p.base_slots for p in selected_pubs if p.kind == "monography"
-            )
-
-            author_result = OptimizationAuthorResult.objects.create(
-                optimization_run=opt_run,
-                autor_id=author_id,
-                rodzaj_autora=rodzaj_autora,
-                total_points=Decimal(str(total_points)),
-                total_slots=Decimal(str(total_slots)),
-                mono_slots=Decimal(str(mono_slots)),
-                slot_limit_total=Decimal(str(limits["total"])),
-                slot_limit_mono=Decimal(str(limits["mono"])),
-            )
-
-            # Save publications for this author
-            for pub in selected_pubs:
-                OptimizationPublication.objects.create(
-                    author_result=author_result,
-                    rekord_id=pub.id,
-                    kind=pub.kind,
-                    points=Decimal(str(pub.points)),
-                    slots=Decimal(str(pub.base_slots)),
-                    is_low_mono=is_low_mono(pub),
-                    author_count=pub.author_count,
-                )
+        opt_run = write_optimization_run(results, dyscyplina_obj, uczelnia=uczelnia_obj)
 
         self.stdout.write(
             self.style.SUCCESS(f"✓ {dyscyplina_nazwa}: Saved run #{opt_run.pk}")
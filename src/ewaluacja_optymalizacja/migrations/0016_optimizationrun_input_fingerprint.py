@@ -0,0 +1,26 @@
+# Generated by Django 5.2.14 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "ewaluacja_optymalizacja",
+            "0015_remove_disciplineswapopportunity_ewaluacja_o_uczelni_ed0a90_idx_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="optimizationrun",
+            name="input_fingerprint",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Skrót danych wejściowych solvera (publikacje, limity autorów, liczba N). Przy niezmienionym odcisku wynik jest używany ponownie.",
+                max_length=64,
+                verbose_name="Odcisk danych wejściowych",
+            ),
+        ),
+    ]
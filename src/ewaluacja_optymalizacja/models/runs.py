@@ -106,6 +106,15 @@ class OptimizationRun(models.Model):
         "Null jeśli niedostępne.",
     )
 
+    input_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name="Odcisk danych wejściowych",
+        help_text="Skrót danych wejściowych solvera (publikacje, limity autorów, "
+        "liczba N). Przy niezmienionym odcisku wynik jest używany ponownie.",
+    )
+
     # Additional metadata
     notes = models.TextField(blank=True, default="", verbose_name="Notatki")
 
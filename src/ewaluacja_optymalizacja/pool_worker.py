@@ -0,0 +1,89 @@
+"""
+Process-pool entry points for parallel discipline solving.
+
+Spawned workers unpickle the pool initializer before Django is set up, so
+this module must not import models at module level -- everything that needs
+the app registry is imported inside the functions.
+"""
+
+import logging
+from contextlib import contextmanager
+
+# Logger tree captured in workers and replayed by the parent process
+LOGGER_NAME = "ewaluacja_optymalizacja"
+
+
+class _RecordBuffer(logging.Handler):
+    """Collects log records in a picklable form (message and traceback as text)."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        self.records.append(record)
+
+
+@contextmanager
+def capture_logs():
+    """
+    Buffer this process's ``ewaluacja_optymalizacja`` log records.
+
+    Every level is captured -- the parent's logger levels decide what is
+    emitted. Propagation is switched off meanwhile, so the records are not
+    also written by the worker's own handlers.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    buffer = _RecordBuffer()
+    level, propagate = logger.level, logger.propagate
+    logger.addHandler(buffer)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    try:
+        yield buffer.records
+    finally:
+        logger.removeHandler(buffer)
+        logger.setLevel(level)
+        logger.propagate = propagate
+
+
+def replay_logs(records) -> None:
+    """Emit records captured by a worker through this process's loggers."""
+    for record in records:
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+
+def init_solve_worker(num_workers: int) -> None:
+    """Pool initializer: set up Django and this worker's CP-SAT CPU share."""
+    import django
+
+    django.setup()
+
+    from ewaluacja_optymalizacja.core.solver import set_default_num_workers
+
+    set_default_num_workers(num_workers)
+
+
+def solve_discipline_worker(data, liczba_n: float, hint_ids=None):
+    """
+    Solve one preloaded discipline (DisciplineData) inside a pool worker.
+
+    ``hint_ids`` -- previous run's selection for warm-starting (optional).
+
+    Returns:
+        (dyscyplina_nazwa, OptimizationResults, log records) tuple; the
+        records are the lines the sequential path would have logged, for
+        ``replay_logs`` in the parent
+    """
+    from ewaluacja_optymalizacja.core import _solve_prepared
+
+    with capture_logs() as records:
+        dyscyplina_nazwa, results = _solve_prepared(data, liczba_n, hint_ids)
+    return dyscyplina_nazwa, results, records
@@ -14,8 +14,10 @@ from .display import (
 )
 from .json_export import save_results_to_json_file
 from .persistence import (
+    delete_optimization_runs,
     load_author_names_and_records,
     save_optimization_to_database,
+    write_optimization_run,
 )
 from .phase3_pinning import handle_phase3_pinning
 from .unpinning import handle_unpinning
@@ -28,6 +30,8 @@ __all__ = [
     "save_results_to_json_file",
     "load_author_names_and_records",
     "save_optimization_to_database",
+    "write_optimization_run",
+    "delete_optimization_runs",
     "handle_phase3_pinning",
     "handle_unpinning",
 ]
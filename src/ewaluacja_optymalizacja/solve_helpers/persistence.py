@@ -1,7 +1,9 @@
 """Database persistence + record loading for optimization results."""
 
 from decimal import Decimal
+from io import StringIO
 
+from django.db import connection, transaction
 from django.utils import timezone
 
 from bpp.models import Autor, Dyscyplina_Naukowa, Rekord
@@ -13,22 +15,100 @@ from ewaluacja_optymalizacja.models import (
     OptimizationRun,
 )
 
+# Children of a run are written with bulk_create; runs with more selected
+# publications than this go through COPY instead.
+COPY_MIN_ROWS = 5000
+BULK_CREATE_BATCH_SIZE = 1000
 
-def save_optimization_to_database(stdout, style, results, dyscyplina):
-    """Save optimization results to the database.
 
-    Removes any previous ``OptimizationRun`` rows for this discipline,
-    then writes a fresh run with per-author and per-publication detail.
+def delete_optimization_runs(**filters):
+    """Delete ``OptimizationRun`` rows matching ``filters``, set-wise.
 
-    Returns the freshly created ``OptimizationRun`` instance.
+    ``QuerySet.delete()`` loads every author result into memory to cascade
+    to its publications. Nothing else references these tables and no
+    signals are attached, so one ``DELETE`` per table, from the leaves up,
+    is equivalent.
+
+    Returns the number of deleted runs.
     """
-    dyscyplina_obj = Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina)
+    db = OptimizationRun.objects.db
+
+    def prefixed(prefix):
+        return {prefix + name: value for name, value in filters.items()}
+
+    OptimizationPublication.objects.filter(
+        **prefixed("author_result__optimization_run__")
+    )._raw_delete(db)
+    OptimizationAuthorResult.objects.filter(
+        **prefixed("optimization_run__")
+    )._raw_delete(db)
+    return OptimizationRun.objects.filter(**filters)._raw_delete(db)
+
+
+def _rodzaje_autorow(author_ids, dyscyplina_obj):
+    """``autor_id -> rodzaj_autora_id`` from the author's largest share record."""
+    return dict(
+        IloscUdzialowDlaAutoraZaCalosc.objects.filter(
+            autor_id__in=author_ids, dyscyplina_naukowa=dyscyplina_obj
+        )
+        .order_by("autor_id", "-ilosc_udzialow")
+        .distinct("autor_id")
+        .values_list("autor_id", "rodzaj_autora_id")
+    )
+
 
-    # Usun stare optymalizacje dla tej dyscypliny
-    OptimizationRun.objects.filter(dyscyplina_naukowa=dyscyplina_obj).delete()
+def _decimal(value):
+    return Decimal(str(value)) if value is not None else None
+
+
+def _copy_publications(publications):
+    """Write unsaved ``OptimizationPublication`` objects with ``COPY``."""
+    opts = OptimizationPublication._meta
+    fields = [f for f in opts.concrete_fields if not f.primary_key]
+
+    def text(field, obj):
+        value = field.value_from_object(obj)
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, tuple | list):
+            return "{" + ",".join(str(v) for v in value) + "}"
+        return str(value)
+
+    buf = StringIO()
+    for obj in publications:
+        buf.write("\t".join(text(f, obj) for f in fields))
+        buf.write("\n")
+    buf.seek(0)
+
+    qn = connection.ops.quote_name
+    sql = "COPY {} ({}) FROM STDIN".format(
+        qn(opts.db_table), ", ".join(qn(f.column) for f in fields)
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            raw.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buf.getvalue())
+
+
+@transaction.atomic
+def write_optimization_run(results, dyscyplina_obj, uczelnia=None):
+    """Replace the discipline's stored runs with ``results``.
+
+    A fixed number of statements regardless of the result size: set-wise
+    delete of old runs, one query for author kinds, one ``INSERT`` for the
+    run, batched ``INSERT`` for author results and batched ``INSERT`` (or
+    ``COPY`` for large runs) for publications.
+
+    Returns the freshly created ``OptimizationRun`` instance.
+    """
+    delete_optimization_runs(dyscyplina_naukowa=dyscyplina_obj)
 
     opt_run = OptimizationRun.objects.create(
         dyscyplina_naukowa=dyscyplina_obj,
+        uczelnia=uczelnia,
         status="completed",
         total_points=Decimal(str(results.total_points)),
         total_slots=Decimal(str(results.total_slots)),
@@ -36,48 +116,79 @@ def save_optimization_to_database(stdout, style, results, dyscyplina):
         low_mono_count=results.low_mono_count,
         low_mono_percentage=Decimal(str(results.low_mono_percentage)),
         validation_passed=results.validation_passed,
+        is_optimal=results.is_optimal,
+        optimality_gap=_decimal(results.optimality_gap_percent),
+        best_bound=_decimal(results.best_bound),
+        input_fingerprint=results.input_fingerprint,
         finished_at=timezone.now(),
     )
 
+    rodzaje = _rodzaje_autorow(list(results.authors), dyscyplina_obj)
+
+    author_results = []
     for author_id, author_data in results.authors.items():
         selected_pubs = author_data["selected_pubs"]
         limits = author_data["limits"]
 
-        record = (
-            IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-                autor_id=author_id, dyscyplina_naukowa=dyscyplina_obj
-            )
-            .order_by("-ilosc_udzialow")
-            .first()
-        )
-        rodzaj_autora = record.rodzaj_autora if record else None
-
         total_points = sum(p.points for p in selected_pubs)
         total_slots = sum(p.base_slots for p in selected_pubs)
         mono_slots = sum(p.base_slots for p in selected_pubs if p.kind == "monography")
 
-        author_result = OptimizationAuthorResult.objects.create(
-            optimization_run=opt_run,
-            autor_id=author_id,
-            rodzaj_autora=rodzaj_autora,
-            total_points=Decimal(str(total_points)),
-            total_slots=Decimal(str(total_slots)),
-            mono_slots=Decimal(str(mono_slots)),
-            slot_limit_total=Decimal(str(limits["total"])),
-            slot_limit_mono=Decimal(str(limits["mono"])),
+        author_results.append(
+            OptimizationAuthorResult(
+                optimization_run=opt_run,
+                autor_id=author_id,
+                rodzaj_autora_id=rodzaje.get(author_id),
+                total_points=Decimal(str(total_points)),
+                total_slots=Decimal(str(total_slots)),
+                mono_slots=Decimal(str(mono_slots)),
+                slot_limit_total=Decimal(str(limits["total"])),
+                slot_limit_mono=Decimal(str(limits["mono"])),
+            )
         )
 
-        for pub in selected_pubs:
-            OptimizationPublication.objects.create(
-                author_result=author_result,
-                rekord_id=pub.id,
-                kind=pub.kind,
-                points=Decimal(str(pub.points)),
-                slots=Decimal(str(pub.base_slots)),
-                is_low_mono=is_low_mono(pub),
-                author_count=pub.author_count,
-            )
+    # PostgreSQL zwraca klucze z bulk_create -- potrzebne dla publikacji
+    OptimizationAuthorResult.objects.bulk_create(
+        author_results, batch_size=BULK_CREATE_BATCH_SIZE
+    )
+
+    publications = [
+        OptimizationPublication(
+            author_result=author_result,
+            rekord_id=pub.id,
+            kind=pub.kind,
+            points=Decimal(str(pub.points)),
+            slots=Decimal(str(pub.base_slots)),
+            is_low_mono=is_low_mono(pub),
+            author_count=pub.author_count,
+        )
+        for author_result, author_data in zip(
+            author_results, results.authors.values(), strict=True
+        )
+        for pub in author_data["selected_pubs"]
+    ]
+
+    if len(publications) >= COPY_MIN_ROWS:
+        _copy_publications(publications)
+    else:
+        OptimizationPublication.objects.bulk_create(
+            publications, batch_size=BULK_CREATE_BATCH_SIZE
+        )
+
+    return opt_run
+
+
+def save_optimization_to_database(stdout, style, results, dyscyplina, uczelnia=None):
+    """Save optimization results to the database.
 
+    Removes any previous ``OptimizationRun`` rows for this discipline,
+    then writes a fresh run with per-author and per-publication detail
+    (see ``write_optimization_run``).
+
+    Returns the freshly created ``OptimizationRun`` instance.
+    """
+    dyscyplina_obj = Dyscyplina_Naukowa.objects.get(nazwa=dyscyplina)
+    opt_run = write_optimization_run(results, dyscyplina_obj, uczelnia=uczelnia)
     stdout.write(style.SUCCESS(f"Saved optimization run #{opt_run.pk} to database"))
     return opt_run
 
@@ -38,13 +38,14 @@ def analyze_discipline_swap_worker_task(  # noqa: C901
     from bpp.models import Dyscyplina_Naukowa
     from bpp.models.zrodlo import Dyscyplina_Zrodla
 
-    from .simulation import simulate_discipline_swap
+    from ..whatif import InMemorySimulator
 
     logger.info(
         f"Worker {worker_id}/{total_workers} starting: "
         f"{len(pub_rekord_ids)} publications to analyze"
     )
 
+    symulator = InMemorySimulator()
     opportunities = []
     analyzed_count = 0
     analysis_start_time = datetime.now()
@@ -117,7 +118,7 @@ def analyze_discipline_swap_worker_task(  # noqa: C901
                 continue
 
             # Symuluj zamianę
-            result = simulate_discipline_swap(autor_assignment, target_disc)
+            result = symulator.simulate_swap(autor_assignment, target_disc)
 
             if result is None:
                 continue
@@ -172,6 +173,7 @@ def analyze_discipline_swap_worker_task(  # noqa: C901
         f"Worker {worker_id}/{total_workers} finished: "
         f"{len(opportunities)} opportunities found in {analyzed_count} publications"
     )
+    symulator.loguj_statystyki(f"Worker {worker_id}: ")
 
     return {
         "worker_id": worker_id,
@@ -3,7 +3,6 @@
 import logging
 import traceback
 from datetime import datetime
-from decimal import Decimal
 
 import rollbar
 from celery import chord, group, shared_task
@@ -47,12 +46,10 @@ def solve_single_discipline_task(
         Dictionary z wynikami optymalizacji dla tej dyscypliny
     """
     from bpp.models import Dyscyplina_Naukowa, Uczelnia
-    from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
-    from ewaluacja_optymalizacja.core import is_low_mono
-    from ewaluacja_optymalizacja.models import (
-        OptimizationAuthorResult,
-        OptimizationPublication,
-        OptimizationRun,
+    from ewaluacja_optymalizacja.models import OptimizationRun
+    from ewaluacja_optymalizacja.solve_helpers.persistence import (
+        delete_optimization_runs,
+        write_optimization_run,
     )
 
     uczelnia = Uczelnia.objects.get(pk=uczelnia_id)
@@ -70,9 +67,7 @@ def solve_single_discipline_task(
         logger.info(f"Starting optimization for discipline: {dyscyplina_nazwa}")
 
         # Usuń stare optymalizacje dla tej dyscypliny
-        deleted_count = OptimizationRun.objects.filter(
-            dyscyplina_naukowa=dyscyplina
-        ).delete()[0]
+        deleted_count = delete_optimization_runs(dyscyplina_naukowa=dyscyplina)
         if deleted_count > 0:
             logger.info(
                 f"Deleted {deleted_count} old optimization runs for {dyscyplina_nazwa}"
@@ -94,74 +89,10 @@ def solve_single_discipline_task(
         )
 
         # Zapisz wyniki do bazy danych
-        opt_run = OptimizationRun.objects.create(
-            dyscyplina_naukowa=dyscyplina,
-            uczelnia=uczelnia,
-            status="completed",
-            total_points=Decimal(str(optimization_results.total_points)),
-            total_slots=Decimal(str(optimization_results.total_slots)),
-            total_publications=optimization_results.total_publications,
-            low_mono_count=optimization_results.low_mono_count,
-            low_mono_percentage=Decimal(str(optimization_results.low_mono_percentage)),
-            validation_passed=optimization_results.validation_passed,
-            is_optimal=optimization_results.is_optimal,
-            optimality_gap=(
-                Decimal(str(optimization_results.optimality_gap_percent))
-                if optimization_results.optimality_gap_percent is not None
-                else None
-            ),
-            best_bound=(
-                Decimal(str(optimization_results.best_bound))
-                if optimization_results.best_bound is not None
-                else None
-            ),
-            finished_at=timezone.now(),
+        opt_run = write_optimization_run(
+            optimization_results, dyscyplina, uczelnia=uczelnia
         )
 
-        # Zapisz wyniki autorów i publikacji
-        for author_id, author_data in optimization_results.authors.items():
-            selected_pubs = author_data["selected_pubs"]
-            limits = author_data["limits"]
-
-            # Pobierz rodzaj_autora dla tego autora (może być wiele rekordów - bierzemy pierwszy)
-            record = (
-                IloscUdzialowDlaAutoraZaCalosc.objects.filter(
-                    autor_id=author_id, dyscyplina_naukowa=dyscyplina
-                )
-                .order_by("-ilosc_udzialow")
-                .first()
-            )
-            rodzaj_autora = record.rodzaj_autora if record else None
-
-            total_points = sum(p.points for p in selected_pubs)
-            total_slots = sum(p.base_slots for p in selected_pubs)
-            mono_slots = sum(
-                p.base_slots for p in selected_pubs if p.kind == "monography"
-            )
-
-            author_result = OptimizationAuthorResult.objects.create(
-                optimization_run=opt_run,
-                autor_id=author_id,
-                rodzaj_autora=rodzaj_autora,
-                total_points=Decimal(str(total_points)),
-                total_slots=Decimal(str(total_slots)),
-                mono_slots=Decimal(str(mono_slots)),
-                slot_limit_total=Decimal(str(limits["total"])),
-                slot_limit_mono=Decimal(str(limits["mono"])),
-            )
-
-            # Zapisz publikacje dla tego autora
-            for pub in selected_pubs:
-                OptimizationPublication.objects.create(
-                    author_result=author_result,
-                    rekord_id=pub.id,
-                    kind=pub.kind,
-                    points=Decimal(str(pub.points)),
-                    slots=Decimal(str(pub.base_slots)),
-                    is_low_mono=is_low_mono(pub),
-                    author_count=pub.author_count,
-                )
-
         discipline_result["status"] = "completed"
         discipline_result["optimization_run_id"] = opt_run.pk
         discipline_result["total_points"] = float(optimization_results.total_points)
@@ -357,10 +288,13 @@ def _run_bulk_optimization(
         OptimizationPublication,
         OptimizationRun,
     )
+    from ewaluacja_optymalizacja.solve_helpers.persistence import (
+        delete_optimization_runs,
+    )
 
     # Delete existing OptimizationRun records
     logger_func(f"Deleting existing OptimizationRun records for uczelnia {uczelnia.pk}")
-    deleted_count = OptimizationRun.objects.filter(uczelnia=uczelnia).delete()[0]
+    deleted_count = delete_optimization_runs(uczelnia=uczelnia)
     logger_func(f"Deleted {deleted_count} OptimizationRun records")
 
     # Launch parallel optimization tasks
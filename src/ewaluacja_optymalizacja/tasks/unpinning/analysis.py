@@ -10,8 +10,8 @@ import rollbar
 from celery import chord
 from django.db.models import F
 
+from ..whatif import InMemorySimulator
 from .clustering import partition_works_into_chunks
-from .simulation import simulate_unpinning_benefit
 
 logger = logging.getLogger(__name__)
 
@@ -420,7 +420,7 @@ def _run_sequential_analysis(  # noqa: C901
     opportunities = []
     analyzed_count = 0
     analysis_start_time = datetime.now()
-    metrics_before_cache = {}
+    symulator = InMemorySimulator()
 
     for rekord_tuple, work_data in works_by_rekord.items():
         authors = work_data["authors"]
@@ -472,11 +472,8 @@ def _run_sequential_analysis(  # noqa: C901
                     ).first()
 
                     if autor_assignment is not None:
-                        simulation_result = simulate_unpinning_benefit(
-                            autor_assignment,
-                            autor_b_obj,
-                            dyscyplina_obj,
-                            metrics_before_cache=metrics_before_cache,
+                        simulation_result = symulator.simulate_unpinning(
+                            autor_assignment, autor_b_obj, dyscyplina_obj
                         )
 
                         if simulation_result:
@@ -557,6 +554,7 @@ def _run_sequential_analysis(  # noqa: C901
             )
 
     logger.info(f"Found {len(opportunities)} unpinning opportunities")
+    symulator.loguj_statystyki()
 
     # Update progress
     task.update_state(
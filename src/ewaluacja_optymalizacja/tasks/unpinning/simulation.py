@@ -171,7 +171,13 @@ def simulate_unpinning_benefit(  # noqa: C901
 
                 # Sprawdź czy praca była wykazana dla A
                 if metryka_a_before is not None:
-                    rekord_id = publikacja.pk
+                    # prace_nazbierane to rekord_id [content_type_id, pk]
+                    from django.contrib.contenttypes.models import ContentType
+
+                    rekord_id = (
+                        ContentType.objects.get_for_model(publikacja).pk,
+                        publikacja.pk,
+                    )
                     prace_nazbierane_a = metryka_a_before.prace_nazbierane or []
                     prace_nazbierane_a_tuples = [
                         tuple(p) if isinstance(p, list) else p
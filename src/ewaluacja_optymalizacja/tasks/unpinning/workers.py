@@ -6,7 +6,7 @@ from decimal import Decimal
 
 from celery import shared_task
 
-from .simulation import simulate_unpinning_benefit
+from ..whatif import InMemorySimulator
 
 logger = logging.getLogger(__name__)
 
@@ -68,7 +68,7 @@ def analyze_unpinning_worker_task(  # noqa: C901
         key = (int(key_parts[0]), int(key_parts[1]))
         metryki_dict[key] = metryka_info
 
-    metrics_before_cache = {}
+    symulator = InMemorySimulator()
 
     opportunities = []
     analyzed_count = 0
@@ -133,11 +133,8 @@ def analyze_unpinning_worker_task(  # noqa: C901
                     ).first()
 
                     if autor_assignment is not None:
-                        simulation_result = simulate_unpinning_benefit(
-                            autor_assignment,
-                            autor_b_obj,
-                            dyscyplina_obj,
-                            metrics_before_cache=metrics_before_cache,
+                        simulation_result = symulator.simulate_unpinning(
+                            autor_assignment, autor_b_obj, dyscyplina_obj
                         )
 
                         if simulation_result:
@@ -207,6 +204,7 @@ def analyze_unpinning_worker_task(  # noqa: C901
         f"Worker {worker_id}/{total_workers} finished: "
         f"{len(opportunities)} opportunities found in {analyzed_count} works"
     )
+    symulator.loguj_statystyki(f"Worker {worker_id}: ")
 
     return {
         "worker_id": worker_id,
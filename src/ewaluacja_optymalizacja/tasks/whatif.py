@@ -0,0 +1,453 @@
+"""Symulacje "co-jeśli" (odpięcie, zamiana dyscypliny) liczone w pamięci.
+
+``simulate_unpinning_benefit`` i ``simulate_discipline_swap`` sprawdzają każdego
+kandydata na bazie: savepoint, zapis ``*_Autor``, przebudowa
+``Cache_Punktacja_Autora`` i dwukrotne ``przelicz_metryki_dla_publikacji``.
+Analiza wykonuje takich symulacji tysiące.
+
+``InMemorySimulator`` liczy to samo bez zapisów:
+
+* dla każdego autora raz pobiera migawkę jego wierszy
+  ``Cache_Punktacja_Autora``, dyscyplin z ``Autor_Dyscyplina`` i limitu slotów
+  z ``IloscUdzialowDlaAutoraZaCalosc``,
+* dla każdej publikacji raz pobiera jej autorów i dobiera kalkulatory
+  slotów (``ISlot``) -- tak jak ``IPunktacjaCacher.rebuildEntries``,
+* zmieniony wariant publikacji przelicza tymi samymi klasami
+  ``SlotKalkulator_*``, podmieniając im jedynie źródło listy autorów
+  (patrz ``bpp.models.sloty.wsadowo.AutorzyWPamieci``), a metryki -- tym samym plecakiem co
+  ``zbieraj_sloty``.
+
+Mutacja, która zmieniłaby dobór kalkulatora (dla wydawnictw zwartych:
+zestaw rodzajów HST wśród przypiętych dyscyplin), zgłasza
+``UnsupportedMutation`` -- ``simulate_unpinning``/``simulate_swap`` liczą
+wtedy po staremu, na bazie.
+
+WERYFIKACJA
+===========
+
+``settings.EWALUACJA_OPTYMALIZACJA_WERYFIKUJ_SYMULACJE_CO = n`` (domyślnie 0,
+wyłączone) sprawia, że co n-ty kandydat policzony w pamięci jest liczony
+również na bazie; rozbieżności trafiają do logu i do ``statystyki``, a
+zwracany jest wynik z bazy.
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from bpp.models.sloty.wsadowo import AutorRekordu, kalkulator_w_pamieci, wpisy_autorow
+
+logger = logging.getLogger(__name__)
+
+_SKALA = 10000
+_CZTERY_MIEJSCA = Decimal("0.0001")
+
+
+class UnsupportedMutation(Exception):
+    """Zmiana wymaga ponownego doboru kalkulatora -- licz na bazie."""
+
+
+def _skaluj(wartosc):
+    """Wartość tak, jak odczyta ją ``zbieraj_sloty`` po zapisie do
+    ``DecimalField(decimal_places=4)``: ``int(pole * 10000)``."""
+    from bpp.models.cache import Cache_Punktacja_Autora
+
+    pole = Cache_Punktacja_Autora._meta.get_field("slot")
+    wartosc = pole.to_python(wartosc).quantize(_CZTERY_MIEJSCA, ROUND_HALF_UP)
+    return int(wartosc * _SKALA)
+
+
+def _rodzaje_hst(wiersze, uczelnia_id):
+    # Odpowiednik wszystkie_dyscypliny_rekordu(uczelnia) w _dopasuj_kalkulator
+    return {
+        w.dyscyplina.dyscyplina_hst
+        for w in wiersze
+        if w.uczelnia_id == uczelnia_id and w.przypieta and w.dyscyplina is not None
+    }
+
+
+@dataclass
+class _Praca:
+    rekord_id: tuple
+    liczy_sie: bool
+    zwarte: bool
+    wiersze: tuple
+    kalkulatory: dict  # uczelnia_id -> kalkulator albo None (CannotAdapt)
+
+
+@dataclass
+class _Autor:
+    uczelnia_id: int  # None, gdy autor nie ma metryk (reguła R2)
+    dyscypliny: set
+    slot_maksymalny: dict  # dyscyplina_id -> Decimal
+
+
+@dataclass(frozen=True)
+class Metryka:
+    punkty_nazbierane: Decimal
+    slot_nazbierany: Decimal
+    prace_nazbierane: frozenset
+
+
+class InMemorySimulator:
+    """Model punktacji do symulacji kandydatów jednej analizy.
+
+    Obiekt pamięta migawki bazy, więc powinien żyć tyle, co jedna analiza
+    (jeden worker) -- zmiany zapisane w tym czasie w bazie nie są widoczne.
+    """
+
+    def __init__(
+        self,
+        rok_min=2022,
+        rok_max=2025,
+        minimalny_pk=Decimal("0.01"),
+        weryfikuj_co=None,
+    ):
+        # Zakres lat i próg jak w przelicz_metryki_dla_publikacji
+        self.rok_min = rok_min
+        self.rok_max = rok_max
+        self.minimalny_pk = minimalny_pk
+        if weryfikuj_co is None:
+            weryfikuj_co = getattr(
+                settings, "EWALUACJA_OPTYMALIZACJA_WERYFIKUJ_SYMULACJE_CO", 0
+            )
+        self.weryfikuj_co = weryfikuj_co
+
+        self._prace = {}
+        self._autorzy = {}
+        # (autor_id, dyscyplina_id, uczelnia_id) -> [(rekord_id, slot, pkdaut)]
+        self._wpisy = defaultdict(list)
+        self._metryki_przed = {}
+        self._metryki_przed_z_bazy = {}
+        self._licznik = 0
+        self.statystyki = defaultdict(int)
+
+    # Migawki
+
+    def _wczytaj_autorow(self, autor_ids):
+        from django.db.models import F, Sum
+
+        from bpp.models import Autor, Autor_Dyscyplina
+        from bpp.models.cache import Cache_Punktacja_Autora_Query
+        from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
+
+        nowi = set(autor_ids) - self._autorzy.keys()
+        if not nowi:
+            return
+
+        for pk, uczelnia_id, skupia in Autor.objects.filter(pk__in=nowi).values_list(
+            "pk",
+            "aktualna_jednostka__uczelnia_id",
+            "aktualna_jednostka__skupia_pracownikow",
+        ):
+            self._autorzy[pk] = _Autor(
+                uczelnia_id=uczelnia_id if skupia else None,
+                dyscypliny=set(),
+                slot_maksymalny={},
+            )
+
+        for autor_id, d1, d2 in Autor_Dyscyplina.objects.filter(
+            autor_id__in=nowi, rok__gte=self.rok_min, rok__lte=self.rok_max
+        ).values_list("autor_id", "dyscyplina_naukowa_id", "subdyscyplina_naukowa_id"):
+            self._autorzy[autor_id].dyscypliny.update(d for d in (d1, d2) if d)
+
+        for wiersz in (
+            IloscUdzialowDlaAutoraZaCalosc.objects.filter(autor_id__in=nowi)
+            .values("autor_id", "dyscyplina_naukowa_id", "uczelnia_id")
+            .annotate(suma=Sum("ilosc_udzialow"))
+            .order_by()
+        ):
+            autor = self._autorzy[wiersz["autor_id"]]
+            if wiersz["uczelnia_id"] == autor.uczelnia_id:
+                autor.slot_maksymalny[wiersz["dyscyplina_naukowa_id"]] = wiersz["suma"]
+
+        # Kolejność pk -- jak wiersze w tabeli, którą czyta zbieraj_sloty
+        for autor_id, dyscyplina_id, uczelnia_id, rekord_id, slot, pkdaut in (
+            Cache_Punktacja_Autora_Query.objects.filter(
+                autor_id__in=nowi,
+                rekord__rok__gte=self.rok_min,
+                rekord__rok__lte=self.rok_max,
+                rekord__punkty_kbn__gte=self.minimalny_pk,
+            )
+            .order_by("pk")
+            .values_list(
+                "autor_id",
+                "dyscyplina_id",
+                "jednostka__uczelnia_id",
+                "rekord_id",
+                F("slot") * _SKALA,
+                F("pkdaut") * _SKALA,
+            )
+        ):
+            self._wpisy[(autor_id, dyscyplina_id, uczelnia_id)].append(
+                (tuple(rekord_id), int(slot), int(pkdaut))
+            )
+
+    def _wczytaj_prace(self, publikacja):
+        from django.contrib.contenttypes.models import ContentType
+
+        from bpp.models import Autor_Dyscyplina, Wydawnictwo_Zwarte
+        from bpp.models.sloty.core import IPunktacjaCacher, ISlot
+        from bpp.models.sloty.exceptions import CannotAdapt
+
+        rekord_id = (ContentType.objects.get_for_model(publikacja).pk, publikacja.pk)
+        praca = self._prace.get(rekord_id)
+        if praca is not None:
+            return praca
+
+        wiersze = list(
+            publikacja.autorzy_set.select_related(
+                "jednostka", "dyscyplina_naukowa", "typ_odpowiedzialnosci"
+            )
+        )
+        licz_sloty = set(
+            Autor_Dyscyplina.objects.filter(
+                autor_id__in=[w.autor_id for w in wiersze],
+                rok=publikacja.rok,
+                rodzaj_autora__licz_sloty=True,
+            ).values_list("autor_id", flat=True)
+        )
+
+        kalkulatory = {}
+        for uczelnia in IPunktacjaCacher(publikacja)._uczelnie_do_przeliczenia():
+            try:
+                kalkulatory[uczelnia.pk] = ISlot(publikacja, uczelnia=uczelnia)
+            except CannotAdapt:
+                kalkulatory[uczelnia.pk] = None
+
+        punkty = publikacja.punkty_kbn
+        praca = _Praca(
+            rekord_id=rekord_id,
+            liczy_sie=(
+                publikacja.rok is not None
+                and self.rok_min <= publikacja.rok <= self.rok_max
+                and punkty is not None
+                and punkty >= self.minimalny_pk
+            ),
+            zwarte=isinstance(publikacja, Wydawnictwo_Zwarte),
+            wiersze=tuple(
+                AutorRekordu.z_wiersza(w, w.autor_id in licz_sloty) for w in wiersze
+            ),
+            kalkulatory=kalkulatory,
+        )
+        self._wczytaj_autorow({w.autor_id for w in praca.wiersze})
+        self._prace[rekord_id] = praca
+        return praca
+
+    # Obliczenia
+
+    def _wpisy_pracy(self, praca, wiersze):
+        """Wiersze ``Cache_Punktacja_Autora``, jakie zapisałby
+        ``IPunktacjaCacher._zapisz`` dla publikacji z autorami ``wiersze``."""
+        ret = defaultdict(list)
+        for uczelnia_id, kalkulator in praca.kalkulatory.items():
+            if praca.zwarte and _rodzaje_hst(wiersze, uczelnia_id) != _rodzaje_hst(
+                praca.wiersze, uczelnia_id
+            ):
+                raise UnsupportedMutation("zmiana trybu HST wydawnictwa zwartego")
+            if kalkulator is None:
+                continue
+
+            kalk = kalkulator_w_pamieci(
+                kalkulator, [w for w in wiersze if w.uczelnia_id == uczelnia_id]
+            )
+            for w, pkdaut, slot in wpisy_autorow(kalk):
+                ret[(w.autor_id, w.dyscyplina.pk, uczelnia_id)].append(
+                    (praca.rekord_id, _skaluj(slot), _skaluj(pkdaut))
+                )
+        return ret
+
+    @staticmethod
+    def _plecak(slot_maksymalny, wpisy):
+        from bpp.core import _zbieraj_sloty_z_wpisow
+
+        punkty, wybrane, sloty = _zbieraj_sloty_z_wpisow(
+            int(slot_maksymalny * _SKALA),
+            [(n, slot, pkdaut) for n, (_r, slot, pkdaut) in enumerate(wpisy)],
+        )
+        return Metryka(
+            # Jak oblicz_metryki_dla_autora: Decimal(str(float))
+            punkty_nazbierane=Decimal(str(punkty)),
+            slot_nazbierany=Decimal(str(sloty)),
+            prace_nazbierane=frozenset(wpisy[n][0] for n in wybrane),
+        )
+
+    def _metryka(self, klucz, slot_maksymalny, wpisy=None):
+        if wpisy is not None:
+            return self._plecak(slot_maksymalny, wpisy)
+
+        # Stan z bazy nie zmienia się przez całą analizę
+        wynik = self._metryki_przed.get(klucz)
+        if wynik is None:
+            wynik = self._plecak(slot_maksymalny, self._wpisy.get(klucz, []))
+            self._metryki_przed[klucz] = wynik
+        return wynik
+
+    def metryki(self, praca, wiersze=None):
+        """Odpowiednik ``przelicz_metryki_dla_publikacji``.
+
+        :param wiersze: autorzy publikacji po zmianie; ``None`` -- stan z bazy
+        :returns: ``{(autor_id, dyscyplina_id): Metryka}``
+        """
+        nowe = None
+        if wiersze is not None:
+            nowe = self._wpisy_pracy(praca, wiersze) if praca.liczy_sie else {}
+        else:
+            wiersze = praca.wiersze
+
+        ret = {}
+        for autor_id in {w.autor_id for w in wiersze if w.dyscyplina is not None}:
+            autor = self._autorzy[autor_id]
+            if autor.uczelnia_id is None:
+                continue
+            for dyscyplina_id in autor.dyscypliny:
+                slot_maksymalny = autor.slot_maksymalny.get(dyscyplina_id)
+                if slot_maksymalny is None:
+                    continue
+                klucz = (autor_id, dyscyplina_id, autor.uczelnia_id)
+                wpisy = None
+                if nowe is not None:
+                    # Przebudowane wiersze dostają nowe pk -- trafiają na koniec
+                    wpisy = [
+                        w for w in self._wpisy.get(klucz, []) if w[0] != praca.rekord_id
+                    ] + nowe.get(klucz, [])
+                ret[(autor_id, dyscyplina_id)] = self._metryka(
+                    klucz, slot_maksymalny, wpisy
+                )
+        return ret
+
+    def unpinning(self, autor_assignment, autor_b_id, dyscyplina_id):
+        """Wynik jak ``simulate_unpinning_benefit``, bez zapisów do bazy."""
+        praca = self._wczytaj_prace(autor_assignment.rekord)
+        wiersze = tuple(
+            replace(w, przypieta=False) if w.pk == autor_assignment.pk else w
+            for w in praca.wiersze
+        )
+        przed = self.metryki(praca)
+        po = self.metryki(praca, wiersze)
+
+        klucz_a = (autor_assignment.autor_id, dyscyplina_id)
+        klucz_b = (autor_b_id, dyscyplina_id)
+        if klucz_b not in przed or klucz_b not in po:
+            logger.warning(
+                f"Brak metryk dla autora B {autor_b_id} w dyscyplinie {dyscyplina_id}"
+            )
+            return None
+
+        zero = Metryka(Decimal("0"), Decimal("0"), frozenset())
+        a_przed, a_po = przed.get(klucz_a, zero), po.get(klucz_a, zero)
+        b_przed, b_po = przed[klucz_b], po[klucz_b]
+
+        punkty_roznica_a = a_po.punkty_nazbierane - a_przed.punkty_nazbierane
+        punkty_roznica_b = b_po.punkty_nazbierane - b_przed.punkty_nazbierane
+
+        punkty_strata_a = (
+            abs(punkty_roznica_a)
+            if praca.rekord_id in a_przed.prace_nazbierane
+            else Decimal("0")
+        )
+        punkty_zysk_b = punkty_roznica_b if punkty_roznica_b > 0 else Decimal("0")
+
+        return {
+            "makes_sense": punkty_zysk_b > punkty_strata_a,
+            "punkty_roznica_a": punkty_roznica_a,
+            "sloty_roznica_a": a_po.slot_nazbierany - a_przed.slot_nazbierany,
+            "punkty_roznica_b": punkty_roznica_b,
+            "sloty_roznica_b": b_po.slot_nazbierany - b_przed.slot_nazbierany,
+        }
+
+    def swap(self, autor_assignment, target_discipline):
+        """Wynik jak ``simulate_discipline_swap``, bez zapisów do bazy."""
+        praca = self._wczytaj_prace(autor_assignment.rekord)
+        wiersze = tuple(
+            replace(w, dyscyplina=target_discipline)
+            if w.pk == autor_assignment.pk
+            else w
+            for w in praca.wiersze
+        )
+
+        points_before = sum(
+            (m.punkty_nazbierane for m in self.metryki(praca).values()), Decimal("0")
+        )
+        points_after = sum(
+            (m.punkty_nazbierane for m in self.metryki(praca, wiersze).values()),
+            Decimal("0"),
+        )
+        point_improvement = points_after - points_before
+        return {
+            "points_before": points_before,
+            "points_after": points_after,
+            "point_improvement": point_improvement,
+            "makes_sense": point_improvement > Decimal("0"),
+        }
+
+    # Punkty wejścia dla workerów: w pamięci, z powrotem do bazy i weryfikacją
+
+    def _weryfikuj_teraz(self):
+        if not self.weryfikuj_co:
+            return False
+        self._licznik += 1
+        return self._licznik % self.weryfikuj_co == 0
+
+    def _policz(self, rodzaj, w_pamieci, z_bazy):
+        try:
+            wynik = w_pamieci()
+        except UnsupportedMutation as e:
+            logger.debug(f"Symulacja ({rodzaj}) na bazie: {e}")
+            self.statystyki["z_bazy"] += 1
+            return z_bazy()
+        except Exception as e:
+            logger.error(
+                f"Błąd symulacji ({rodzaj}) w pamięci, liczę na bazie: {e}",
+                exc_info=True,
+            )
+            self.statystyki["z_bazy"] += 1
+            return z_bazy()
+
+        self.statystyki["w_pamieci"] += 1
+        if not self._weryfikuj_teraz():
+            return wynik
+
+        wynik_z_bazy = z_bazy()
+        if wynik == wynik_z_bazy:
+            self.statystyki["zgodne"] += 1
+        else:
+            self.statystyki["niezgodne"] += 1
+            logger.warning(
+                f"Symulacja ({rodzaj}) w pamięci różni się od bazy: "
+                f"pamięć={wynik}, baza={wynik_z_bazy}"
+            )
+        return wynik_z_bazy
+
+    def simulate_unpinning(self, autor_assignment, autor_currently_using, dyscyplina):
+        """Zamiennik ``simulate_unpinning_benefit`` (te same argumenty i wynik)."""
+        from .unpinning.simulation import simulate_unpinning_benefit
+
+        return self._policz(
+            "odpięcie",
+            lambda: self.unpinning(
+                autor_assignment, autor_currently_using.pk, dyscyplina.pk
+            ),
+            lambda: simulate_unpinning_benefit(
+                autor_assignment,
+                autor_currently_using,
+                dyscyplina,
+                metrics_before_cache=self._metryki_przed_z_bazy,
+            ),
+        )
+
+    def simulate_swap(self, autor_assignment, target_discipline):
+        """Zamiennik ``simulate_discipline_swap`` (te same argumenty i wynik)."""
+        from .discipline_swap.simulation import simulate_discipline_swap
+
+        return self._policz(
+            "zamiana dyscypliny",
+            lambda: self.swap(autor_assignment, target_discipline),
+            lambda: simulate_discipline_swap(autor_assignment, target_discipline),
+        )
+
+    def loguj_statystyki(self, prefiks=""):
+        logger.info(f"{prefiks}Symulacje: {dict(self.statystyki)}")
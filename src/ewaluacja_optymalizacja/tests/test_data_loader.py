@@ -0,0 +1,171 @@
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from model_bakery import baker
+
+from bpp.models import (
+    Autor,
+    Cache_Punktacja_Autora,
+    Wydawnictwo_Ciagle,
+    Wydawnictwo_Ciagle_Autor,
+)
+from ewaluacja_common.models import Rodzaj_Autora
+from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
+from ewaluacja_optymalizacja.core.data_loader import (
+    _cache_entries,
+    load_author_slot_limits,
+    load_authors_jest_w_n,
+    load_discipline_data,
+    load_pinned_author_counts,
+)
+
+
+@pytest.mark.django_db
+def test_load_author_slot_limits_one_query(dyscyplina1, django_assert_num_queries):
+    autorzy = baker.make(Autor, _quantity=3)
+    for autor in autorzy[:2]:
+        IloscUdzialowDlaAutoraZaCalosc.objects.create(
+            autor=autor,
+            dyscyplina_naukowa=dyscyplina1,
+            ilosc_udzialow=3,
+            ilosc_udzialow_monografie=1.5,
+        )
+    # Two rows for one author are summed and capped
+    IloscUdzialowDlaAutoraZaCalosc.objects.create(
+        autor=autorzy[1],
+        dyscyplina_naukowa=dyscyplina1,
+        ilosc_udzialow=3,
+        ilosc_udzialow_monografie=1.5,
+    )
+
+    with django_assert_num_queries(1):
+        limits = load_author_slot_limits(
+            [a.pk for a in autorzy], dyscyplina1, lambda msg: None
+        )
+
+    assert limits == {
+        autorzy[0].pk: {"total": 3.0, "mono": 1.5},
+        autorzy[1].pk: {"total": 4.0, "mono": 2.0},
+        autorzy[2].pk: {"total": 4.0, "mono": 2.0},
+    }
+
+
+@pytest.mark.django_db
+def test_load_discipline_data_timings(dyscyplina1):
+    data = load_discipline_data(dyscyplina1.nazwa)
+
+    assert data.pubs == []
+    assert data.authors == []
+    assert data.dyscyplina_id == dyscyplina1.pk
+    assert {"discipline", "jest_w_n", "author_counts", "publications"} <= set(
+        data.timings
+    )
+
+
+@pytest.mark.django_db
+def test_load_discipline_data_brak_dyscypliny():
+    with pytest.raises(ValueError):
+        load_discipline_data("nie ma takiej dyscypliny")
+
+
+@pytest.fixture
+def cache_dyscypliny(dyscyplina1, jednostka):
+    """Prace 2023 z wpisami w cache punktacji autora dla ``dyscyplina1``:
+    autorzy z kilkoma wierszami IloscUdzialow o różnym ``jest_w_n`` oraz
+    prace z autorami przypiętymi i odpiętymi."""
+    w_n, _ = Rodzaj_Autora.objects.update_or_create(
+        skrot="X", defaults={"nazwa": "W N", "sort": 90, "jest_w_n": True}
+    )
+    poza_n, _ = Rodzaj_Autora.objects.update_or_create(
+        skrot="Y", defaults={"nazwa": "Poza N", "sort": 91, "jest_w_n": False}
+    )
+    autorzy = baker.make(Autor, _quantity=4)
+
+    # Decyduje wiersz z największą liczbą udziałów
+    for autor, udzialy in (
+        (autorzy[0], [(1, poza_n), (3, w_n)]),
+        (autorzy[1], [(2, w_n), (4, poza_n)]),
+        (autorzy[2], [(2, None)]),
+    ):
+        for ilosc, rodzaj in udzialy:
+            IloscUdzialowDlaAutoraZaCalosc.objects.create(
+                autor=autor,
+                dyscyplina_naukowa=dyscyplina1,
+                ilosc_udzialow=ilosc,
+                ilosc_udzialow_monografie=ilosc / 2,
+                rodzaj_autora=rodzaj,
+            )
+
+    wpisy = []
+    for przypiete in ([True, True, False], [False, False], [True]):
+        praca = baker.make(Wydawnictwo_Ciagle, rok=2023)
+        for autor, przypieta in zip(autorzy, przypiete, strict=False):
+            baker.make(
+                Wydawnictwo_Ciagle_Autor,
+                rekord=praca,
+                autor=autor,
+                jednostka=jednostka,
+                dyscyplina_naukowa=dyscyplina1,
+                przypieta=przypieta,
+            )
+            wpisy.append((praca, autor))
+    # Autor bez wierszy IloscUdzialow
+    wpisy.append((praca, autorzy[3]))
+
+    # Cache na końcu: zapis autorów pracy mógłby go przeliczyć
+    ct = ContentType.objects.get_for_model(Wydawnictwo_Ciagle)
+    for praca_pk in {praca.pk for praca, _autor in wpisy}:
+        Cache_Punktacja_Autora.objects.filter(rekord_id=[ct.pk, praca_pk]).delete()
+    for praca, autor in wpisy:
+        Cache_Punktacja_Autora.objects.create(
+            rekord_id=[ct.pk, praca.pk],
+            autor=autor,
+            jednostka=jednostka,
+            dyscyplina=dyscyplina1,
+            pkdaut=20,
+            slot=1,
+        )
+    return autorzy
+
+
+@pytest.mark.django_db
+def test_loadery_zgodne_z_zapytaniami_per_wpis(dyscyplina1, cache_dyscypliny):
+    """Zbiorcze loadery dają to samo, co dawny kod z zapytaniem na autora
+    i na wpis cache."""
+    cache_entries = _cache_entries(dyscyplina1)
+
+    jest_w_n = {}
+    for autor_id in cache_entries.values_list("autor_id", flat=True).distinct():
+        record = (
+            IloscUdzialowDlaAutoraZaCalosc.objects.filter(
+                autor_id=autor_id, dyscyplina_naukowa=dyscyplina1
+            )
+            .order_by("-ilosc_udzialow")
+            .first()
+        )
+        jest_w_n[autor_id] = bool(
+            record and record.rodzaj_autora and record.rodzaj_autora.jest_w_n
+        )
+
+    przypieci = {
+        tuple(entry.rekord_id): entry.rekord.original.autorzy_set.filter(
+            dyscyplina_naukowa__isnull=False, przypieta=True
+        ).count()
+        for entry in cache_entries.select_related("rekord")
+    }
+
+    autorzy = cache_dyscypliny
+    assert jest_w_n == {
+        autorzy[0].pk: True,
+        autorzy[1].pk: False,
+        autorzy[2].pk: False,
+        autorzy[3].pk: False,
+    }
+    assert sorted(przypieci.values()) == [0, 1, 2]
+
+    # Autor bez wierszy IloscUdzialow nie ma klucza -- generate_pub_data
+    # bierze wtedy False
+    wynik = load_authors_jest_w_n(cache_entries, dyscyplina1)
+    assert {autor_id: wynik.get(autor_id, False) for autor_id in jest_w_n} == jest_w_n
+
+    counts = load_pinned_author_counts(cache_entries)
+    assert {rid: counts.get(rid, 0) for rid in przypieci} == przypieci
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from ewaluacja_optymalizacja.core import solve_author_knapsack
+from ewaluacja_optymalizacja.core import solver as solver_module
+from ewaluacja_optymalizacja.core.data_structures import Pub
+from ewaluacja_optymalizacja.core.solver import (
+    solve_author_knapsack_cp_sat,
+    solve_author_knapsack_dp,
+)
+
+SLOTY = [0.1, 0.25, 0.5, 0.75, 1.0, 1 / 3, 0.2]
+
+
+def _pub(n, kind, points, base_slots):
+    return Pub(
+        id=(1, n),
+        author=1,
+        kind=kind,
+        points=points,
+        base_slots=base_slots,
+        author_count=1,
+        jest_w_n=True,
+    )
+
+
+def _losowe_prace(rnd, ile):
+    return [
+        _pub(
+            n,
+            rnd.choice(["article", "article", "monography"]),
+            rnd.choice([5, 20, 40, 70, 100, 140, 200, 12.5, 33.75]),
+            rnd.choice(SLOTY),
+        )
+        for n in range(ile)
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dp_zgodny_z_cp_sat(seed):
+    rnd = random.Random(seed)
+    prace = _losowe_prace(rnd, rnd.randint(1, 25))
+    max_slots = rnd.choice([1, 2, 2.5, 3.3, 4])
+    max_mono = rnd.choice([0, 0.5, 1, 2, 4])
+
+    wybrane, optymalne = solve_author_knapsack_dp(prace, max_slots, max_mono)
+    oczekiwane, _ = solve_author_knapsack_cp_sat(prace, max_slots, max_mono)
+
+    assert optymalne
+    assert sum(p.points for p in wybrane) == pytest.approx(
+        sum(p.points for p in oczekiwane)
+    )
+    assert sum(int(p.base_slots * 1000) for p in wybrane) <= int(max_slots * 1000)
+    assert sum(
+        int(p.base_slots * 1000) for p in wybrane if p.kind == "monography"
+    ) <= int(max_mono * 1000)
+
+
+def test_dp_przypadki_brzegowe():
+    assert solve_author_knapsack([], 4, 2) == ([], True)
+
+    # Praca bez slotów zawsze się mieści
+    darmowa = _pub(1, "article", 10, 0)
+    assert solve_author_knapsack_dp([darmowa], 0, 0) == ([darmowa], True)
+
+    # Limit monografii 0 -- wybierane są tylko artykuły
+    mono = _pub(2, "monography", 200, 1)
+    artykul = _pub(3, "article", 20, 1)
+    assert solve_author_knapsack_dp([mono, artykul], 4, 0) == ([artykul], True)
+
+    # Kolejność wyniku jak w CP-SAT: efektywność malejąco
+    tania = _pub(4, "article", 100, 0.5)
+    assert solve_author_knapsack_dp([artykul, tania], 4, 0) == (
+        [tania, artykul],
+        True,
+    )
+
+
+def test_dp_za_duzy_przypadek_idzie_do_cp_sat(monkeypatch):
+    prace = _losowe_prace(random.Random(0), 10)
+    monkeypatch.setattr(solver_module, "DP_MAX_CELLS", 1)
+
+    assert solve_author_knapsack_dp(prace, 4, 2) is None
+    assert solve_author_knapsack(prace, 4, 2) == solve_author_knapsack_cp_sat(
+        prace, 4, 2
+    )
@@ -0,0 +1,93 @@
+import logging
+
+import pytest
+
+from ewaluacja_optymalizacja.core import (
+    DisciplineData,
+    _solve_disciplines_parallel,
+    _solve_prepared,
+    solve_discipline,
+)
+from ewaluacja_optymalizacja.core.data_structures import Pub
+from ewaluacja_optymalizacja.core.solver import (
+    configure_solver,
+    default_num_workers,
+    set_default_num_workers,
+)
+
+
+@pytest.fixture
+def reset_num_workers():
+    yield
+    set_default_num_workers(None)
+
+
+def test_configure_solver_respektuje_przydzial_workerow(reset_num_workers):
+    set_default_num_workers(3)
+    assert default_num_workers() == 3
+    assert configure_solver(log_progress=False).parameters.num_search_workers == 3
+
+    # Jawny parametr ma pierwszeństwo
+    solver = configure_solver(log_progress=False, num_workers=2)
+    assert solver.parameters.num_search_workers == 2
+
+
+@pytest.mark.django_db
+def test_solve_discipline_z_gotowymi_danymi_bez_zapytan(django_assert_num_queries):
+    data = DisciplineData(
+        dyscyplina_nazwa="nie ma takiej",
+        dyscyplina_id=1,
+        pubs=[],
+        authors=[],
+        author_slot_limits={},
+    )
+    with django_assert_num_queries(0):
+        results = solve_discipline(data.dyscyplina_nazwa, data=data)
+
+    assert results.total_publications == 0
+
+
+def _dyscyplina(nazwa, dyscyplina_id, liczba_autorow):
+    pubs = [
+        Pub(
+            id=(1, dyscyplina_id * 100 + n),
+            author=autor,
+            kind="monography" if n % 4 == 0 else "article",
+            points=20 + 13 * n % 120,
+            base_slots=0.5 + (n % 3) * 0.25,
+            author_count=1,
+            jest_w_n=True,
+        )
+        for autor in range(liczba_autorow)
+        for n in range(6)
+    ]
+    authors = list(range(liczba_autorow))
+    return DisciplineData(
+        dyscyplina_nazwa=nazwa,
+        dyscyplina_id=dyscyplina_id,
+        pubs=pubs,
+        authors=authors,
+        author_slot_limits={a: {"total": 2.0, "mono": 1.0} for a in authors},
+    )
+
+
+def test_solve_disciplines_parallel_jak_sekwencyjnie(caplog):
+    jobs = [
+        (_dyscyplina("pierwsza", 1, 3), 4.0, None),
+        (_dyscyplina("druga", 2, 4), 5.0, None),
+    ]
+    sekwencyjnie = dict(_solve_prepared(*job) for job in jobs)
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="ewaluacja_optymalizacja"):
+        rownolegle = dict(_solve_disciplines_parallel(jobs, max_parallel=2))
+
+    assert rownolegle.keys() == sekwencyjnie.keys()
+    for nazwa, wynik in sekwencyjnie.items():
+        assert rownolegle[nazwa].total_points == pytest.approx(wynik.total_points)
+        assert rownolegle[nazwa].total_publications == wynik.total_publications
+
+    # Logi z procesów puli są odtwarzane w procesie rodzica
+    komunikaty = caplog.messages
+    assert any("Processing: pierwsza" in m for m in komunikaty)
+    assert any("Processing: druga" in m for m in komunikaty)
@@ -0,0 +1,80 @@
+import pytest
+from model_bakery import baker
+
+from bpp.models import Autor
+from ewaluacja_optymalizacja.core import build_optimization_results
+from ewaluacja_optymalizacja.core.data_structures import Pub
+from ewaluacja_optymalizacja.models import (
+    OptimizationAuthorResult,
+    OptimizationPublication,
+    OptimizationRun,
+)
+from ewaluacja_optymalizacja.solve_helpers import persistence
+from ewaluacja_optymalizacja.solve_helpers.persistence import (
+    delete_optimization_runs,
+    write_optimization_run,
+)
+
+
+def _results(autorzy, prac_na_autora):
+    pubs = [
+        Pub(
+            id=(1, n),
+            author=autor.pk,
+            kind="monography" if n % 5 == 0 else "article",
+            points=20 + n,
+            base_slots=0.5,
+            author_count=1,
+            jest_w_n=True,
+        )
+        for autor in autorzy
+        for n in range(prac_na_autora)
+    ]
+    authors = [a.pk for a in autorzy]
+    return build_optimization_results(
+        "testowa",
+        pubs,
+        pubs,
+        authors,
+        {a: {"total": 4.0, "mono": 2.0} for a in authors},
+        sum(p.points for p in pubs),
+        True,
+    )
+
+
+@pytest.mark.django_db
+def test_write_optimization_run_stala_liczba_zapytan(
+    dyscyplina1, django_assert_max_num_queries
+):
+    autorzy = baker.make(Autor, _quantity=10)
+    write_optimization_run(_results(autorzy[:2], 3), dyscyplina1)
+
+    # Usunięcie starego przebiegu (3), rodzaje autorów, przebieg, autorzy,
+    # publikacje + savepoint -- niezależnie od liczby wierszy
+    with django_assert_max_num_queries(10):
+        run = write_optimization_run(_results(autorzy, 8), dyscyplina1)
+
+    assert OptimizationRun.objects.get() == run
+    assert OptimizationAuthorResult.objects.filter(optimization_run=run).count() == 10
+    assert OptimizationPublication.objects.count() == 80
+    wynik = OptimizationAuthorResult.objects.get(autor=autorzy[0])
+    assert wynik.publications.filter(kind="monography").count() == 2
+
+
+@pytest.mark.django_db
+def test_write_optimization_run_copy(dyscyplina1, monkeypatch):
+    monkeypatch.setattr(persistence, "COPY_MIN_ROWS", 1)
+    autorzy = baker.make(Autor, _quantity=2)
+
+    write_optimization_run(_results(autorzy, 4), dyscyplina1)
+
+    pub = OptimizationPublication.objects.get(
+        author_result__autor=autorzy[1], rekord_id=(1, 3)
+    )
+    assert pub.points == 23
+    assert pub.kind == "article"
+    assert not pub.is_low_mono
+
+    assert delete_optimization_runs(dyscyplina_naukowa=dyscyplina1) == 1
+    assert not OptimizationPublication.objects.exists()
+    assert not OptimizationAuthorResult.objects.exists()
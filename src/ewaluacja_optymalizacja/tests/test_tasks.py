@@ -33,6 +33,7 @@ def test_solve_single_discipline_task_success(uczelnia, dyscyplina1):
     mock_results.is_optimal = True
     mock_results.optimality_gap_percent = None
     mock_results.best_bound = None
+    mock_results.input_fingerprint = ""
     mock_results.authors = {}
 
     with patch(
@@ -73,6 +74,7 @@ def test_solve_single_discipline_task_deletes_old_runs(uczelnia, dyscyplina1):
     mock_results.is_optimal = True
     mock_results.optimality_gap_percent = None
     mock_results.best_bound = None
+    mock_results.input_fingerprint = ""
     mock_results.authors = {}
 
     with patch(
@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from bpp.models import Autor
+from ewaluacja_optymalizacja.core import (
+    DisciplineData,
+    input_fingerprint,
+    load_previous_run,
+    results_from_run,
+)
+from ewaluacja_optymalizacja.core.data_structures import Pub
+from ewaluacja_optymalizacja.core.optimization_phases import (
+    apply_institution_constraints,
+)
+from ewaluacja_optymalizacja.models import (
+    OptimizationAuthorResult,
+    OptimizationPublication,
+    OptimizationRun,
+)
+
+
+def _pub(n, author, points=100, base_slots=1.0, kind="article"):
+    return Pub(
+        id=(1, n),
+        author=author,
+        kind=kind,
+        points=points,
+        base_slots=base_slots,
+        author_count=1,
+        jest_w_n=True,
+    )
+
+
+def _data(pubs, limits=None):
+    authors = sorted({p.author for p in pubs})
+    return DisciplineData(
+        dyscyplina_nazwa="testowa",
+        dyscyplina_id=1,
+        pubs=pubs,
+        authors=authors,
+        author_slot_limits=limits or {a: {"total": 4.0, "mono": 2.0} for a in authors},
+    )
+
+
+def test_input_fingerprint():
+    pubs = [_pub(1, 10), _pub(2, 10, points=40), _pub(3, 20, base_slots=0.5)]
+    fp = input_fingerprint(_data(pubs), 12.0)
+
+    # Kolejność publikacji z zapytania nie ma znaczenia
+    assert input_fingerprint(_data(pubs[::-1]), 12.0) == fp
+
+    # Każda zmiana danych wejściowych zmienia odcisk
+    assert input_fingerprint(_data(pubs), 13.0) != fp
+    assert input_fingerprint(_data(pubs), 12.0, "single-phase") != fp
+    assert input_fingerprint(_data(pubs[:2]), 12.0) != fp
+    assert input_fingerprint(_data([*pubs[:2], _pub(3, 20)]), 12.0) != fp
+    limity = {10: {"total": 4.0, "mono": 2.0}, 20: {"total": 3.0, "mono": 2.0}}
+    assert input_fingerprint(_data(pubs, limity), 12.0) != fp
+
+
+def test_podpowiedzi_z_poprzedniego_przebiegu_nie_zmieniaja_optimum():
+    pubs = [
+        _pub(n, author, points=20 + 7 * n, base_slots=0.5 + (n % 3) * 0.25)
+        for n, author in enumerate([1, 1, 1, 2, 2, 2, 3, 3, 3, 3])
+    ]
+    authors = [1, 2, 3]
+    limits = {a: {"total": 1.5, "mono": 1.0} for a in authors}
+
+    def log(msg, style=None):
+        pass
+
+    bez, punkty, *_ = apply_institution_constraints(
+        pubs, set(), authors, limits, 3.0, log
+    )
+    _, punkty_hint, *_ = apply_institution_constraints(
+        pubs, set(), authors, limits, 3.0, log, hint_ids={p.id for p in bez}
+    )
+
+    assert punkty_hint == pytest.approx(punkty)
+
+
+@pytest.mark.django_db
+def test_results_from_run(dyscyplina1):
+    jan, anna = baker.make(Autor, _quantity=2)
+    pubs = [
+        _pub(1, jan.pk, points=100),
+        _pub(2, jan.pk, points=20),
+        _pub(1, anna.pk, points=100),
+    ]
+    data = _data(pubs)
+
+    run = baker.make(
+        OptimizationRun,
+        dyscyplina_naukowa=dyscyplina1,
+        status="completed",
+        is_optimal=False,
+        optimality_gap=Decimal("1.5"),
+        input_fingerprint="abc",
+    )
+    for autor in (jan, anna):
+        wynik = baker.make(
+            OptimizationAuthorResult,
+            optimization_run=run,
+            autor=autor,
+            slot_limit_total=4,
+            slot_limit_mono=2,
+        )
+        baker.make(
+            OptimizationPublication,
+            author_result=wynik,
+            rekord_id=(1, 1),
+            points=100,
+            slots=1,
+        )
+
+    poprzedni, wybor = load_previous_run(dyscyplina1.pk)
+    assert poprzedni == run
+    assert wybor == {((1, 1), jan.pk), ((1, 1), anna.pk)}
+
+    results = results_from_run(data, poprzedni, wybor, "abc")
+    assert results.reused_run_id == run.pk
+    assert results.total_points == 200
+    assert results.authors[jan.pk]["selected_pubs"] == [pubs[0]]
+    assert not results.is_optimal
+    assert results.optimality_gap_percent == 1.5
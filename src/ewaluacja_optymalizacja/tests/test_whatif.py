@@ -0,0 +1,127 @@
+"""Symulacje w pamięci dają te same wyniki, co symulacje na bazie."""
+
+from decimal import Decimal
+
+import pytest
+from model_bakery import baker
+
+from bpp.models import (
+    Autor,
+    Autor_Dyscyplina,
+    Jednostka,
+    Typ_Odpowiedzialnosci,
+    Wydawnictwo_Ciagle,
+    Wydawnictwo_Ciagle_Autor,
+)
+from bpp.models.sloty.core import IPunktacjaCacher
+from ewaluacja_liczba_n.models import IloscUdzialowDlaAutoraZaCalosc
+from ewaluacja_optymalizacja.tasks.discipline_swap.simulation import (
+    simulate_discipline_swap,
+)
+from ewaluacja_optymalizacja.tasks.unpinning.simulation import (
+    simulate_unpinning_benefit,
+)
+from ewaluacja_optymalizacja.tasks.whatif import InMemorySimulator
+
+
+@pytest.fixture
+def dane(denorms, rodzaj_autora_n, dyscyplina1, dyscyplina2):
+    uczelnia = baker.make("bpp.Uczelnia")
+    jednostka = baker.make(Jednostka, skupia_pracownikow=True, uczelnia=uczelnia)
+    typ_odp, _ = Typ_Odpowiedzialnosci.objects.get_or_create(
+        nazwa="autor", defaults={"skrot": "aut."}
+    )
+
+    autorzy = baker.make(Autor, aktualna_jednostka=jednostka, _quantity=3)
+    for autor, limit in zip(autorzy, ("1", "0.5", "1"), strict=True):
+        Autor_Dyscyplina.objects.create(
+            autor=autor,
+            rok=2023,
+            rodzaj_autora=rodzaj_autora_n,
+            dyscyplina_naukowa=dyscyplina1,
+            procent_dyscypliny=Decimal("50"),
+            subdyscyplina_naukowa=dyscyplina2,
+            procent_subdyscypliny=Decimal("50"),
+        )
+        for dyscyplina in (dyscyplina1, dyscyplina2):
+            baker.make(
+                IloscUdzialowDlaAutoraZaCalosc,
+                autor=autor,
+                dyscyplina_naukowa=dyscyplina,
+                uczelnia=uczelnia,
+                ilosc_udzialow=Decimal(limit),
+                ilosc_udzialow_monografie=Decimal(limit) / 2,
+            )
+
+    # Różne progi (k/m, 1/m, 1/k) i różna liczba współautorów z dyscypliny
+    for punkty, zespol in ((100, 3), (70, 2), (40, 3), (20, 2), (5, 3)):
+        pub = baker.make(Wydawnictwo_Ciagle, rok=2023, punkty_kbn=punkty)
+        for kolejnosc, autor in enumerate(autorzy[:zespol]):
+            baker.make(
+                Wydawnictwo_Ciagle_Autor,
+                rekord=pub,
+                autor=autor,
+                jednostka=jednostka,
+                dyscyplina_naukowa=dyscyplina2 if kolejnosc == 2 else dyscyplina1,
+                przypieta=True,
+                afiliuje=True,
+                typ_odpowiedzialnosci=typ_odp,
+                kolejnosc=kolejnosc,
+            )
+        denorms.flush()
+        pub.refresh_from_db()
+        cacher = IPunktacjaCacher(pub)
+        cacher.removeEntries()
+        cacher.rebuildEntries()
+
+    return autorzy
+
+
+def _przypisania():
+    return Wydawnictwo_Ciagle_Autor.objects.select_related(
+        "autor", "dyscyplina_naukowa", "rekord"
+    ).order_by("rekord_id", "kolejnosc")
+
+
+@pytest.mark.django_db
+def test_odpiecie_zgodne_z_baza(dane):
+    symulator = InMemorySimulator()
+
+    sprawdzone = 0
+    for wa in _przypisania():
+        for autor_b in dane:
+            if autor_b == wa.autor:
+                continue
+            oczekiwane = simulate_unpinning_benefit(wa, autor_b, wa.dyscyplina_naukowa)
+            wynik = symulator.unpinning(wa, autor_b.pk, wa.dyscyplina_naukowa_id)
+            assert wynik == oczekiwane, (wa, autor_b)
+            sprawdzone += oczekiwane is not None
+
+    assert sprawdzone > 0
+
+
+@pytest.mark.django_db
+def test_zamiana_dyscypliny_zgodna_z_baza(dane, dyscyplina1, dyscyplina2):
+    symulator = InMemorySimulator()
+
+    for wa in _przypisania():
+        docelowa = dyscyplina2 if wa.dyscyplina_naukowa == dyscyplina1 else dyscyplina1
+        oczekiwane = simulate_discipline_swap(wa, docelowa)
+        assert oczekiwane is not None
+        assert symulator.swap(wa, docelowa) == oczekiwane, wa
+
+
+@pytest.mark.django_db
+def test_bez_zapytan_po_migawce_i_weryfikacja(
+    dane, dyscyplina2, django_assert_num_queries
+):
+    symulator = InMemorySimulator(weryfikuj_co=1)
+    wa = _przypisania().first()
+
+    symulator.simulate_swap(wa, dyscyplina2)
+    assert symulator.statystyki["zgodne"] == 1
+    assert symulator.statystyki["niezgodne"] == 0
+
+    with django_assert_num_queries(0):
+        symulator.swap(wa, dyscyplina2)
+        symulator.unpinning(wa, dane[1].pk, wa.dyscyplina_naukowa_id)
@@ -10,12 +10,14 @@ Podział na podmoduły:
 - `tytul_funkcja`  -- matchery dla słownikowych encji (Wydzial, Tytul,
   Funkcja_Autora, Grupa_Pracownicza, Wymiar_Etatu)
 - `jednostka`      -- matchowanie jednostek + helper `wytnij_skrot`
-- `autor`          -- matchowanie autorów (po identyfikatorach + imieniu)
+- `autor`          -- matchowanie autorów (po identyfikatorach + imieniu),
+  także wsadowe (`matchuj_autorow_wsadowo`)
 - `zrodlo`         -- matchowanie czasopism (ISSN, mniswId, tytuł)
 - `dyscyplina`     -- matchowanie dyscyplin BPP i PBN
 - `wydawca`        -- matchowanie wydawców
 - `uczelnia`       -- matchowanie uczelni (PBN Institution)
-- `publikacja`     -- matchowanie rekordów publikacji + pomocnicze stałe
+- `publikacja`     -- matchowanie rekordów publikacji + pomocnicze stałe,
+  także wsadowe (`matchuj_publikacje_wsadowo`)
 - `normalize_db`   -- wyrażenia ORM do znormalizowanych pól + ich pythonowe
   odpowiedniki + `normalize_date`
 """
@@ -33,6 +35,7 @@ from .autor import (
     _try_match_autor_in_jednostka,
     _try_match_autor_with_orcid_or_tytul,
     matchuj_autora,
+    matchuj_autorow_wsadowo,
     znajdz_kandydatow_autora,
 )
 from .dyscyplina import (
@@ -68,6 +71,7 @@ from .publikacja import (
     _try_match_pub_by_uri,
     _try_match_pub_by_zrodlo,
     matchuj_publikacje,
+    matchuj_publikacje_wsadowo,
 )
 from .tytul_funkcja import (
     matchuj_funkcja_autora,
@@ -88,6 +92,7 @@ from .zrodlo import (
 __all__ = [
     # autor
     "matchuj_autora",
+    "matchuj_autorow_wsadowo",
     "znajdz_kandydatow_autora",
     "KandydatAutora",
     "_build_autor_name_query",
@@ -118,6 +123,7 @@ __all__ = [
     "normalized_db_zrodlo_skrot",
     # publikacja
     "matchuj_publikacje",
+    "matchuj_publikacje_wsadowo",
     "MATCH_SIMILARITY_THRESHOLD",
     "MATCH_SIMILARITY_THRESHOLD_LOW",
     "MATCH_SIMILARITY_THRESHOLD_VERY_LOW",
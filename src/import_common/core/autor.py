@@ -8,7 +8,7 @@ from dataclasses import dataclass
 
 from django.contrib.postgres.lookups import Unaccent
 from django.db.models import Q
-from django.db.models.functions import Lower
+from django.db.models.functions import Lower, Upper
 
 from bpp.models import Autor, Autor_Jednostka, Jednostka, Tytul
 from import_common.normalization import (
@@ -598,3 +598,106 @@ def matchuj_autora(
 
     # 4. Tie-breaker dla ambiguity bez jednostki: preferuj autora z ORCID/tytułem
     return _try_match_autor_with_orcid_or_tytul(imiona, nazwisko)
+
+
+def _autorzy_po_identyfikatorach(dane: list[dict]) -> list[Autor | None]:
+    """Wsadowy odpowiednik ``_try_match_autor_by_direct_ids``.
+
+    Każdy rodzaj identyfikatora to jedno zapytanie ``IN (...)`` dla całej
+    listy; kolejność prób dla pojedynczej pozycji (BPP id, ORCID, PBN UID,
+    system kadrowy, PBN id) jest taka sama jak w wersji pojedynczej.
+    """
+
+    def _int(wartosc):
+        if isinstance(wartosc, str):
+            wartosc = wartosc.strip()
+        try:
+            return int(wartosc)
+        except (TypeError, ValueError):
+            return None
+
+    po_bpp_id = Autor.objects.in_bulk({_int(d.get("bpp_id")) for d in dane} - {None})
+
+    orcidy = {d["orcid"].strip().upper() for d in dane if d.get("orcid")}
+    po_orcid = {
+        autor.orcid.upper(): autor
+        for autor in Autor.objects.annotate(_orcid=Upper("orcid")).filter(
+            _orcid__in=orcidy
+        )
+    }
+
+    pbn_uidy = {
+        d["pbn_uid_id"]
+        for d in dane
+        if d.get("pbn_uid_id") is not None and d["pbn_uid_id"].strip() != ""
+    }
+    po_pbn_uid = {}
+    # Jak ``.first()``: przy kilku autorach z tym samym PBN UID wygrywa
+    # pierwszy w domyślnym porządku modelu.
+    for autor in Autor.objects.filter(pbn_uid_id__in=pbn_uidy).order_by(
+        *Autor._meta.ordering, "pk"
+    ):
+        po_pbn_uid.setdefault(autor.pbn_uid_id, autor)
+
+    kadrowe = {_int(d.get("system_kadrowy_id")) for d in dane} - {None}
+    po_kadrowym = {
+        autor.system_kadrowy_id: autor
+        for autor in Autor.objects.filter(system_kadrowy_id__in=kadrowe)
+    }
+
+    pbn_idy = {_int(d.get("pbn_id")) for d in dane} - {None}
+    po_pbn_id = {
+        autor.pbn_id: autor for autor in Autor.objects.filter(pbn_id__in=pbn_idy)
+    }
+
+    ret = []
+    for d in dane:
+        orcid = d.get("orcid")
+        pbn_uid_id = d.get("pbn_uid_id")
+        ret.append(
+            po_bpp_id.get(_int(d.get("bpp_id")))
+            or (po_orcid.get(orcid.strip().upper()) if orcid else None)
+            or (po_pbn_uid.get(pbn_uid_id) if pbn_uid_id else None)
+            or po_kadrowym.get(_int(d.get("system_kadrowy_id")))
+            or po_pbn_id.get(_int(d.get("pbn_id")))
+        )
+    return ret
+
+
+def matchuj_autorow_wsadowo(dane: list[dict]) -> list[Autor | None]:
+    """Wsadowa wersja ``matchuj_autora`` dla importów plików.
+
+    ``dane`` to lista słowników z argumentami ``matchuj_autora`` (``imiona``,
+    ``nazwisko``, ``jednostka``, ``bpp_id``, ``pbn_uid_id``,
+    ``system_kadrowy_id``, ``pbn_id``, ``orcid``, ``tytul_str``); zwracana
+    lista odpowiada jej pozycja po pozycji i zawiera to samo, co zwróciłby
+    ``matchuj_autora`` wołany dla każdej pozycji osobno.
+
+    Identyfikatory rozwiązywane są kilkoma zapytaniami ``IN (...)`` dla
+    całej listy. Pozycje bez trafienia po identyfikatorach przechodzą przez
+    ścieżkę nazwiskową ``matchuj_autora`` -- raz dla każdej różnej
+    kombinacji (imiona, nazwisko, jednostka, tytuł); w plikach z pracownikami
+    czy publikacjami ci sami autorzy powtarzają się w wielu wierszach.
+    """
+    ret = _autorzy_po_identyfikatorach(dane)
+
+    po_nazwisku = {}
+    for n, d in enumerate(dane):
+        if ret[n] is not None:
+            continue
+        jednostka = d.get("jednostka")
+        klucz = (
+            d.get("imiona"),
+            d.get("nazwisko"),
+            jednostka.pk if jednostka is not None else None,
+            d.get("tytul_str"),
+        )
+        if klucz not in po_nazwisku:
+            po_nazwisku[klucz] = matchuj_autora(
+                d.get("imiona"),
+                d.get("nazwisko"),
+                jednostka=jednostka,
+                tytul_str=d.get("tytul_str"),
+            )
+        ret[n] = po_nazwisku[klucz]
+    return ret
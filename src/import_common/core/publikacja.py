@@ -6,7 +6,10 @@ zNORMALIZOWANY w bazie tytuł (`normalized_db_title`); kandydaci muszą
 przekroczyć kombinację progu podobieństwa i kompatybilność numeru części.
 """
 
+from copy import copy
+
 from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connection
 from django.db.models import Q
 
 from bpp.models import Rekord, Wydawnictwo_Zwarte
@@ -310,3 +313,293 @@ def matchuj_publikacje(
             return result
 
     return None
+
+
+# Liczba rekordów w jednym zapytaniu ``LATERAL`` wsadowego matchowania
+ROZMIAR_PORCJI_WSADOWEJ = 500
+
+
+def _pk_jako_klucz(pk):
+    # ``Rekord`` ma klucz złożony, zwracany z bazy jako lista
+    return tuple(pk) if isinstance(pk, list) else pk
+
+
+def _najlepsze_wsadowo(klass, wiersze, warunek, baza=None, limit=1, ranking=True):
+    """Jedno zapytanie ``CROSS JOIN LATERAL`` zamiast osobnego zapytania dla
+    każdego rekordu.
+
+    ``wiersze`` to krotki ``(idx, wartosc, rok, tytul, zrodlo_id)``, dostępne
+    w ``warunek`` (fragment SQL) jako kolumny ``v.*``; kolumny tabeli
+    ``klass`` są dostępne przez alias ``t``. Dla każdego wiersza zwraca do
+    ``limit`` rekordów posortowanych malejąco po ``similarity()`` tytułu
+    znormalizowanego jak ``normalized_db_title`` -- tak samo jak
+    ``.annotate(podobienstwo=...).order_by("-podobienstwo")`` w wersji
+    pojedynczej. ``baza`` (queryset) dodatkowo zawęża kandydatów.
+
+    Zwraca słownik ``{idx: [(pk, podobienstwo), ...]}``.
+    """
+    qn = connection.ops.quote_name
+    pk = qn(klass._meta.pk.column)
+    tytul = qn(klass._meta.get_field("tytul_oryginalny").column)
+    podobienstwo = (
+        f"similarity(TRIM(REPLACE(REPLACE(LOWER(t.{tytul}), ' [online]', ''), "
+        "'  ', ' ')), v.tytul)"
+        if ranking
+        else "NULL::real"
+    )
+
+    warunek_bazy, parametry_bazy = "", []
+    if baza is not None:
+        sql, parametry_bazy = baza.order_by().values("pk").query.sql_with_params()
+        warunek_bazy = f" AND t.{pk} IN ({sql})"
+
+    ret = {}
+    for start in range(0, len(wiersze), ROZMIAR_PORCJI_WSADOWEJ):
+        porcja = wiersze[start : start + ROZMIAR_PORCJI_WSADOWEJ]
+        values = ", ".join(
+            ["(%s::integer, %s::text, %s::integer, %s::text, %s::integer)"]
+            * len(porcja)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT v.idx, m.pk, m.podobienstwo "
+                f"FROM (VALUES {values}) AS v(idx, wartosc, rok, tytul, zrodlo_id) "
+                f"CROSS JOIN LATERAL ("
+                f"SELECT t.{pk} AS pk, {podobienstwo} AS podobienstwo "
+                f"FROM {qn(klass._meta.db_table)} t "
+                f"WHERE {warunek}{warunek_bazy} "
+                f"ORDER BY podobienstwo DESC LIMIT {int(limit)}"
+                f") m",
+                [x for wiersz in porcja for x in wiersz] + list(parametry_bazy),
+            )
+            for idx, pk_rekordu, wartosc in cursor.fetchall():
+                ret.setdefault(idx, []).append((pk_rekordu, wartosc))
+    return ret
+
+
+def _kandydaci_wsadowo(klass, trafienia):
+    """Zamienia ``{idx: [(pk, podobienstwo), ...]}`` na
+    ``{idx: [obiekt, ...]}``; obiekty mają ustawione ``podobienstwo`` jak po
+    ``annotate`` w wersji pojedynczej."""
+    pks = {_pk_jako_klucz(pk) for lista in trafienia.values() for pk, _ in lista}
+    obiekty = {
+        _pk_jako_klucz(obj.pk): obj for obj in klass.objects.filter(pk__in=list(pks))
+    }
+
+    ret = {}
+    for idx, lista in trafienia.items():
+        ret[idx] = []
+        for pk, podobienstwo in lista:
+            obj = obiekty.get(_pk_jako_klucz(pk))
+            if obj is None:
+                continue
+            obj = copy(obj)
+            obj.podobienstwo = podobienstwo
+            ret[idx].append(obj)
+    return ret
+
+
+def _like_prefiks(wartosc):
+    """Parametr ``LIKE`` odpowiadający lookupowi ``istartswith``."""
+    return connection.ops.prep_for_like_query(wartosc) + "%"
+
+
+def _kolumna(klass, nazwa):
+    return "t." + connection.ops.quote_name(klass._meta.get_field(nazwa).column)
+
+
+def _etap_wsadowy(klass, wiersze, warunek, prog, tytuly, wyniki, baza=None, isbny=None):
+    """Wsadowy odpowiednik ``res.first()`` + ``_check_candidate``: dla
+    każdego wiersza najlepszy kandydat trafia do ``wyniki``, jeżeli spełnia
+    próg i zgodność numeru części (oraz ISBN, gdy podano ``isbny``)."""
+    if not wiersze:
+        return
+    trafienia = _najlepsze_wsadowo(klass, wiersze, warunek, baza=baza)
+    for idx, kandydaci in _kandydaci_wsadowo(klass, trafienia).items():
+        candidate = kandydaci[0]
+        if not _check_candidate(candidate, tytuly[idx], prog):
+            continue
+        if isbny is not None and not _isbn_matches(candidate, isbny[idx]):
+            continue
+        wyniki[idx] = candidate
+
+
+def _wsadowo_po_doi(klass, dane, wyniki, doi_matchuj_tylko_nadrzedne):
+    wiersze, tytuly = [], {}
+    for idx, d in enumerate(dane):
+        doi = normalize_doi(d.get("doi"))
+        if doi:
+            tytuly[idx] = d["title"]
+            wiersze.append(
+                (idx, _like_prefiks(doi), d["year"], d["title"].lower(), None)
+            )
+
+    warunek = (
+        f"UPPER({_kolumna(klass, 'doi')}::text) LIKE UPPER(v.wartosc) "
+        f"AND {_kolumna(klass, 'rok')} = v.rok"
+    )
+    if doi_matchuj_tylko_nadrzedne and hasattr(klass, "wydawnictwo_nadrzedne_id"):
+        warunek += f" AND {_kolumna(klass, 'wydawnictwo_nadrzedne')} IS NULL"
+
+    _etap_wsadowy(
+        klass, wiersze, warunek, MATCH_SIMILARITY_THRESHOLD_VERY_LOW, tytuly, wyniki
+    )
+
+
+def _wsadowo_po_zrodle(klass, dane, tytuly, wyniki, indeksy):
+    """Jak ``.get()`` w ``_try_match_pub_by_zrodlo``: tylko dokładnie jeden
+    rekord jest dopasowaniem."""
+    if not hasattr(klass, "zrodlo"):
+        return
+
+    wiersze = []
+    for idx in indeksy:
+        zrodlo = dane[idx].get("zrodlo")
+        if zrodlo is not None and _is_title_long_enough(tytuly[idx]):
+            wiersze.append(
+                (
+                    idx,
+                    _like_prefiks(tytuly[idx]),
+                    dane[idx]["year"],
+                    None,
+                    getattr(zrodlo, "pk", zrodlo),
+                )
+            )
+    if not wiersze:
+        return
+
+    trafienia = _najlepsze_wsadowo(
+        klass,
+        wiersze,
+        f"UPPER({_kolumna(klass, 'tytul_oryginalny')}::text) LIKE UPPER(v.wartosc) "
+        f"AND {_kolumna(klass, 'rok')} = v.rok "
+        f"AND {_kolumna(klass, 'zrodlo')} = v.zrodlo_id",
+        limit=2,
+        ranking=False,
+    )
+    for idx, kandydaci in _kandydaci_wsadowo(klass, trafienia).items():
+        if len(kandydaci) == 1:
+            wyniki[idx] = kandydaci[0]
+
+
+def _wsadowo_po_isbn(
+    klass, dane, tytuly, wyniki, indeksy, isbn_matchuj_tylko_nadrzedne
+):
+    if not hasattr(klass, "isbn") or not hasattr(klass, "e_isbn"):
+        return
+
+    wiersze = [
+        (idx, normalize_isbn(dane[idx]["isbn"]), None, tytuly[idx].lower(), None)
+        for idx in indeksy
+        if dane[idx].get("isbn")
+    ]
+    if not wiersze:
+        return
+
+    _etap_wsadowy(
+        klass,
+        wiersze,
+        f"({_kolumna(klass, 'isbn')} = v.wartosc "
+        f"OR {_kolumna(klass, 'e_isbn')} = v.wartosc)",
+        MATCH_SIMILARITY_THRESHOLD_VERY_LOW,
+        tytuly,
+        wyniki,
+        baza=_build_isbn_query(klass, isbn_matchuj_tylko_nadrzedne),
+    )
+
+
+def _wsadowo_po_uri(klass, dane, tytuly, wyniki, indeksy):
+    wiersze = []
+    for idx in indeksy:
+        public_uri = normalize_public_uri(dane[idx].get("public_uri"))
+        if public_uri:
+            wiersze.append((idx, public_uri, None, tytuly[idx].lower(), None))
+
+    _etap_wsadowy(
+        klass,
+        wiersze,
+        f"({_kolumna(klass, 'www')} = v.wartosc "
+        f"OR {_kolumna(klass, 'public_www')} = v.wartosc)",
+        MATCH_SIMILARITY_THRESHOLD,
+        tytuly,
+        wyniki,
+    )
+
+
+def _wsadowo_po_tytule(klass, dane, tytuly, wyniki, indeksy):
+    """Jak ``_try_match_pub_by_title``: najpierw ``istartswith`` w obrębie
+    roku, dla pozostałych -- cały rok z niższym progiem."""
+    indeksy = [idx for idx in indeksy if _is_title_long_enough(tytuly[idx])]
+    isbny = {idx: dane[idx].get("isbn") for idx in indeksy}
+    rok = _kolumna(klass, "rok")
+
+    _etap_wsadowy(
+        klass,
+        [
+            (
+                idx,
+                _like_prefiks(tytuly[idx]),
+                dane[idx]["year"],
+                tytuly[idx].lower(),
+                None,
+            )
+            for idx in indeksy
+        ],
+        f"UPPER({_kolumna(klass, 'tytul_oryginalny')}::text) "
+        f"LIKE UPPER(v.wartosc) AND {rok} = v.rok",
+        MATCH_SIMILARITY_THRESHOLD,
+        tytuly,
+        wyniki,
+        isbny=isbny,
+    )
+
+    _etap_wsadowy(
+        klass,
+        [
+            (idx, None, dane[idx]["year"], tytuly[idx].lower(), None)
+            for idx in indeksy
+            if wyniki[idx] is None
+        ],
+        f"{rok} = v.rok",
+        MATCH_SIMILARITY_THRESHOLD_LOW,
+        tytuly,
+        wyniki,
+        isbny=isbny,
+    )
+
+
+def matchuj_publikacje_wsadowo(
+    klass,
+    dane,
+    isbn_matchuj_tylko_nadrzedne=True,
+    doi_matchuj_tylko_nadrzedne=True,
+):
+    """Wsadowa wersja ``matchuj_publikacje`` dla importów plików.
+
+    ``dane`` to lista słowników z argumentami ``matchuj_publikacje``
+    (``title``, ``year``, ``doi``, ``public_uri``, ``isbn``, ``zrodlo``);
+    zwracana lista odpowiada jej pozycja po pozycji i zawiera te same
+    decyzje, co ``matchuj_publikacje`` wołane dla każdej pozycji osobno.
+
+    Etapy (DOI, źródło, ISBN, URI, tytuł) są te same, ale każdy etap to
+    jedno zapytanie ``LATERAL`` na porcję rekordów, które nie zostały
+    jeszcze dopasowane -- zamiast kilku zapytań na rekord.
+    """
+    wyniki = [None] * len(dane)
+
+    def niedopasowane():
+        return [idx for idx, wynik in enumerate(wyniki) if wynik is None]
+
+    # Próba po DOI (przed normalizacją tytułu)
+    _wsadowo_po_doi(klass, dane, wyniki, doi_matchuj_tylko_nadrzedne)
+
+    tytuly = {idx: normalize_tytul_publikacji(d["title"]) for idx, d in enumerate(dane)}
+
+    _wsadowo_po_zrodle(klass, dane, tytuly, wyniki, niedopasowane())
+    _wsadowo_po_isbn(
+        klass, dane, tytuly, wyniki, niedopasowane(), isbn_matchuj_tylko_nadrzedne
+    )
+    _wsadowo_po_uri(klass, dane, tytuly, wyniki, niedopasowane())
+    _wsadowo_po_tytule(klass, dane, tytuly, wyniki, niedopasowane())
+
+    return wyniki
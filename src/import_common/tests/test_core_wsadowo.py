@@ -0,0 +1,237 @@
+"""Wsadowe matchowanie (``matchuj_autorow_wsadowo``,
+``matchuj_publikacje_wsadowo``) ma dawać te same decyzje, co wersje
+pojedyncze, stałą liczbą zapytań niezależną od liczby rekordów."""
+
+import pytest
+from model_bakery import baker
+
+from bpp.models import Autor, Rekord, Wydawnictwo_Ciagle, Wydawnictwo_Zwarte
+from import_common.core import (
+    matchuj_autora,
+    matchuj_autorow_wsadowo,
+    matchuj_publikacje,
+    matchuj_publikacje_wsadowo,
+)
+
+
+@pytest.mark.django_db
+def test_matchuj_autorow_wsadowo_jak_matchuj_autora(jednostka):
+    jan = baker.make(
+        Autor,
+        imiona="Jan",
+        nazwisko="Kowalski",
+        orcid="0000-0002-1825-009X",
+        system_kadrowy_id=123,
+        pbn_id=456,
+    )
+    anna = baker.make(Autor, imiona="Anna", nazwisko="Nowak")
+
+    dane = [
+        dict(bpp_id=anna.pk),
+        dict(orcid="0000-0002-1825-009x "),
+        dict(system_kadrowy_id="123"),
+        dict(pbn_id=" 456"),
+        dict(imiona="Anna", nazwisko="Nowak"),
+        dict(imiona="Anna", nazwisko="Nowak", jednostka=jednostka),
+        dict(imiona="Anna", nazwisko="Nowak", orcid="0000-0000-0000-0000"),
+        dict(imiona="Piotr", nazwisko="Brak"),
+        dict(imiona=None, nazwisko=None),
+    ]
+
+    wyniki = matchuj_autorow_wsadowo(dane)
+
+    assert wyniki == [matchuj_autora(**d) for d in dane]
+    assert wyniki[:5] == [anna, jan, jan, jan, anna]
+    assert wyniki[-2:] == [None, None]
+
+
+@pytest.mark.django_db
+def test_matchuj_autorow_wsadowo_liczba_zapytan(django_assert_max_num_queries):
+    for n in range(20):
+        baker.make(Autor, imiona="Jan", nazwisko=f"Nazwisko{n}", pbn_id=1000 + n)
+
+    with django_assert_max_num_queries(5):
+        wyniki = matchuj_autorow_wsadowo([dict(pbn_id=1000 + n) for n in range(20)])
+
+    assert [a.nazwisko for a in wyniki] == [f"Nazwisko{n}" for n in range(20)]
+
+
+@pytest.mark.django_db
+def test_matchuj_publikacje_wsadowo_jak_matchuj_publikacje(zrodlo):
+    po_doi = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Publikacja znajdowana po numerze DOI",
+        rok=2021,
+        doi="10.1000/ABC.1",
+    )
+    po_zrodle = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Publikacja znajdowana po źródle i początku tytułu",
+        rok=2021,
+        zrodlo=zrodlo,
+    )
+    po_www = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Publikacja znajdowana po adresie WWW",
+        rok=2021,
+        www="https://example.com/praca",
+    )
+    po_tytule = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Znaczenie jakości wody w produkcji drobiarskiej cz. III",
+        rok=2020,
+    )
+
+    dane = [
+        dict(
+            title="Publikacja znajdowana po numerze DOI",
+            year=2021,
+            doi="https://doi.org/10.1000/abc.1",
+        ),
+        dict(title="Publikacja znajdowana po źródle", year=2021, zrodlo=zrodlo),
+        dict(
+            title="Publikacja znajdowana po adresie WWW.",
+            year=2021,
+            public_uri=" https://example.com/praca",
+        ),
+        dict(
+            title="Znaczenie jakości wody w produkcji drobiarskiej cz. III",
+            year=2020,
+        ),
+        # Inny numer części -- bez dopasowania
+        dict(
+            title="Znaczenie jakości wody w produkcji drobiarskiej cz. II",
+            year=2020,
+        ),
+        dict(title="Zupełnie inna publikacja niczego nie dopasuje", year=2020),
+    ]
+
+    wyniki = matchuj_publikacje_wsadowo(Wydawnictwo_Ciagle, dane)
+
+    assert wyniki == [matchuj_publikacje(Wydawnictwo_Ciagle, **d) for d in dane]
+    assert wyniki == [po_doi, po_zrodle, po_www, po_tytule, None, None]
+    assert wyniki[3].podobienstwo == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+def test_matchuj_publikacje_wsadowo_isbn_rozdzialy():
+    ksiazka = baker.make(
+        Wydawnictwo_Zwarte,
+        tytul_oryginalny="Monografia o rozdziałach i numerach ISBN",
+        rok=2022,
+        isbn="9788300000001",
+    )
+    baker.make(
+        Wydawnictwo_Zwarte,
+        tytul_oryginalny="Rozdział monografii",
+        rok=2022,
+        wydawnictwo_nadrzedne=ksiazka,
+    )
+
+    dane = [
+        dict(
+            title="Monografia o rozdziałach i numerach ISBN",
+            year=2022,
+            isbn="9788300000001",
+        ),
+        dict(
+            title="Monografia o rozdziałach i numerach ISBN",
+            year=2022,
+            isbn="978-83-999-9999-9",
+        ),
+    ]
+
+    wyniki = matchuj_publikacje_wsadowo(Wydawnictwo_Zwarte, dane)
+
+    assert wyniki == [matchuj_publikacje(Wydawnictwo_Zwarte, **d) for d in dane]
+    assert wyniki == [ksiazka, None]
+
+
+@pytest.mark.django_db
+def test_matchuj_publikacje_wsadowo_rekord(zrodlo):
+    # Rekord ma złożony klucz główny (content_type_id, object_id) -- tak
+    # wywołuje dopasowanie integrator PBN.
+    po_doi = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Artykuł znajdowany w rekordach po numerze DOI",
+        rok=2021,
+        doi="10.1000/REKORD.1",
+    )
+    po_isbn = baker.make(
+        Wydawnictwo_Zwarte,
+        tytul_oryginalny="Monografia znajdowana w rekordach po ISBN",
+        rok=2022,
+        isbn="9788300000002",
+    )
+    # Po ISBN dla Rekord dopasowywane są tylko wydawnictwa nadrzędne
+    baker.make(
+        Wydawnictwo_Zwarte,
+        tytul_oryginalny="Rozdział monografii z rekordów",
+        rok=2022,
+        wydawnictwo_nadrzedne=po_isbn,
+    )
+    po_zrodle = baker.make(
+        Wydawnictwo_Ciagle,
+        tytul_oryginalny="Artykuł znajdowany w rekordach po źródle",
+        rok=2021,
+        zrodlo=zrodlo,
+    )
+    po_tytule = baker.make(
+        Wydawnictwo_Zwarte,
+        tytul_oryginalny="Monografia znajdowana w rekordach po samym tytule",
+        rok=2020,
+    )
+
+    dane = [
+        dict(
+            title="Artykuł znajdowany w rekordach po numerze DOI",
+            year=2021,
+            doi="https://doi.org/10.1000/rekord.1",
+        ),
+        dict(
+            title="Monografia znajdowana w rekordach po ISBN",
+            year=2022,
+            isbn="978-83-000-0000-2",
+        ),
+        dict(
+            title="Artykuł znajdowany w rekordach po źródle",
+            year=2021,
+            zrodlo=zrodlo,
+        ),
+        dict(
+            title="Monografia znajdowana w rekordach po samym tytule",
+            year=2020,
+        ),
+        dict(title="Tytuł, którego nie ma w bazie", year=2020),
+    ]
+
+    wyniki = matchuj_publikacje_wsadowo(Rekord, dane)
+
+    assert wyniki == [matchuj_publikacje(Rekord, **d) for d in dane]
+    assert [w and w.original for w in wyniki] == [
+        po_doi,
+        po_isbn,
+        po_zrodle,
+        po_tytule,
+        None,
+    ]
+
+
+@pytest.mark.django_db
+def test_matchuj_publikacje_wsadowo_liczba_zapytan(django_assert_max_num_queries):
+    for n in range(20):
+        baker.make(
+            Wydawnictwo_Ciagle,
+            tytul_oryginalny=f"Długi tytuł publikacji numer {n} do matchowania",
+            rok=2023,
+        )
+    dane = [
+        dict(title=f"Długi tytuł publikacji numer {n} do matchowania", year=2023)
+        for n in range(20)
+    ]
+
+    # Etap istartswith: zapytanie LATERAL + pobranie obiektów
+    with django_assert_max_num_queries(2):
+        wyniki = matchuj_publikacje_wsadowo(Wydawnictwo_Ciagle, dane)
+
+    assert [w.tytul_oryginalny for w in wyniki] == [d["title"] for d in dane]
@@ -5,7 +5,11 @@ from openpyxl.utils.exceptions import InvalidFileException
 
 from bpp.models import Jednostka
 from bpp.models.struktura_konwersja import znajdz_lub_utworz_wezel_wydzialu
-from import_common.core import matchuj_autora, matchuj_jednostke, matchuj_wydzial
+from import_common.core import (
+    matchuj_autorow_wsadowo,
+    matchuj_jednostke,
+    matchuj_wydzial,
+)
 from import_common.exceptions import (
     BadNoOfSheetsException,
     HeaderNotFoundException,
@@ -127,6 +131,7 @@ def przeanalizuj_plik_xls(sciezka, parent):
     naglowek = [k.rodzaj_pola for k in parent.kolumna_set.all()]
     wydzial_cache = {}
     jednostka_cache = {}
+    wiersze = []
 
     for n, row in enumerate(
         s.iter_rows(
@@ -145,17 +150,26 @@ def przeanalizuj_plik_xls(sciezka, parent):
         jednostka = _matchuj_jednostke_z_cache(
             jednostka_cache, original.get("nazwa jednostki")
         )
+        wiersze.append((n, original, jednostka, wydzial))
+
+    # Autorów dopasowujemy dla całego pliku naraz: identyfikatory kilkoma
+    # zapytaniami IN, nazwiska -- raz na osobę, a nie na wiersz.
+    autorzy = matchuj_autorow_wsadowo(
+        [
+            dict(
+                imiona=original["imię"],
+                nazwisko=original["nazwisko"],
+                jednostka=jednostka,
+                orcid=original.get("orcid"),
+                pbn_id=original.get("pbn_id"),
+                tytul_str=original.get("tytuł"),
+            )
+            for _nr, original, jednostka, _wydzial in wiersze
+        ]
+    )
 
-        autor = matchuj_autora(
-            original["imię"],
-            original["nazwisko"],
-            jednostka=jednostka,
-            orcid=original.get("orcid"),
-            pbn_id=original.get("pbn_id"),
-            tytul_str=original.get("tytuł"),
-        )
-
+    for (nr, original, jednostka, wydzial), autor in zip(wiersze, autorzy, strict=True):
         bledny = _parsuj_procenty(original)
-        _utworz_wiersz_importu(n, parent, original, jednostka, wydzial, autor, bledny)
+        _utworz_wiersz_importu(nr, parent, original, jednostka, wydzial, autor, bledny)
 
     return (True, f"przeanalizowano {n - parent.wiersz_naglowka} rekordow")
@@ -3,7 +3,7 @@ import sys
 import rollbar
 
 from bpp.models import Autor_Absencja
-from import_common.core import matchuj_autora
+from import_common.core import matchuj_autorow_wsadowo
 from import_polon.models import ImportPlikuAbsencji, WierszImportuPlikuAbsencji
 from import_polon.utils import read_excel_or_csv_dataframe_guess_encoding
 
@@ -102,14 +102,22 @@ def analyze_file_import_absencji(fn, parent_model: ImportPlikuAbsencji, p):
     total = len(records)
     # ``p.track`` aktualizuje pasek postępu (throttlowany) i sprawdza anulowanie
     # przed każdym wierszem — zastępuje ręczne ``send_progress``.
+    # Autorzy dopasowywani wsadowo dla całego pliku: ORCID-y jednym
+    # zapytaniem, każde (imię, nazwisko) tylko raz.
+    autorzy = matchuj_autorow_wsadowo(
+        [
+            dict(
+                imiona=(row.get("IMIE", "") or "").strip(),
+                nazwisko=(row.get("NAZWISKO", "") or "").strip(),
+                orcid=(row.get("ORCID", "") or "").strip(),
+            )
+            for row in records
+        ]
+    )
     for n_row, row in p.track(
         list(enumerate(records)), total=total, label="Import absencji"
     ):
-        autor = matchuj_autora(
-            imiona=(row.get("IMIE", "") or "").strip(),
-            nazwisko=(row.get("NAZWISKO", "") or "").strip(),
-            orcid=(row.get("ORCID", "") or "").strip(),
-        )
+        autor = autorzy[n_row]
 
         bledy, rok, ile_dni = _validate_row(row, autor)
 
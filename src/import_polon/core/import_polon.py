@@ -11,7 +11,12 @@ from bpp.models import (
     przebuduj_prace_autora_po_udanej_transakcji,
 )
 from ewaluacja_common.models import Rodzaj_Autora
-from import_common.core import matchuj_autora, matchuj_dyscypline, normalize_date
+from import_common.core import (
+    matchuj_autora,
+    matchuj_autorow_wsadowo,
+    matchuj_dyscypline,
+    normalize_date,
+)
 from import_polon.models import ImportPlikuPolon, WierszImportuPlikuPolon
 from import_polon.utils import read_excel_or_csv_dataframe_guess_encoding
 
@@ -23,6 +28,59 @@ def _normalize_zatrudnienie_date(value):
     return timezone.make_aware(dt)
 
 
+# Autorów dopasowujemy porcjami (kilka zapytań IN na porcję zamiast kilku
+# zapytań na wiersz); porcja jest na tyle mała, że ``p.track`` nadal
+# regularnie raportuje postęp i sprawdza anulowanie.
+POLON_ROZMIAR_PORCJI_AUTOROW = 500
+
+# Znacznik w porcji: wiersz dopasowujemy pojedynczo, bo porcja jest nieaktualna
+_DOPASUJ_POJEDYNCZO = object()
+
+
+def _dane_autora(row):
+    """Argumenty ``matchuj_autora`` dla wiersza pliku POLON."""
+    return dict(
+        imiona=(
+            (row.get("IMIE", "") or "") + " " + (row.get("DRUGIE", "") or "")
+        ).strip(),
+        nazwisko=row.get("NAZWISKO", ""),
+        pbn_uid_id=row.get("IDETYFIKATOR_OSOBY_PBN")
+        or row.get("IDENTYFIKATOR_OSOBY_PBN"),
+        orcid=row.get("ORCID", "") or "",
+        tytul_str=row.get(
+            "STOPIEN_TYTUL_AKTUALNY_NA_DZIEN_WYGENEROWANIA_RAPORTU", None
+        ),
+    )
+
+
+def _autor_z_porcji(autorzy, records, n_row):
+    """Autor dla wiersza ``n_row``; gdy brak go w ``autorzy``, dopasowuje
+    wsadowo kolejną porcję wierszy, zaczynając od ``n_row``."""
+    if n_row not in autorzy:
+        porcja = range(n_row, min(n_row + POLON_ROZMIAR_PORCJI_AUTOROW, len(records)))
+        autorzy.clear()
+        autorzy.update(
+            zip(
+                porcja,
+                matchuj_autorow_wsadowo([_dane_autora(records[n]) for n in porcja]),
+                strict=True,
+            )
+        )
+    autor = autorzy[n_row]
+    if autor is _DOPASUJ_POJEDYNCZO:
+        return matchuj_autora(**_dane_autora(records[n_row]))
+    return autor
+
+
+def _uniewaznij_porcje(autorzy):
+    """Po zmianie autora (ORCID) decyzje porcji dla dalszych wierszy mogą być
+    nieaktualne -- nowy ORCID wygrywa po identyfikatorze i rozstrzyga remisy
+    po nazwisku. Resztę porcji dopasowujemy więc pojedynczo, jak przed
+    wprowadzeniem porcji; kolejna porcja widzi już zmiany."""
+    for n_row in autorzy:
+        autorzy[n_row] = _DOPASUJ_POJEDYNCZO
+
+
 def _format_none(value, none_text="pustego"):
     """Format value for display, replacing None with Polish text."""
     return none_text if value is None else value
@@ -433,9 +491,10 @@ def _sync_autor_dyscyplina(
     return ops
 
 
-def _update_autor_orcid(autor, orcid, parent_model):
+def _update_autor_orcid(autor, orcid, parent_model, autorzy):
     """
-    Update author's ORCID if needed.
+    Update author's ORCID if needed; a change invalidates the pre-matched
+    authors in ``autorzy`` (see ``_uniewaznij_porcje``).
     Returns list of operation descriptions.
     """
     ops = []
@@ -444,6 +503,7 @@ def _update_autor_orcid(autor, orcid, parent_model):
         ops.append("Ustawiam ORCID. ")
         if parent_model.zapisz_zmiany_do_bazy:
             autor.save()
+        _uniewaznij_porcje(autorzy)
     return ops
 
 
@@ -483,6 +543,7 @@ def analyze_file_import_polon(fn, parent_model: ImportPlikuPolon, p):
 
     records = data.to_dict("records")
     total = len(records)
+    autorzy = {}
     # ``p.track`` aktualizuje pasek postępu (throttlowany) i sprawdza anulowanie
     # przed każdym wierszem — zastępuje ręczne ``send_progress`` z każdej gałęzi.
     for n_row, row in p.track(
@@ -510,18 +571,7 @@ def analyze_file_import_polon(fn, parent_model: ImportPlikuPolon, p):
 
         # Match author
         orcid = row.get("ORCID", "") or ""
-        autor = matchuj_autora(
-            imiona=(
-                (row.get("IMIE", "") or "") + " " + (row.get("DRUGIE", "") or "")
-            ).strip(),
-            nazwisko=row.get("NAZWISKO", ""),
-            pbn_uid_id=row.get("IDETYFIKATOR_OSOBY_PBN")
-            or row.get("IDENTYFIKATOR_OSOBY_PBN"),
-            orcid=orcid,
-            tytul_str=row.get(
-                "STOPIEN_TYTUL_AKTUALNY_NA_DZIEN_WYGENEROWANIA_RAPORTU", None
-            ),
-        )
+        autor = _autor_z_porcji(autorzy, records, n_row)
 
         # Multi-hosted guard: nie dotykaj autora zatrudnionego w innej uczelni.
         # matchuj_autora dopasowuje globalnie, więc mógł trafić autora obcej
@@ -594,7 +644,7 @@ def analyze_file_import_polon(fn, parent_model: ImportPlikuPolon, p):
             )
 
             # Update ORCID if needed
-            orcid_ops = _update_autor_orcid(autor, orcid, parent_model)
+            orcid_ops = _update_autor_orcid(autor, orcid, parent_model, autorzy)
             ops.extend(orcid_ops)
 
             rezultat = ", ".join(ops)
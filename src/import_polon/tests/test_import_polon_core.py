@@ -254,3 +254,29 @@ def test_analyze_excel_file_import_polon_badawczy_type(
         except Autor_Dyscyplina.DoesNotExist:
             # Author might not be in test data, that's OK for this test
             pass
+
+
+@pytest.mark.django_db
+def test_porcja_autorow_uniewazniana_po_ustawieniu_orcid():
+    """Wiersz dalej w porcji widzi ORCID zapisany przez wcześniejszy wiersz
+    -- tak jak przy dopasowaniu wiersz po wierszu."""
+    from import_polon.core.import_polon import (
+        _autor_z_porcji,
+        _update_autor_orcid,
+    )
+
+    autor = baker.make(Autor, imiona="Anna", nazwisko="Nowak", orcid=None)
+    orcid = "0000-0002-1825-0097"
+    records = [
+        {"IMIE": "Anna", "NAZWISKO": "Nowak", "ORCID": orcid},
+        # Nazwisko po zmianie, nieznane w bazie: dopasowanie tylko po ORCID
+        {"IMIE": "Anna", "NAZWISKO": "Zielińska", "ORCID": orcid},
+    ]
+    ipp = baker.make(ImportPlikuPolon, zapisz_zmiany_do_bazy=True)
+
+    autorzy = {}
+    assert _autor_z_porcji(autorzy, records, 0) == autor
+    assert autorzy[1] is None
+
+    assert _update_autor_orcid(autor, orcid, ipp, autorzy)
+    assert _autor_z_porcji(autorzy, records, 1) == autor
@@ -1,9 +1,10 @@
 from datetime import timedelta
+from itertools import islice
 
 from django.db.models import Max
 from django.utils import timezone
 
-from import_common.core import matchuj_autora
+from import_common.core import matchuj_autorow_wsadowo
 from pbn_api.models import Scientist
 
 from .models import CachedScientistMatch
@@ -11,6 +12,15 @@ from .models import CachedScientistMatch
 # Cache validity period in days
 CACHE_VALIDITY_DAYS = 7
 
+# Scientists matched to BPP authors with one matchuj_autorow_wsadowo call
+MATCH_BATCH_SIZE = 500
+
+
+def _porcje(iterable, size):
+    iterator = iter(iterable)
+    while porcja := list(islice(iterator, size)):
+        yield porcja
+
 
 def get_cache_status():
     """
@@ -56,28 +66,36 @@ def rebuild_match_cache(operation):
     operation.save(update_fields=["total_scientists"])
 
     matches_count = 0
-
-    for idx, scientist in enumerate(scientists.iterator(), 1):
-        match = matchuj_autora(
-            imiona=scientist.name,
-            nazwisko=scientist.lastName,
-            orcid=scientist.orcid,
-            pbn_uid_id=scientist.pk,
-            pbn_id=_get_legacy_pbn_id(scientist),
+    idx = 0
+
+    for porcja in _porcje(scientists.iterator(), MATCH_BATCH_SIZE):
+        matches = matchuj_autorow_wsadowo(
+            [
+                dict(
+                    imiona=scientist.name,
+                    nazwisko=scientist.lastName,
+                    orcid=scientist.orcid,
+                    pbn_uid_id=scientist.pk,
+                    pbn_id=_get_legacy_pbn_id(scientist),
+                )
+                for scientist in porcja
+            ]
         )
 
-        CachedScientistMatch.objects.update_or_create(
-            scientist=scientist, defaults={"matched_autor": match}
-        )
+        for scientist, match in zip(porcja, matches, strict=True):
+            idx += 1
+            CachedScientistMatch.objects.update_or_create(
+                scientist=scientist, defaults={"matched_autor": match}
+            )
 
-        if match:
-            matches_count += 1
+            if match:
+                matches_count += 1
 
-        # Update progress every 10 records
-        if idx % 10 == 0:
-            operation.processed_scientists = idx
-            operation.matches_found = matches_count
-            operation.save(update_fields=["processed_scientists", "matches_found"])
+            # Update progress every 10 records
+            if idx % 10 == 0:
+                operation.processed_scientists = idx
+                operation.matches_found = matches_count
+                operation.save(update_fields=["processed_scientists", "matches_found"])
 
     # Final statistics
     operation.processed_scientists = operation.total_scientists
@@ -0,0 +1,107 @@
+"""HTML-to-PDF rendering for declaration exports.
+
+Deliberately free of Django imports: functions from this module run in
+process-pool workers started with the ``spawn`` context, which
+import only this module (no ``django.setup()``, no database connection).
+The Django side renders templates to HTML; workers only do the CPU-bound
+xhtml2pdf work.
+"""
+
+from collections import deque
+from io import BytesIO
+
+try:
+    from xhtml2pdf import pisa
+except ImportError:
+    pisa = None
+
+# Font paths for DejaVuSans (supports Polish characters)
+DEJAVU_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+DEJAVU_BOLD_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+PAGE_BREAK = '<div style="page-break-after: always;"></div>\n'
+
+DOCUMENT_HEAD = f"""<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Oswiadczenie</title>
+    <style>
+        @font-face {{
+            font-family: "DejaVuSans";
+            src: url("{DEJAVU_FONT_PATH}");
+        }}
+        @font-face {{
+            font-family: "DejaVuSans";
+            src: url("{DEJAVU_BOLD_FONT_PATH}");
+            font-weight: bold;
+        }}
+        body {{
+            font-family: "DejaVuSans", sans-serif;
+            font-size: 10pt;
+            line-height: 1.4;
+            margin: 2.5cm;
+        }}
+        h1 {{ font-size: 14pt; text-align: center; margin: 0.5em 0; }}
+        h2 {{ font-size: 12pt; margin: 0.5em 0; }}
+        h3 {{ font-size: 10pt; margin: 0.5em 0; }}
+        p {{ margin: 0.3em 0; }}
+        ul {{ margin: 0.3em 0; }}
+    </style>
+</head>
+<body>
+"""
+
+DOCUMENT_TAIL = """
+</body>
+</html>"""
+
+
+def html_document(body):
+    """Wrap rendered declaration content(s) in the PDF-ready HTML document."""
+    return DOCUMENT_HEAD + body + DOCUMENT_TAIL
+
+
+def html_to_pdf(html):
+    """Render a complete HTML document to PDF bytes."""
+    result = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=result, encoding="utf-8")
+    if pisa_status.err:
+        raise ValueError("PDF generation failed")
+    return result.getvalue()
+
+
+def init_worker():
+    """Process-pool initializer: warm up xhtml2pdf once per worker.
+
+    The first ``CreatePDF`` in a process pays for parsing the default CSS,
+    loading reportlab and reading the DejaVu fonts; doing it here keeps that
+    cost out of the first real declaration of every worker.
+    """
+    if pisa is not None:
+        html_to_pdf(html_document("<p>zażółć gęślą jaźń</p>"))
+
+
+def render_pdfs(jobs, pool=None, window=None):
+    """Render ``(key, html)`` jobs to ``(key, pdf_bytes)``, preserving order.
+
+    With a ``pool`` at most ``window`` documents are in flight at once, so
+    neither the pending HTML nor finished PDFs pile up in memory: results are
+    yielded to the caller (e.g. written to a ZIP) as soon as they are ready.
+    Without a pool the work is done in the calling process.
+    """
+    if pool is None:
+        for key, html in jobs:
+            yield key, html_to_pdf(html)
+        return
+
+    pending = deque()
+    for key, html in jobs:
+        pending.append((key, pool.submit(html_to_pdf, html)))
+        if len(pending) >= window:
+            key, future = pending.popleft()
+            yield key, future.result()
+
+    while pending:
+        key, future = pending.popleft()
+        yield key, future.result()
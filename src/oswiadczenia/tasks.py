@@ -1,27 +1,33 @@
 import os
 import tempfile
 import zipfile
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
+from itertools import islice
+from types import SimpleNamespace
 from typing import Any
 
+import billiard
 import rollbar
 from celery import shared_task
+from django.conf import settings
+from django.core.files import File
 from django.core.files.base import ContentFile
 from django.db.models import Q
 from django.template.loader import render_to_string
 from django.utils import timezone
+from pypdf import PdfWriter
 
 from bpp.models import Autor_Dyscyplina, Autorzy, Uczelnia
-
-try:
-    from xhtml2pdf import pisa
-except ImportError:
-    pisa = None
-
-# Font paths for DejaVuSans (supports Polish characters)
-DEJAVU_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
-DEJAVU_BOLD_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+from oswiadczenia.pdf import (
+    DEJAVU_BOLD_FONT_PATH,
+    DEJAVU_FONT_PATH,
+    PAGE_BREAK,
+    html_document,
+    html_to_pdf,
+    init_worker,
+    pisa,
+    render_pdfs,
+)
 
 
 def check_fonts_available():
@@ -162,85 +168,39 @@ def build_queryset_for_task(task, uczelnia=None):
 
 def render_declaration_html(decl, uczelnia):
     """Render a single declaration to full HTML document."""
-    html_content = render_to_string(
-        "oswiadczenia/tresc_jednego_oswiadczenia.html",
-        {
-            "autor": decl["autor"],
-            "object": decl["rekord"],
-            "dyscyplina_pracy": decl["dyscyplina_pracy"],
-            "dyscyplina_naukowa": decl["dyscyplina_naukowa"],
-            "subdyscyplina_naukowa": decl["subdyscyplina_naukowa"],
-            "uczelnia": uczelnia,
-            "data_oswiadczenia": decl["data_oswiadczenia"],
-            "przypieta": decl["przypieta"],
-        },
-    )
-
-    return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Oswiadczenie</title>
-    <style>
-        @font-face {{
-            font-family: "DejaVuSans";
-            src: url("{DEJAVU_FONT_PATH}");
-        }}
-        @font-face {{
-            font-family: "DejaVuSans";
-            src: url("{DEJAVU_BOLD_FONT_PATH}");
-            font-weight: bold;
-        }}
-        body {{
-            font-family: "DejaVuSans", sans-serif;
-            font-size: 10pt;
-            line-height: 1.4;
-            margin: 2.5cm;
-        }}
-        h1 {{ font-size: 14pt; text-align: center; margin: 0.5em 0; }}
-        h2 {{ font-size: 12pt; margin: 0.5em 0; }}
-        h3 {{ font-size: 10pt; margin: 0.5em 0; }}
-        p {{ margin: 0.3em 0; }}
-        ul {{ margin: 0.3em 0; }}
-    </style>
-</head>
-<body>
-{html_content}
-</body>
-</html>"""
+    return html_document(render_declaration_content_only(decl, uczelnia))
 
 
-def generate_declaration_content(decl, uczelnia, export_format):
-    """Generate content for a single declaration.
-
-    Returns:
-        tuple: (filename, content_bytes)
-    """
+def declaration_filename(decl, extension):
+    """Path of a single declaration inside the export ZIP."""
     autor_name = sanitize_filename(
         f"{decl['autor'].nazwisko}_{decl['autor'].imiona}", 50
     )
     rekord_id = decl["rekord"].pk[1]  # second element of tuple pk
     tytul = sanitize_filename(decl["rekord"].tytul_oryginalny, 30)
     dyscyplina_name = sanitize_filename(str(decl["dyscyplina_pracy"]), 20)
+    return f"{autor_name}/{rekord_id}_{tytul}_{dyscyplina_name}.{extension}"
+
+
+def generate_declaration_content(decl, uczelnia, export_format):
+    """Generate content for a single declaration.
 
+    Returns:
+        tuple: (filename, content_bytes)
+    """
+    filename = declaration_filename(decl, export_format)
     full_html = render_declaration_html(decl, uczelnia)
 
     if export_format == "pdf":
-        result = BytesIO()
-        pisa_status = pisa.CreatePDF(full_html, dest=result, encoding="utf-8")
-        if pisa_status.err:
-            raise Exception(f"PDF generation failed for {decl['autor']}")
-        pdf_content = result.getvalue()
-        filename = f"{autor_name}/{rekord_id}_{tytul}_{dyscyplina_name}.pdf"
-        return filename, pdf_content
+        try:
+            return filename, html_to_pdf(full_html)
+        except ValueError as e:
+            raise Exception(f"PDF generation failed for {decl['autor']}") from e
     elif export_format == "docx":
         from nowe_raporty.docx_export import html_to_docx
 
-        docx_content = html_to_docx(full_html)
-        filename = f"{autor_name}/{rekord_id}_{tytul}_{dyscyplina_name}.docx"
-        return filename, docx_content
+        return filename, html_to_docx(full_html)
     else:
-        filename = f"{autor_name}/{rekord_id}_{tytul}_{dyscyplina_name}.html"
         return filename, full_html.encode("utf-8")
 
 
@@ -250,39 +210,79 @@ def write_declaration_to_zip(zf, decl, uczelnia, export_format):
     zf.writestr(filename, content)
 
 
-def generate_pdfs_parallel(declarations, uczelnia, task):
-    """Generate PDFs in parallel using ThreadPoolExecutor.
+def pdf_processes():
+    """Number of PDF rendering processes; 1 renders in the task's process."""
+    return getattr(settings, "OSWIADCZENIA_PDF_PROCESY", min(4, os.cpu_count() or 2))
 
-    Returns:
-        list of (filename, content) tuples
+
+class PdfPool:
+    """``billiard`` process pool with the ``submit``/``shutdown`` subset of
+    ``concurrent.futures.Executor`` that ``render_pdfs`` uses.
+
+    ``billiard`` (Celery's fork of ``multiprocessing``) lets a daemonic
+    process start children, so the pool also works inside a prefork Celery
+    worker, where ``ProcessPoolExecutor`` fails with "daemonic processes are
+    not allowed to have children".
     """
-    max_workers = min(4, os.cpu_count() or 2)
-    results = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_idx = {
-            executor.submit(
-                generate_declaration_content,
-                decl,
-                uczelnia,
-                "pdf",
-            ): (idx, decl)
-            for idx, decl in enumerate(declarations, 1)
-        }
 
-        for future in as_completed(future_to_idx):
-            idx, decl = future_to_idx[future]
-            filename, content = future.result()
-            results.append((filename, content))
+    def __init__(self, processes):
+        self._pool = billiard.get_context("spawn").Pool(
+            processes, initializer=init_worker
+        )
 
-            task.processed_items = len(results)
-            task.current_item = (
-                f"{decl['autor']} - {decl['rekord'].tytul_oryginalny[:30]}"
-            )
-            if len(results) % 10 == 0 or len(results) == len(declarations):
-                task.save()
+    def submit(self, fn, *args):
+        # ``AsyncResult.get`` re-raises the worker's exception, like
+        # ``Future.result``.
+        return SimpleNamespace(result=self._pool.apply_async(fn, args).get)
+
+    def shutdown(self, cancel_futures=False):
+        if cancel_futures:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        self._pool.join()
+
+
+def pdf_pool():
+    """Process pool for xhtml2pdf (CPU-bound, holds the GIL — threads don't
+    help), or None when rendering in-process.
 
-    return results
+    ``spawn``: workers import only ``oswiadczenia.pdf``; a forked copy of the
+    Celery worker would share its database connection.
+    """
+    processes = pdf_processes()
+    if processes <= 1:
+        return None
+    return PdfPool(processes)
+
+
+def _update_progress(task, idx, total, decl):
+    task.processed_items = idx
+    task.current_item = f"{decl['autor']} - {decl['rekord'].tytul_oryginalny[:30]}"
+    if idx % 10 == 0 or idx == total:
+        task.save()
+
+
+def generate_pdfs_parallel(zf, declarations, uczelnia, task):
+    """Render PDFs in a process pool and write each one to the ZIP as soon as
+    it is ready.
+
+    HTML is rendered lazily in this process (templates need the database),
+    at most a few documents ahead of the workers, so memory use does not grow
+    with the number of declarations.
+    """
+    jobs = ((decl, render_declaration_html(decl, uczelnia)) for decl in declarations)
+    pool = pdf_pool()
+    try:
+        window = pdf_processes() * 2
+        for idx, (decl, content) in enumerate(render_pdfs(jobs, pool, window), 1):
+            zf.writestr(declaration_filename(decl, "pdf"), content)
+            _update_progress(task, idx, len(declarations), decl)
+    except ValueError as e:
+        raise Exception("PDF generation failed") from e
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
 
 def generate_html_sequential(zf, declarations, uczelnia, task):
@@ -423,66 +423,51 @@ def generate_combined_docx(declarations, uczelnia, task):
     return html_to_docx(full_html)
 
 
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
 def generate_combined_pdf(declarations, uczelnia, task):
     """Generate a single PDF file with all declarations.
 
+    Declarations are rendered in chunks of ``OSWIADCZENIA_PDF_CHUNK`` (one
+    xhtml2pdf document each, in the process pool) and merged page-wise, so
+    there is never one giant HTML string or a single huge xhtml2pdf run.
+    Each chunk starts on a new page, same as the page break between
+    declarations.
+
     Returns:
-        bytes: PDF file content
+        File: temporary file with the PDF; closing it removes it.
     """
-    html_parts = []
-
-    for idx, decl in enumerate(declarations, 1):
-        content = render_declaration_content_only(decl, uczelnia)
-        html_parts.append(content)
-
-        task.processed_items = idx
-        task.current_item = f"{decl['autor']} - {decl['rekord'].tytul_oryginalny[:30]}"
-        if idx % 10 == 0 or idx == len(declarations):
-            task.save()
-
-    # Join with page break dividers
-    combined_content = '<div style="page-break-after: always;"></div>\n'.join(
-        html_parts
-    )
-
-    full_html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Oswiadczenia</title>
-    <style>
-        @font-face {{
-            font-family: "DejaVuSans";
-            src: url("{DEJAVU_FONT_PATH}");
-        }}
-        @font-face {{
-            font-family: "DejaVuSans";
-            src: url("{DEJAVU_BOLD_FONT_PATH}");
-            font-weight: bold;
-        }}
-        body {{
-            font-family: "DejaVuSans", sans-serif;
-            font-size: 10pt;
-            line-height: 1.4;
-            margin: 2.5cm;
-        }}
-        h1 {{ font-size: 14pt; text-align: center; margin: 0.5em 0; }}
-        h2 {{ font-size: 12pt; margin: 0.5em 0; }}
-        h3 {{ font-size: 10pt; margin: 0.5em 0; }}
-        p {{ margin: 0.3em 0; }}
-        ul {{ margin: 0.3em 0; }}
-    </style>
-</head>
-<body>
-{combined_content}
-</body>
-</html>"""
+    chunk_size = getattr(settings, "OSWIADCZENIA_PDF_CHUNK", 50)
+    processed = 0
+
+    def jobs():
+        nonlocal processed
+        for chunk in _chunks(declarations, chunk_size):
+            bodies = [render_declaration_content_only(d, uczelnia) for d in chunk]
+            processed += len(chunk)
+            _update_progress(task, processed, len(declarations), chunk[-1])
+            yield len(chunk), html_document(PAGE_BREAK.join(bodies))
+
+    writer = PdfWriter()
+    pool = pdf_pool()
+    try:
+        for _, content in render_pdfs(jobs(), pool, pdf_processes() * 2):
+            writer.append(BytesIO(content))
+    except ValueError as e:
+        raise Exception("PDF generation failed") from e
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
 
-    result = BytesIO()
-    pisa_status = pisa.CreatePDF(full_html, dest=result, encoding="utf-8")
-    if pisa_status.err:
-        raise Exception("PDF generation failed")
-    return result.getvalue()
+    result = tempfile.TemporaryFile()
+    writer.write(result)
+    writer.close()
+    result.seek(0)
+    return File(result)
 
 
 def _generate_single_file_output(task, declarations, uczelnia):
@@ -518,28 +503,21 @@ def _generate_zip_output(task, declarations, uczelnia):
     """Generate a ZIP file with multiple declaration files.
 
     Returns:
-        tuple: (filename, content) for the ZIP file.
+        tuple: (filename, File) — temporary file with the ZIP; closing it
+        removes it.
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".zip") as tmp_file:
-        with zipfile.ZipFile(tmp_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            if task.export_format == "pdf":
-                results = generate_pdfs_parallel(declarations, uczelnia, task)
-                for fname, file_content in results:
-                    zf.writestr(fname, file_content)
-            elif task.export_format == "docx":
-                generate_docx_sequential(zf, declarations, uczelnia, task)
-            else:
-                generate_html_sequential(zf, declarations, uczelnia, task)
-
-        tmp_path = tmp_file.name
-
-    with open(tmp_path, "rb") as f:
-        content = f.read()
-
-    os.unlink(tmp_path)
+    tmp_file = tempfile.TemporaryFile()
+    with zipfile.ZipFile(tmp_file, "w", zipfile.ZIP_DEFLATED) as zf:
+        if task.export_format == "pdf":
+            generate_pdfs_parallel(zf, declarations, uczelnia, task)
+        elif task.export_format == "docx":
+            generate_docx_sequential(zf, declarations, uczelnia, task)
+        else:
+            generate_html_sequential(zf, declarations, uczelnia, task)
+    tmp_file.seek(0)
 
     filename = f"oswiadczenia_{task.rok_od}_{task.rok_do}_{task.export_format}.zip"
-    return filename, content
+    return filename, File(tmp_file)
 
 
 @shared_task(bind=True)
@@ -597,14 +575,13 @@ def generate_oswiadczenia_zip(self, task_id: int, uczelnia_id=None):
             check_fonts_available()
 
         # Handle single-file formats or ZIP
-        single_file_result = _generate_single_file_output(task, declarations, uczelnia)
-        if single_file_result:
-            filename, content = single_file_result
-            task.result_file.save(filename, ContentFile(content))
-        else:
-            # Generate ZIP
-            filename, content = _generate_zip_output(task, declarations, uczelnia)
-            task.result_file.save(filename, ContentFile(content))
+        filename, content = _generate_single_file_output(
+            task, declarations, uczelnia
+        ) or _generate_zip_output(task, declarations, uczelnia)
+        if not isinstance(content, File):
+            content = ContentFile(content)
+        with content:
+            task.result_file.save(filename, content)
 
         task.status = "completed"
         task.completed_at = timezone.now()
@@ -289,3 +289,122 @@ def test_remove_old_oswiadczenia_export_files():
     remove_old_oswiadczenia_export_files()
 
     assert OswiadczeniaExportTask.objects.count() == 1
+
+
+def test_render_pdfs_kolejnosc_i_okno(monkeypatch):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from oswiadczenia import pdf
+
+    w_toku = []
+
+    def html_to_pdf(html):
+        w_toku.append(html)
+        # Wcześniejsze dokumenty kończą się później niż następne
+        time.sleep(0.01 * (5 - int(html)))
+        return html.encode()
+
+    monkeypatch.setattr(pdf, "html_to_pdf", html_to_pdf)
+    wygenerowane = []
+
+    def jobs():
+        for no in range(5):
+            wygenerowane.append(no)
+            # Okno 2: generator nie wyprzedza odbiorcy o więcej niż 2 dokumenty
+            assert len(wygenerowane) - len(wyniki) <= 2
+            yield no, str(no)
+
+    wyniki = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for key, content in pdf.render_pdfs(jobs(), pool, window=2):
+            wyniki.append((key, content))
+
+    assert wyniki == [(no, str(no).encode()) for no in range(5)]
+
+
+def _pdf_pool_w_procesie_demonie(kolejka):
+    from oswiadczenia import pdf
+    from oswiadczenia.tasks import PdfPool
+
+    pool = PdfPool(2)
+    try:
+        kolejka.put(pool.submit(pdf.html_document, "x").result())
+    finally:
+        pool.shutdown()
+
+
+def test_pdf_pool_w_procesie_demonie():
+    """Proces prefork Celery jest demonem — pula musi w nim wystartować."""
+    import billiard
+
+    from oswiadczenia import pdf
+
+    kolejka = billiard.Queue()
+    proces = billiard.Process(
+        target=_pdf_pool_w_procesie_demonie, args=(kolejka,), daemon=True
+    )
+    proces.start()
+    try:
+        assert kolejka.get(timeout=120) == pdf.html_document("x")
+    finally:
+        proces.join()
+
+
+@pytest.fixture
+def deklaracje(zwarte_z_dyscyplinami, uczelnia):
+    from bpp.models import Autorzy
+    from oswiadczenia.tasks import build_declarations_list
+
+    queryset = (
+        Autorzy.objects.exclude(dyscyplina_naukowa=None)
+        .select_related("autor", "rekord", "dyscyplina_naukowa")
+        .order_by("autor__nazwisko")
+    )
+    return build_declarations_list(queryset, uczelnia)
+
+
+@pytest.mark.django_db
+def test_generate_combined_pdf_porcjami(deklaracje, uczelnia, settings):
+    from types import SimpleNamespace
+
+    from pypdf import PdfReader
+
+    from oswiadczenia.tasks import generate_combined_pdf, pisa
+
+    if pisa is None:
+        pytest.skip("xhtml2pdf nie jest zainstalowany")
+
+    settings.OSWIADCZENIA_PDF_PROCESY = 1
+    settings.OSWIADCZENIA_PDF_CHUNK = 1
+    task = SimpleNamespace(save=lambda: None)
+
+    with generate_combined_pdf(deklaracje, uczelnia, task) as wynik:
+        strony = len(PdfReader(wynik).pages)
+
+    assert deklaracje
+    assert strony >= len(deklaracje)
+    assert task.processed_items == len(deklaracje)
+
+
+@pytest.mark.django_db
+def test_generate_pdfs_parallel_zapisuje_do_zip(deklaracje, uczelnia, settings):
+    import zipfile
+    from io import BytesIO
+    from types import SimpleNamespace
+
+    from oswiadczenia.tasks import declaration_filename, generate_pdfs_parallel, pisa
+
+    if pisa is None:
+        pytest.skip("xhtml2pdf nie jest zainstalowany")
+
+    settings.OSWIADCZENIA_PDF_PROCESY = 1
+    task = SimpleNamespace(save=lambda: None)
+
+    bufor = BytesIO()
+    with zipfile.ZipFile(bufor, "w") as zf:
+        generate_pdfs_parallel(zf, deklaracje, uczelnia, task)
+
+    with zipfile.ZipFile(bufor) as zf:
+        assert zf.namelist() == [declaration_filename(d, "pdf") for d in deklaracje]
+        assert all(zf.read(n).startswith(b"%PDF") for n in zf.namelist())
@@ -18,7 +18,7 @@ class Command(PBNBaseCommand):
 
             publication = original.pbn_uid
             versions = sorted(
-                publication.versions,
+                publication.wszystkie_wersje,
                 key=lambda obj: arrow.get(obj["createdTime"]),
                 reverse=True,
             )
@@ -0,0 +1,137 @@
+"""Historia wersji rekordów lustra PBN w osobnej, skompresowanej tabeli.
+
+W wierszach ``Publication``, ``Scientist``, ``Journal``, ``Institution``,
+``Publisher`` i ``Conference`` pole ``versions`` zostaje z samą bieżącą
+wersją; wcześniejsze trafiają do ``HistoriaWersji`` jako JSON skompresowany
+zlib-em. Przenoszone porcjami po kluczu, bez wczytywania całych tabel.
+"""
+
+import json
+import zlib
+
+from django.db import migrations, models
+
+MODELE = [
+    "publication",
+    "scientist",
+    "journal",
+    "institution",
+    "publisher",
+    "conference",
+]
+
+ROZMIAR_PORCJI = 1000
+
+
+def _kompresuj(wersje):
+    return zlib.compress(json.dumps(wersje, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def _biezaca(wersja):
+    return isinstance(wersja, dict) and bool(wersja.get("current"))
+
+
+def przenies_historie(apps, schema_editor):
+    HistoriaWersji = apps.get_model("pbn_api", "HistoriaWersji")
+    connection = schema_editor.connection
+
+    for model_name in MODELE:
+        Model = apps.get_model("pbn_api", model_name)
+        table = connection.ops.quote_name(Model._meta.db_table)
+        ostatni = ""
+
+        while True:
+            with connection.cursor() as cursor:
+                # CASE: jsonb_array_length() na obiekcie rzuca błędem, a AND
+                # nie gwarantuje kolejności obliczania warunków
+                cursor.execute(
+                    f'SELECT "mongoId", versions FROM {table} '
+                    f'WHERE "mongoId" > %s AND CASE WHEN '
+                    f"jsonb_typeof(versions) = 'array' "
+                    f"THEN jsonb_array_length(versions) > 1 ELSE false END "
+                    f'ORDER BY "mongoId" LIMIT %s',
+                    [ostatni, ROZMIAR_PORCJI],
+                )
+                wiersze = cursor.fetchall()
+            if not wiersze:
+                break
+            ostatni = wiersze[-1][0]
+
+            historia = []
+            wiersze_lustra = []
+            for mongo_id, versions in wiersze:
+                if isinstance(versions, str):
+                    versions = json.loads(versions)
+                biezace = [v for v in versions if _biezaca(v)]
+                if not biezace or len(biezace) == len(versions):
+                    continue
+                historyczne = [v for v in versions if not _biezaca(v)]
+                historia.append(
+                    HistoriaWersji(
+                        model=model_name,
+                        mongoId=mongo_id,
+                        liczba_wersji=len(historyczne),
+                        dane=_kompresuj(historyczne),
+                    )
+                )
+                wiersze_lustra.append(Model(pk=mongo_id, versions=biezace))
+
+            HistoriaWersji.objects.bulk_create(historia)
+            Model.objects.bulk_update(wiersze_lustra, ["versions"])
+
+
+def przywroc_historie(apps, schema_editor):
+    HistoriaWersji = apps.get_model("pbn_api", "HistoriaWersji")
+
+    for model_name in MODELE:
+        Model = apps.get_model("pbn_api", model_name)
+        historia = HistoriaWersji.objects.filter(model=model_name).order_by("mongoId")
+        for start in range(0, historia.count(), ROZMIAR_PORCJI):
+            porcja = {
+                h.mongoId: json.loads(zlib.decompress(bytes(h.dane)).decode("utf-8"))
+                for h in historia[start : start + ROZMIAR_PORCJI]
+            }
+            wiersze_lustra = list(
+                Model.objects.filter(pk__in=porcja).only("pk", "versions")
+            )
+            for obj in wiersze_lustra:
+                obj.versions = [*porcja[obj.pk], *obj.versions]
+            Model.objects.bulk_update(wiersze_lustra, ["versions"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pbn_api", "0079_constraint_publikacja_instytucji"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistoriaWersji",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=50)),
+                ("mongoId", models.CharField(max_length=32)),
+                ("liczba_wersji", models.PositiveIntegerField(default=0)),
+                ("dane", models.BinaryField()),
+            ],
+            options={
+                "verbose_name": "Historia wersji rekordu PBN",
+                "verbose_name_plural": "Historia wersji rekordów PBN",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("model", "mongoId"),
+                        name="pbn_api_historiawersji_unique",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(przenies_historie, przywroc_historie),
+    ]
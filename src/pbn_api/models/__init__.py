@@ -1,6 +1,7 @@
 from .conference import Conference  # noqa
 from .country import Country  # noqa
 from .discipline import Discipline, DisciplineGroup  # noqa
+from .historia_wersji import HistoriaWersji  # noqa
 from .institution import Institution  # noqa
 from .journal import Journal  # noqa
 from .language import Language  # noqa
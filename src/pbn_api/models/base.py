@@ -4,6 +4,8 @@ from django.db import models
 from django.db.models import JSONField
 from django.utils.functional import cached_property
 
+from .historia_wersji import HistoriaWersji
+
 
 class BasePBNModel(models.Model):
     created_on = models.DateTimeField(auto_now_add=True)
@@ -16,6 +18,25 @@ class BasePBNModel(models.Model):
 MAX_TEXT_FIELD_LENGTH = 350
 
 
+def _biezaca(wersja):
+    return isinstance(wersja, dict) and bool(wersja.get("current"))
+
+
+def rozdziel_wersje(versions):
+    """Podziel listę wersji z PBN na ``(bieżące, historyczne)``.
+
+    ``historyczne`` jest ``None``, gdy nie ma czego przenosić do
+    ``HistoriaWersji`` -- lista bez wersji bieżącej (zostaje w wierszu
+    w całości) albo złożona wyłącznie z bieżących (np. wczytana z bazy).
+    """
+    if not isinstance(versions, list):
+        return versions, None
+    biezace = [v for v in versions if _biezaca(v)]
+    if not biezace or len(biezace) == len(versions):
+        return versions, None
+    return biezace, [v for v in versions if not _biezaca(v)]
+
+
 class BasePBNMongoDBModel(BasePBNModel):
     mongoId = models.CharField(max_length=32, primary_key=True)
     status = models.CharField(max_length=32, db_index=True, default="")
@@ -23,6 +44,12 @@ class BasePBNMongoDBModel(BasePBNModel):
     verified = models.BooleanField(default=False, db_index=True)
     versions = JSONField(default=list)
 
+    # Pole ``versions`` trzyma wyłącznie bieżącą wersję rekordu -- przy
+    # zapisie wcześniejsze wersje trafiają skompresowane do ``HistoriaWersji``
+    # (patrz ``historia_wersji`` / ``wszystkie_wersje``). Dzięki temu wiersze
+    # lustra są małe, a ``current_version``/``value()`` przeglądają jeden
+    # element.
+
     # Nazwy pól wyciaganych "na wierzch" do pól obiektu
     # ze słownika JSONa (pole 'values')
     pull_up_on_save = None
@@ -33,15 +60,24 @@ class BasePBNMongoDBModel(BasePBNModel):
     def save(
         self, force_insert=False, force_update=False, using=None, update_fields=None
     ):
+        historia = None
+        if update_fields is None or "versions" in update_fields:
+            self.versions, historia = rozdziel_wersje(self.versions)
+
         if self.pull_up_on_save:
             self._pull_up_on_save()
-        return super().save(
+        ret = super().save(
             force_insert=force_insert,
             force_update=force_update,
             using=using,
             update_fields=update_fields,
         )
 
+        if historia is not None:
+            HistoriaWersji.objects.zapisz(self._meta.model_name, {self.pk: historia})
+            self.__dict__.pop("historia_wersji", None)
+        return ret
+
     def _pull_up_on_save(self):
         for attr in self.pull_up_on_save:
             if hasattr(self, f"pull_up_{attr}"):
@@ -69,6 +105,17 @@ class BasePBNMongoDBModel(BasePBNModel):
                 if elem.get("current"):
                     return elem
 
+    @cached_property
+    def historia_wersji(self):
+        """Wcześniejsze wersje rekordu, wczytywane z ``HistoriaWersji``."""
+        historia = HistoriaWersji.objects.dla(self).only("dane").first()
+        return historia.wersje if historia is not None else []
+
+    @property
+    def wszystkie_wersje(self):
+        """Pełna lista wersji, jak w PBN: historyczne i bieżąca."""
+        return [*self.historia_wersji, *self.versions]
+
     def value(self, *path, return_none=False):
         v = self.current_version
         if v is None:
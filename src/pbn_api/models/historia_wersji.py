@@ -0,0 +1,81 @@
+import json
+import zlib
+
+from django.db import models
+
+# Poziom kompresji zlib historii wersji; wyższe poziomy niewiele dają na JSON-ie
+POZIOM_KOMPRESJI = 6
+
+
+def kompresuj_wersje(wersje):
+    return zlib.compress(
+        json.dumps(wersje, ensure_ascii=False).encode("utf-8"), POZIOM_KOMPRESJI
+    )
+
+
+def dekompresuj_wersje(dane):
+    return json.loads(zlib.decompress(bytes(dane)).decode("utf-8"))
+
+
+class HistoriaWersjiManager(models.Manager):
+    def dla(self, obj):
+        """Historia wersji rekordu lustra PBN (``BasePBNMongoDBModel``)."""
+        return self.filter(model=obj._meta.model_name, mongoId=obj.pk)
+
+    def zapisz(self, model_name, historia):
+        """Zapisz (upsert) historię wersji: ``historia`` to ``mongoId -> lista``.
+
+        Pusta lista usuwa historię rekordu.
+        """
+        do_usuniecia = [pk for pk, wersje in historia.items() if not wersje]
+        if do_usuniecia:
+            self.filter(model=model_name, mongoId__in=do_usuniecia).delete()
+
+        self.bulk_create(
+            [
+                HistoriaWersji(
+                    model=model_name,
+                    mongoId=pk,
+                    liczba_wersji=len(wersje),
+                    dane=kompresuj_wersje(wersje),
+                )
+                for pk, wersje in historia.items()
+                if wersje
+            ],
+            update_conflicts=True,
+            unique_fields=["model", "mongoId"],
+            update_fields=["liczba_wersji", "dane"],
+        )
+
+
+class HistoriaWersji(models.Model):
+    """Wcześniejsze (nie-bieżące) wersje rekordów lustra PBN.
+
+    W wierszu lustra (``Publication``, ``Scientist``, ``Journal``...) pole
+    ``versions`` trzyma tylko bieżącą wersję; pozostałe, potrzebne rzadko,
+    trafiają tutaj jako skompresowany zlib-em JSON i są ładowane leniwie
+    (``BasePBNMongoDBModel.historia_wersji``).
+    """
+
+    model = models.CharField(max_length=50)
+    mongoId = models.CharField(max_length=32)
+    liczba_wersji = models.PositiveIntegerField(default=0)
+    dane = models.BinaryField()
+
+    objects = HistoriaWersjiManager()
+
+    class Meta:
+        verbose_name = "Historia wersji rekordu PBN"
+        verbose_name_plural = "Historia wersji rekordów PBN"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model", "mongoId"], name="pbn_api_historiawersji_unique"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.mongoId} ({self.liczba_wersji} wersji)"
+
+    @property
+    def wersje(self):
+        return dekompresuj_wersje(self.dane)
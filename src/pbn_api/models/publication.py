@@ -150,11 +150,10 @@ class Publication(LinkDoPBNMixin, BasePBNMongoDBModel):
 
             return Zrodlo.objects.filter(pbn_uid_id=self.journal_id).first()
 
-    def matchuj_do_rekordu_bpp(self):
-        from bpp.models.cache import Rekord
-
-        return matchuj_publikacje(
-            Rekord,
+    def dane_do_matchowania(self):
+        """Argumenty ``matchuj_publikacje`` (i ``matchuj_publikacje_wsadowo``)
+        dla tej publikacji."""
+        return dict(
             title=self.title,
             year=self.year,
             doi=self.doi,
@@ -163,6 +162,11 @@ class Publication(LinkDoPBNMixin, BasePBNMongoDBModel):
             zrodlo=self.matchuj_zrodlo_do_rekordu_bpp(),
         )
 
+    def matchuj_do_rekordu_bpp(self):
+        from bpp.models.cache import Rekord
+
+        return matchuj_publikacje(Rekord, **self.dane_do_matchowania())
+
     def get_bpp_publication(self):
         """Zwraca rekord BPP powiązany przez PBN UID (bez fuzzy matching)."""
         from bpp.models.cache import Rekord
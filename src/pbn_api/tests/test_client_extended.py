@@ -227,7 +227,7 @@ def test_pageable_resource_missing_content_key():
 # ==================== RequestsTransport Tests ====================
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_success(mock_get):
     """Test RequestsTransport.get successful request"""
     mock_response = MagicMock()
@@ -241,7 +241,7 @@ def test_requests_transport_get_success(mock_get):
     assert result == {"test": "data"}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_includes_headers(mock_get):
     """Test RequestsTransport.get includes required headers"""
     mock_response = MagicMock()
@@ -262,7 +262,7 @@ def test_requests_transport_get_includes_headers(mock_get):
     assert headers["X-User-Token"] == "user_token"
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_http_error(mock_get):
     """Test RequestsTransport.get raises HttpException on error status"""
     mock_response = MagicMock()
@@ -276,7 +276,7 @@ def test_requests_transport_get_http_error(mock_get):
         transport.get("/endpoint")
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_ssl_error_retry(mock_get):
     """Test RequestsTransport.get retries on SSL error"""
     mock_response = MagicMock()
@@ -294,7 +294,7 @@ def test_requests_transport_get_ssl_error_retry(mock_get):
     assert result == {"test": "data"}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_connection_error_retry(mock_get):
     """Test RequestsTransport.get retries on connection error"""
     mock_response = MagicMock()
@@ -312,7 +312,7 @@ def test_requests_transport_get_connection_error_retry(mock_get):
     assert result == {"test": "data"}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_access_denied_403(mock_get):
     """Test RequestsTransport.get handles 403 access denied"""
     mock_response = MagicMock()
@@ -328,7 +328,7 @@ def test_requests_transport_get_access_denied_403(mock_get):
         transport.get("/endpoint", fail_on_auth_missing=True)
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 def test_requests_transport_get_prace_serwisowe(mock_get):
     """Test RequestsTransport.get detects maintenance mode"""
     mock_response = MagicMock()
@@ -344,7 +344,7 @@ def test_requests_transport_get_prace_serwisowe(mock_get):
         transport.get("/endpoint")
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_requests_transport_post_success(mock_post):
     """Test RequestsTransport.post successful request"""
     mock_response = MagicMock()
@@ -360,7 +360,7 @@ def test_requests_transport_post_success(mock_post):
     assert result == {"id": "123"}
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_requests_transport_post_includes_headers(mock_post):
     """Test RequestsTransport.post includes required headers"""
     mock_response = MagicMock()
@@ -381,7 +381,7 @@ def test_requests_transport_post_includes_headers(mock_post):
     assert headers["X-User-Token"] == "user_token"
 
 
-@patch("requests.delete")
+@patch("requests.Session.delete")
 def test_requests_transport_post_delete_method(mock_delete):
     """Test RequestsTransport.post uses DELETE method when delete=True"""
     mock_response = MagicMock()
@@ -397,7 +397,7 @@ def test_requests_transport_post_delete_method(mock_delete):
     mock_delete.assert_called_once()
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_requests_transport_post_access_denied_403(mock_post):
     """Test RequestsTransport.post handles access denied"""
     mock_response = MagicMock()
@@ -413,7 +413,7 @@ def test_requests_transport_post_access_denied_403(mock_post):
         transport.post("/endpoint", body={})
 
 
-@patch("requests.post")
+@patch("requests.Session.post")
 def test_requests_transport_post_invalid_json_on_403(mock_post):
     """Test RequestsTransport.post handles invalid JSON on 403"""
     mock_response = MagicMock()
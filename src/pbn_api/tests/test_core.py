@@ -7,7 +7,7 @@ from pbn_api.tests.utils import MockTransport
 def test_RequestsTransport_get(mocker):
     m = mocker.MagicMock()
     m.status_code = 200
-    rg = mocker.patch("requests.get", return_value=m)
+    rg = mocker.patch("requests.Session.get", return_value=m)
 
     t = RequestsTransport("foo", "bar", "onet.pl")
     t.get("foobar", {"foo": "bar"})
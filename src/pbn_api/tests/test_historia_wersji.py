@@ -0,0 +1,47 @@
+import pytest
+from model_bakery import baker
+
+from pbn_api.models import HistoriaWersji, Publication
+from pbn_api.models.base import rozdziel_wersje
+
+STARA = {"current": False, "object": {"title": "Stary tytuł"}}
+BIEZACA = {"current": True, "object": {"title": "Nowy tytuł"}}
+
+
+def test_rozdziel_wersje():
+    assert rozdziel_wersje([STARA, BIEZACA]) == ([BIEZACA], [STARA])
+    assert rozdziel_wersje([BIEZACA]) == ([BIEZACA], None)
+    assert rozdziel_wersje([STARA]) == ([STARA], None)
+    assert rozdziel_wersje({}) == ({}, None)
+
+
+@pytest.mark.django_db
+def test_save_przenosi_historie():
+    pub = baker.make(Publication, versions=[STARA, BIEZACA])
+
+    pub.refresh_from_db()
+    assert pub.versions == [BIEZACA]
+    assert pub.title == "Nowy tytuł"
+    assert pub.historia_wersji == [STARA]
+    assert pub.wszystkie_wersje == [STARA, BIEZACA]
+
+    historia = HistoriaWersji.objects.dla(pub).get()
+    assert historia.liczba_wersji == 1
+
+    # Zapis bez nowych wersji nie rusza historii
+    pub.save()
+    assert HistoriaWersji.objects.dla(pub).get().wersje == [STARA]
+
+
+@pytest.mark.django_db
+def test_save_aktualizuje_historie():
+    pub = baker.make(Publication, versions=[STARA, BIEZACA])
+
+    najnowsza = {"current": True, "object": {"title": "Najnowszy tytuł"}}
+    pub.versions = [STARA, {**BIEZACA, "current": False}, najnowsza]
+    pub.save()
+
+    pub = Publication.objects.get(pk=pub.pk)
+    assert pub.versions == [najnowsza]
+    assert len(pub.historia_wersji) == 2
+    assert HistoriaWersji.objects.count() == 1
@@ -49,3 +49,43 @@ PBN_CLIENT_HTTP_TIMEOUT = _parse_timeout(
     ),
     default=(30.0, 120.0),
 )
+
+
+def _parse_number(raw, default, cast=float):
+    if raw is None or raw == "":
+        return default
+    return cast(raw)
+
+
+def _setting(name):
+    return getattr(settings, name, os.getenv(name))
+
+
+# Rozmiar puli połączeń keep-alive sesji HTTP (na transport). Powinien być
+# co najmniej równy liczbie wątków ``threaded_page_getter``.
+PBN_CLIENT_POOL_SIZE = _parse_number(
+    _setting("PBN_CLIENT_POOL_SIZE"), default=32, cast=int
+)
+
+# Liczba prób dla błędów połączenia oraz odpowiedzi 429/503.
+PBN_CLIENT_MAX_RETRIES = _parse_number(
+    _setting("PBN_CLIENT_MAX_RETRIES"), default=15, cast=int
+)
+
+# Exponential backoff: opóźnienie = losowo z [0, min(MAX, BASE * 2**próba)],
+# o ile serwer nie podał ``Retry-After``.
+PBN_CLIENT_BACKOFF_BASE = _parse_number(
+    _setting("PBN_CLIENT_BACKOFF_BASE"), default=1.0
+)
+PBN_CLIENT_BACKOFF_MAX = _parse_number(_setting("PBN_CLIENT_BACKOFF_MAX"), default=60.0)
+
+# Limit zapytań na sekundę wspólny dla wszystkich wątków procesu (token
+# bucket); brak wartości = bez limitu. BURST = pojemność kubełka.
+PBN_CLIENT_RATE_LIMIT = _parse_number(_setting("PBN_CLIENT_RATE_LIMIT"), default=None)
+PBN_CLIENT_RATE_BURST = _parse_number(_setting("PBN_CLIENT_RATE_BURST"), default=None)
+
+# Ile stron PageableResource pobierać z wyprzedzeniem podczas iteracji
+# (pula wątków); 1 = pobieranie sekwencyjne.
+PBN_CLIENT_PREFETCH_PAGES = _parse_number(
+    _setting("PBN_CLIENT_PREFETCH_PAGES"), default=4, cast=int
+)
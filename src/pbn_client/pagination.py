@@ -1,10 +1,15 @@
 """Pageable resource handling for PBN API."""
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 
 class PageableResource:
     """Handles paginated responses from PBN API."""
 
-    def __init__(self, transport, res, url, headers, body=None, method="get"):
+    def __init__(
+        self, transport, res, url, headers, body=None, method="get", prefetch=None
+    ):
         self.url = url
         self.headers = headers
         self.transport = transport
@@ -21,6 +26,10 @@ class PageableResource:
         self.total_pages = res["totalPages"]
         self.done = False
 
+        # Ile kolejnych stron pobierać w tle podczas iteracji; None = wartość
+        # z ustawień (PBN_CLIENT_PREFETCH_PAGES), 0 lub 1 = sekwencyjnie.
+        self.prefetch = prefetch
+
     def count(self):
         return self.total_elements
 
@@ -39,6 +48,84 @@ class PageableResource:
         except KeyError:
             return
 
+    def _fetch_content(self, current_page):
+        """``fetch_page``, ale odpowiedź bez ``content`` to błąd, nie pusta strona."""
+        content = self.fetch_page(current_page)
+        if content is None:
+            raise ValueError(
+                f"Odpowiedź PBN dla strony {current_page} z {self.url} "
+                "nie zawiera 'content'"
+            )
+        return content
+
+    def _prefetch_window(self, window):
+        if window is None:
+            window = self.prefetch
+        if window is None:
+            from pbn_client.conf import settings as pbn_settings
+
+            window = pbn_settings.PBN_CLIENT_PREFETCH_PAGES
+        return max(1, min(int(window), self.total_pages - 1))
+
+    def iter_pages(self, window=None, ordered=True):
+        """Zwracaj zawartość kolejnych stron, pobierając je z wyprzedzeniem.
+
+        Strony 1..N pobiera pula ``window`` wątków; w locie lub w buforze jest
+        naraz najwyżej ``window`` stron, więc wolny konsument hamuje pobieranie.
+        Pula startuje dopiero, gdy konsument wyczerpie stronę 0 — krótkie
+        ``islice`` nie wywołuje zbędnych zapytań.
+
+        :param ordered: ``False`` — strony w kolejności ukończenia pobierania
+            (dla konsumentów, którym kolejność jest obojętna).
+        """
+        yield self.page_0
+
+        if self.total_pages <= 1:
+            return
+
+        window = self._prefetch_window(window)
+        if window == 1:
+            for n in range(1, self.total_pages):
+                yield self._fetch_content(n)
+            return
+
+        pages = iter(range(1, self.total_pages))
+        executor = ThreadPoolExecutor(
+            max_workers=window, thread_name_prefix="pbn-prefetch"
+        )
+        pending = deque()
+
+        def submit():
+            n = next(pages, None)
+            if n is not None:
+                pending.append(executor.submit(self._fetch_content, n))
+
+        try:
+            for _ in range(window):
+                submit()
+
+            while pending:
+                if ordered:
+                    future = pending.popleft()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    future = done.pop()
+                    pending.remove(future)
+                result = future.result()
+                submit()
+                yield result
+        finally:
+            # Konsument przerwał iterację (lub poleciał wyjątek): nie
+            # pobieramy już niczego ponad to, co jest w locie.
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def __iter__(self):
-        for n in range(0, self.total_pages):
-            yield from self.fetch_page(n)
+        for page in self.iter_pages():
+            yield from page
+
+    def iter_unordered(self, window=None):
+        """Jak ``__iter__``, ale strony w kolejności ukończenia pobierania."""
+        for page in self.iter_pages(window, ordered=False):
+            yield from page
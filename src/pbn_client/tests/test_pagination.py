@@ -0,0 +1,106 @@
+"""Pobieranie stron PageableResource z wyprzedzeniem."""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from pbn_client.pagination import PageableResource
+
+PAGE_SIZE = 3
+
+
+class _FakeTransport:
+    """Strona n zawiera elementy n*3..n*3+2; późniejsze strony wracają szybciej."""
+
+    def __init__(self, total_pages, fail_on=None, empty_on=None):
+        self.total_pages = total_pages
+        self.fail_on = fail_on
+        self.empty_on = empty_on
+        self.lock = threading.Lock()
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, headers=None):
+        n = int(url.rsplit("page=", 1)[1])
+        with self.lock:
+            self.requested.append(n)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.002 * (self.total_pages - n))
+            if n == self.fail_on:
+                raise RuntimeError(f"page {n}")
+            if n == self.empty_on:
+                return {"error": "brak danych"}
+            return {"content": list(range(n * PAGE_SIZE, (n + 1) * PAGE_SIZE))}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _resource(transport, prefetch=4):
+    res = {
+        "content": list(range(PAGE_SIZE)),
+        "number": 0,
+        "totalElements": transport.total_pages * PAGE_SIZE,
+        "totalPages": transport.total_pages,
+    }
+    return PageableResource(transport, res, "/api?size=3", {}, prefetch=prefetch)
+
+
+@pytest.mark.parametrize("prefetch", [1, 4])
+def test_kolejnosc_zachowana(prefetch):
+    transport = _FakeTransport(12)
+
+    assert list(_resource(transport, prefetch)) == list(range(12 * PAGE_SIZE))
+    assert sorted(transport.requested) == list(range(1, 12))
+
+
+def test_okno_ogranicza_liczbe_zapytan_w_locie():
+    transport = _FakeTransport(20)
+    for _ in _resource(transport, prefetch=3):
+        time.sleep(0.0005)
+
+    assert transport.max_in_flight <= 3
+
+
+def test_przerwana_iteracja_nie_pobiera_wszystkiego():
+    transport = _FakeTransport(50)
+
+    assert list(itertools.islice(_resource(transport, 4), PAGE_SIZE + 1)) == list(
+        range(PAGE_SIZE + 1)
+    )
+    assert len(transport.requested) <= 1 + 4
+
+
+def test_krotkie_islice_nie_uruchamia_puli():
+    transport = _FakeTransport(50)
+
+    list(itertools.islice(_resource(transport), PAGE_SIZE))
+
+    assert transport.requested == []
+
+
+def test_tryb_bez_kolejnosci():
+    transport = _FakeTransport(10)
+
+    assert sorted(_resource(transport).iter_unordered()) == list(range(10 * PAGE_SIZE))
+
+
+def test_wyjatek_strony_przekazany_konsumentowi():
+    transport = _FakeTransport(10, fail_on=5)
+
+    with pytest.raises(RuntimeError, match="page 5"):
+        list(_resource(transport))
+
+
+@pytest.mark.parametrize("prefetch", [1, 4])
+def test_strona_bez_content_to_blad(prefetch):
+    # Zniekształcona odpowiedź PBN nie może zostać po cichu pominięta
+    transport = _FakeTransport(10, empty_on=5)
+
+    with pytest.raises(ValueError, match="strony 5"):
+        list(_resource(transport, prefetch))
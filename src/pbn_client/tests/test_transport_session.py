@@ -0,0 +1,150 @@
+"""Sesja keep-alive, backoff po 429/503 i limit tempa w RequestsTransport."""
+
+import pickle
+from unittest.mock import MagicMock, patch
+
+import pytest
+from requests import ConnectionError
+
+from pbn_client.exceptions import HttpException
+from pbn_client.throttling import (
+    LatencyStats,
+    TokenBucket,
+    normalize_endpoint,
+    parse_retry_after,
+)
+from pbn_client.transport import RequestsTransport
+
+
+def _resp(status_code, headers=None, json=None):
+    ret = MagicMock(status_code=status_code, headers=headers or {})
+    ret.json.return_value = json or {}
+    return ret
+
+
+@pytest.fixture
+def transport():
+    return RequestsTransport("app", "apptok", "https://pbn.example", "usertok")
+
+
+def test_sesja_wspolna_dla_zapytan(transport):
+    assert transport.session is transport.session
+    adapter = transport.session.get_adapter("https://pbn.example/api")
+    assert adapter._pool_maxsize >= 1
+
+
+def test_sesja_nie_przechodzi_przez_pickle(transport):
+    assert transport.session is not None
+    kopia = pickle.loads(pickle.dumps(transport))
+    assert kopia._session is None
+    assert kopia.base_url == transport.base_url
+
+
+@patch("time.sleep")
+@patch("requests.Session.get")
+def test_get_honoruje_retry_after(mock_get, mock_sleep, transport):
+    mock_get.side_effect = [
+        _resp(429, {"Retry-After": "3"}),
+        _resp(503),
+        _resp(200, json={"ok": True}),
+    ]
+
+    assert transport.get("/api/v1/x") == {"ok": True}
+    assert mock_get.call_count == 3
+    assert mock_sleep.call_args_list[0].args == (3.0,)
+
+
+@patch("time.sleep")
+@patch("requests.Session.get")
+def test_get_po_wyczerpaniu_prob_podnosi_http_exception(
+    mock_get, mock_sleep, transport
+):
+    mock_get.return_value = _resp(503)
+
+    with (
+        patch("pbn_client.conf.settings.PBN_CLIENT_MAX_RETRIES", 3),
+        pytest.raises(HttpException),
+    ):
+        transport.get("/x")
+
+    assert mock_get.call_count == 3
+
+
+@patch("requests.Session.post")
+def test_post_nie_jest_ponawiany_po_zerwanym_polaczeniu(mock_post, transport):
+    mock_post.side_effect = ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        transport.post("/api/v1/x", body={})
+
+    mock_post.assert_called_once()
+
+
+@patch("time.sleep")
+@patch("requests.Session.post")
+def test_post_ponawiany_po_429(mock_post, mock_sleep, transport):
+    mock_post.side_effect = [_resp(429), _resp(200, json={"id": 1})]
+
+    assert transport.post("/api/v1/x", body={}) == {"id": 1}
+    assert mock_post.call_count == 2
+
+
+@patch("requests.Session.get")
+def test_liczniki_opoznien_per_endpoint(mock_get):
+    transport = RequestsTransport("app", "apptok", "https://stats.example")
+    mock_get.return_value = _resp(200)
+
+    transport.get("/api/v1/journals/5e709189878c28a04737dc6f")
+    transport.get("/api/v1/journals/5e709189878c28a04737dc70?x=1")
+
+    stats = transport.latency_stats()[("GET", "/api/v1/journals/{id}")]
+    assert stats["count"] == 2
+    assert stats["errors"] == 0
+
+
+def test_latency_stats_liczy_bledy():
+    stats = LatencyStats()
+    stats.record("get", "/a", 0.5, 200)
+    stats.record("get", "/a", 1.5, 500)
+    stats.record("get", "/a", 1.0)
+
+    s = stats.snapshot()[("GET", "/a")]
+    assert s["count"] == 3
+    assert s["errors"] == 2
+    assert s["max"] == 1.5
+    assert s["avg"] == 1.0
+
+
+def test_token_bucket():
+    czekania = []
+    bucket = TokenBucket(rate=10, burst=2, clock=lambda: 0.0, sleep=czekania.append)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert czekania == pytest.approx([0.1, 0.2])
+
+
+def test_token_bucket_bez_limitu():
+    assert TokenBucket(rate=None).acquire() == 0.0
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("5", 5.0),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+        ("", None),
+        (None, None),
+        ("jutro", None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_normalize_endpoint():
+    assert (
+        normalize_endpoint("/api/v1/institutions/123/people?page=2")
+        == "/api/v1/institutions/{id}/people"
+    )
@@ -0,0 +1,154 @@
+"""Kontrola tempa zapytań do PBN: token bucket, backoff i liczniki opóźnień.
+
+Obiekty trzymane są w rejestrach modułowych (klucz: ``base_url``), dzięki czemu
+wszystkie wątki w procesie — np. pula ``threaded_page_getter`` — dzielą jeden
+limit i jedne liczniki, niezależnie od tego, ile instancji transportu powstało.
+"""
+
+import email.utils
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+# Segmenty ścieżki, które są identyfikatorami (mongoId, UUID, liczby) —
+# zwijamy je do ``{id}``, żeby liczniki były per endpoint, a nie per obiekt.
+_ID_SEGMENT = re.compile(
+    r"^(?:[0-9a-f]{24}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+    r"|\d+)$",
+    re.IGNORECASE,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    :param rate: liczba zapytań na sekundę; ``None`` lub 0 wyłącza limit
+    :param burst: pojemność kubełka (ile zapytań może pójść naraz)
+    """
+
+    def __init__(self, rate=None, burst=None, clock=time.monotonic, sleep=None):
+        self.rate = float(rate) if rate else None
+        self.burst = float(burst or max(1.0, self.rate or 1.0))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Pobierz jeden żeton, czekając w razie potrzeby. Zwraca czas czekania."""
+        if self.rate is None:
+            return 0.0
+
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= 1.0
+            # Żeton "pożyczony" z przyszłości: każdy wątek odczekuje swoją
+            # kolejkę poza sekcją krytyczną, więc inne wątki nie stoją na locku.
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            (self._sleep or time.sleep)(wait)
+        return wait
+
+
+class LatencyStats:
+    """Liczniki liczby zapytań, błędów i czasu odpowiedzi per endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, method, endpoint, elapsed, status_code=None):
+        key = (method.upper(), normalize_endpoint(endpoint))
+        with self._lock:
+            s = self._stats.get(key)
+            if s is None:
+                s = self._stats[key] = {
+                    "count": 0,
+                    "errors": 0,
+                    "total": 0.0,
+                    "max": 0.0,
+                }
+            s["count"] += 1
+            s["total"] += elapsed
+            s["max"] = max(s["max"], elapsed)
+            if status_code is None or status_code >= 400:
+                s["errors"] += 1
+
+    def snapshot(self):
+        """Kopia liczników: ``{(metoda, endpoint): {count, errors, total, max, avg}}``."""
+        with self._lock:
+            return {
+                key: dict(s, avg=s["total"] / s["count"] if s["count"] else 0.0)
+                for key, s in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def normalize_endpoint(url):
+    """``/api/v1/journals/5e70...?x=1`` -> ``/api/v1/journals/{id}``."""
+    path = url.split("?", 1)[0]
+    return "/".join(
+        "{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")
+    )
+
+
+def parse_retry_after(value, now=None):
+    """Zamień nagłówek ``Retry-After`` (sekundy lub data HTTP) na sekundy.
+
+    Zwraca ``None``, jeżeli nagłówka nie ma lub nie da się go odczytać.
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def backoff_delay(attempt, base, cap):
+    """Exponential backoff z pełnym jitterem (``attempt`` liczone od 0)."""
+    return random.uniform(0, min(cap, base * (2**attempt)))
+
+
+_registry_lock = threading.Lock()
+_buckets = {}
+_latency = {}
+
+
+def get_bucket(base_url, rate, burst):
+    """Wspólny dla procesu kubełek dla danego serwera PBN."""
+    key = (base_url, rate, burst)
+    with _registry_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+
+def get_latency_stats(base_url):
+    """Wspólne dla procesu liczniki opóźnień dla danego serwera PBN."""
+    with _registry_lock:
+        stats = _latency.get(base_url)
+        if stats is None:
+            stats = _latency[base_url] = LatencyStats()
+        return stats
@@ -1,7 +1,6 @@
 """HTTP transport layer for PBN API client."""
 
 import logging
-import random
 import time
 import warnings
 from urllib.parse import quote
@@ -9,6 +8,7 @@ from urllib.parse import quote
 import requests
 import rollbar
 from requests import ConnectionError
+from requests.adapters import HTTPAdapter
 from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
 from requests.exceptions import SSLError
 from simplejson.errors import JSONDecodeError
@@ -25,8 +25,18 @@ from pbn_client.exceptions import (
 
 from .auth import OAuthMixin
 from .pagination import PageableResource
+from .throttling import (
+    backoff_delay,
+    get_bucket,
+    get_latency_stats,
+    parse_retry_after,
+)
 from .utils import smart_content
 
+# Odpowiedzi, po których serwer oczekuje ponowienia zapytania (przeciążenie,
+# prace serwisowe) — honorujemy wtedy nagłówek Retry-After.
+RETRY_STATUS_CODES = frozenset({429, 503})
+
 # Nagłówki, których WARTOŚCI nie wolno logować/wysyłać (uwierzytelniające lub
 # identyfikujące). Dopasowanie po nazwie, case-insensitive.
 _WRAZLIWE_NAGLOWKI = frozenset(
@@ -83,23 +93,126 @@ class RequestsTransport(OAuthMixin, PBNClientTransport):
             sent_headers.update(headers)
         return sent_headers
 
-    def _make_get_request_with_retry(self, url, headers, max_retries=15):
-        """Make GET request with retry on SSL/Connection errors."""
+    _session = None
+
+    def __getstate__(self):
+        # Sesja (gniazda, locki puli) nie przechodzi przez pickle — np. do
+        # procesów ``threaded_page_getter``; każdy proces otworzy własną.
+        state = self.__dict__.copy()
+        state.pop("_session", None)
+        return state
+
+    @property
+    def session(self):
+        """Sesja HTTP z pulą połączeń keep-alive, współdzielona przez wątki."""
+        if self._session is None:
+            from pbn_client.conf import settings as pbn_settings
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pbn_settings.PBN_CLIENT_POOL_SIZE,
+                pool_maxsize=pbn_settings.PBN_CLIENT_POOL_SIZE,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def latency_stats(self):
+        """Liczniki per endpoint: ``{(metoda, endpoint): {count, errors, ...}}``."""
+        return get_latency_stats(self.base_url).snapshot()
+
+    def _retry_delay(self, attempt, ret=None):
+        from pbn_client.conf import settings as pbn_settings
+
+        if ret is not None:
+            retry_after = parse_retry_after(ret.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, pbn_settings.PBN_CLIENT_BACKOFF_MAX)
+        return backoff_delay(
+            attempt,
+            pbn_settings.PBN_CLIENT_BACKOFF_BASE,
+            pbn_settings.PBN_CLIENT_BACKOFF_MAX,
+        )
+
+    def _send(self, method, url, **kwargs):
+        """Wyślij zapytanie przez sesję: limit tempa + pomiar czasu."""
+        from pbn_client.conf import settings as pbn_settings
+
+        get_bucket(
+            self.base_url,
+            pbn_settings.PBN_CLIENT_RATE_LIMIT,
+            pbn_settings.PBN_CLIENT_RATE_BURST,
+        ).acquire()
+
+        stats = get_latency_stats(self.base_url)
+        start = time.monotonic()
+        try:
+            ret = getattr(self.session, method)(
+                self.base_url + url,
+                timeout=pbn_settings.PBN_CLIENT_HTTP_TIMEOUT,
+                **kwargs,
+            )
+        except BaseException:
+            stats.record(method, url, time.monotonic() - start)
+            raise
+        stats.record(method, url, time.monotonic() - start, ret.status_code)
+        return ret
+
+    def _request_with_retry(self, method, url, retry_on_errors, max_retries=None):
+        """Wykonaj zapytanie, ponawiając je po 429/503 z backoffem.
+
+        Błędy połączenia (SSL, zerwane połączenie) są ponawiane tylko wtedy,
+        gdy ``retry_on_errors`` — czyli dla zapytań idempotentnych (GET).
+        Po wyczerpaniu prób zwracana jest ostatnia odpowiedź (lub podnoszony
+        ostatni wyjątek).
+        """
         from pbn_client.conf import settings as pbn_settings
 
-        retries = 0
-        while retries < max_retries:
+        if max_retries is None:
+            max_retries = pbn_settings.PBN_CLIENT_MAX_RETRIES
+
+        attempt = 0
+        while True:
             try:
-                return requests.get(
-                    self.base_url + url,
-                    headers=headers,
-                    timeout=pbn_settings.PBN_CLIENT_HTTP_TIMEOUT,
-                )
-            except (SSLError, ConnectionError) as e:
-                retries += 1
-                time.sleep(random.randint(1, 5))
-                if retries >= max_retries:
-                    raise e
+                ret = method()
+            except (SSLError, ConnectionError):
+                attempt += 1
+                if not retry_on_errors or attempt >= max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt - 1))
+                continue
+
+            if ret.status_code not in RETRY_STATUS_CODES:
+                return ret
+
+            attempt += 1
+            if attempt >= max_retries:
+                return ret
+            delay = self._retry_delay(attempt - 1, ret)
+            logger.warning(
+                "PBN %s on %s, retry %d/%d in %.1fs",
+                ret.status_code,
+                url,
+                attempt,
+                max_retries,
+                delay,
+            )
+            time.sleep(delay)
+
+    def _make_get_request_with_retry(self, url, headers, max_retries=None):
+        """Make GET request with retry on SSL/Connection errors and 429/503."""
+        return self._request_with_retry(
+            lambda: self._send("get", url, headers=headers),
+            url,
+            retry_on_errors=True,
+            max_retries=max_retries,
+        )
 
     def _handle_403_response(self, ret, url, headers, fail_on_auth_missing):
         """Handle 403 response, attempting reauthorization if needed."""
@@ -161,7 +274,7 @@ class RequestsTransport(OAuthMixin, PBNClientTransport):
 
     def _get_request_method(self, delete):
         """Get appropriate HTTP method."""
-        return requests.delete if delete else requests.post
+        return "delete" if delete else "post"
 
     def _parse_403_response(self, ret, url):
         """Parse 403 response JSON."""
@@ -249,15 +362,14 @@ class RequestsTransport(OAuthMixin, PBNClientTransport):
         if not hasattr(self, "access_token"):
             return self.post(url, headers=headers, body=body, delete=delete)
 
-        from pbn_client.conf import settings as pbn_settings
-
         sent_headers = self._build_post_headers(headers)
         method = self._get_request_method(delete)
-        ret = method(
-            self.base_url + url,
-            headers=sent_headers,
-            json=body,
-            timeout=pbn_settings.PBN_CLIENT_HTTP_TIMEOUT,
+        # POST/DELETE nie są idempotentne: ponawiamy tylko wtedy, gdy serwer
+        # jawnie odrzucił zapytanie (429/503), nie po zerwanym połączeniu.
+        ret = self._request_with_retry(
+            lambda: self._send(method, url, headers=sent_headers, json=body),
+            url,
+            retry_on_errors=False,
         )
 
         if ret.status_code == 403:
@@ -0,0 +1,353 @@
+"""Wsadowy dyspozytor kolejki eksportu do PBN.
+
+Zamiast jednego zadania Celery na wpis ``Dyspozytor`` zajmuje wpisy porcjami
+(``SELECT ... FOR UPDATE SKIP LOCKED``) i wysyła je pulą wątków. Na parę
+(uczelnia, użytkownik PBN) przypada jeden klient, a z nim jedna pula połączeń
+keep-alive. Limit tempa zapytań daje ``pbn_client.transport`` (token bucket
+per ``base_url``, wspólny dla wątków procesu). Limit współbieżności daje
+rozmiar puli plus blokada w cache: naraz działa najwyżej jeden dyspozytor.
+
+Zajęcie wpisu to dzierżawa: ``nastepna_proba`` przesuwa się o
+``PBN_EXPORT_QUEUE_DZIERZAWA`` sekund. Dopóki dzierżawa nie wygaśnie, wpisu
+nie weźmie żaden dyspozytor, także ten sam po awarii workera. Ponowienie
+po błędzie to termin w ``nastepna_proba``, a nie zadanie z ``countdown``.
+
+Backoff zależy od rodzaju błędu (``RodzajBledu``):
+
+* TECHNICZNY (prace serwisowe, błędy HTTP): każdy kolejny błąd z serii
+  podwaja przerwę i wstrzymuje CAŁY dyspozytor, żeby nie zasypywać PBN
+  zapytaniami, gdy nie działa. Prace serwisowe (``RETRY_MUCH_LATER``)
+  wstrzymują od razu; błędy zakończone dopiero po
+  ``PBN_EXPORT_QUEUE_PROG_PAUZY`` kolejnych;
+* MERYTORYCZNY: winny jest rekord, nie PBN, więc tylko liczymy.
+
+Pozostałe statusy ponowienia (423 na jednym rekordzie, nieudana
+synchronizacja oświadczeń jednej publikacji) dotyczą tylko danego wpisu:
+odkładamy go o ``PONOWIENIA[status]`` sekund, a reszta kolejki idzie dalej.
+
+Udana wysyłka zeruje serię. Liczniki przepustowości i czasu oczekiwania
+w kolejce zwraca ``statystyki_kolejki()``.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import PBN_Export_Queue, RodzajBledu, SendStatus
+from .tasks import LOCK_PREFIX, LOCK_TIMEOUT, PONOWIENIA
+
+logger = logging.getLogger(__name__)
+
+PREFIKS = "pbn_export_dispatcher:"
+KLUCZ_BLOKADY = PREFIKS + "blokada"
+KLUCZ_PAUZY = PREFIKS + "pauza"
+
+# Przerwa (sekundy) po serii błędów technicznych zakończonych (np. HTTP 500),
+# gdy seria dojdzie do PBN_EXPORT_QUEUE_PROG_PAUZY; pojedynczy taki błąd
+# (np. rekord skasowany przed wysyłką) nie wstrzymuje dyspozytora.
+PRZERWA_PO_BLEDACH_TECHNICZNYCH = 60
+
+# Statusy ponowienia, które wstrzymują cały dyspozytor (PBN nie działa);
+# pozostałe z PONOWIENIA odkładają tylko wysyłany wpis.
+PONOWIENIA_WSTRZYMUJACE = frozenset({SendStatus.RETRY_MUCH_LATER})
+
+LICZNIKI = (
+    "wyslane",
+    "ponowione",
+    "bledy_" + RodzajBledu.TECHNICZNY,
+    "bledy_" + RodzajBledu.MERYTORYCZNY,
+    "wykluczone",
+    "pominiete",
+    "czas_wysylki_ms",
+    "oczekiwanie_ms",
+    "oczekiwanie_n",
+)
+
+
+def _ustawienie(nazwa, domyslnie):
+    return getattr(settings, f"PBN_EXPORT_QUEUE_{nazwa}", domyslnie)
+
+
+def _zlicz(licznik, ile=1):
+    klucz = PREFIKS + licznik
+    try:
+        cache.incr(klucz, ile)
+    except ValueError:
+        # Brak klucza — pierwszy wzrost (albo wyścig z innym workerem)
+        if not cache.add(klucz, ile, None):
+            cache.incr(klucz, ile)
+
+
+def gotowe_do_wysylki(teraz=None):
+    """Wpisy, które dyspozytor może teraz zająć."""
+    teraz = teraz or timezone.now()
+    return PBN_Export_Queue.objects.filter(
+        Q(nastepna_proba=None) | Q(nastepna_proba__lte=teraz),
+        wysylke_zakonczono=None,
+        wykluczone=False,
+    ).exclude(retry_after_user_authorised=True)
+
+
+def zajmij_porcje(rozmiar, dzierzawa):
+    """Zajmij do ``rozmiar`` najstarszych gotowych wpisów na ``dzierzawa`` sekund.
+
+    Wiersze trzymane przez inny dyspozytor (albo ``_zajmij_atomowo``
+    pojedynczej wysyłki) ``skip_locked`` pomija, więc dwa dyspozytory nie
+    dostaną tego samego wpisu.
+    """
+    teraz = timezone.now()
+    with transaction.atomic():
+        wpisy = list(
+            gotowe_do_wysylki(teraz)
+            .select_for_update(skip_locked=True)
+            .order_by("zamowiono", "pk")[:rozmiar]
+        )
+        PBN_Export_Queue.objects.filter(pk__in=[w.pk for w in wpisy]).update(
+            nastepna_proba=teraz + timedelta(seconds=dzierzawa)
+        )
+
+    # Czas oczekiwania w kolejce — tylko dla pierwszego podejścia do wpisu
+    czekaly = [teraz - w.zamowiono for w in wpisy if w.wysylke_podjeto is None]
+    if czekaly:
+        _zlicz("oczekiwanie_ms", int(sum(c.total_seconds() for c in czekaly) * 1000))
+        _zlicz("oczekiwanie_n", len(czekaly))
+    return wpisy
+
+
+def pauza_do():
+    """Do kiedy dyspozytor jest wstrzymany po błędach technicznych (albo None)."""
+    koniec = cache.get(KLUCZ_PAUZY)
+    if koniec is not None and koniec > timezone.now():
+        return koniec
+    return None
+
+
+def _seria(rodzaj):
+    """Zwiększ i zwróć długość bieżącej serii błędów rodzaju ``rodzaj``."""
+    klucz = f"{PREFIKS}seria:{rodzaj}"
+    if cache.add(klucz, 1, None):
+        return 1
+    return cache.incr(klucz)
+
+
+def _przerwa(bazowa, seria):
+    """``bazowa`` podwajana z każdym błędem serii, najwyżej
+    ``PBN_EXPORT_QUEUE_BACKOFF_MAX`` (chyba że sama bazowa jest dłuższa)."""
+    maks = max(bazowa, _ustawienie("BACKOFF_MAX", 6 * 60 * 60))
+    return min(bazowa * 2 ** min(seria - 1, 16), maks)
+
+
+def _wyzeruj_serie(rodzaj):
+    cache.delete(f"{PREFIKS}seria:{rodzaj}")
+
+
+def _wstrzymaj(przerwa):
+    koniec = timezone.now() + timedelta(seconds=przerwa)
+    cache.set(KLUCZ_PAUZY, koniec, przerwa)
+    logger.warning("Kolejka PBN: błędy techniczne, dyspozytor wstrzymany do %s", koniec)
+    return koniec
+
+
+class Dyspozytor:
+    """Jeden przebieg wysyłki porcjami; klienci PBN żyją tyle, co przebieg."""
+
+    def __init__(self, rozmiar_porcji=None, wspolbieznosc=None, dzierzawa=None):
+        self.rozmiar_porcji = rozmiar_porcji or _ustawienie("PORCJA", 50)
+        self.wspolbieznosc = wspolbieznosc or _ustawienie("WSPOLBIEZNOSC", 4)
+        self.dzierzawa = dzierzawa or _ustawienie("DZIERZAWA", 15 * 60)
+        self._klienci = {}
+        self._klienci_lock = threading.Lock()
+
+    def klient(self, wpis):
+        """Klient PBN wspólny dla wpisów tej samej uczelni i użytkownika PBN.
+
+        None, gdy nie da się go zbudować (brak tokena, uczelni, konfiguracji) —
+        wtedy ``send_to_pbn`` idzie zwykłą ścieżką i zgłasza właściwy błąd.
+        """
+        from bpp.models import Uczelnia
+
+        uzytkownik = wpis.zamowil.get_pbn_user()
+        if not uzytkownik.pbn_token:
+            return None
+
+        uczelnia = wpis.uczelnia or Uczelnia.objects.get_single_uczelnia_or_none()
+        if uczelnia is None:
+            return None
+
+        klucz = (uczelnia.pk, uzytkownik.pk, uzytkownik.pbn_token)
+        with self._klienci_lock:
+            if klucz not in self._klienci:
+                try:
+                    self._klienci[klucz] = uczelnia.pbn_client(uzytkownik.pbn_token)
+                except ImproperlyConfigured:
+                    return None
+            return self._klienci[klucz]
+
+    def zamknij(self):
+        for klient in self._klienci.values():
+            klient.transport.close()
+        self._klienci.clear()
+
+    def wyslij(self, wpis):
+        """Wyślij jeden zajęty wpis. Zwraca SendStatus albo None (pominięty)."""
+        if pauza_do() is not None:
+            return None
+
+        # Ten sam zamek, co task_sprobuj_wyslac_do_pbn — wysyłka pojedyncza
+        # (np. "wyślij teraz" z admina) i wsadowa się nie nakładają.
+        lock_key = f"{LOCK_PREFIX}{wpis.pk}"
+        if not cache.add(lock_key, "locked", LOCK_TIMEOUT):
+            status = SendStatus.LOCKED_ELSEWHERE
+        else:
+            try:
+                start = time.monotonic()
+                status = wpis.send_to_pbn(pbn_client=self.klient(wpis))
+                _zlicz("czas_wysylki_ms", int((time.monotonic() - start) * 1000))
+            finally:
+                cache.delete(lock_key)
+
+        self.rozlicz(wpis, status)
+        return status
+
+    def _wyslij_w_watku(self, wpis):
+        # Wątek puli ma własne połączenie z bazą
+        close_old_connections()
+        try:
+            return self.wyslij(wpis)
+        finally:
+            close_old_connections()
+
+    def rozlicz(self, wpis, status):
+        """Liczniki, backoff i termin kolejnej próby po wysyłce ``wpis``."""
+        if status in PONOWIENIA:
+            przerwa = PONOWIENIA[status]
+            if status in PONOWIENIA_WSTRZYMUJACE:
+                przerwa = _przerwa(przerwa, _seria(RodzajBledu.TECHNICZNY))
+                _wstrzymaj(przerwa)
+            _zlicz("ponowione")
+            PBN_Export_Queue.objects.filter(pk=wpis.pk).update(
+                nastepna_proba=timezone.now() + timedelta(seconds=przerwa)
+            )
+            return
+
+        match status:
+            case SendStatus.FINISHED_OKAY:
+                _zlicz("wyslane")
+                _wyzeruj_serie(RodzajBledu.TECHNICZNY)
+
+            case SendStatus.FINISHED_ERROR:
+                wpis.refresh_from_db(fields=["rodzaj_bledu"])
+                rodzaj = wpis.rodzaj_bledu or RodzajBledu.TECHNICZNY
+                _zlicz("bledy_" + rodzaj)
+                if rodzaj == RodzajBledu.TECHNICZNY:
+                    self._po_bledzie_technicznym()
+
+            case SendStatus.WYKLUCZONE:
+                _zlicz("wykluczone")
+
+            case _:
+                # RETRY_AFTER_USER_AUTHORISED, LOCKED_ELSEWHERE
+                _zlicz("pominiete")
+
+    def _po_bledzie_technicznym(self):
+        prog = _ustawienie("PROG_PAUZY", 5)
+        seria = _seria(RodzajBledu.TECHNICZNY)
+        if seria >= prog:
+            _wstrzymaj(_przerwa(PRZERWA_PO_BLEDACH_TECHNICZNYCH, seria - prog + 1))
+
+    def zwolnij(self, wpisy):
+        """Oddaj dzierżawę wpisów, których nie zdążyliśmy wysłać (pauza)."""
+        koniec = pauza_do()
+        PBN_Export_Queue.objects.filter(
+            pk__in=[w.pk for w in wpisy], wysylke_zakonczono=None
+        ).update(nastepna_proba=koniec)
+
+    def uruchom(self, limit_czasu=None):
+        """Wysyłaj porcjami, aż kolejka się opróżni, przyjdzie pauza albo
+        minie ``limit_czasu`` sekund. Zwraca słownik z podsumowaniem."""
+        limit_czasu = limit_czasu or _ustawienie("LIMIT_CZASU", 5 * 60)
+        start = time.monotonic()
+        wyniki = {"wyslane": 0, "porcje": 0, "zajete": 0}
+
+        executor = None
+        if self.wspolbieznosc > 1:
+            executor = ThreadPoolExecutor(max_workers=self.wspolbieznosc)
+
+        try:
+            while time.monotonic() - start < limit_czasu and pauza_do() is None:
+                wpisy = zajmij_porcje(self.rozmiar_porcji, self.dzierzawa)
+                if not wpisy:
+                    break
+
+                if executor is None:
+                    statusy = [self.wyslij(wpis) for wpis in wpisy]
+                else:
+                    statusy = list(executor.map(self._wyslij_w_watku, wpisy))
+                self.zwolnij(
+                    [w for w, s in zip(wpisy, statusy, strict=True) if s is None]
+                )
+
+                wyniki["porcje"] += 1
+                wyniki["zajete"] += len(wpisy)
+                wyniki["wyslane"] += statusy.count(SendStatus.FINISHED_OKAY)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.zamknij()
+
+        czas = time.monotonic() - start
+        wyniki["czas_s"] = round(czas, 3)
+        wyniki["na_sekunde"] = round(wyniki["wyslane"] / czas, 3) if czas else 0.0
+        logger.info("Kolejka PBN: %s", wyniki)
+        return wyniki
+
+
+def wyslij_porcjami(**kwargs):
+    """Uruchom dyspozytor, chyba że inny już pracuje. Zwraca podsumowanie
+    przebiegu albo None, gdy blokada jest zajęta."""
+    limit_czasu = kwargs.pop("limit_czasu", None) or _ustawienie("LIMIT_CZASU", 5 * 60)
+    if not cache.add(KLUCZ_BLOKADY, "locked", limit_czasu + LOCK_TIMEOUT):
+        return None
+    try:
+        return Dyspozytor(**kwargs).uruchom(limit_czasu=limit_czasu)
+    finally:
+        cache.delete(KLUCZ_BLOKADY)
+
+
+def statystyki_kolejki():
+    """Liczniki dyspozytora (od restartu cache) i stan kolejki z bazy."""
+    wartosci = cache.get_many([PREFIKS + licznik for licznik in LICZNIKI])
+    ret = {licznik: wartosci.get(PREFIKS + licznik, 0) for licznik in LICZNIKI}
+
+    teraz = timezone.now()
+    gotowe = gotowe_do_wysylki(teraz)
+    najstarszy = gotowe.aggregate(Min("zamowiono"))["zamowiono__min"]
+    koniec_pauzy = pauza_do()
+
+    ret.update(
+        {
+            "gotowe": gotowe.count(),
+            "w_kolejce": PBN_Export_Queue.objects.filter(
+                wysylke_zakonczono=None
+            ).count(),
+            "najstarszy_oczekuje_s": (
+                int((teraz - najstarszy).total_seconds()) if najstarszy else 0
+            ),
+            "srednie_oczekiwanie_ms": (
+                ret["oczekiwanie_ms"] // ret["oczekiwanie_n"]
+                if ret["oczekiwanie_n"]
+                else 0
+            ),
+            "pauza_do": koniec_pauzy.isoformat() if koniec_pauzy else None,
+        }
+    )
+    return ret
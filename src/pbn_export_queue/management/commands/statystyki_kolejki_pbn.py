@@ -0,0 +1,28 @@
+"""Przepustowość i opóźnienia wsadowej wysyłki kolejki PBN — do monitoringu,
+np. co minutę z ``--json`` do Zabbiksa.
+
+Liczniki rosną od ostatniego restartu cache; tempo liczy się z różnic.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from pbn_export_queue.dispatcher import statystyki_kolejki
+
+
+class Command(BaseCommand):
+    help = "Liczniki dyspozytora kolejki eksportu do PBN i stan kolejki."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--json", action="store_true", help="Wynik jako JSON")
+
+    def handle(self, *args, **options):
+        statystyki = statystyki_kolejki()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(statystyki))
+            return
+
+        for nazwa, wartosc in statystyki.items():
+            self.stdout.write(f"{nazwa:<24}{wartosc}")
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("pbn_export_queue", "0010_atomowa_kolejka_pbn"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pbn_export_queue",
+            name="nastepna_proba",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
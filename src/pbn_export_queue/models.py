@@ -114,6 +114,10 @@ class PBN_Export_Queue(models.Model):
     wysylke_zakonczono = models.DateTimeField(null=True, blank=True, db_index=True)
 
     ilosc_prob = models.PositiveSmallIntegerField(default=0)
+
+    # Termin, przed którym dyspozytor (pbn_export_queue.dispatcher) nie weźmie
+    # wpisu: dzierżawa na czas wysyłki albo termin ponowienia po błędzie.
+    nastepna_proba = models.DateTimeField(null=True, blank=True, db_index=True)
     zakonczono_pomyslnie = models.BooleanField(null=True, default=None, db_index=True)
     komunikat = models.TextField(null=True, blank=True)  # noqa: DJ001
 
@@ -443,8 +447,10 @@ class PBN_Export_Queue(models.Model):
         self.refresh_from_db()
         return True
 
-    def send_to_pbn(self):
-        """:return: SendStatus"""
+    def send_to_pbn(self, pbn_client=None):
+        """:param pbn_client: klient PBN współdzielony między wpisami (dyspozytor
+            wsadowy); None — zbuduj nowy dla tej wysyłki.
+        :return: SendStatus"""
         self.refresh_from_db()
 
         if self.wysylke_zakonczono is not None:
@@ -468,6 +474,7 @@ class PBN_Export_Queue(models.Model):
                 user=self.zamowil.get_pbn_user(),
                 obj=self.rekord_do_wysylki,
                 force_upload=True,
+                pbn_client=pbn_client,
                 uczelnia=self.uczelnia,
             )
         except Exception as exc:
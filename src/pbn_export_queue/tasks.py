@@ -17,6 +17,21 @@ logger = logging.getLogger(__name__)
 LOCK_TIMEOUT = 300  # 5 minut timeout dla locka
 LOCK_PREFIX = "pbn_export_lock:"
 
+# Opóźnienie ponowienia wysyłki (sekundy) wg statusu
+PONOWIENIA = {
+    SendStatus.RETRY_SOON: 60,  # np. 423 Locked
+    SendStatus.RETRY_LATER: 5 * 60,
+    SendStatus.RETRY_MUCH_LATER: 3 * 60 * 60,  # PraceSerwisoweException
+}
+
+
+def _ponow(pk, countdown):
+    # nastepna_proba: żeby dyspozytor wsadowy nie wysłał wpisu przed terminem
+    PBN_Export_Queue.objects.filter(pk=pk).update(
+        nastepna_proba=timezone.now() + timedelta(seconds=countdown)
+    )
+    task_sprobuj_wyslac_do_pbn.apply_async(args=[pk], countdown=countdown)
+
 
 @app.task
 def task_sprobuj_wyslac_do_pbn(pk):
@@ -42,18 +57,11 @@ def task_sprobuj_wyslac_do_pbn(pk):
 
         res = p.send_to_pbn()
 
-        match res:
-            case SendStatus.RETRY_LATER:
-                task_sprobuj_wyslac_do_pbn.apply_async(args=[pk], countdown=5 * 60)
-
-            case SendStatus.RETRY_SOON:
-                # np. 423 Locked
-                task_sprobuj_wyslac_do_pbn.apply_async(args=[pk], countdown=60)
-
-            case SendStatus.RETRY_MUCH_LATER:
-                # PraceSerwisoweException
-                task_sprobuj_wyslac_do_pbn.apply_async(args=[pk], countdown=60 * 60 * 3)
+        if res in PONOWIENIA:
+            _ponow(pk, PONOWIENIA[res])
+            return
 
+        match res:
             case SendStatus.FINISHED_OKAY:
                 # After successful send, check for more items in queue
                 check_and_send_next_in_queue()
@@ -157,6 +165,7 @@ def queue_pbn_export_batch(
 
     model = apps.get_model(app_label, model_name)
 
+    dodano = 0
     for record_id in record_ids:
         try:
             record = model.objects.get(pk=record_id)
@@ -164,12 +173,7 @@ def queue_pbn_export_batch(
                 PBN_Export_Queue.objects.sprobuj_utowrzyc_wpis(
                     user, record, uczelnia=uczelnia
                 )
-                # Send to PBN in background
-                queue_entry = PBN_Export_Queue.objects.filter_rekord_do_wysylki(
-                    record
-                ).first()
-                if queue_entry:
-                    task_sprobuj_wyslac_do_pbn.delay(queue_entry.pk)
+                dodano += 1
             except AlreadyEnqueuedError:
                 # Already in queue — to nie błąd, tylko idempotencja batcha.
                 pass
@@ -195,6 +199,23 @@ def queue_pbn_export_batch(
             )
             rollbar.report_exc_info()
 
+    if dodano:
+        # Jedno zadanie na całą paczkę zamiast jednego na rekord — wpisy
+        # wysyła dyspozytor, porcjami i z limitem tempa.
+        wyslij_kolejke_porcjami.delay()
+
+
+@app.task
+def wyslij_kolejke_porcjami():
+    """Wysyła gotowe wpisy kolejki porcjami (``pbn_export_queue.dispatcher``).
+
+    Uruchamiane przez Celery Beat co minutę oraz po zleceniu wysyłki wielu
+    rekordów naraz. Gdy inny przebieg trwa, kończy się od razu (None).
+    """
+    from .dispatcher import wyslij_porcjami
+
+    return wyslij_porcjami()
+
 
 @app.task
 def queue_watchdog():
@@ -0,0 +1,187 @@
+"""Tests for the batched PBN_Export_Queue dispatcher."""
+
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from model_bakery import baker
+
+from pbn_export_queue.dispatcher import (
+    Dyspozytor,
+    gotowe_do_wysylki,
+    pauza_do,
+    zajmij_porcje,
+)
+from pbn_export_queue.models import PBN_Export_Queue, RodzajBledu, SendStatus
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache():
+    # Pauza i liczniki dyspozytora żyją w cache; LocMemCache dzieli pamięć
+    # między instancjami, więc czyścimy ją przed i po każdym teście.
+    with override_settings(CACHES=LOCMEM_CACHE):
+        cache.clear()
+        yield
+        cache.clear()
+
+
+@pytest.fixture
+def wpisy(admin_user):
+    teraz = timezone.now()
+    ret = []
+    for no in range(3):
+        wpis = baker.make(PBN_Export_Queue, zamowil=admin_user)
+        # zamowiono ma auto_now_add — kolejność ustawiamy po utworzeniu
+        PBN_Export_Queue.objects.filter(pk=wpis.pk).update(
+            zamowiono=teraz - timedelta(minutes=10 - no)
+        )
+        ret.append(wpis)
+    return ret
+
+
+def _wysylka(status, rodzaj=None):
+    def send_to_pbn(self, pbn_client=None):
+        if status == SendStatus.FINISHED_ERROR:
+            return self.error("błąd", rodzaj=rodzaj)
+        if status == SendStatus.FINISHED_OKAY:
+            self.wysylke_zakonczono = timezone.now()
+            self.zakonczono_pomyslnie = True
+            self.save()
+        return status
+
+    return patch.object(
+        PBN_Export_Queue, "send_to_pbn", autospec=True, side_effect=send_to_pbn
+    )
+
+
+@pytest.mark.django_db
+def test_gotowe_do_wysylki(wpisy):
+    wykluczony, po_autoryzacji, pozniej = wpisy
+    PBN_Export_Queue.objects.filter(pk=wykluczony.pk).update(wykluczone=True)
+    PBN_Export_Queue.objects.filter(pk=po_autoryzacji.pk).update(
+        retry_after_user_authorised=True
+    )
+    PBN_Export_Queue.objects.filter(pk=pozniej.pk).update(
+        nastepna_proba=timezone.now() + timedelta(hours=1)
+    )
+
+    assert not gotowe_do_wysylki().exists()
+    assert gotowe_do_wysylki(timezone.now() + timedelta(hours=2)).get() == pozniej
+
+
+@pytest.mark.django_db
+def test_zajmij_porcje_najstarsze_i_dzierzawa(wpisy):
+    porcja = zajmij_porcje(2, dzierzawa=600)
+    assert [w.pk for w in porcja] == [wpisy[0].pk, wpisy[1].pk]
+
+    # Zajęte wpisy mają dzierżawę — kolejna porcja ich nie bierze
+    assert [w.pk for w in zajmij_porcje(10, dzierzawa=600)] == [wpisy[2].pk]
+    assert zajmij_porcje(10, dzierzawa=600) == []
+
+
+@pytest.mark.django_db
+def test_dyspozytor_wysyla_wszystkie(wpisy):
+    with _wysylka(SendStatus.FINISHED_OKAY) as send:
+        wynik = Dyspozytor(rozmiar_porcji=2, wspolbieznosc=1).uruchom()
+
+    assert send.call_count == 3
+    assert wynik["wyslane"] == 3
+    assert wynik["porcje"] == 2
+    assert not PBN_Export_Queue.objects.filter(wysylke_zakonczono=None).exists()
+
+
+@pytest.mark.django_db
+def test_dyspozytor_wstrzymany_po_ponowieniu(wpisy):
+    with _wysylka(SendStatus.RETRY_MUCH_LATER) as send:
+        wynik = Dyspozytor(rozmiar_porcji=10, wspolbieznosc=1).uruchom()
+
+    # Prace serwisowe w PBN: po pierwszej odpowiedzi reszta porcji czeka
+    assert send.call_count == 1
+    assert wynik["wyslane"] == 0
+
+    koniec = pauza_do()
+    assert koniec > timezone.now() + timedelta(hours=2)
+    for wpis in wpisy:
+        wpis.refresh_from_db()
+        assert wpis.wysylke_zakonczono is None
+        assert wpis.nastepna_proba >= koniec - timedelta(seconds=1)
+
+    # Kolejny przebieg nic nie wysyła, dopóki trwa pauza
+    with _wysylka(SendStatus.FINISHED_OKAY) as send:
+        Dyspozytor(wspolbieznosc=1).uruchom()
+    send.assert_not_called()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("status", [SendStatus.RETRY_SOON, SendStatus.RETRY_LATER])
+def test_dyspozytor_ponowienie_rekordu_nie_wstrzymuje_kolejki(wpisy, status):
+    zablokowany, *pozostale = wpisy
+
+    def send_to_pbn(self, pbn_client=None):
+        # np. 423 Locked na jednym rekordzie (ResourceLockedException)
+        if self.pk == zablokowany.pk:
+            return status
+        self.wysylke_zakonczono = timezone.now()
+        self.zakonczono_pomyslnie = True
+        self.save()
+        return SendStatus.FINISHED_OKAY
+
+    with patch.object(
+        PBN_Export_Queue, "send_to_pbn", autospec=True, side_effect=send_to_pbn
+    ) as send:
+        wynik = Dyspozytor(rozmiar_porcji=1, wspolbieznosc=1).uruchom()
+
+    assert send.call_count == 3
+    assert wynik["wyslane"] == 2
+    assert pauza_do() is None
+
+    zablokowany.refresh_from_db()
+    assert zablokowany.wysylke_zakonczono is None
+    assert zablokowany.nastepna_proba > timezone.now()
+    for wpis in pozostale:
+        wpis.refresh_from_db()
+        assert wpis.zakonczono_pomyslnie
+
+
+@pytest.mark.django_db
+@override_settings(PBN_EXPORT_QUEUE_PROG_PAUZY=2)
+def test_dyspozytor_bledy_techniczne_wstrzymuja_po_progu(wpisy):
+    with _wysylka(SendStatus.FINISHED_ERROR, RodzajBledu.TECHNICZNY) as send:
+        Dyspozytor(rozmiar_porcji=10, wspolbieznosc=1).uruchom()
+
+    assert send.call_count == 2
+    assert pauza_do() is not None
+
+
+@pytest.mark.django_db
+@override_settings(PBN_EXPORT_QUEUE_PROG_PAUZY=1)
+def test_dyspozytor_bledy_merytoryczne_nie_wstrzymuja(wpisy):
+    with _wysylka(SendStatus.FINISHED_ERROR, RodzajBledu.MERYTORYCZNY) as send:
+        Dyspozytor(rozmiar_porcji=10, wspolbieznosc=1).uruchom()
+
+    assert send.call_count == 3
+    assert pauza_do() is None
+
+
+@pytest.mark.django_db
+def test_statystyki_kolejki_pbn(wpisy):
+    with _wysylka(SendStatus.FINISHED_OKAY):
+        Dyspozytor(rozmiar_porcji=2, wspolbieznosc=1).uruchom()
+    baker.make(PBN_Export_Queue)
+
+    out = StringIO()
+    call_command("statystyki_kolejki_pbn", "--json", stdout=out)
+    statystyki = json.loads(out.getvalue())
+
+    assert statystyki["wyslane"] == 3
+    assert statystyki["oczekiwanie_n"] == 3
+    assert statystyki["srednie_oczekiwanie_ms"] >= 8 * 60 * 1000
+    assert statystyki["gotowe"] == statystyki["w_kolejce"] == 1
@@ -260,6 +260,9 @@ def test_queue_pbn_export_batch(mocker):
     mock_task_delay = mocker.patch(
         "pbn_export_queue.tasks.task_sprobuj_wyslac_do_pbn.delay"
     )
+    mock_dispatcher_delay = mocker.patch(
+        "pbn_export_queue.tasks.wyslij_kolejke_porcjami.delay"
+    )
 
     # Collect record IDs
     record_ids = [record1.id, record2.id, record3.id]
@@ -280,8 +283,10 @@ def test_queue_pbn_export_batch(mocker):
     for entry in queue_entries:
         assert entry.zamowil == user
 
-    # Verify that task_sprobuj_wyslac_do_pbn was called for each record
-    assert mock_task_delay.call_count == 3
+    # Wysyłkę całej paczki zleca jedno zadanie dyspozytora, nie zadanie
+    # na rekord
+    mock_dispatcher_delay.assert_called_once_with()
+    mock_task_delay.assert_not_called()
 
 
 @pytest.mark.django_db(transaction=True)
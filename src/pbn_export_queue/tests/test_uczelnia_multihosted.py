@@ -21,7 +21,7 @@ def test_queue_pbn_export_batch_stores_uczelnia(mocker, uczelnia):
     user = User.objects.create_user(username="batch_user", password="testpass")
     record = baker.make(Wydawnictwo_Ciagle, tytul_oryginalny="Rec")
 
-    mocker.patch("pbn_export_queue.tasks.task_sprobuj_wyslac_do_pbn.delay")
+    mocker.patch("pbn_export_queue.tasks.wyslij_kolejke_porcjami.delay")
 
     queue_pbn_export_batch(
         app_label="bpp",
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from pbn_api.management.commands.util import PBNBaseCommand
 from pbn_import.models import ImportSession
 from pbn_import.utils import ImportManager
+from pbn_import.utils.import_manager import DEFAULT_MAX_PARALLEL_DOWNLOADS
 from pbn_import.utils.step_definitions import (
     get_command_steps,
     get_legacy_command_aliases,
@@ -26,6 +27,7 @@ def build_config_from_options(options):
         "delete_existing": options.get("delete_existing", False),
         "wydzial_domyslny": options.get("wydzial_domyslny"),
         "wydzial_domyslny_skrot": options.get("wydzial_domyslny_skrot"),
+        "max_parallel_downloads": options.get("max_parallel_downloads"),
     }
 
     # Granularne flagi: --disable-{form_field}
@@ -85,6 +87,12 @@ class Command(PBNBaseCommand):
             "--wydzial-domyslny-skrot",
             help="Skrót domyślnego wydziału",
         )
+        parser.add_argument(
+            "--max-parallel-downloads",
+            type=int,
+            help="Ile faz pobierania z PBN wykonywać równolegle "
+            f"(domyślnie {DEFAULT_MAX_PARALLEL_DOWNLOADS}, 1 = sekwencyjnie)",
+        )
         parser.add_argument(
             "--username",
             help="Nazwa użytkownika dla sesji importu (domyślnie: pierwszy superuser)",
@@ -1,8 +1,10 @@
+import json
 import logging
 
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.expressions import RawSQL
 from django.utils import timezone
 
 from bpp.util import zaloguj_polkniety_wyjatek
@@ -108,6 +110,40 @@ class ImportSession(models.Model):
             update_fields.append("completed_steps")
         self.save(update_fields=update_fields)
 
+    def set_progress_data(self, path, value):
+        """Set ``progress_data[path[0]]...[path[-1]] = value`` atomically.
+
+        A single UPDATE with ``jsonb_set`` replaces only the given key, so
+        steps running in parallel threads (each with its own copy of the
+        session) don't overwrite each other's entries the way a
+        read-modify-``save()`` of the whole JSON would. Missing intermediate
+        objects are created. The in-memory copy is refreshed afterwards.
+        """
+        path = [str(key) for key in path]
+        sql = "COALESCE(progress_data, '{}'::jsonb)"
+        params = []
+        for depth in range(1, len(path)):
+            sql = (
+                f"jsonb_set({sql}, %s::text[], "
+                "COALESCE(progress_data #> %s::text[], '{}'::jsonb))"
+            )
+            params += [path[:depth], path[:depth]]
+        sql = f"jsonb_set({sql}, %s::text[], %s::jsonb)"
+        params += [path, json.dumps(value)]
+
+        ImportSession.objects.filter(pk=self.pk).update(
+            progress_data=RawSQL(sql, params)
+        )
+        self.refresh_from_db(fields=["progress_data"])
+
+    def remove_progress_data(self, key):
+        """Remove top-level ``progress_data[key]`` atomically (see
+        ``set_progress_data``)."""
+        ImportSession.objects.filter(pk=self.pk).update(
+            progress_data=RawSQL("progress_data - %s", [key])
+        )
+        self.refresh_from_db(fields=["progress_data"])
+
     @property
     def overall_progress(self):
         """Calculate overall progress percentage"""
@@ -6,6 +6,7 @@ ekstrakcja komunikatów błędów, anulowanie oraz pełny przebieg ``run()`` na
 lekkich krokach-atrapach (bez prawdziwych wywołań PBN).
 """
 
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -356,3 +357,87 @@ def test_results_keyed_by_phase(db):
     defs = get_step_definitions({})
     keys = [d["result_key"] for d in defs]
     assert len(keys) == len(set(keys))
+
+
+# ===========================================================================
+# Harmonogram kroków (depends_on + równoległe fazy pobierania)
+# ===========================================================================
+
+
+def _recording_step(calls):
+    class _Step:
+        def __init__(self, session, client, uczelnia=None, **kwargs):
+            self.session = session
+
+        def __call__(self, method="run"):
+            calls.append(method)
+            return {"ok": method}
+
+    return _Step
+
+
+def phase_cfg(klass, result_key, phase, depends_on):
+    return {
+        **step_cfg(klass, name=result_key.split(":")[0], result_key=result_key),
+        "phase": phase,
+        "method": phase,
+        "depends_on": depends_on,
+    }
+
+
+@patch.object(ImportManager, "_run_post_import_commands")
+def test_run_inside_transaction_is_sequential(_post, session):
+    calls = []
+    step = _recording_step(calls)
+    manager = make_manager(session, client=MagicMock())
+    manager.pbn_authorized = True
+    manager.steps = [
+        phase_cfg(step, "a:download", "download", []),
+        phase_cfg(step, "a:process", "process", ["a:download"]),
+        phase_cfg(step, "b:download", "download", []),
+    ]
+
+    result = manager.run()
+
+    # Test biegnie w transakcji — wątki puli by jej nie widziały
+    assert manager._download_executor() is None
+    assert result["success"] is True
+    assert calls == ["download", "process", "download"]
+
+
+@pytest.mark.django_db(transaction=True)
+@patch.object(ImportManager, "_run_post_import_commands")
+def test_downloads_run_in_parallel_before_dependent_process(_post, django_user_model):
+    user = baker.make(django_user_model)
+    session = baker.make(ImportSession, user=user, status="pending", config={})
+    # Oba pobierania muszą trwać jednocześnie, inaczej bariera nie puści
+    barrier = threading.Barrier(2, timeout=10)
+    order = []
+
+    class _Download:
+        def __init__(self, session, client, uczelnia=None, **kwargs):
+            self.session = session
+
+        def __call__(self, method="run"):
+            barrier.wait()
+            order.append("download")
+            return {"ok": True}
+
+    manager = make_manager(
+        session, client=MagicMock(), config={"max_parallel_downloads": 2}
+    )
+    manager.pbn_authorized = True
+    manager.steps = [
+        phase_cfg(_Download, "a:download", "download", []),
+        phase_cfg(_Download, "b:download", "download", []),
+        phase_cfg(
+            _recording_step(order), "a:process", "process", ["a:download", "b:download"]
+        ),
+    ]
+
+    result = manager.run()
+
+    assert result["success"] is True
+    assert order == ["download", "download", "process"]
+    session.refresh_from_db()
+    assert session.status == "completed"
@@ -48,3 +48,32 @@ def test_progress_data_writes_do_not_clobber(django_user_model):
     assert "author_import" in reloaded.progress_data["steps"]
     assert "current_subtask" in reloaded.progress_data, reloaded.progress_data
     assert reloaded.progress_data["current_subtask"]["name"] == "sub"
+
+
+class _OtherStep(ImportStepBase):
+    step_name = "publication_import"
+    step_description = "Other test step"
+
+
+@pytest.mark.django_db
+def test_parallel_steps_keep_each_others_progress(django_user_model):
+    """Steps downloading in parallel threads each hold their own copy of
+    the session; every step's progress_data["steps"] entry must survive
+    the other's updates, and clearing a subtask must not drop them."""
+    user = baker.make(django_user_model)
+    row = baker.make(ImportSession, user=user, progress_data={})
+
+    step_a = _Step(ImportSession.objects.get(pk=row.pk))
+    step_b = _OtherStep(ImportSession.objects.get(pk=row.pk))
+
+    step_a.update_progress(current=1, total=10)
+    step_b.update_progress(current=2, total=4)
+    step_a.update_progress(current=5, total=10, message="processing")
+    step_b.update_subtask_progress(current=1, total=2, desc="sub")
+    step_a.clear_subtask_progress()
+
+    steps = ImportSession.objects.get(pk=row.pk).progress_data["steps"]
+    assert steps["author_import"]["processed"] == 5
+    assert steps["author_import"]["message"] == "processing"
+    assert steps["publication_import"]["processed"] == 2
+    assert "current_subtask" not in ImportSession.objects.get(pk=row.pk).progress_data
@@ -304,3 +304,44 @@ def test_get_form_steps_returns_two_column_rows():
     assert punktacja["process"] is not None
     oplaty = by_name["fee_import"]
     assert oplaty["single"] is not None
+
+
+def test_depends_on_points_to_earlier_phases():
+    defs = get_step_definitions({})
+    seen = set()
+    for d in defs:
+        assert set(d["depends_on"]) <= seen, d["result_key"]
+        seen.add(d["result_key"])
+
+
+def test_downloads_depend_only_on_setup_and_declared_downloads():
+    by_key = {d["result_key"]: d for d in get_step_definitions({})}
+    setup = ["initial_setup", "institution_setup"]
+
+    assert by_key["initial_setup"]["depends_on"] == []
+    assert by_key["institution_setup"]["depends_on"] == ["initial_setup"]
+    for entity in ("source", "publisher", "conference", "author"):
+        assert by_key[f"{entity}_import:download"]["depends_on"] == setup
+    assert by_key["publication_import:download"]["depends_on"] == [
+        *setup,
+        "author_import:download",
+    ]
+    assert "source_import:download" in by_key["source_import:process"]["depends_on"]
+    assert "author_import:process" in by_key["publication_import:process"]["depends_on"]
+
+
+def test_depends_on_bridges_disabled_phases():
+    by_key = {
+        d["result_key"]: d for d in get_step_definitions({"disable_publikacje": True})
+    }
+
+    # Bez publikacji oświadczenia czekają na to, na co czekałyby publikacje
+    assert by_key["statement_import:download"]["depends_on"] == [
+        "initial_setup",
+        "institution_setup",
+        "author_import:download",
+    ]
+    depends_on = by_key["statement_import:process"]["depends_on"]
+    assert "author_import:process" in depends_on
+    assert "source_scoring_import" in depends_on
+    assert not any(k.startswith("publication_import") for k in depends_on)
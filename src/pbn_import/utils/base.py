@@ -39,32 +39,23 @@ class TqdmSessionProgress:
 
         progress = int((current / total) * 100) if total > 0 else 0
 
-        # Re-read progress_data before mutating: this callback holds a
-        # possibly-stale in-memory copy and a full scoped save would clobber
-        # concurrent writers (e.g. the step's progress_data["steps"]).
-        self.session.refresh_from_db(fields=["progress_data"])
-
-        # Update session progress data
-        if "current_subtask" not in self.session.progress_data:
-            self.session.progress_data["current_subtask"] = {}
-
-        self.session.progress_data["current_subtask"] = {
-            "name": self.subtask_name,
-            "description": desc,
-            "current": current,
-            "total": total,
-            "percentage": progress,
-        }
-
-        # Save only the progress_data field to minimize DB load
-        self.session.save(update_fields=["progress_data"])
+        # Atomic update of the current_subtask key only: the step's
+        # progress_data["steps"] may be written concurrently by other threads.
+        self.session.set_progress_data(
+            ["current_subtask"],
+            {
+                "name": self.subtask_name,
+                "description": desc,
+                "current": current,
+                "total": total,
+                "percentage": progress,
+            },
+        )
         self.last_update_time = current_time
 
     def clear(self):
         """Clear subtask progress"""
-        if "current_subtask" in self.session.progress_data:
-            del self.session.progress_data["current_subtask"]
-            self.session.save(update_fields=["progress_data"])
+        self.session.remove_progress_data("current_subtask")
 
 
 def pbar_with_callback(iterator, total, desc, callback=None, check_cancel_func=None):
@@ -133,26 +124,18 @@ class ImportStepBase:
             progress_percent=progress_percent,
         )
 
-        # Re-read progress_data (only) before mutating it: a concurrent
-        # throttled TqdmSessionProgress may have written current_subtask from
-        # its own in-memory copy. Refresh ONLY progress_data so the scalar
-        # fields just persisted by update_progress() above are not discarded.
-        self.session.refresh_from_db(fields=["progress_data"])
-
-        # Store detailed progress in session data
-        if "steps" not in self.session.progress_data:
-            self.session.progress_data["steps"] = {}
-
-        self.session.progress_data["steps"][self.step_name] = {
-            "processed": current,
-            "total": total,
-            "progress": progress_percent,
-            "message": message,
-            "errors": len(self.errors),
-        }
-        # Scope the save to progress_data so we don't clobber concurrent
-        # writers of other (scalar) fields.
-        self.session.save(update_fields=["progress_data"])
+        # Steps run in parallel threads, each with its own copy of the
+        # session: update only this step's key, atomically in the database.
+        self.session.set_progress_data(
+            ["steps", self.step_name],
+            {
+                "processed": current,
+                "total": total,
+                "progress": progress_percent,
+                "message": message,
+                "errors": len(self.errors),
+            },
+        )
 
     def start(self):
         """Called when step starts"""
@@ -217,9 +200,7 @@ class ImportStepBase:
 
     def clear_subtask_progress(self):
         """Clear any subtask progress"""
-        if "current_subtask" in self.session.progress_data:
-            del self.session.progress_data["current_subtask"]
-            self.session.save(update_fields=["progress_data"])
+        self.session.remove_progress_data("current_subtask")
 
     def handle_error(self, error: Exception, context: str = ""):
         """Handle and log an error with full traceback"""
@@ -3,11 +3,12 @@
 import logging
 import sys
 import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Any
 
 import rollbar
 from django.core.management import call_command
-from django.db import transaction
+from django.db import connection, connections, transaction
 from django.utils import timezone
 
 from bpp.util import zaloguj_polkniety_wyjatek
@@ -18,6 +19,9 @@ from .step_definitions import get_step_definitions
 
 logger = logging.getLogger("pbn_import")
 
+# Domyślna liczba faz pobierania z PBN wykonywanych równolegle
+DEFAULT_MAX_PARALLEL_DOWNLOADS = 4
+
 
 class ImportManager:
     """Orchestrates the entire PBN import process"""
@@ -45,6 +49,12 @@ class ImportManager:
         # Define import steps with their order
         self.steps = get_step_definitions(self.config)
 
+        # Fazy pobierania (czas to głównie oczekiwanie na PBN) biegną
+        # równolegle, do tego limitu; 1 — import w pełni sekwencyjny
+        self.max_parallel_downloads = int(
+            self.config.get("max_parallel_downloads") or DEFAULT_MAX_PARALLEL_DOWNLOADS
+        )
+
     def _check_pbn_authorization(self):
         """Check if PBN client is properly authorized"""
         if self.client is None:
@@ -229,12 +239,19 @@ class ImportManager:
         return has_errors, critical_error, tb_string, False, None
 
     def _execute_step(
-        self, idx, step_config, results, has_errors, critical_error, tb_string
+        self,
+        idx,
+        step_config,
+        results,
+        has_errors,
+        critical_error,
+        tb_string,
+        session=None,
     ):
         """Execute a single import step"""
         step_class = step_config["class"]
         step = step_class(
-            session=self.session,
+            session=session or self.session,
             client=self.client,
             uczelnia=self.uczelnia,
             **step_config["args"],
@@ -331,77 +348,189 @@ class ImportManager:
                 "message": "Import zakończony pomyślnie",
             }
 
-    def _run_import_steps(self, results):
-        """Run all import steps and return status"""
-        has_errors = False
-        critical_error = None
-        tb_string = None
-
-        for idx, step_config in enumerate(self.steps):
-            cancel_result = self._check_cancellation(results)
-            if cancel_result:
-                return (
-                    has_errors,
-                    critical_error,
-                    tb_string,
-                    True,
-                    cancel_result,
-                )
+    def _step_prerequisites(self):
+        """Zbiory ``result_key``, na które czeka każdy z ``self.steps``.
 
-            self.session.completed_steps = idx
-            self.session.save()
+        Liczą się tylko kroki obecne w ``self.steps``; krok bez ``depends_on``
+        czeka na wszystkie wcześniejsze (jak przy wykonaniu sekwencyjnym).
+        """
+        keys = {s["result_key"] for s in self.steps}
+        return [
+            (
+                set(step_config["depends_on"]) & keys
+                if "depends_on" in step_config
+                else {s["result_key"] for s in self.steps[:idx]}
+            )
+            for idx, step_config in enumerate(self.steps)
+        ]
 
-            if self._should_skip_step(step_config, results):
-                has_errors = True
-                continue
+    def _download_executor(self):
+        """Pula wątków dla faz pobierania albo None (wszystko w wątku głównym).
 
-            (
-                has_errors,
-                critical_error,
-                tb_string,
-                should_break,
-                cancel_result,
-            ) = self._execute_step(
-                idx, step_config, results, has_errors, critical_error, tb_string
+        Wątki puli mają własne połączenia z bazą — w otwartej transakcji nie
+        widziałyby jej zmian, więc wtedy kroki idą sekwencyjnie.
+        """
+        if self.max_parallel_downloads <= 1 or connection.in_atomic_block:
+            return None
+        if not any(s.get("phase") == "download" for s in self.steps):
+            return None
+        return ThreadPoolExecutor(
+            max_workers=self.max_parallel_downloads, thread_name_prefix="pbn_import"
+        )
+
+    def _next_step(self, pending, prerequisites, done, running, executor):
+        """Następny gotowy krok z ``pending``: ``(idx, step_config, w_puli)``.
+
+        Najpierw fazy pobierania (jeśli pula ma wolne miejsce), potem —
+        w kolejności listy — pozostałe, wykonywane w wątku głównym.
+        """
+        ready = [(idx, s) for idx, s in pending if prerequisites[idx] <= done]
+        if executor is not None and len(running) < self.max_parallel_downloads:
+            for idx, step_config in ready:
+                if step_config.get("phase") == "download":
+                    return idx, step_config, True
+        for idx, step_config in ready:
+            if executor is None or step_config.get("phase") != "download":
+                return idx, step_config, False
+        return None
+
+    def _start_step(self, step_config, results, status):
+        """Kontrole przed startem kroku. Zwraca False, gdy krok nie rusza."""
+        cancel_result = self._check_cancellation(results)
+        if cancel_result:
+            status["cancel_result"] = cancel_result
+            return False
+
+        # Tylko completed_steps: pełny zapis nadpisałby progress_data
+        # zapisywane w tym czasie przez kroki w wątkach puli
+        self.session.completed_steps = len(status["done"])
+        self.session.save(update_fields=["completed_steps"])
+
+        if self._should_skip_step(step_config, results):
+            status["has_errors"] = True
+            status["done"].add(step_config["result_key"])
+            return False
+        return True
+
+    def _execute_step_in_thread(self, idx, step_config, results):
+        """``_execute_step`` w wątku puli.
+
+        Krok dostaje własną kopię sesji — kroki zmieniają
+        ``session.progress_data`` w pamięci — a połączenie z bazą wątku
+        jest zamykane po kroku.
+        """
+        try:
+            session = ImportSession.objects.get(pk=self.session.pk)
+            return self._execute_step(
+                idx, step_config, results, False, None, None, session=session
             )
+        finally:
+            connections.close_all()
+
+    def _finish_step(self, step_config, outcome, status):
+        """Rozlicz wynik ``_execute_step``: błędy, przerwanie, anulowanie."""
+        has_errors, critical_error, tb_string, should_break, cancel_result = outcome
+        status["has_errors"] = status["has_errors"] or has_errors
+        status["critical_error"] = critical_error or status["critical_error"]
+        status["tb_string"] = tb_string or status["tb_string"]
+        status["done"].add(step_config["result_key"])
+
+        if cancel_result:
+            status["cancel_result"] = cancel_result
+            return
+
+        if should_break:
+            status["stop"] = True
+            return
 
-            if cancel_result:
-                return (
-                    has_errors,
-                    critical_error,
-                    tb_string,
-                    True,
-                    cancel_result,
+        # Check for error logs after each step - stop if errors occurred
+        if self._has_error_logs():
+            first_error = (
+                ImportLog.objects.filter(
+                    session=self.session, level__in=["error", "critical"]
+                )
+                .order_by("timestamp")
+                .first()
+            )
+            if first_error:
+                status["critical_error"] = first_error.message
+                status["has_errors"] = True
+                status["stop"] = True
+                logger.warning(
+                    f"Przerywanie importu z powodu błędu w kroku "
+                    f"{step_config['name']}: {first_error.message}"
+                )
+                ImportLog.objects.create(
+                    session=self.session,
+                    level="warning",
+                    step="Import Control",
+                    message=f"Import zatrzymany z powodu błędu: {first_error.message}",
                 )
 
-            if should_break:
-                break
+    def _run_import_steps(self, results):
+        """Run import steps in dependency order and return status.
 
-            # Check for error logs after each step - stop if errors occurred
-            if self._has_error_logs():
-                first_error = (
-                    ImportLog.objects.filter(
-                        session=self.session, level__in=["error", "critical"]
-                    )
-                    .order_by("timestamp")
-                    .first()
+        Fazy pobierania biegną równolegle w puli wątków, najwyżej
+        ``max_parallel_downloads`` naraz; pozostałe fazy — w wątku głównym,
+        po jednej, gdy tylko zakończą się ich ``depends_on``. Po przerwaniu
+        lub anulowaniu nowe kroki nie ruszają, a trwające są dokańczane.
+        """
+        status = {
+            "has_errors": False,
+            "critical_error": None,
+            "tb_string": None,
+            "cancel_result": None,
+            "stop": False,
+            "done": set(),
+        }
+        prerequisites = self._step_prerequisites()
+        pending = list(enumerate(self.steps))
+        running = {}
+        executor = self._download_executor()
+
+        try:
+            while pending or running:
+                for future in [f for f in running if f.done()]:
+                    self._finish_step(running.pop(future), future.result(), status)
+
+                if status["cancel_result"] or status["stop"]:
+                    pending.clear()
+
+                next_step = self._next_step(
+                    pending, prerequisites, status["done"], running, executor
                 )
-                if first_error:
-                    critical_error = first_error.message
-                    has_errors = True
-                    logger.warning(
-                        f"Przerywanie importu z powodu błędu w kroku "
-                        f"{step_config['name']}: {critical_error}"
+                if next_step is None:
+                    if not running:
+                        break
+                    wait(running, return_when=FIRST_COMPLETED)
+                    continue
+
+                idx, step_config, in_pool = next_step
+                pending.remove((idx, step_config))
+                if not self._start_step(step_config, results, status):
+                    continue
+
+                if in_pool:
+                    future = executor.submit(
+                        self._execute_step_in_thread, idx, step_config, results
                     )
-                    ImportLog.objects.create(
-                        session=self.session,
-                        level="warning",
-                        step="Import Control",
-                        message=f"Import zatrzymany z powodu błędu: {critical_error}",
+                    running[future] = step_config
+                else:
+                    outcome = self._execute_step(
+                        idx, step_config, results, False, None, None
                     )
-                    break
-
-        return has_errors, critical_error, tb_string, False, None
+                    self._finish_step(step_config, outcome, status)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return (
+            status["has_errors"],
+            status["critical_error"],
+            status["tb_string"],
+            bool(status["cancel_result"]),
+            status["cancel_result"],
+        )
 
     def run(self):
         """Execute the complete import process"""
@@ -495,7 +624,7 @@ class ImportManager:
         for cmd, description in commands:
             try:
                 self.session.current_step = description
-                self.session.save()
+                self.session.save(update_fields=["current_step"])
 
                 logger.info(f"Uruchamianie komendy: {cmd}")
                 call_command(cmd)
@@ -525,22 +654,22 @@ class ImportManager:
 
         # Uruchom denorm_flush po zacommitowaniu transakcji, aby uniknąć deadlocka
         self.session.current_step = "Odświeżanie denormalizacji"
-        self.session.save()
+        self.session.save(update_fields=["current_step"])
         logger.info("Zaplanowano denorm_flush po zacommitowaniu transakcji")
         transaction.on_commit(lambda: call_command("denorm_flush"))
 
     def pause(self):
         """Pause the import process"""
         self.session.status = "paused"
-        self.session.save()
+        self.session.save(update_fields=["status"])
 
     def resume(self):
         """Resume the import process"""
         self.session.status = "running"
-        self.session.save()
+        self.session.save(update_fields=["status"])
 
     def cancel(self):
         """Cancel the import process"""
         self.session.status = "cancelled"
         self.session.completed_at = timezone.now()
-        self.session.save()
+        self.session.save(update_fields=["status", "completed_at"])
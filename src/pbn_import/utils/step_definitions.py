@@ -51,7 +51,16 @@ def _single(form_field, label, column):
     ]
 
 
+# Kroki konfiguracyjne — poprzedzają wszystkie pozostałe fazy.
+SETUP_STEPS = ("initial_setup", "institution_setup")
+
 # Pojedyncze źródło prawdy o krokach importu.
+#
+# Zależności (po ``result_key``, poza SETUP_STEPS i własną fazą pobierania,
+# dopisywanymi automatycznie): ``download_requires`` dla fazy pobierania,
+# ``requires`` dla fazy przetwarzania/jednofazowej. Zależność może wskazywać
+# tylko krok wcześniejszy na liście — kolejność listy jest zawsze poprawną
+# kolejnością wykonania sekwencyjnego.
 ALL_STEP_DEFINITIONS = [
     {
         "name": "initial_setup",
@@ -90,6 +99,7 @@ ALL_STEP_DEFINITIONS = [
         "phases": _single(
             "punktacja_zrodel", "Synchronizacja punktów i dyscyplin źródeł", "process"
         ),
+        "requires": ["source_import:process"],
     },
     {
         "name": "publisher_import",
@@ -126,6 +136,16 @@ ALL_STEP_DEFINITIONS = [
         "required": False,
         "show_in_form": True,
         "phases": _split("publikacje", "Publikacje"),
+        # Publikacje instytucji dociągają brakujących autorów pojedynczo —
+        # po pobraniu autorów hurtem takich zapytań prawie nie ma
+        "download_requires": ["author_import:download"],
+        "requires": [
+            "source_import:process",
+            "source_scoring_import",
+            "publisher_import:process",
+            "conference_import:process",
+            "author_import:process",
+        ],
     },
     {
         "name": "statement_import",
@@ -135,6 +155,9 @@ ALL_STEP_DEFINITIONS = [
         "required": False,
         "show_in_form": True,
         "phases": _split("oswiadczenia", "Oświadczenia"),
+        # j.w. — oświadczenia dociągają brakujące publikacje i autorów
+        "download_requires": ["publication_import:download"],
+        "requires": ["publication_import:process"],
     },
     {
         "name": "fee_import",
@@ -144,6 +167,7 @@ ALL_STEP_DEFINITIONS = [
         "required": False,
         "show_in_form": True,
         "phases": _single("oplaty", "Import opłat", "both"),
+        "requires": ["publication_import:process"],
     },
 ]
 
@@ -236,19 +260,64 @@ def _get_step_args(step_name, config):
     return {}
 
 
+def _result_key(step, phase):
+    if phase["phase"] == "single":
+        return step["name"]
+    return f"{step['name']}:{phase['phase']}"
+
+
+def _phase_requires(step, phase):
+    """Bezpośrednie zależności fazy (``result_key``), łącznie z wyłączonymi."""
+    if step["name"] in SETUP_STEPS:
+        return list(SETUP_STEPS[: SETUP_STEPS.index(step["name"])])
+    requires = list(SETUP_STEPS)
+    if phase["phase"] == "download":
+        requires += step.get("download_requires", [])
+    else:
+        requires += step.get("requires", [])
+        if phase["phase"] == "process":
+            requires.append(f"{step['name']}:download")
+    return requires
+
+
+def _resolve_depends_on(key, requires, enabled):
+    """Zależności fazy ``key`` ograniczone do faz włączonych.
+
+    Wyłączona faza jest zastępowana jej własnymi zależnościami, więc
+    kolejność między pozostałymi fazami zostaje zachowana.
+    """
+    result = []
+    for req in requires[key]:
+        for dep in (
+            [req] if req in enabled else _resolve_depends_on(req, requires, enabled)
+        ):
+            if dep not in result:
+                result.append(dep)
+    return result
+
+
 def get_step_definitions(config):
-    """Płaska, uporządkowana lista faz do wykonania (po odfiltrowaniu)."""
+    """Płaska, uporządkowana lista faz do wykonania (po odfiltrowaniu).
+
+    Każda faza ma ``depends_on`` — listę ``result_key`` włączonych faz, które
+    muszą się zakończyć przed nią (patrz ``ImportManager``).
+    """
+    requires = {}
+    enabled = set()
+    for step in ALL_STEP_DEFINITIONS:
+        for phase in step["phases"]:
+            key = _result_key(step, phase)
+            requires[key] = _phase_requires(step, phase)
+            if not _phase_disabled(config, phase):
+                enabled.add(key)
+
     result = []
     for step in ALL_STEP_DEFINITIONS:
         for phase in step["phases"]:
             if _phase_disabled(config, phase):
                 continue
             phase_name = phase["phase"]
-            result_key = (
-                step["name"]
-                if phase_name == "single"
-                else f"{step['name']}:{phase_name}"
-            )
+            result_key = _result_key(step, phase)
             result.append(
                 {
                     "name": step["name"],
@@ -259,6 +328,7 @@ def get_step_definitions(config):
                     "required": step["required"],
                     "args": _get_step_args(step["name"], config),
                     "result_key": result_key,
+                    "depends_on": _resolve_depends_on(result_key, requires, enabled),
                 }
             )
     return result
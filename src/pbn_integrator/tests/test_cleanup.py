@@ -0,0 +1,19 @@
+import pytest
+from model_bakery import baker
+
+from pbn_api.models import HistoriaWersji, Institution, Publication, Scientist
+from pbn_integrator.utils.cleanup import clear_all
+
+STARA = {"current": False, "object": {"title": "Stara", "name": "Stara"}}
+BIEZACA = {"current": True, "object": {"title": "Nowa", "name": "Nowa"}}
+
+
+@pytest.mark.django_db
+def test_clear_all_kasuje_historie_wersji_lustra():
+    for model in (Institution, Publication, Scientist):
+        baker.make(model, versions=[STARA, BIEZACA])
+    assert HistoriaWersji.objects.count() == 3
+
+    clear_all()
+
+    assert not HistoriaWersji.objects.exists()
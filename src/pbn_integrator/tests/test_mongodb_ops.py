@@ -378,3 +378,99 @@ class TestZapiszMongodb:
 
         # Clean up
         result.delete()
+
+
+# ============================================================================
+# UNIT TESTS - zapisz_mongodb_wsadowo
+# ============================================================================
+
+
+def _elem(mongo_id, version=1, title="Tytuł"):
+    return {
+        "mongoId": mongo_id,
+        "status": "ACTIVE",
+        "verificationLevel": "HIGH",
+        "verified": True,
+        "versions": [{"version": version, "current": True, "object": {"title": title}}],
+    }
+
+
+@pytest.mark.django_db
+class TestZapiszMongodbWsadowo:
+    """Test zapisz_mongodb_wsadowo (INSERT ... ON CONFLICT)"""
+
+    def test_created_updated_unchanged(self, django_assert_num_queries):
+        from pbn_api.models import Publication
+        from pbn_integrator.utils.mongodb_ops import zapisz_mongodb_wsadowo
+
+        wynik = zapisz_mongodb_wsadowo([_elem("a"), _elem("b")], Publication)
+        assert wynik == {"created": 2, "updated": 0, "unchanged": 0}
+        # Pola z ``pull_up_on_save`` są wypełniane także w ścieżce wsadowej
+        assert Publication.objects.get(pk="a").title == "Tytuł"
+
+        with django_assert_num_queries(1):
+            wynik = zapisz_mongodb_wsadowo(
+                [_elem("a"), _elem("b", version=2, title="Nowy"), _elem("c")],
+                Publication,
+            )
+        assert wynik == {"created": 1, "updated": 1, "unchanged": 1}
+
+        b = Publication.objects.get(pk="b")
+        assert b.title == "Nowy"
+        assert b.versions[0]["version"] == 2
+
+    def test_duplikaty_w_porcji(self):
+        from pbn_api.models import Publication
+        from pbn_integrator.utils.mongodb_ops import zapisz_mongodb_wsadowo
+
+        wynik = zapisz_mongodb_wsadowo([_elem("a"), _elem("a", version=2)], Publication)
+
+        assert wynik == {"created": 1, "updated": 0, "unchanged": 0}
+        assert Publication.objects.get(pk="a").versions[0]["version"] == 2
+
+    def test_extra_wymusza_aktualizacje(self):
+        from pbn_api.models import Scientist
+        from pbn_integrator.utils.mongodb_ops import zapisz_mongodb_wsadowo
+
+        zapisz_mongodb_wsadowo([_elem("s")], Scientist)
+        wynik = zapisz_mongodb_wsadowo(
+            [_elem("s")], Scientist, from_institution_api=True
+        )
+
+        assert wynik["updated"] == 1
+        assert Scientist.objects.get(pk="s").from_institution_api is True
+
+    def test_pusta_porcja(self):
+        from pbn_api.models import Publication
+        from pbn_integrator.utils.mongodb_ops import zapisz_mongodb_wsadowo
+
+        assert zapisz_mongodb_wsadowo([], Publication) == {
+            "created": 0,
+            "updated": 0,
+            "unchanged": 0,
+        }
+
+    def test_threaded_mongodb_saver_zapisuje_strone(self):
+        from pbn_api.models import Institution
+        from pbn_integrator.utils.threaded_page_getter import ThreadedMongoDBSaver
+
+        saver = ThreadedMongoDBSaver(model_class=Institution)
+        saver.data = MagicMock()
+        saver.data.fetch_page.return_value = [_elem("i1"), _elem("i2")]
+
+        wynik = saver.get_single_page(3)
+
+        saver.data.fetch_page.assert_called_once_with(3)
+        assert wynik["created"] == 2
+        assert Institution.objects.count() == 2
+
+    def test_threaded_mongodb_saver_strona_bez_content_to_blad(self):
+        from pbn_api.models import Institution
+        from pbn_integrator.utils.threaded_page_getter import ThreadedMongoDBSaver
+
+        saver = ThreadedMongoDBSaver(model_class=Institution)
+        saver.data = MagicMock()
+        saver.data.fetch_page.return_value = None
+
+        with pytest.raises(ValueError, match="strony 3"):
+            saver.get_single_page(3)
@@ -102,6 +102,7 @@ from pbn_integrator.utils.mongodb_ops import (  # noqa
     ensure_publication_exists,
     pobierz_mongodb,
     zapisz_mongodb,
+    zapisz_mongodb_wsadowo,
     zapisz_oswiadczenie_instytucji,
     zapisz_publikacje_instytucji,
 )
@@ -219,6 +220,7 @@ __all__ = [
     "ensure_publication_exists",
     "pobierz_mongodb",
     "zapisz_mongodb",
+    "zapisz_mongodb_wsadowo",
     "zapisz_oswiadczenie_instytucji",
     "zapisz_publikacje_instytucji",
     # Dictionaries
@@ -16,6 +16,7 @@ from pbn_api.models import (
     Country,
     Discipline,
     DisciplineGroup,
+    HistoriaWersji,
     Institution,
     Journal,
     Language,
@@ -26,6 +27,7 @@ from pbn_api.models import (
     Scientist,
     SentData,
 )
+from pbn_api.models.base import BasePBNMongoDBModel
 from pbn_integrator.utils.constants import MODELE_Z_PBN_UID
 
 
@@ -44,6 +46,9 @@ def clear_publications():
     clear_match_publications()
     for model in [OswiadczenieInstytucji, PublikacjaInstytucji, Publication, SentData]:
         model.objects.all()._raw_delete(MODELE_Z_PBN_UID[0].objects.db)
+    HistoriaWersji.objects.filter(model=Publication._meta.model_name)._raw_delete(
+        HistoriaWersji.objects.db
+    )
 
 
 def clear_all():
@@ -76,3 +81,9 @@ def clear_all():
     ):
         print(f"Deleting all {model}")
         model.objects.all()._raw_delete(model.objects.db)
+        if issubclass(model, BasePBNMongoDBModel):
+            # Historia wersji z poprzedniego lustra nie może się dokleić do
+            # rekordów pobranych ponownie (``wszystkie_wersje``)
+            HistoriaWersji.objects.filter(model=model._meta.model_name)._raw_delete(
+                HistoriaWersji.objects.db
+            )
@@ -11,6 +11,7 @@ from typing import TYPE_CHECKING
 import rollbar
 
 from bpp.models import Rekord
+from import_common.core import matchuj_publikacje_wsadowo
 from pbn_api.models import OswiadczenieInstytucji, Publication
 from pbn_integrator.utils.multiprocessing_utils import (
     _bede_uzywal_bazy_danych_z_multiprocessing_z_django,
@@ -60,13 +61,19 @@ def _integruj_single_part(ids):
     Args:
         ids: List of publication IDs.
     """
+    publikacje = Publication.objects.in_bulk(ids)
     for _id in ids:
-        try:
-            elem = Publication.objects.get(pk=_id)
-        except Publication.DoesNotExist as e:
+        if _id not in publikacje:
             logger.info(f"Brak publikacji o ID {_id}")
-            raise e
-        p = elem.matchuj_do_rekordu_bpp()
+            raise Publication.DoesNotExist(f"Brak publikacji o ID {_id}")
+
+    # Cała porcja dopasowywana naraz -- kilka zapytań na etap matchowania
+    # zamiast kilku zapytań na każdą publikację.
+    elems = [publikacje[_id] for _id in ids]
+    rekordy = matchuj_publikacje_wsadowo(
+        Rekord, [elem.dane_do_matchowania() for elem in elems]
+    )
+    for elem, p in zip(elems, rekordy, strict=True):
         ustaw_pbn_uid_jesli_brak(elem, p)
 
 
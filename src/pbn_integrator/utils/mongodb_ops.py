@@ -7,17 +7,19 @@ import sys
 from typing import TYPE_CHECKING
 
 import rollbar
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 
 from bpp.util import pbar, zaloguj_polkniety_wyjatek
 from pbn_api.exceptions import HttpException
 from pbn_api.models import (
+    HistoriaWersji,
     Institution,
     OswiadczenieInstytucji,
     Publication,
     PublikacjaInstytucji,
     Scientist,
 )
+from pbn_api.models.base import rozdziel_wersje
 
 if TYPE_CHECKING:
     from pbn_api.client import PBNClient
@@ -67,7 +69,9 @@ def zapisz_mongodb(elem, klass, client=None, **extra):
                 setattr(v, key, extra.get(key))
                 needs_saving = True
 
-        if elem["versions"] != v.versions:
+        # W wierszu jest tylko bieżąca wersja (reszta w ``HistoriaWersji``);
+        # nowa wersja w PBN zawsze zmienia też bieżącą
+        if rozdziel_wersje(elem["versions"])[0] != v.versions:
             v.versions = elem["versions"]
             needs_saving = True
 
@@ -77,6 +81,130 @@ def zapisz_mongodb(elem, klass, client=None, **extra):
     return v
 
 
+# Ile rekordów wysyłać w jednym ``INSERT ... ON CONFLICT``.
+ROZMIAR_PORCJI_UPSERT = 1000
+
+
+def _zbuduj_obiekt_mongodb(elem, klass, extra):
+    """Instancja modelu dla ``elem`` — te same pola co w ``zapisz_mongodb``,
+    łącznie z polami wyciąganymi z JSONa (``pull_up_on_save``).
+
+    Zwraca ``(obiekt, historia)``: w obiekcie zostaje bieżąca wersja,
+    ``historia`` to wcześniejsze wersje do ``HistoriaWersji`` (albo ``None``).
+    """
+    versions, historia = rozdziel_wersje(elem["versions"])
+    obj = klass(
+        pk=elem["mongoId"],
+        status=elem["status"],
+        verificationLevel=elem["verificationLevel"],
+        verified=elem["verified"],
+        versions=versions,
+        **extra,
+    )
+    if obj.pull_up_on_save:
+        obj._pull_up_on_save()
+    return obj, historia
+
+
+def _upsert_sql(klass, extra, liczba_wierszy):
+    """``INSERT ... ON CONFLICT (pk) DO UPDATE`` dla ``liczba_wierszy`` wierszy.
+
+    Istniejący wiersz jest aktualizowany tylko wtedy, gdy zmieniły się
+    ``versions`` (lub któreś z pól ``extra``) — tak jak w ``zapisz_mongodb``.
+    ``RETURNING pk, (xmax = 0)`` odróżnia wiersze wstawione od
+    zaktualizowanych; niezmienione nie są zwracane wcale.
+    """
+    qn = connection.ops.quote_name
+    opts = klass._meta
+    fields = opts.concrete_fields
+    pk_column = opts.pk.column
+
+    update_names = {"status", "verificationLevel", "verified", "versions"}
+    update_names.update(klass.pull_up_on_save or ())
+    update_names.update(extra)
+    update_columns = [
+        f.column
+        for f in fields
+        if f.name in update_names or f.name == "last_updated_on"
+    ]
+    compare_columns = [opts.get_field("versions").column] + [
+        opts.get_field(name).column for name in extra
+    ]
+
+    table = qn(opts.db_table)
+    wiersz = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    return (
+        f"INSERT INTO {table} ({', '.join(qn(f.column) for f in fields)}) "
+        f"VALUES {', '.join([wiersz] * liczba_wierszy)} "
+        f"ON CONFLICT ({qn(pk_column)}) DO UPDATE SET "
+        + ", ".join(f"{qn(c)} = EXCLUDED.{qn(c)}" for c in update_columns)
+        + " WHERE "
+        + " OR ".join(
+            f"{table}.{qn(c)} IS DISTINCT FROM EXCLUDED.{qn(c)}"
+            for c in compare_columns
+        )
+        + f" RETURNING {qn(pk_column)}, (xmax = 0)"
+    )
+
+
+def zapisz_mongodb_wsadowo(elems, klass, **extra):
+    """Zapisz porcję elementów PBN jednym ``INSERT ... ON CONFLICT`` na porcję.
+
+    Wsadowy odpowiednik ``zapisz_mongodb`` dla lustrzanych tabel PBN
+    (``Publication``, ``Scientist``, ``Institution``, ``Journal``...): zamiast
+    ``select_for_update`` + ``create``/``save`` per rekord — jedno zapytanie
+    na ``ROZMIAR_PORCJI_UPSERT`` rekordów.
+
+    Args:
+        elems: Elementy z PBN API (np. zawartość strony).
+        klass: Model dziedziczący z ``BasePBNMongoDBModel``.
+        **extra: Dodatkowe pola zapisywane w każdym rekordzie.
+
+    Returns:
+        Słownik z liczbą rekordów ``created``, ``updated``, ``unchanged``.
+    """
+    # Jedno polecenie nie może dotknąć tego samego wiersza dwa razy —
+    # duplikaty w porcji (zdarzają się przy stronicowaniu) zwijamy, wygrywa
+    # ostatni.
+    unikalne = {elem["mongoId"]: elem for elem in elems}
+    wynik = {"created": 0, "updated": 0, "unchanged": 0}
+    if not unikalne:
+        return wynik
+
+    fields = klass._meta.concrete_fields
+    obiekty = []
+    historie = {}
+    for e in unikalne.values():
+        obj, historia = _zbuduj_obiekt_mongodb(e, klass, extra)
+        obiekty.append(obj)
+        if historia is not None:
+            historie[obj.pk] = historia
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(obiekty), ROZMIAR_PORCJI_UPSERT):
+            porcja = obiekty[start : start + ROZMIAR_PORCJI_UPSERT]
+            params = []
+            for obj in porcja:
+                params.extend(
+                    f.get_db_prep_save(f.pre_save(obj, True), connection)
+                    for f in fields
+                )
+            cursor.execute(_upsert_sql(klass, extra, len(porcja)), params)
+            zwrocone = cursor.fetchall()
+            created = sum(1 for (_pk, inserted) in zwrocone if inserted)
+            wynik["created"] += created
+            wynik["updated"] += len(zwrocone) - created
+            wynik["unchanged"] += len(porcja) - len(zwrocone)
+
+            # Historia tylko dla wierszy wstawionych lub zmienionych; pusta
+            # lista usuwa nieaktualną historię
+            zmienione = {pk: historie.get(pk, []) for pk, _ins in zwrocone}
+            if zmienione:
+                HistoriaWersji.objects.zapisz(klass._meta.model_name, zmienione)
+
+    return wynik
+
+
 def ensure_publication_exists(client, publicationId):
     """Ensure a publication exists in the database, fetching from PBN if necessary.
 
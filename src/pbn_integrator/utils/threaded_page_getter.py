@@ -39,6 +39,18 @@ class ThreadedPageGetter:
 
 
 class ThreadedMongoDBSaver(ThreadedPageGetter):
+    def get_single_page(self, n):
+        # Cała strona jednym INSERT ... ON CONFLICT zamiast transakcji
+        # per element.
+        from pbn_integrator.utils import zapisz_mongodb_wsadowo
+
+        strona = self.data.fetch_page(n)
+        if strona is None:
+            # Odpowiedź bez ``content`` to błąd pobierania, nie pusta strona —
+            # inaczej mirror "udałby się" z brakującymi stronami.
+            raise ValueError(f"Odpowiedź PBN dla strony {n} nie zawiera 'content'")
+        return zapisz_mongodb_wsadowo(strona, self.pbn_api_klass)
+
     def process_element(self, elem):
         if not hasattr(self, "zapisz_mongodb"):
             from pbn_integrator.utils import zapisz_mongodb
@@ -12,6 +12,7 @@
 #
 # 4) zadnego progress baru w javie, chociaz nie wiem w sumie
 #
+from collections import defaultdict
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
@@ -20,13 +21,16 @@ from django.db import models, transaction
 from django.urls import reverse
 from liveops.models import LiveOperation
 
-from bpp.core import zbieraj_sloty
+from bpp.core import zbieraj_sloty_wsadowo
 from bpp.fields import YearField
-from bpp.models import Autor, Cache_Punktacja_Autora_Query
+from bpp.models import Autor, Autor_Jednostka, Cache_Punktacja_Autora_Query
 from bpp.models.uczelnia import do_roku_default
-from bpp.util import year_last_month
+from bpp.util import no_threads, year_last_month
 from raport_slotow.core import autorzy_zerowi
 
+# Wiersze raportu zapisywane są przez bulk_create porcjami tej wielkości.
+ROZMIAR_PORCJI_ZAPISU = 1000
+
 
 class RaportSlotowUczelnia(LiveOperation):
     # Kolizja nazw szablonów: class_to_snake("RaportSlotowUczelnia") =
@@ -133,128 +137,165 @@ class RaportSlotowUczelnia(LiveOperation):
         if self.dziel_na_jednostki_i_wydzialy:
             lst += ("jednostka_id",)
 
-        kombinacje = (
-            Cache_Punktacja_Autora_Query.objects.filter(
-                rekord__rok__gte=self.od_roku, rekord__rok__lte=self.do_roku
-            )
-            .values_list(*lst)
-            .distinct()
+        rekordy = Cache_Punktacja_Autora_Query.objects.filter(
+            rekord__rok__gte=self.od_roku, rekord__rok__lte=self.do_roku
         )
 
         if self.uczelnia_id is not None:
-            kombinacje = kombinacje.filter(jednostka__uczelnia_id=self.uczelnia_id)
+            rekordy = rekordy.filter(jednostka__uczelnia_id=self.uczelnia_id)
+
+        kombinacje = rekordy.values_list(*lst).distinct()
 
         total = kombinacje.count()
 
-        for n, res in enumerate(kombinacje):
-            # Reaguj na „Anuluj": p.percent() nie sprawdza cancel_requested
-            # (robi to tylko p.track()), więc bez tego przycisk byłby no-op
-            # mid-run. OperationCancelled leci z bloku atomic w run() →
-            # rollback już-zapisanych wierszy (all-or-nothing).
-            p.check_cancelled()
+        aktualne_jednostki = {}
+        if not self.dziel_na_jednostki_i_wydzialy:
+            # Jedno zapytanie zamiast Autor.objects.get na każdą kombinację.
+            aktualne_jednostki = dict(
+                Autor.objects.filter(
+                    pk__in=rekordy.order_by().values("autor_id")
+                ).values_list("pk", "aktualna_jednostka_id")
+            )
 
-            if self.dziel_na_jednostki_i_wydzialy:
-                autor_id, dyscyplina_id, jednostka_id = res
-            else:
-                autor_id, dyscyplina_id = res
-                jednostka_id = None
+        wiersze = []
 
-            maks_punkty, lista, sloty_sum = zbieraj_sloty(
-                autor_id,
+        # Wyniki przychodzą w kolejności (autor, dyscyplina[, jednostka]) --
+        # jedno strumieniowane zapytanie zamiast zbieraj_sloty per kombinacja,
+        # plecaki liczone porcjami (w puli procesów, o ile to możliwe).
+        for n, (klucz, wynik) in enumerate(
+            zbieraj_sloty_wsadowo(
                 self.slot,
                 self.od_roku,
                 self.do_roku,
                 self.minimalny_pk,
-                dyscyplina_id=dyscyplina_id,
-                jednostka_id=jednostka_id,
-                akcja=self.akcja,
                 uczelnia_id=self.uczelnia_id,
+                dziel_na_jednostki=self.dziel_na_jednostki_i_wydzialy,
+                akcja=self.akcja,
+                procesy=no_threads(),
             )
+        ):
+            # Reaguj na „Anuluj": p.percent() nie sprawdza cancel_requested
+            # (robi to tylko p.track()), więc bez tego przycisk byłby no-op
+            # mid-run. OperationCancelled leci z bloku atomic w run() →
+            # rollback już-zapisanych wierszy (all-or-nothing).
+            p.check_cancelled()
+
+            autor_id, dyscyplina_id, jednostka_id = klucz
+            maks_punkty, lista, sloty_sum = wynik
 
             avg = None
             if sloty_sum != 0:
                 avg = maks_punkty / sloty_sum
 
             if not self.dziel_na_jednostki_i_wydzialy:
-                # Pobieramy ID jednostki dopiero tutaj, bo wcześniej zostaloby użyte
-                # jako parametr funkcji zbieraj_sloty
-                jednostka_id = Autor.objects.get(id=autor_id).aktualna_jednostka_id
-
-            self.raportslotowuczelniawiersz_set.create(
-                autor_id=autor_id,
-                jednostka_id=jednostka_id,
-                dyscyplina_id=dyscyplina_id,
-                slot=sloty_sum,
-                pkd_aut_sum=maks_punkty,
-                avg=avg,
+                jednostka_id = aktualne_jednostki.get(autor_id)
+
+            wiersze.append(
+                RaportSlotowUczelniaWiersz(
+                    parent=self,
+                    autor_id=autor_id,
+                    jednostka_id=jednostka_id,
+                    dyscyplina_id=dyscyplina_id,
+                    slot=sloty_sum,
+                    pkd_aut_sum=maks_punkty,
+                    avg=avg,
+                )
             )
+            if len(wiersze) >= ROZMIAR_PORCJI_ZAPISU:
+                RaportSlotowUczelniaWiersz.objects.bulk_create(wiersze)
+                wiersze = []
 
             if total:
                 # Progress.percent ma wbudowany throttling — nie trzeba %10.
                 p.percent(int(n * 100 / total))
 
+        RaportSlotowUczelniaWiersz.objects.bulk_create(wiersze)
+
         if self.pokazuj_zerowych:
-            zerowi = autorzy_zerowi(
-                od_roku=self.od_roku,
-                do_roku=self.do_roku,
-                min_pk=self.minimalny_pk,
-                uczelnia=self.uczelnia,
-            )
+            self._generuj_zerowych(p)
+
+    def _generuj_zerowych(self, p):
+        zerowi = autorzy_zerowi(
+            od_roku=self.od_roku,
+            do_roku=self.do_roku,
+            min_pk=self.minimalny_pk,
+            uczelnia=self.uczelnia,
+        )
 
-            # --- Początek --- komentarz dot. buga w Django
-            # Z uwagi na bug w django (obecnie 3.0.11) nie mozemy zrobic tutaj
-            # zerowi = zerowi.values_list("autor_id", "dyscyplina_naukowa_id").distinct()
-            # a ja na ten (29. sty 2021) moment nie mam czasu poprawiać Django, zatem uzyjemy
-            # set() aby lokalizować autorów już widzianych
-            # --- Koniec --- komentarza dot. buga w Django
+        # --- Początek --- komentarz dot. buga w Django
+        # Z uwagi na bug w django (obecnie 3.0.11) nie mozemy zrobic tutaj
+        # zerowi = zerowi.values_list("autor_id", "dyscyplina_naukowa_id").distinct()
+        # a ja na ten (29. sty 2021) moment nie mam czasu poprawiać Django, zatem uzyjemy
+        # set() aby lokalizować autorów już widzianych
+        # --- Koniec --- komentarza dot. buga w Django
 
-            # Jeżeli w raporcie jest włączony podział na jednostki i wydziały, to dla każdego autora zerowego
-            # dorzuć rekordy jego jednostek; jeżeli nie - to wrzuć po prostu autorów.
+        # Jeżeli w raporcie jest włączony podział na jednostki i wydziały, to dla każdego autora zerowego
+        # dorzuć rekordy jego jednostek; jeżeli nie - to wrzuć po prostu autorów.
 
-            # Kolejny problem: jezeli autor już istnieje w raporcie jako autor który ma prace,
-            # to nie powinien być wyświetlany jako zerowy (w kontekscie dyscypliny, w której
-            # ma prace).
+        # Kolejny problem: jezeli autor już istnieje w raporcie jako autor który ma prace,
+        # to nie powinien być wyświetlany jako zerowy (w kontekscie dyscypliny, w której
+        # ma prace).
 
-            seen = set()
+        # Dodaj do listy widzianych autorów, którzy już zostali wyemitowani w raporcie dla danych
+        # dyscyplin.
 
-            # Dodaj do listy widzianych autorów, którzy już zostali wyemitowani w raporcie dla danych
-            # dyscyplin.
+        seen = set(
+            self.raportslotowuczelniawiersz_set.values_list(
+                "autor_id", "dyscyplina_id"
+            ).distinct()
+        )
 
-            seen = set(
-                self.raportslotowuczelniawiersz_set.values_list(
-                    "autor_id", "dyscyplina_id"
-                ).distinct()
-            )
+        kandydaci = []
+        for autor_id, _rok, dyscyplina_id in zerowi.values_list():
+            if (autor_id, dyscyplina_id) in seen:
+                continue
 
-            for autor_id, _rok, dyscyplina_id in zerowi.values_list():
-                if (autor_id, dyscyplina_id) in seen:
-                    continue
+            seen.add((autor_id, dyscyplina_id))
+            kandydaci.append((autor_id, dyscyplina_id))
 
-                seen.add((autor_id, dyscyplina_id))
+        p.check_cancelled()
 
-                jednostka_id = Autor.objects.get(
-                    id=autor_id
-                ).aktualna_jednostka_id  # None
+        # Jednostki autorów pobierane jednym zapytaniem (zamiast Autor.objects.get
+        # na każdego autora zerowego).
+        autorzy = {autor_id for autor_id, _dyscyplina_id in kandydaci}
+        aktualne_jednostki = dict(
+            Autor.objects.filter(pk__in=autorzy).values_list(
+                "pk", "aktualna_jednostka_id"
+            )
+        )
 
-                kw = dict(
-                    autor_id=autor_id,
-                    jednostka_id=jednostka_id,
-                    dyscyplina_id=dyscyplina_id,
-                    slot=0,
-                    pkd_aut_sum=0,
-                    avg=None,
+        jednostki_autorow = defaultdict(list)
+        if self.dziel_na_jednostki_i_wydzialy:
+            for autor_id, jednostka_id in (
+                Autor_Jednostka.objects.filter(autor_id__in=autorzy)
+                .values_list("autor_id", "jednostka_id")
+                .distinct()
+            ):
+                jednostki_autorow[autor_id].append(jednostka_id)
+
+        wiersze = []
+        for autor_id, dyscyplina_id in kandydaci:
+            if self.dziel_na_jednostki_i_wydzialy:
+                jednostki = jednostki_autorow[autor_id]
+            else:
+                jednostki = [aktualne_jednostki.get(autor_id)]
+
+            for jednostka_id in jednostki:
+                wiersze.append(
+                    RaportSlotowUczelniaWiersz(
+                        parent=self,
+                        autor_id=autor_id,
+                        jednostka_id=jednostka_id,
+                        dyscyplina_id=dyscyplina_id,
+                        slot=0,
+                        pkd_aut_sum=0,
+                        avg=None,
+                    )
                 )
 
-                if self.dziel_na_jednostki_i_wydzialy:
-                    for (jednostka_id,) in (
-                        Autor.objects.get(pk=autor_id)
-                        .autor_jednostka_set.values_list("jednostka_id")
-                        .distinct()
-                    ):
-                        kw["jednostka_id"] = jednostka_id
-                        self.raportslotowuczelniawiersz_set.create(**kw)
-                else:
-                    self.raportslotowuczelniawiersz_set.create(**kw)
+        RaportSlotowUczelniaWiersz.objects.bulk_create(
+            wiersze, batch_size=ROZMIAR_PORCJI_ZAPISU
+        )
 
     def get_details_set(self):
         return (
@@ -100,3 +100,52 @@ def test_run_respektuje_scoping_uczelni(
     )
     assert uczelnie_w_raporcie <= {jednostka.uczelnia_id}
     assert druga_uczelnia.pk not in uczelnie_w_raporcie
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("dziel", [True, False])
+@pytest.mark.parametrize("minimalny_pk", [None, 0, 1000])
+def test_zbieraj_sloty_wsadowo_zgodne_z_zbieraj_sloty(
+    rekord_slotu, rok, dziel, minimalny_pk
+):
+    """Wsadowy generator daje dla każdej kombinacji to samo, co
+    ``zbieraj_sloty`` wołane osobno -- łącznie z kombinacjami, w których
+    żadna praca nie przekracza ``minimalny_pk`` (wynik zerowy)."""
+    from bpp.core import zbieraj_sloty, zbieraj_sloty_wsadowo
+
+    wyniki = list(
+        zbieraj_sloty_wsadowo(
+            1, rok, rok, minimalny_pk, dziel_na_jednostki=dziel, procesy=1
+        )
+    )
+    assert len(wyniki) == 1
+
+    (autor_id, dyscyplina_id, jednostka_id), wynik = wyniki[0]
+    assert autor_id == rekord_slotu.autor_id
+    assert dyscyplina_id == rekord_slotu.dyscyplina_id
+    assert jednostka_id == (rekord_slotu.jednostka_id if dziel else None)
+
+    assert wynik == zbieraj_sloty(
+        autor_id,
+        1,
+        rok,
+        rok,
+        minimalny_pk,
+        dyscyplina_id=dyscyplina_id,
+        jednostka_id=jednostka_id,
+    )
+
+
+@pytest.mark.django_db
+def test_run_bez_podzialu_na_jednostki_aktualna_jednostka(
+    rekord_slotu, rok, raport_slotow_uczelnia
+):
+    raport_slotow_uczelnia.od_roku = rok
+    raport_slotow_uczelnia.do_roku = rok
+    raport_slotow_uczelnia.dziel_na_jednostki_i_wydzialy = False
+    raport_slotow_uczelnia.save()
+
+    raport_slotow_uczelnia.run(MockProgress(raport_slotow_uczelnia))
+
+    wiersz = RaportSlotowUczelniaWiersz.objects.get()
+    assert wiersz.jednostka_id == rekord_slotu.autor.aktualna_jednostka_id